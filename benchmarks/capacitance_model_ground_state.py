@@ -0,0 +1,75 @@
+"""Benchmark of the per-pixel and batched ground state computations of
+CapacitanceModel, using the double dot of the capacitance model example
+notebook.
+
+Run with ``python benchmarks/capacitance_model_ground_state.py``.
+"""
+import timeit
+
+import numpy as np
+
+from nanotune.model.capacitancemodel import CapacitanceModel
+
+N_STEPS_LOOP = 20
+N_STEPS_BATCH = 100
+
+
+def make_double_dot() -> CapacitanceModel:
+    qdot = CapacitanceModel(
+        "qdot",
+        charge_nodes={0: "A", 1: "B"},
+        voltage_nodes={
+            0: "top_barrier",
+            1: "left_barrier",
+            2: "left_plunger",
+            3: "central_barrier",
+            4: "right_plunger",
+            5: "right_barrier",
+        },
+    )
+    qdot.V_v([-1, -1, -0.5, -1, -0.1, -1])
+    qdot.C_cc([[-2]])
+    qdot.C_cv([
+        [-0.6, -0.6, -0.5, -0.5, -0.1, -0.1],
+        [-0.5, -0.3, -0.2, -0.8, -0.5, -0.9],
+    ])
+    return qdot
+
+
+def voltage_grid(qdot: CapacitanceModel, n_steps: int) -> np.ndarray:
+    sweep_ranges = qdot.determine_sweep_voltages(
+        [2, 4], N_limits=[(0, 3), (0, 3)],
+    )
+    return qdot._get_voltage_grid(
+        [2, 4], [np.linspace(*v_range, n_steps) for v_range in sweep_ranges],
+    )
+
+
+def main() -> None:
+    qdot = make_double_dot()
+    try:
+        loop_points = voltage_grid(qdot, N_STEPS_LOOP)
+        batch_points = voltage_grid(qdot, N_STEPS_BATCH)
+
+        t_loop = timeit.timeit(
+            lambda: [qdot.determine_N(V_v=V_v) for V_v in loop_points],
+            number=1,
+        )
+        t_batch = min(timeit.repeat(
+            lambda: qdot.determine_N_batch(batch_points), number=1, repeat=5,
+        ))
+        per_pixel_loop = t_loop / len(loop_points)
+        per_pixel_batch = t_batch / len(batch_points)
+
+        print(f"determine_N, {N_STEPS_LOOP}x{N_STEPS_LOOP}: {t_loop:.3f} s")
+        print(
+            f"determine_N_batch, {N_STEPS_BATCH}x{N_STEPS_BATCH}: "
+            f"{t_batch:.4f} s"
+        )
+        print(f"speedup per pixel: {per_pixel_loop / per_pixel_batch:.0f}x")
+    finally:
+        qdot.close()
+
+
+if __name__ == "__main__":
+    main()
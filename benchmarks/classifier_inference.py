@@ -0,0 +1,76 @@
+"""Benchmark of the generic and fused inference paths of Classifier, using a
+double dot classifier trained on random data of the standard 2D shape.
+
+Run with ``python benchmarks/classifier_inference.py``.
+"""
+import os
+import tempfile
+import timeit
+
+import numpy as np
+
+import nanotune as nt
+from nanotune.classification.classifier import Classifier
+from nanotune.data.export_data import export_label
+
+N_TRAIN = 400
+N_BATCH = 256
+CLASSIFIER_TYPES = ["LogisticRegression", "LinearSVC", "SVC"]
+
+
+def make_data(n_samples: int, rng: np.random.Generator) -> np.ndarray:
+    len_2d = np.prod(nt.config["core"]["standard_shapes"]["2"])
+    data = rng.uniform(
+        size=(len(nt.config["core"]["data_types"]), n_samples, len_2d + 1)
+    )
+    labels = [export_label(["doubledot"], q, "dotregime") for q in [0, 1]]
+    data[:, :, -1] = np.tile(labels, n_samples // 2)
+    return data
+
+
+def generic_predict(clf: Classifier, condensed_data: np.ndarray) -> np.ndarray:
+    relevant_data = clf.get_relevant_data(condensed_data)
+    _, relevant_data = clf.prep_data(test_data=relevant_data)
+    return clf.clf.predict(relevant_data)
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    condensed_data = make_data(N_BATCH, rng)[:, :, :-1]
+    single = condensed_data[:, :1]
+
+    with tempfile.TemporaryDirectory() as folder:
+        np.save(os.path.join(folder, "dots.npy"), make_data(N_TRAIN, rng))
+        for classifier_type in CLASSIFIER_TYPES:
+            clf = Classifier(
+                ["dots.npy"],
+                "doubledot",
+                folder_path=folder,
+                classifier_type=classifier_type,
+            )
+            clf.train()
+            assert np.array_equal(
+                generic_predict(clf, condensed_data),
+                clf.predict_condensed_data(condensed_data),
+            )
+
+            print(f"{classifier_type}:")
+            for label, data in [("1 sample", single),
+                                (f"{N_BATCH} samples", condensed_data)]:
+                t_generic = min(timeit.repeat(
+                    lambda: generic_predict(clf, data), number=20, repeat=5,
+                )) / 20
+                t_fused = min(timeit.repeat(
+                    lambda: clf.predict_condensed_data(data),
+                    number=20,
+                    repeat=5,
+                )) / 20
+                print(
+                    f"  {label}: generic {1e6 * t_generic:.0f} us, "
+                    f"fused {1e6 * t_fused:.0f} us, "
+                    f"speedup {t_generic / t_fused:.1f}x"
+                )
+
+
+if __name__ == "__main__":
+    main()
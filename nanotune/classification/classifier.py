@@ -1,12 +1,19 @@
+import copy
+import hashlib
+import itertools
 import json
 import logging
 import os
+import pickle
 import time
-from typing import Any, Dict, List, Optional, Tuple, Union
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import (Any, Dict, Iterator, List, Optional, Sequence, Tuple,
+                    Union)
 import numpy.typing as npt
 import numpy as np
 
 from sklearn import svm
+from sklearn.base import clone
 from sklearn.decomposition import PCA
 from sklearn.discriminant_analysis import QuadraticDiscriminantAnalysis
 from sklearn.ensemble import AdaBoostClassifier, RandomForestClassifier
@@ -23,11 +30,26 @@ from sklearn.tree import DecisionTreeClassifier
 
 import nanotune as nt
 from nanotune.data.dataset import Dataset
-from nanotune.data.export_data import prep_data
+from nanotune.data.dataset_cache import dataset_cache
+from nanotune.classification.inference import FusedInference
+from nanotune.data.export_data import condense_dataset, condense_signal
+from nanotune.model.noise import augmented_batches
 
 logger = logging.getLogger(__name__)
 ALLOWED_CATEGORIES = list(dict(nt.config["core"]["features"]).keys())
 DOT_LABEL_MAPPING = dict(nt.config["core"]["dot_mapping"])
+FILL_VALUE = nt.config["core"]["fill_value"][0]
+DEFAULT_CHUNK_SIZE = 1024
+ARTIFACT_FORMAT_VERSION = 1
+# attributes saved with a trained classifier, all of which are set in __init__
+# or when fitting
+ARTIFACT_ATTRIBUTES = (
+    "category", "_feature_indexes", "_relevant_labels", "file_fractions",
+    "hyper_parameters", "folder_path", "file_paths", "name",
+    "classifier_type", "retained_variance", "data_types", "test_size",
+    "dtype", "clf",
+)
+FITTED_ATTRIBUTES = ("raw_scaler", "pca", "compressed_scaler")
 
 RELEVANT_FEATURE_INDEXES: Dict[str, List[int]] = {
     "pinchoff": [1, 2, 3, 4],
@@ -39,6 +61,7 @@ RELEVANT_FEATURE_INDEXES: Dict[str, List[int]] = {
 
 DEFAULT_CLF_PARAMETERS: Dict[str, Any] = {
     "SVC": {"kernel": "linear", "probability": True, "gamma": "auto"},
+    "LinearSVC": {},
     "LogisticRegression": {"solver": "newton-cg", "max_iter": 3000},
     "MLPClassifier": {"max_iter": 3000},
     "GaussianProcessClassifier": {},
@@ -50,6 +73,20 @@ DEFAULT_CLF_PARAMETERS: Dict[str, Any] = {
     "KNeighborsClassifier": {"n_neighbors": 2},
 }
 
+CLASSIFIER_CLASSES: Dict[str, Any] = {
+    "SVC": svm.SVC,
+    "LinearSVC": svm.LinearSVC,
+    "LogisticRegression": LogisticRegression,
+    "MLPClassifier": MLPClassifier,
+    "GaussianProcessClassifier": GaussianProcessClassifier,
+    "DecisionTreeClassifier": DecisionTreeClassifier,
+    "RandomForestClassifier": RandomForestClassifier,
+    "AdaBoostClassifier": AdaBoostClassifier,
+    "GaussianNB": GaussianNB,
+    "QuadraticDiscriminantAnalysis": QuadraticDiscriminantAnalysis,
+    "KNeighborsClassifier": KNeighborsClassifier,
+}
+
 METRIC_NAMES = ["accuracy_score", "brier_score_loss", "auc", "average_precision_recall"]
 
 DEFAULT_DATA_FILES = {
@@ -98,6 +135,13 @@ class Classifier:
         clf: instance of a scikit-learn binary classifier.
         original_data: all data loaded.
         labels: labels of original data.
+        dtype: floating point type data is loaded as, e.g. np.float32 to
+            halve the memory required.
+        training_checksums: checksums of the numpy data files a classifier
+            loaded with `load` was trained on, empty otherwise.
+        fused_inference: fitted preprocessing and classifier folded into a
+            `FusedInference`, used by `predict_condensed_data`. Compiled when
+            the classifier is trained or loaded, reset when stages are refit.
     """
     def __init__(
         self,
@@ -110,6 +154,7 @@ class Classifier:
         hyper_parameters: Optional[Dict[str, Union[str, float, int]]] = None,
         retained_variance: float = 0.99,
         file_fractions: Optional[List[float]] = None,
+        dtype: npt.DTypeLike = np.float64,
     ) -> None:
 
         if folder_path is None:
@@ -146,7 +191,7 @@ class Classifier:
         if classifier_type is None:
             default_params = {}
         else:
-            default_params = DEFAULT_CLF_PARAMETERS[classifier_type]
+            default_params = dict(DEFAULT_CLF_PARAMETERS[classifier_type])
         default_params.update(hyper_parameters)
         self.hyper_parameters = default_params
 
@@ -162,29 +207,14 @@ class Classifier:
 
         self.data_types = data_types
         self.test_size = test_size
+        self.dtype = np.dtype(dtype)
+        self.fused_inference: Optional[FusedInference] = None
+        self.training_checksums: Dict[str, str] = {}
 
-        if classifier_type == "SVC":
-            self.clf = svm.SVC(**self.hyper_parameters)
-        elif classifier_type == "LogisticRegression":
-            self.clf = LogisticRegression(**self.hyper_parameters)
-        elif classifier_type == "LinearSVC":
-            self.clf = svm.LinearSVC(**self.hyper_parameters)
-        elif classifier_type == "MLPClassifier":
-            self.clf = MLPClassifier(**self.hyper_parameters)
-        elif classifier_type == "GaussianProcessClassifier":
-            self.clf = GaussianProcessClassifier(**self.hyper_parameters)
-        elif classifier_type == "DecisionTreeClassifier":
-            self.clf = DecisionTreeClassifier(**self.hyper_parameters)
-        elif classifier_type == "RandomForestClassifier":
-            self.clf = RandomForestClassifier(**self.hyper_parameters)
-        elif classifier_type == "AdaBoostClassifier":
-            self.clf = AdaBoostClassifier(**self.hyper_parameters)
-        elif classifier_type == "GaussianNB":
-            self.clf = GaussianNB(**self.hyper_parameters)
-        elif classifier_type == "QuadraticDiscriminantAnalysis":
-            self.clf = QuadraticDiscriminantAnalysis(**self.hyper_parameters)
-        elif classifier_type == "KNeighborsClassifier":
-            self.clf = KNeighborsClassifier(**self.hyper_parameters)
+        if classifier_type in CLASSIFIER_CLASSES:
+            self.clf = CLASSIFIER_CLASSES[classifier_type](
+                **self.hyper_parameters
+            )
         else:
             self.clf = None
 
@@ -197,8 +227,13 @@ class Classifier:
         file_paths: List[str],
         data_types: List[str],
         file_fractions: Optional[List[float]] = [1.0],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
     ) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.int64]]:
         """Loads data including labels from numpy files.
+        Files are memory-mapped and only the requested data types of datasets
+        with relevant labels are read, 'chunk_size' datasets at a time. They
+        are written into a single array of the classifier's `dtype`, ordered
+        by label as in `select_relevant_data`.
 
         Args:
             file_paths: list of paths of numpy data files.
@@ -208,76 +243,197 @@ class Classifier:
             a value less than 1, data is chosen at random. It can be used to
             calculate accuracy variation when different random sub-sets of
             avaliable data are used for training data.
+            chunk_size: number of datasets read at a time.
 
         Returns:
             np.array: data
             np.array: labels
         """
-        DATA_TYPE_MAPPING = dict(nt.config["core"]["data_types"])
+        files, selections, labels = self._select_datasets(
+            file_paths, file_fractions,
+        )
+        columns = self._relevant_columns(files, selections, data_types)
+        n_columns = sum(len(cols) for _, cols in columns)
+
+        all_labels = np.concatenate(labels)
+        relevant_labels = np.searchsorted(self._relevant_labels, all_labels)
+        order = np.argsort(relevant_labels, kind="stable")
+        destination = np.empty(len(order), dtype=int)
+        destination[order] = np.arange(len(order))
+
+        relevant_data = np.empty((len(order), n_columns), dtype=self.dtype)
+        offset = 0
+        for data, rows in zip(files, selections):
+            for start in range(0, len(rows), chunk_size):
+                chunk = rows[start:start + chunk_size]
+                relevant_data[destination[offset:offset + len(chunk)]] = (
+                    self._read_rows(data, chunk, columns)
+                )
+                offset += len(chunk)
+        relevant_labels = relevant_labels[order]
+
+        # remove NaNs in data
+        mask = np.isfinite(relevant_data).any(axis=-1)
+        if not np.all(mask):
+            relevant_data = relevant_data[mask]
+            relevant_labels = relevant_labels[mask]
+
+        return relevant_data, relevant_labels
+
+    def iter_data(
+        self,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        file_paths: Optional[List[str]] = None,
+        data_types: Optional[List[str]] = None,
+    ) -> Iterator[Tuple[npt.NDArray[np.float64], npt.NDArray[np.int64]]]:
+        """Iterates over data in numpy files in chunks, without loading all
+        of it into memory. Datasets are yielded in the order they appear in
+        the files, with labels mapped in the same way as by `load_data`.
 
-        len_2d = np.prod(nt.config["core"]["standard_shapes"]["2"]) + 1
-        all_the_stuff = np.empty([len(DATA_TYPE_MAPPING), 0, len_2d])
-        try:
-            for ip in range(len(file_paths)):
-                sub_data = np.array(
-                    np.load(file_paths[ip], allow_pickle=True),
-                    dtype=np.float64
+        Args:
+            chunk_size: number of datasets read at a time.
+            file_paths: list of paths of numpy data files. Default are the
+                classifier's `file_paths`.
+            data_types: data types, one or more of: 'signal', 'gradient',
+                'frequencies', 'features'. Default are the classifier's
+                `data_types`.
+
+        Yields:
+            np.array: chunk of data
+            np.array: labels of chunk
+        """
+        if file_paths is None:
+            file_paths = self.file_paths
+        if data_types is None:
+            data_types = self.data_types
+
+        files, selections, labels = self._select_datasets(file_paths)
+        columns = self._relevant_columns(files, selections, data_types)
+        for data, rows, file_labels in zip(files, selections, labels):
+            label_indices = np.searchsorted(self._relevant_labels, file_labels)
+            for start in range(0, len(rows), chunk_size):
+                chunk_data = self._read_rows(
+                    data, rows[start:start + chunk_size], columns,
+                )
+                chunk_labels = label_indices[start:start + chunk_size]
+                mask = np.isfinite(chunk_data).any(axis=-1)
+                if np.any(mask):
+                    yield chunk_data[mask], chunk_labels[mask]
+
+    def _select_datasets(
+        self,
+        file_paths: List[str],
+        file_fractions: Optional[List[float]] = None,
+    ) -> Tuple[List[npt.NDArray[np.float64]], List[npt.NDArray[np.int64]],
+            List[npt.NDArray[np.float64]]]:
+        """Memory-maps numpy data files and selects datasets to use, i.e.
+        a random subset of 'file_fractions' of each file with relevant
+        labels.
+
+        Returns:
+            list: memory-mapped data of each file.
+            list: indices of selected datasets of each file.
+            list: labels of selected datasets of each file.
+        """
+        files: List[npt.NDArray[np.float64]] = []
+        selections: List[npt.NDArray[np.int64]] = []
+        labels: List[npt.NDArray[np.float64]] = []
+        for ip, file_path in enumerate(file_paths):
+            try:
+                data = np.load(file_path, mmap_mode="r")
+            except ValueError:
+                # arrays of Python objects can not be memory-mapped
+                data = np.array(
+                    np.load(file_path, allow_pickle=True), dtype=np.float64
                 )
-                frac = file_fractions[ip]  # type: ignore
-                n_samples = int(round(sub_data.shape[1] * frac))
-                select = np.random.choice(sub_data.shape[1], n_samples, replace=False)
-                sub_data = sub_data[:, select, :]
-
-                all_the_stuff = np.concatenate([all_the_stuff, sub_data], axis=1)
-        except ValueError:
-            len_1d = np.prod(nt.config["core"]["standard_shapes"]["1"]) + 1
-            all_the_stuff = np.empty([len(DATA_TYPE_MAPPING), 0, len_1d])
-            for ip in range(len(file_paths)):
-                sub_data = np.array(
-                    np.load(file_paths[ip], allow_pickle=True), dtype=np.float64
+            if files and data.shape[-1] != files[0].shape[-1]:
+                logger.error(
+                    f"Data in {file_path} is of a different shape than "
+                    + f"data in {file_paths[0]}."
                 )
-                frac = file_fractions[ip]  # type: ignore
-                n_samples = int(round(sub_data.shape[1] * frac))
-                select = np.random.choice(sub_data.shape[1], n_samples, replace=False)
-                sub_data = sub_data[:, select, :]
-                all_the_stuff = np.concatenate([all_the_stuff, sub_data], axis=1)
+                raise ValueError
+
+            rows = np.arange(data.shape[1])
+            if file_fractions is not None:
+                frac = file_fractions[ip]
+                n_samples = int(round(data.shape[1] * frac))
+                rows = np.random.choice(
+                    data.shape[1], n_samples, replace=False,
+                )
+            file_labels = np.asarray(data[0, :, -1], dtype=np.float64)[rows]
+            relevant = np.isin(file_labels, self._relevant_labels)
 
-        labels = all_the_stuff[0, :, -1]
-        data = all_the_stuff[:, :, :-1]
+            files.append(data)
+            selections.append(rows[relevant])
+            labels.append(file_labels[relevant])
 
-        relevant_data = np.empty((data.shape[1], 0))
-        for data_type in data_types:
-            to_append = data[DATA_TYPE_MAPPING[data_type]]
+        return files, selections, labels
 
-            if data_type == "features":
-                to_append[to_append == nt.config["core"]["fill_value"]] = np.nan
-                to_append = to_append[:, np.isfinite(to_append).any(axis=0)]
+    def _relevant_columns(
+        self,
+        files: List[npt.NDArray[np.float64]],
+        selections: List[npt.NDArray[np.int64]],
+        data_types: List[str],
+    ) -> List[Tuple[int, npt.NDArray[np.int64]]]:
+        """Determines which columns of which data type to use. For features,
+        only those found in some of the selected datasets are considered,
+        out of which those given by `RELEVANT_FEATURE_INDEXES` are used.
+
+        Returns:
+            list: tuples of data type index and column indices.
+        """
+        data_type_mapping = dict(nt.config["core"]["data_types"])
+        n_points = files[0].shape[-1] - 1 if files else 0
 
+        columns = []
+        for data_type in data_types:
+            data_type_idx = data_type_mapping[data_type]
+            type_columns = np.arange(n_points)
+            if data_type == "features":
+                found = np.zeros(n_points, dtype=bool)
+                for data, rows in zip(files, selections):
+                    for start in range(0, len(rows), DEFAULT_CHUNK_SIZE):
+                        chunk = rows[start:start + DEFAULT_CHUNK_SIZE]
+                        features = np.asarray(data[data_type_idx][chunk])
+                        features = features[:, :-1]
+                        found |= np.isfinite(
+                            np.where(features == FILL_VALUE, np.nan, features)
+                        ).any(axis=0)
+                type_columns = type_columns[found]
                 try:
-                    to_append = to_append[:, self._feature_indexes]
+                    type_columns = type_columns[self._feature_indexes]
                 except IndexError:
                     logger.warning(
-                        "Some data in {} ".format(file_paths)
+                        "Some data in {} ".format(self.file_paths)
                         + "does not have the"
                         + "feature requested. Make sure all data "
                         + "has been fitted with appropriate"
                         + " fit classes."
                     )
+            columns.append((data_type_idx, type_columns))
 
-            relevant_data = np.append(relevant_data, to_append, axis=1)
-
-        # remove NaNs in labels
-        mask = ~np.isnan(labels)
-        relevant_data = relevant_data[mask, :]
-        labels = labels[mask]
-        # remove NaNs in data
-        mask = np.isfinite(relevant_data).any(axis=-1)
-        relevant_data = relevant_data[mask]
-        labels = labels[mask].astype(int)
-
-        relevant_data, labels = self.select_relevant_data(relevant_data, labels)
+        return columns
 
-        return relevant_data, labels
+    def _read_rows(
+        self,
+        data: npt.NDArray[np.float64],
+        rows: npt.NDArray[np.int64],
+        columns: List[Tuple[int, npt.NDArray[np.int64]]],
+    ) -> npt.NDArray[np.float64]:
+        """Reads relevant columns of datasets 'rows' and casts them to the
+        classifier's `dtype`, replacing fill values by NaNs.
+        """
+        chunk = np.empty(
+            (len(rows), sum(len(cols) for _, cols in columns)),
+            dtype=self.dtype,
+        )
+        start = 0
+        for data_type_idx, cols in columns:
+            to_append = np.asarray(data[data_type_idx][rows])[:, cols]
+            to_append = np.where(to_append == FILL_VALUE, np.nan, to_append)
+            chunk[:, start:start + len(cols)] = to_append
+            start += len(cols)
+        return chunk
 
     def select_relevant_data(
         self,
@@ -292,20 +448,131 @@ class Classifier:
             data: original data
             label: original labels
         """
-        shape = data.shape
-        relevant_data = np.empty((0, shape[1]))
-        relevant_labels = np.empty([0])
-
-        for il, label in enumerate(self._relevant_labels):
-            relevant_indx = np.where(labels == label)[0]
-            relevant_data = np.concatenate(
-                [relevant_data, data[relevant_indx, :]], axis=0
+        relevant_indx = np.concatenate(
+            [np.where(labels == label)[0] for label in self._relevant_labels]
+        )
+        relevant_labels = np.searchsorted(
+            self._relevant_labels, labels[relevant_indx],
+        )
+
+        return data[relevant_indx], relevant_labels
+
+    def iter_augmented_data(
+        self,
+        batch_size: int = DEFAULT_CHUNK_SIZE,
+        n_batches: Optional[int] = None,
+        seed: Optional[int] = None,
+        **augmentation: Any,
+    ) -> Iterator[Tuple[npt.NDArray[np.float64], npt.NDArray[np.int64]]]:
+        """Iterates over batches of the classifier's signals, drawn at random
+        and augmented on the fly using `augmented_batches`. Signals and
+        frequencies are arranged according to the classifier's
+        `data_types`, other data types can not be augmented.
+
+        Args:
+            batch_size: number of datasets per batch.
+            n_batches: number of batches to yield. Batches are yielded
+                indefinitely if None.
+            seed: seed of the random number generator.
+            augmentation: keyword arguments of `augmented_batches`, e.g.
+                'noise_types', 'max_strength' and 'charge_shift_probability'.
+
+        Yields:
+            np.array: batch of augmented data
+            np.array: labels of batch
+        """
+        unsupported = set(self.data_types) - {"signal", "frequencies"}
+        if unsupported:
+            logger.error(
+                f"Unable to augment {', '.join(sorted(unsupported))}. Only "
+                + "signal and frequencies are supported."
             )
-            relevant_labels = np.concatenate(
-                [relevant_labels, np.ones(len(relevant_indx)) * il], axis=0
+            raise ValueError
+
+        n_points = int(np.prod(nt.config["core"]["standard_shapes"]["2"]))
+        if self.data_types[0] == "signal":
+            signal = self.original_data[:, :n_points]
+            labels = self.labels
+        else:
+            signal, labels = self.load_data(
+                self.file_paths, ["signal"], file_fractions=self.file_fractions,
             )
+        if signal.shape[-1] != n_points:
+            logger.error("Only 2D data can be augmented.")
+            raise ValueError
 
-        return relevant_data, relevant_labels
+        batches = augmented_batches(
+            signal,
+            labels,
+            batch_size=batch_size,
+            n_batches=n_batches,
+            seed=seed,
+            **augmentation,
+        )
+        for batch_signal, batch_frequencies, batch_labels in batches:
+            data = {"signal": batch_signal, "frequencies": batch_frequencies}
+            yield (
+                np.concatenate(
+                    [data[data_type] for data_type in self.data_types], axis=1,
+                ).astype(self.dtype),
+                batch_labels,
+            )
+
+    def train_incrementally(
+        self,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        n_epochs: int = 1,
+        augmentation: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Trains binary classifiers supporting `partial_fit`, such as
+        `MLPClassifier` or `GaussianNB`, on data streamed from the numpy data
+        files using `iter_data`. Data is scaled in the same way as in
+        `train`, but populations are not balanced.
+
+        Args:
+            chunk_size: number of datasets used in each call to
+                `partial_fit`.
+            n_epochs: number of passes over all data.
+            augmentation: if given, the classifier is trained on augmented
+                batches of 'chunk_size' datasets yielded by
+                `iter_augmented_data`, called with these keyword arguments.
+                'n_batches' is required and is the number of batches per
+                epoch. The scaler is fitted on the original data.
+        """
+        if not hasattr(self.clf, "partial_fit"):
+            logger.error(
+                f"{self.classifier_type} does not support incremental "
+                + "training."
+            )
+            raise ValueError
+
+        self.raw_scaler = StandardScaler()
+        self.fused_inference = None
+        for data, _ in self.iter_data(chunk_size):
+            self.raw_scaler.partial_fit(data)
+
+        augmented_data = None
+        if augmentation is not None:
+            augmentation = dict(augmentation)
+            n_batches = augmentation.pop("n_batches", None)
+            if n_batches is None:
+                logger.error("Specify the number of augmented batches.")
+                raise ValueError
+            augmented_data = self.iter_augmented_data(
+                batch_size=chunk_size, **augmentation,
+            )
+
+        classes = np.arange(len(self._relevant_labels))
+        for _ in range(n_epochs):
+            if augmented_data is None:
+                batches = self.iter_data(chunk_size)
+            else:
+                batches = itertools.islice(augmented_data, n_batches)
+            for data, labels in batches:
+                self.clf.partial_fit(
+                    self.raw_scaler.transform(data), labels, classes=classes,
+                )
+        self.compile_inference()
 
     def train(
         self,
@@ -328,6 +595,42 @@ class Classifier:
 
         X_train, _ = self.prep_data(train_data=data_to_use)
         self.clf.fit(X_train, labels_to_use)
+        self.compile_inference()
+
+    def compile_inference(
+        self,
+        perform_pca: Optional[bool] = False,
+        scale_pc: Optional[bool] = False,
+    ) -> None:
+        """Folds the fitted stages of `prep_data` and, for linear
+        classifiers, the classifier itself into a `FusedInference`, which
+        `predict_condensed_data` uses from then on. Called by `train`,
+        `train_incrementally` and `load` with the stages `prep_data` applies
+        by default.
+
+        Args:
+            perform_pca: whether principal components are used for
+                prediction.
+            scale_pc: whether scaled principal components are used for
+                prediction.
+        """
+        if not hasattr(self, "raw_scaler"):
+            logger.error("Scale train data before compiling inference.")
+            raise AttributeError
+        if perform_pca and not hasattr(self, "pca"):
+            logger.error("Compress train data before compiling inference.")
+            raise AttributeError
+        if scale_pc and not hasattr(self, "compressed_scaler"):
+            logger.error(
+                "Scale principal components before compiling inference.")
+            raise AttributeError
+
+        self.fused_inference = FusedInference(
+            self.clf,
+            self.raw_scaler,
+            pca=self.pca if perform_pca else None,
+            compressed_scaler=self.compressed_scaler if scale_pc else None,
+        )
 
     def prep_data(
         self,
@@ -372,6 +675,7 @@ class Classifier:
         self,
         data: npt.NDArray[np.float64],
         labels: npt.NDArray[np.int64],
+        rng: Optional[np.random.Generator] = None,
     ) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.int64]]:
         """Selects a subset of data at random so that each population/label
         appears equally often. Makes for a balanced dataset.
@@ -379,23 +683,28 @@ class Classifier:
         Args:
             data: the data to subsample and balance
             labels: labels corresponding to `data`.
+            rng: random number generator to draw from. Default is numpy's
+                global random state.
         """
+        random_state: Any = np.random if rng is None else rng
         populations_labels, population_counts = np.unique(labels, return_counts=True)
 
         n_each = int(np.min(population_counts))
-        new_data = np.empty([n_each * len(populations_labels), data.shape[-1]])
+        new_data = np.empty(
+            [n_each * len(populations_labels), data.shape[-1]], dtype=data.dtype
+        )
         new_labels = np.empty(n_each * len(populations_labels), int)
 
         for ii, label in enumerate(populations_labels):
             idx = np.where(labels == int(label))
-            idx = np.random.choice(idx[0], n_each, replace=False)
+            idx = random_state.choice(idx[0], n_each, replace=False)
             idx = idx.astype(int)
             dat = data[idx]
             new_data[ii * n_each : (ii + 1) * n_each] = dat
             label_array = np.ones(n_each, dtype=int) * int(label)
             new_labels[ii * n_each : (ii + 1) * n_each] = label_array
 
-        p = np.random.permutation(len(new_labels))
+        p = random_state.permutation(len(new_labels))
 
         return new_data[p], new_labels[p]
 
@@ -443,6 +752,7 @@ class Classifier:
             np.array: scaled test data
         """
         if train_data is not None:
+            self.fused_inference = None
             self.raw_scaler = StandardScaler()
             self.raw_scaler.fit(train_data)
             train_data = self.raw_scaler.transform(train_data)
@@ -477,6 +787,7 @@ class Classifier:
                 components.
         """
         if train_data is not None:
+            self.fused_inference = None
             self.compressed_scaler = StandardScaler()
             self.compressed_scaler.fit(train_data)
             train_data = self.compressed_scaler.transform(train_data)
@@ -510,6 +821,7 @@ class Classifier:
             np.array: scaled test data containing principal components.
         """
         if train_data is not None:
+            self.fused_inference = None
             self.pca = PCA(self.retained_variance)
             self.pca.fit(train_data)
             train_data = self.pca.transform(train_data)
@@ -561,44 +873,224 @@ class Classifier:
         Returns:
             array: containing the result as integers.
         """
-        if db_folder is None:
-            db_folder = nt.config["db_folder"]
+        return [
+            self.predict_many(
+                [dataid],
+                db_name,
+                db_folder=db_folder,
+                readout_method_to_use=readout_method_to_use,
+            )
+        ]
 
-        DATA_TYPE_MAPPING = dict(nt.config["core"]["data_types"])
+    def predict_many(
+        self,
+        dataids: Sequence[int],
+        db_name: str,
+        db_folder: Optional[str] = None,
+        readout_method_to_use: str = 'transport',
+    ) -> npt.NDArray[np.int64]:
+        """Classifies the traces of several QCoDeS datasets in a single call
+        of the underlying classifier. See `predict` for details.
 
-        df = Dataset(dataid, db_name)
+        Args:
+            dataids: QCoDeS run IDs.
+            db_name: name of database
+            db_folder: path to folder where database is located.
+            readout_method_to_use: readout method to classify.
+
+        Returns:
+            np.array: predictions, one per run ID.
+        """
+        condensed_data = load_condensed_data(
+            dataids,
+            db_name,
+            [self.category],
+            db_folder=db_folder,
+            readout_method_to_use=readout_method_to_use,
+        )
+        return self.predict_condensed_data(condensed_data[self.category])
+
+    def predict_condensed_data(
+        self,
+        condensed_data: npt.NDArray[np.float64],
+    ) -> npt.NDArray[np.int64]:
+        """Classifies data previously prepared by `load_condensed_data` or
+        `prep_data`. The compiled `fused_inference` is used if available.
+
+        Args:
+            condensed_data: data of shape (number of data types, number of
+                samples, number of points in standard shape).
+
+        Returns:
+            np.array: predictions, one per sample.
+        """
+        relevant_data = self.get_relevant_data(condensed_data)
+        if self.fused_inference is not None:
+            return self.fused_inference.predict(relevant_data)
+        _, X_test = self.prep_data(test_data=relevant_data)
+        assert X_test is not None
+        return self.clf.predict(X_test)
+
+    def predict_proba_condensed_data(
+        self,
+        condensed_data: npt.NDArray[np.float64],
+    ) -> npt.NDArray[np.float64]:
+        """Computes the probability of data previously prepared by
+        `load_condensed_data` or `prep_data` to belong to the population
+        labelled 1, e.g. a good single dot. Requires a binary classifier
+        implementing `predict_proba`.
 
-        condensed_data_all = prep_data(
-            df, self.category, readout_method_to_use=readout_method_to_use)
+        Args:
+            condensed_data: data of shape (number of data types, number of
+                samples, number of points in standard shape).
 
-        predictions = []
+        Returns:
+            np.array: probabilities, one per sample.
+        """
+        if not hasattr(self.clf, "predict_proba"):
+            logger.error(
+                f"{self.classifier_type} does not predict probabilities."
+            )
+            raise ValueError
+        relevant_data = self.get_relevant_data(condensed_data)
+        _, X_test = self.prep_data(test_data=relevant_data)
+        assert X_test is not None
+        probabilities = self.clf.predict_proba(X_test)
+        return probabilities[:, list(self.clf.classes_).index(1)]
 
-        for condensed_data in condensed_data_all:
+    def get_relevant_data(
+        self,
+        condensed_data: npt.NDArray[np.float64],
+    ) -> npt.NDArray[np.float64]:
+        """Selects the data types used by the classifier from condensed data
+        and concatenates them into a single matrix. Features are reduced to
+        those relevant for the classifier's category.
 
-            relevant_data = np.empty((1, 0))
-            for data_type in self.data_types:
-                to_append = condensed_data[DATA_TYPE_MAPPING[data_type]]
+        Args:
+            condensed_data: data of shape (number of data types, number of
+                samples, number of points in standard shape).
 
-                if data_type == "features":
-                    to_append[to_append == nt.config["core"]["fill_value"]] = np.nan
-                    to_append = to_append[:, np.isfinite(to_append).any(axis=0)]  # type: ignore
+        Returns:
+            np.array: data of shape (number of samples, number of input
+                values of the classifier).
+        """
+        DATA_TYPE_MAPPING = dict(nt.config["core"]["data_types"])
 
-                    try:
-                        to_append = to_append[:, self.feature_indexes]  # type: ignore
-                    except IndexError:
+        relevant_data = []
+        for data_type in self.data_types:
+            to_append = np.asarray(
+                condensed_data[DATA_TYPE_MAPPING[data_type]], dtype=np.float64
+            )
+            if data_type == "features":
+                all_features = np.where(
+                    to_append == FILL_VALUE, np.nan, to_append
+                )
+                # missing features are NaN, as in training data
+                feature_indexes = np.asarray(self._feature_indexes, dtype=int)
+                sample_features = np.full(
+                    (len(all_features), len(feature_indexes)), np.nan
+                )
+                for sample_idx, features in enumerate(all_features):
+                    features = features[np.isfinite(features)]
+                    available = feature_indexes < len(features)
+                    if not np.all(available):
                         logger.warning(
-                            f"Some data in {dataid} does not have the requested \
-                            features. Make sure all data has been fitted with \
-                            appropriate fit classes."
+                            f"Sample {sample_idx} does not have the requested "
+                            + "features. Make sure all data has been fitted "
+                            + "with appropriate fit classes."
                         )
+                    sample_features[sample_idx, available] = features[
+                        feature_indexes[available]
+                    ]
+                to_append = sample_features
+            relevant_data.append(to_append)
+
+        return np.concatenate(relevant_data, axis=1)
+
+    def save(self, path: str) -> None:
+        """Saves the trained classifier to a single file, which can be loaded
+        with `Classifier.load` without loading any training data. Saved are
+        the scikit-learn classifier, the fitted scalers and principal
+        components of `prep_data`, the classifier's settings and SHA-256
+        checksums of the numpy data files it was trained on. The file is
+        replaced only once it has been written entirely.
 
-                relevant_data = np.append(relevant_data, to_append, axis=1)
+        Args:
+            path: path of file to save the classifier to.
+        """
+        if not hasattr(self, "raw_scaler"):
+            logger.error("Train classifier before saving it.")
+            raise ValueError
 
-            _, relevant_data = self.prep_data(test_data=relevant_data)  # type: ignore
+        artifact = {
+            "format_version": ARTIFACT_FORMAT_VERSION,
+            "state": {
+                attribute: getattr(self, attribute)
+                for attribute in ARTIFACT_ATTRIBUTES + FITTED_ATTRIBUTES
+                if hasattr(self, attribute)
+            },
+            "checksums": {
+                file_path: get_file_checksum(file_path)
+                for file_path in self.file_paths
+            },
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(
+        cls,
+        path: str,
+        verify_checksums: bool = False,
+    ) -> "Classifier":
+        """Loads a classifier saved with `save`, ready to predict. Training
+        data is neither loaded nor required, leaving `original_data` and
+        `labels` empty.
+
+        Args:
+            path: path of file the classifier was saved to.
+            verify_checksums: whether to check that the numpy data files the
+                classifier was trained on have not changed since. Requires
+                the files and reads them entirely.
 
-            predictions.append(self.clf.predict(relevant_data))
+        Returns:
+            Classifier: the trained classifier.
+        """
+        with open(path, "rb") as f:
+            artifact = pickle.load(f)
 
-        return predictions
+        if artifact.get("format_version") != ARTIFACT_FORMAT_VERSION:
+            logger.error(
+                f"Unsupported classifier file format: {path}. Retrain and "
+                + "save the classifier again."
+            )
+            raise ValueError
+
+        classifier = cls.__new__(cls)
+        classifier.__dict__.update(artifact["state"])
+        classifier.training_checksums = artifact["checksums"]
+        classifier.original_data = np.empty((0, 0), dtype=classifier.dtype)
+        classifier.labels = np.empty(0, dtype=int)
+        classifier.compile_inference()
+
+        if verify_checksums:
+            checksums = classifier.training_checksums
+            changed_files = [
+                file_path
+                for file_path, checksum in checksums.items()
+                if not os.path.isfile(file_path)
+                or get_file_checksum(file_path) != checksum
+            ]
+            if changed_files:
+                logger.error(
+                    "Training data has changed since the classifier was "
+                    + f"saved: {changed_files}"
+                )
+                raise ValueError
+
+        return classifier
 
     def compute_metrics(
         self,
@@ -609,6 +1101,8 @@ class Classifier:
         n_supp_train: Optional[int] = None,
         perform_pca: bool = False,
         scale_pc: bool = False,
+        seed: int = 0,
+        n_workers: Optional[int] = 1,
     ) -> Tuple[Dict[str, Dict[str, Any]], npt.NDArray[np.float64]]:
         """Computes different metrics of a classifier, averaging over
         a number of iterations.
@@ -616,6 +1110,11 @@ class Classifier:
         extracted is saved to a dict. Metrics computed are `accuracy_score`,
         `brier_score_loss`, `auc` (area under curve), `average_precision_recall`
         and the confusion matrix - all implemented in sklearn.metrics.
+        Each iteration draws its random numbers from an independent stream
+        derived from 'seed' and the iteration, making the result independent
+        of 'n_workers'. Each iteration fits a clone of `clf`. Afterwards,
+        `clf` and the scalers and principal components of `prep_data` are
+        those fitted in the last iteration.
 
         Args:
             n_iter: number of train and test iterations over which the metrics
@@ -629,6 +1128,10 @@ class Classifier:
             perform_pca: whether the metrics should be computed using
                 principal components for training and testing.
             scale_pc: whether principal components should be scaled.
+            seed: seed of all random numbers, e.g. of balancing populations.
+            n_workers: number of worker processes. Iterations run in the
+                current process if set to 1. If None, the number of CPUs is
+                used.
 
         Returns:
             dict: summary od results, mapping the a string indicating the
@@ -639,16 +1142,136 @@ class Classifier:
                 where the metrics appear in the order defined by
                 METRIC_NAMES.
         """
-        if n_iter is None:
-            n_iter = DEFAULT_N_ITER[self.category]
+        results, fitted = self._compute_metrics_of(
+            {str(self.classifier_type): self.clf},
+            n_iter=n_iter,
+            save_to_file=save_to_file,
+            filenames={str(self.classifier_type): filename},
+            supp_train_data=supp_train_data,
+            n_supp_train=n_supp_train,
+            perform_pca=perform_pca,
+            scale_pc=scale_pc,
+            seed=seed,
+            n_workers=n_workers,
+            keep_fitted=str(self.classifier_type),
+        )
+        assert fitted is not None
+        self.clf, fitted_stages = fitted
+        for attr, value in fitted_stages.items():
+            setattr(self, attr, value)
+        self.compile_inference()
 
-        metrics = np.empty([len(METRIC_NAMES), n_iter])
+        return results[str(self.classifier_type)]
 
-        conf_matrix = []
+    def compare_classifiers(
+        self,
+        classifier_types: Optional[Sequence[str]] = None,
+        n_iter: Optional[int] = None,
+        save_to_file: bool = True,
+        supp_train_data: Optional[List[str]] = None,
+        n_supp_train: Optional[int] = None,
+        perform_pca: bool = False,
+        scale_pc: bool = False,
+        seed: int = 0,
+        n_workers: Optional[int] = None,
+    ) -> Dict[str, Tuple[Dict[str, Dict[str, Any]], npt.NDArray[np.float64]]]:
+        """Computes metrics of several types of binary classifiers as
+        `compute_metrics`, on the classifier's data. Each iteration's train
+        and test sets, including scaling and principal components, are
+        prepared once and shared by all classifier types. Iterations are run
+        by a pool of processes, each preparing a fold and scoring all
+        classifier types on it. Unlike `compute_metrics`, the classifier's
+        `clf` is left as is.
 
-        start_time = time.time()
-        train_times = []
+        Args:
+            classifier_types: types of binary classifiers to compare, keys of
+                `DEFAULT_CLF_PARAMETERS`, all of which are compared by
+                default. Classifiers are set up with their default
+                parameters, except the classifier's own type, which uses
+                `hyper_parameters`.
+            n_iter: number of train and test iterations over which the metrics
+                statistic should be computed.
+            save_to_file: whether to save metrics info of each classifier type
+                to file, named as by `compute_metrics`.
+            supp_train_data: list of paths to files with additional training
+                data.
+            n_supp_train: number of datasets which should be added to
+                the train set from additional data.
+            perform_pca: whether the metrics should be computed using
+                principal components for training and testing.
+            scale_pc: whether principal components should be scaled.
+            seed: seed of all random numbers, e.g. of balancing populations.
+            n_workers: number of worker processes. Everything runs in the
+                current process if set to 1. Default is the number of CPUs.
+
+        Returns:
+            dict: mapping each classifier type onto the summary of results
+                and metric results of all iterations, as returned by
+                `compute_metrics`.
+        """
+        if classifier_types is None:
+            classifier_types = list(DEFAULT_CLF_PARAMETERS.keys())
 
+        estimators = {}
+        for classifier_type in classifier_types:
+            if classifier_type not in CLASSIFIER_CLASSES:
+                logger.error(
+                    "Classifier type must be one of "
+                    + f"{list(CLASSIFIER_CLASSES.keys())}"
+                )
+                raise ValueError
+            if classifier_type == self.classifier_type:
+                estimators[classifier_type] = self.clf
+            else:
+                estimators[classifier_type] = CLASSIFIER_CLASSES[
+                    classifier_type
+                ](**DEFAULT_CLF_PARAMETERS[classifier_type])
+
+        results, _ = self._compute_metrics_of(
+            estimators,
+            n_iter=n_iter,
+            save_to_file=save_to_file,
+            supp_train_data=supp_train_data,
+            n_supp_train=n_supp_train,
+            perform_pca=perform_pca,
+            scale_pc=scale_pc,
+            seed=seed,
+            n_workers=n_workers,
+        )
+        return results
+
+    def _compute_metrics_of(
+        self,
+        estimators: Dict[str, Any],
+        n_iter: Optional[int] = None,
+        save_to_file: bool = True,
+        filenames: Optional[Dict[str, str]] = None,
+        supp_train_data: Optional[List[str]] = None,
+        n_supp_train: Optional[int] = None,
+        perform_pca: bool = False,
+        scale_pc: bool = False,
+        seed: int = 0,
+        n_workers: Optional[int] = None,
+        keep_fitted: Optional[str] = None,
+    ) -> Tuple[
+        Dict[str, Tuple[Dict[str, Dict[str, Any]], npt.NDArray[np.float64]]],
+        Optional[Tuple[Any, Dict[str, Any]]],
+    ]:
+        """Computes metrics of several scikit-learn binary classifiers,
+        mapped onto the names used in results and file names. See
+        `compare_classifiers`. Also returns the estimator named 'keep_fitted'
+        as fitted in the last iteration, together with the fitted stages of
+        `prep_data` of that iteration, if given.
+        """
+        if n_iter is None:
+            n_iter = DEFAULT_N_ITER[self.category]
+        if filenames is None:
+            filenames = {}
+
+        start_time = time.time()
+        name_addon = ""
+        train_data_addon: Optional[npt.NDArray[np.float64]] = None
+        train_labels_addon: Optional[npt.NDArray[np.int64]] = None
         if supp_train_data is not None:
             supp_train_data, name_addon = self._list_paths(supp_train_data)
             f_frac = [1.0] * len(supp_train_data)
@@ -661,118 +1284,148 @@ class Classifier:
             mask = [1] * n_supp_train
             mask = mask + [0] * (train_data_addon.shape[0] - n_supp_train)
             mask_np = np.array(mask, dtype=bool)
-            np.random.shuffle(mask_np)
+            np.random.default_rng(np.random.SeedSequence(seed)).shuffle(mask_np)
 
             train_data_addon = train_data_addon[mask_np]
             train_labels_addon = train_labels_addon[mask_np]
-        else:
-            train_data_addon = None
-            train_labels_addon = None
-
-        for curr_iter in range(n_iter):
-            start_time_train = time.time()
-
-            (data_to_use, labels_to_use) = self.select_equal_populations(
-                self.original_data, self.labels
-            )
-            (train_data,
-             test_data,
-             train_labels,
-             test_labels) = self.split_data(data_to_use, labels_to_use)
-
-            if train_data_addon is not None:
-                train_data = np.concatenate([train_data, train_data_addon], axis=0)
-                train_labels = np.concatenate(
-                    [train_labels, train_labels_addon], axis=0
-                )
-
-            X_train, X_test = self.prep_data(
-                train_data=train_data,
-                test_data=test_data,
-                perform_pca=perform_pca,
-                scale_pc=scale_pc,
-            )
-
-            probas = self.clf.fit(X_train, train_labels).predict_proba(X_test)
-
-            train_times.append(time.time() - start_time_train)
-
-            pred_labels = self.clf.predict(X_test)
-
-            m_in = METRIC_NAMES.index("accuracy_score")
-            metrics[m_in, curr_iter] = accuracy_score(test_labels, pred_labels)
 
-            m_in = METRIC_NAMES.index("brier_score_loss")
-            metrics[m_in, curr_iter] = brier_score_loss(
-                test_labels, pred_labels)
-
-            fpr, tpr, thresholds = roc_curve(test_labels, probas[:, 1])
-            m_in = METRIC_NAMES.index("auc")
-            metrics[m_in, curr_iter] = auc(fpr, tpr)
-
-            if hasattr(self.clf, "decision_function"):
-                y_score = self.clf.decision_function(X_test)
-            else:
-                y_score = self.clf.predict_proba(X_test)[:, 1]
-
-            m_in = METRIC_NAMES.index("average_precision_recall")
-            metrics[m_in, curr_iter] = average_precision_score(test_labels, y_score)
-            conf_matrix.append(confusion_matrix(test_labels, pred_labels))
+        # the data is passed separately, sent to each worker process once
+        fold_classifier = copy.copy(self)
+        fold_classifier.original_data = np.empty((0, 0), dtype=self.dtype)
+        fold_classifier.labels = np.empty(0, dtype=int)
+        fold_classifier.fused_inference = None
+        fold_data = (
+            fold_classifier,
+            self.original_data,
+            self.labels,
+            train_data_addon,
+            train_labels_addon,
+        )
+        fold_args = (seed, perform_pca, scale_pc)
+
+        scores: Dict[Tuple[str, int], Tuple[Any, ...]] = {}
+        fold_sizes: Dict[int, Tuple[int, int]] = {}
+        fitted = None
+
+        def collect(curr_iter: int, iter_result: Tuple[Any, ...]) -> None:
+            nonlocal fitted
+            fold_sizes[curr_iter], iter_scores, iter_fitted = iter_result
+            for name, score in iter_scores.items():
+                scores[(name, curr_iter)] = score
+            if iter_fitted is not None:
+                fitted = iter_fitted
+
+        last_iter = n_iter - 1
+
+        def keep_fitted_of(curr_iter: int) -> Optional[str]:
+            return keep_fitted if curr_iter == last_iter else None
+
+        if n_workers == 1:
+            for curr_iter in range(n_iter):
+                collect(curr_iter, _score_iteration(
+                    *fold_data,
+                    estimators,
+                    curr_iter,
+                    *fold_args,
+                    keep_fitted=keep_fitted_of(curr_iter),
+                ))
+        else:
+            # each worker receives data and estimators once, and prepares
+            # and scores entire iterations, so that folds never leave it
+            with ProcessPoolExecutor(
+                max_workers=n_workers,
+                initializer=_init_fold_worker,
+                initargs=(*fold_data, estimators),
+            ) as executor:
+                futures = {
+                    executor.submit(
+                        _score_iteration_in_worker,
+                        curr_iter,
+                        *fold_args,
+                        keep_fitted=keep_fitted_of(curr_iter),
+                    ): curr_iter
+                    for curr_iter in range(n_iter)
+                }
+                for future in as_completed(futures):
+                    collect(futures[future], future.result())
+                    logger.info(
+                        f"Computed metrics of {len(fold_sizes)} of {n_iter} "
+                        + "iterations."
+                    )
 
         elapsed_time = (time.time() - start_time) / n_iter
-        conf_matrix_np: npt.NDArray[np.float64] = np.array(conf_matrix)
-
-        info_dict: Dict[str, Any] = {
-            "n_iter": n_iter,
-            "classifier": self.classifier_type,
-            "category": self.category,
-            "data_files": self.file_paths,
-            "data_types": self.data_types,
-            "hyper_parameters": self.clf.get_params(),
-            "metric_names": METRIC_NAMES,
-            "elapsed_time [s/iter]": elapsed_time,
-            "n_test": test_data.shape[0],
-            "n_train": train_data.shape[0],
-            "mean_train_time": np.mean(train_times),
-            "std_train_time": np.std(train_times),
-            "perform_pca": perform_pca,
-            "scale_pc": scale_pc,
-            "metadata": {},
-            "supp_train_data": supp_train_data,
-        }
-
-        for im, metric_name in enumerate(METRIC_NAMES):
-            info_dict[metric_name] = {
-                "std": np.std(metrics[im]),
-                "mean": np.mean(metrics[im]),
+        n_test, n_train = fold_sizes[n_iter - 1]
+
+        results = {}
+        for name, estimator in estimators.items():
+            metrics = np.empty([len(METRIC_NAMES), n_iter])
+            conf_matrix = []
+            train_times = []
+            for curr_iter in range(n_iter):
+                iter_metrics, iter_conf_matrix, train_time = scores[
+                    (name, curr_iter)
+                ]
+                metrics[:, curr_iter] = iter_metrics
+                conf_matrix.append(iter_conf_matrix)
+                train_times.append(train_time)
+            conf_matrix_np: npt.NDArray[np.float64] = np.array(conf_matrix)
+
+            info_dict: Dict[str, Any] = {
+                "n_iter": n_iter,
+                "classifier": name,
+                "category": self.category,
+                "data_files": self.file_paths,
+                "data_types": self.data_types,
+                "hyper_parameters": estimator.get_params(),
+                "metric_names": METRIC_NAMES,
+                "elapsed_time [s/iter]": elapsed_time,
+                "n_test": n_test,
+                "n_train": n_train,
+                "mean_train_time": np.mean(train_times),
+                "std_train_time": np.std(train_times),
+                "perform_pca": perform_pca,
+                "scale_pc": scale_pc,
+                "metadata": {},
+                "supp_train_data": supp_train_data,
             }
 
-        info_dict["confusion_matrix"] = {
-            "std": np.std(conf_matrix_np, axis=0).tolist(),
-            "mean": np.mean(conf_matrix_np, axis=0).tolist(),
-        }
-
-        if save_to_file:
-            if not filename:
-                filename = self.name + "_"
-                if supp_train_data is not None:
-                    filename = filename + name_addon + "_"
-                filename += "_".join(self.data_types)
-                if perform_pca:
-                    filename += "_PCA"
-                if scale_pc:
-                    filename += "_scaled"
-                filename += ".json"
+            for im, metric_name in enumerate(METRIC_NAMES):
+                info_dict[metric_name] = {
+                    "std": np.std(metrics[im]),
+                    "mean": np.mean(metrics[im]),
+                }
 
-            path = os.path.join(nt.config["db_folder"], "classifier_metrics")
-            if not os.path.exists(path):
-                os.makedirs(path)
-            path = os.path.join(path, filename)
-            with open(path, "w") as f:
-                json.dump(info_dict, f)
-
-        return info_dict, metrics
+            info_dict["confusion_matrix"] = {
+                "std": np.std(conf_matrix_np, axis=0).tolist(),
+                "mean": np.mean(conf_matrix_np, axis=0).tolist(),
+            }
 
+            if save_to_file:
+                filename = filenames.get(name, "")
+                if not filename:
+                    _, data_addon = self._list_paths(
+                        [os.path.basename(p) for p in self.file_paths]
+                    )
+                    filename = data_addon + self.category + "_" + name + "_"
+                    if supp_train_data is not None:
+                        filename = filename + name_addon + "_"
+                    filename += "_".join(self.data_types)
+                    if perform_pca:
+                        filename += "_PCA"
+                    if scale_pc:
+                        filename += "_scaled"
+                    filename += ".json"
+
+                path = os.path.join(nt.config["db_folder"], "classifier_metrics")
+                if not os.path.exists(path):
+                    os.makedirs(path)
+                path = os.path.join(path, filename)
+                with open(path, "w") as f:
+                    json.dump(info_dict, f)
+
+            results[name] = (info_dict, metrics)
+
+        return results, fitted
 
     def _list_paths(self, filenames: List[str]) -> Tuple[List[str], str]:
         """Adds path to file names."""
@@ -784,3 +1437,304 @@ class Classifier:
             file_paths.append(p)
             name = name + os.path.splitext(filename)[0] + "_"
         return file_paths, name
+
+
+def load_condensed_data(
+    dataids: Sequence[int],
+    db_name: str,
+    categories: Sequence[str],
+    db_folder: Optional[str] = None,
+    readout_method_to_use: str = 'transport',
+) -> Dict[str, npt.NDArray[np.float64]]:
+    """Loads QCoDeS datasets and prepares them for classification using
+    `condense_dataset`. Each dataset is loaded only once, even if it is prepared for
+    several categories.
+
+    Args:
+        dataids: QCoDeS run IDs.
+        db_name: name of database
+        categories: categories to prepare data for, e.g. the categories of all
+            classifiers to apply.
+        db_folder: path to folder where database is located.
+        readout_method_to_use: readout method to prepare.
+
+    Returns:
+        dict: mapping each category onto condensed data of shape (number of
+            data types, number of datasets, number of points in standard
+            shape).
+    """
+    if db_folder is None:
+        db_folder = nt.config["db_folder"]
+
+    condensed_data: Dict[str, List[npt.NDArray[np.float64]]] = {
+        category: [] for category in categories
+    }
+    for dataid in dataids:
+        dataset = dataset_cache.load(Dataset, dataid, db_name, db_folder=db_folder)
+        for category in condensed_data.keys():
+            df = copy.copy(dataset)
+            # condense_dataset may rescale data in place, keep the cached
+            # instance intact
+            df.data = dataset.data.copy(deep=True)
+            condensed_data[category].append(
+                condense_dataset(
+                    df, category, readout_method_to_use=readout_method_to_use
+                )[:, np.newaxis, :]
+            )
+
+    n_data_types = len(nt.config["core"]["data_types"])
+    return {
+        category: np.concatenate(data, axis=1)
+        if data else np.empty((n_data_types, 0, 0))
+        for category, data in condensed_data.items()
+    }
+
+
+def condense_segments(
+    signals: Sequence[npt.NDArray[np.float64]],
+    categories: Sequence[str],
+    features: Optional[Dict[str, Any]] = None,
+    readout_method_to_use: str = 'transport',
+) -> Dict[str, npt.NDArray[np.float64]]:
+    """Prepares normalized signals held in memory, e.g. segments of a charge
+    diagram, for classification using `condense_signal`. The in-memory
+    counterpart of `load_condensed_data`, returning data in the same format.
+
+    Args:
+        signals: normalized signals, e.g. views of a charge diagram.
+        categories: categories to prepare data for, e.g. the categories of all
+            classifiers to apply.
+        features: extracted features of the data the signals belong to, flat
+            or nested by readout method as in nanotune metadata.
+        readout_method_to_use: readout method the signals belong to.
+
+    Returns:
+        dict: mapping each category onto condensed data of shape (number of
+            data types, number of signals, number of points in standard
+            shape).
+    """
+    condensed_data: Dict[str, List[npt.NDArray[np.float64]]] = {
+        category: [] for category in categories
+    }
+    for signal in signals:
+        for category in condensed_data.keys():
+            condensed_data[category].append(
+                condense_signal(
+                    signal,
+                    category,
+                    features=features,
+                    readout_method_to_use=readout_method_to_use,
+                )[:, np.newaxis, :]
+            )
+
+    n_data_types = len(nt.config["core"]["data_types"])
+    return {
+        category: np.concatenate(data, axis=1)
+        if data else np.empty((n_data_types, 0, 0))
+        for category, data in condensed_data.items()
+    }
+
+
+def _prepare_fold(
+    classifier: Classifier,
+    data: npt.NDArray[np.float64],
+    labels: npt.NDArray[np.int64],
+    train_data_addon: Optional[npt.NDArray[np.float64]],
+    train_labels_addon: Optional[npt.NDArray[np.int64]],
+    curr_iter: int,
+    seed: int,
+    perform_pca: bool,
+    scale_pc: bool,
+) -> Dict[str, Any]:
+    """Balances populations, splits data into train and test set and
+    prepares both with `prep_data`, as done in each iteration of
+    `Classifier.compute_metrics`. Random numbers are drawn from a stream
+    derived from 'seed' and 'curr_iter'."""
+    start_time = time.time()
+    rng = np.random.default_rng(
+        np.random.SeedSequence(seed, spawn_key=(curr_iter,))
+    )
+    # a copy keeps the scalers and PCA fitted on this fold
+    fold_classifier = copy.copy(classifier)
+    (data_to_use, labels_to_use) = fold_classifier.select_equal_populations(
+        data, labels, rng=rng,
+    )
+    (train_data,
+     test_data,
+     train_labels,
+     test_labels) = fold_classifier.split_data(data_to_use, labels_to_use)
+
+    if train_data_addon is not None:
+        train_data = np.concatenate([train_data, train_data_addon], axis=0)
+        train_labels = np.concatenate(
+            [train_labels, train_labels_addon], axis=0
+        )
+
+    X_train, X_test = fold_classifier.prep_data(
+        train_data=train_data,
+        test_data=test_data,
+        perform_pca=perform_pca,
+        scale_pc=scale_pc,
+    )
+    return {
+        "X_train": X_train,
+        "X_test": X_test,
+        "train_labels": train_labels,
+        "test_labels": test_labels,
+        "prep_time": time.time() - start_time,
+        "fitted_stages": {
+            attr: getattr(fold_classifier, attr)
+            for attr in FITTED_ATTRIBUTES
+            if hasattr(fold_classifier, attr)
+        },
+    }
+
+
+def _fold_sizes(fold: Dict[str, Any]) -> Tuple[int, int]:
+    """Returns the number of test and train datasets of a fold."""
+    return fold["X_test"].shape[0], fold["X_train"].shape[0]
+
+
+def _score_fold(
+    estimator: Any,
+    fold: Dict[str, Any],
+    seed: int,
+    curr_iter: int,
+) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.int64], float, Any]:
+    """Fits a clone of a scikit-learn binary classifier on the train set of a
+    fold and computes the metrics of `Classifier.compute_metrics` on its test
+    set. Classifiers with an unset `random_state` are seeded from 'seed' and
+    'curr_iter'.
+
+    Returns:
+        np.array: metrics in the order of METRIC_NAMES.
+        np.array: confusion matrix.
+        float: training time, including the preparation of the fold.
+        Any: the fitted clone.
+    """
+    start_time = time.time()
+    clf = clone(estimator)
+    if clf.get_params().get("random_state", 0) is None:
+        clf.set_params(random_state=int(np.random.SeedSequence(
+            seed, spawn_key=(curr_iter,)).generate_state(1)[0]))
+
+    X_test = fold["X_test"]
+    test_labels = fold["test_labels"]
+    clf.fit(fold["X_train"], fold["train_labels"])
+    probas = None
+    if hasattr(clf, "predict_proba"):
+        probas = clf.predict_proba(X_test)[:, 1]
+
+    train_time = time.time() - start_time + fold["prep_time"]
+
+    pred_labels = clf.predict(X_test)
+    if hasattr(clf, "decision_function"):
+        y_score = clf.decision_function(X_test)
+    else:
+        y_score = probas
+    if probas is None:
+        probas = y_score
+
+    metrics = np.empty(len(METRIC_NAMES))
+    m_in = METRIC_NAMES.index("accuracy_score")
+    metrics[m_in] = accuracy_score(test_labels, pred_labels)
+
+    m_in = METRIC_NAMES.index("brier_score_loss")
+    metrics[m_in] = brier_score_loss(test_labels, pred_labels)
+
+    fpr, tpr, thresholds = roc_curve(test_labels, probas)
+    m_in = METRIC_NAMES.index("auc")
+    metrics[m_in] = auc(fpr, tpr)
+
+    m_in = METRIC_NAMES.index("average_precision_recall")
+    metrics[m_in] = average_precision_score(test_labels, y_score)
+
+    return (
+        metrics, confusion_matrix(test_labels, pred_labels), train_time, clf
+    )
+
+
+def _score_iteration(
+    classifier: Classifier,
+    data: npt.NDArray[np.float64],
+    labels: npt.NDArray[np.int64],
+    train_data_addon: Optional[npt.NDArray[np.float64]],
+    train_labels_addon: Optional[npt.NDArray[np.int64]],
+    estimators: Dict[str, Any],
+    curr_iter: int,
+    seed: int,
+    perform_pca: bool,
+    scale_pc: bool,
+    keep_fitted: Optional[str] = None,
+) -> Tuple[
+    Tuple[int, int],
+    Dict[str, Tuple[Any, ...]],
+    Optional[Tuple[Any, Dict[str, Any]]],
+]:
+    """Prepares the fold of an iteration with `_prepare_fold` and scores all
+    estimators on it with `_score_fold`.
+
+    Returns:
+        tuple: number of test and train datasets of the fold.
+        dict: mapping estimator names onto metrics, confusion matrix and
+            training time.
+        tuple: estimator named 'keep_fitted' fitted on the fold and fitted
+            stages of `prep_data`, None if 'keep_fitted' is not given.
+    """
+    fold = _prepare_fold(
+        classifier,
+        data,
+        labels,
+        train_data_addon,
+        train_labels_addon,
+        curr_iter,
+        seed,
+        perform_pca,
+        scale_pc,
+    )
+    scores = {}
+    fitted = None
+    for name, estimator in estimators.items():
+        *score, clf = _score_fold(estimator, fold, seed, curr_iter)
+        scores[name] = tuple(score)
+        if name == keep_fitted:
+            fitted = (clf, fold["fitted_stages"])
+
+    return _fold_sizes(fold), scores, fitted
+
+
+_fold_data: Tuple[Any, ...] = ()
+
+
+def _init_fold_worker(*fold_data: Any) -> None:
+    """Keeps the classifier and data folds are prepared from, and the
+    estimators to score, in a worker process, so that they are sent to each
+    worker only once."""
+    global _fold_data
+    _fold_data = fold_data
+
+
+def _score_iteration_in_worker(*args: Any, **kwargs: Any) -> Tuple[Any, ...]:
+    """Prepares and scores the fold of an iteration in a worker process
+    initialized by `_init_fold_worker`."""
+    return _score_iteration(*_fold_data, *args, **kwargs)
+
+
+def get_file_checksum(
+    file_path: str,
+    chunk_size: int = 2**20,
+) -> str:
+    """Computes the SHA-256 checksum of a file, reading it in chunks.
+
+    Args:
+        file_path: path of file.
+        chunk_size: number of bytes read at a time.
+
+    Returns:
+        str: hexadecimal checksum.
+    """
+    checksum = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            checksum.update(chunk)
+    return checksum.hexdigest()
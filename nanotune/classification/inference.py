@@ -0,0 +1,156 @@
+import logging
+from typing import Any, Optional, Tuple
+
+import numpy as np
+import numpy.typing as npt
+from sklearn.decomposition import PCA
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import LinearSVC
+
+logger = logging.getLogger(__name__)
+
+LINEAR_CLASSIFIERS = (LogisticRegression, LinearSVC)
+
+
+class FusedInference:
+    """Classifies data with the fitted preprocessing stages of a `Classifier`
+    and its binary classifier folded into as few operations as possible.
+    Scaling, principal components and scaling of principal components are all
+    affine maps, which are composed into a single one ahead of time. For
+    linear classifiers such as `LogisticRegression` and `LinearSVC`, the
+    classifier's decision function is folded in as well, so that a stack of
+    samples is classified with one matrix multiplication. Other classifiers
+    predict on data transformed by the fused preprocessing.
+
+    Attributes:
+        clf: fitted scikit-learn binary classifier.
+        weights: weights of the fused affine map, either a vector of
+            per-feature factors (scaling only) or a matrix of shape (number of
+            input values, number of outputs).
+        offset: offset of the fused affine map.
+        is_linear: whether the classifier's decision function has been folded
+            into `weights` and `offset`.
+    """
+    def __init__(
+        self,
+        clf: Any,
+        raw_scaler: StandardScaler,
+        pca: Optional[PCA] = None,
+        compressed_scaler: Optional[StandardScaler] = None,
+    ) -> None:
+        """Fuses fitted stages, applied in the same order as in
+        `Classifier.prep_data`.
+
+        Args:
+            clf: fitted scikit-learn binary classifier.
+            raw_scaler: scaler fitted on raw data.
+            pca: principal components, if used.
+            compressed_scaler: scaler fitted on principal components, if used.
+        """
+        self.clf = clf
+        weights, offset = _scaler_to_affine(raw_scaler)
+        if pca is not None:
+            weights, offset = _compose(weights, offset, *_pca_to_affine(pca))
+        if compressed_scaler is not None:
+            weights, offset = _compose(
+                weights, offset, *_scaler_to_affine(compressed_scaler)
+            )
+
+        self.is_linear = isinstance(clf, LINEAR_CLASSIFIERS)
+        if self.is_linear:
+            weights, offset = _compose(
+                weights, offset, clf.coef_.T, clf.intercept_,
+            )
+        self.weights = weights
+        self.offset = offset
+
+    def transform(
+        self,
+        data: npt.NDArray[np.float64],
+    ) -> npt.NDArray[np.float64]:
+        """Applies the fused affine map.
+
+        Args:
+            data: data of shape (number of samples, number of input values).
+
+        Returns:
+            np.array: transformed data, decision function values for linear
+                classifiers and preprocessed data otherwise.
+        """
+        data = np.asarray(data, dtype=np.float64)
+        if self.weights.ndim == 1:
+            return data * self.weights + self.offset
+        return data @ self.weights + self.offset
+
+    def predict(
+        self,
+        data: npt.NDArray[np.float64],
+    ) -> npt.NDArray[np.int64]:
+        """Classifies a stack of samples, as the binary classifier's
+        `predict` does on data prepared by `Classifier.prep_data`.
+
+        Args:
+            data: data of shape (number of samples, number of input values),
+                as returned by `Classifier.get_relevant_data`.
+
+        Returns:
+            np.array: predictions, one per sample.
+        """
+        transformed = self.transform(data)
+        if not self.is_linear:
+            return self.clf.predict(transformed)
+
+        if transformed.shape[1] == 1:
+            indices = (transformed[:, 0] > 0).astype(int)
+        else:
+            indices = transformed.argmax(axis=1)
+        return self.clf.classes_[indices]
+
+
+def _scaler_to_affine(
+    scaler: StandardScaler,
+) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """Returns per-feature factors and offsets equivalent to a fitted
+    `StandardScaler`."""
+    n_features = scaler.n_features_in_
+    factors = np.ones(n_features)
+    if scaler.scale_ is not None:
+        factors = 1 / scaler.scale_
+    offset = np.zeros(n_features)
+    if scaler.mean_ is not None:
+        offset = -scaler.mean_ * factors
+    return factors, offset
+
+
+def _pca_to_affine(
+    pca: PCA,
+) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """Returns the matrix and offset equivalent to a fitted `PCA`."""
+    matrix = pca.components_.T
+    if pca.whiten:
+        matrix = matrix / np.sqrt(pca.explained_variance_)
+    return matrix, -pca.mean_ @ matrix
+
+
+def _compose(
+    weights: npt.NDArray[np.float64],
+    offset: npt.NDArray[np.float64],
+    next_weights: npt.NDArray[np.float64],
+    next_offset: npt.NDArray[np.float64],
+) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """Composes two affine maps, the first applied first. Weights are either
+    vectors of per-feature factors or matrices of shape (number of inputs,
+    number of outputs)."""
+    if next_weights.ndim == 1:
+        if weights.ndim == 1:
+            new_weights = weights * next_weights
+        else:
+            new_weights = weights * next_weights[np.newaxis, :]
+        return new_weights, offset * next_weights + next_offset
+
+    if weights.ndim == 1:
+        new_weights = weights[:, np.newaxis] * next_weights
+    else:
+        new_weights = weights @ next_weights
+    return new_weights, offset @ next_weights + next_offset
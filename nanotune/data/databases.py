@@ -8,7 +8,7 @@ import qcodes as qc
 from qcodes.dataset.experiment_container import experiments
 from qcodes.dataset.sqlite.connection import atomic
 from qcodes.dataset.sqlite.database import connect
-from qcodes.dataset.sqlite.queries import add_meta_data, get_metadata
+from qcodes.dataset.sqlite.queries import add_meta_data
 from qcodes.dataset.sqlite.query_helpers import many_many
 
 import nanotune as nt
@@ -33,7 +33,8 @@ def get_dataIDs(
     configuration.config.json under the "labels" key.
     Optionally, the quality can be
     specified. Quality and category together are the machine learning labels
-    nanotune uses during classification.
+    nanotune uses during classification. To search many databases, use
+    `nanotune.data.label_catalog.LabelCatalog`.
 
     Args:
         db_name: name of database to search.
@@ -69,8 +70,11 @@ def get_dataIDs(
                 WHERE ({category}={1} OR {category} LIKE {str(1)})
                 AND (good={quality} OR good LIKE {str(quality)})
             """
-    c = conn.execute(sql)
-    param_names_temp = many_many(c, id_type)
+    try:
+        c = conn.execute(sql)
+        param_names_temp = many_many(c, id_type)
+    finally:
+        conn.close()
 
     return list(flatten_list(param_names_temp))
 
@@ -107,11 +111,14 @@ def get_unlabelled_ids(
         sql = f"""
             SELECT captured_run_id FROM runs WHERE good IS NULL
             """
-    c = conn.execute(sql)
-    if get_run_id:
-        param_names_temp = many_many(c, "run_id")
-    else:
-        param_names_temp = many_many(c, "captured_run_id")
+    try:
+        c = conn.execute(sql)
+        if get_run_id:
+            param_names_temp = many_many(c, "run_id")
+        else:
+            param_names_temp = many_many(c, "captured_run_id")
+    finally:
+        conn.close()
 
     return list(flatten_list(param_names_temp))
 
@@ -175,15 +182,36 @@ def new_database(
     path = os.path.join(db_folder, db_name)
     qc.initialise_or_create_database_at(path)
     nt.config["db_name"] = db_name
+    _add_label_columns(path)
 
-    # add label columns
+    return path
+
+
+def create_database_at(path: str) -> None:
+    """Creates a database and initialises it with nanotune labels, as
+    `new_database`, but without changing the default database. As neither
+    nanotune's nor QCoDeS' configuration is modified, it is safe to call while
+    other threads load from or save to the default database.
+
+    Args:
+        path: absolute path of new database.
+    """
+    # connect creates and initialises the database if it does not exist
     db_conn = connect(path)
-    with atomic(db_conn) as conn:
-        add_meta_data(conn, 0, {"original_guid": 0})
-        for label in nt.config["core"]["labels"]:
-            add_meta_data(conn, 0, {label: 0})
+    db_conn.close()
+    _add_label_columns(path)
 
-    return path
+
+def _add_label_columns(path: str) -> None:
+    """Adds a column for the original guid and each nanotune label."""
+    db_conn = connect(path)
+    try:
+        with atomic(db_conn) as conn:
+            add_meta_data(conn, 0, {"original_guid": 0})
+            for label in nt.config["core"]["labels"]:
+                add_meta_data(conn, 0, {label: 0})
+    finally:
+        db_conn.close()
 
 
 def set_database(
@@ -213,14 +241,23 @@ def set_database(
 
     qc.config["core"]["db_location"] = db_path
 
-    # check if label columns exist, create if not
+    # check if label columns exist, create if not. Only missing columns are
+    # written, allowing several processes to read from the same database.
     db_conn = connect(db_path)
-    with atomic(db_conn) as conn:
-        try:
-            get_metadata(db_conn, "0", nt.config["core"]["labels"][0])
-        except (RuntimeError, KeyError):
-            for label in nt.config["core"]["labels"]:
-                add_meta_data(conn, 0, {label: 0})
+    try:
+        columns = [
+            row["name"] for row in db_conn.execute("PRAGMA table_info(runs)")
+        ]
+        missing_labels = [
+            label for label in nt.config["core"]["labels"]
+            if label not in columns
+        ]
+        if missing_labels:
+            with atomic(db_conn) as conn:
+                for label in missing_labels:
+                    add_meta_data(conn, 0, {label: 0})
+    finally:
+        db_conn.close()
 
 
 def get_database() -> Tuple[str, str]:
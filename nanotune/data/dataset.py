@@ -61,6 +61,10 @@ class Dataset:
         filtered_data: xarray dataset containing data to which a Gaussian
             filter has been applied. Keys have been renamed to "standard"
             readout methods defined in `Readout`.
+        metadata_only: whether only metadata has been loaded, leaving
+            `raw_data`, `data`, `power_spectrum` and `filtered_data` empty.
+
+    Power spectrum and filtered data are computed on first access.
     """
 
     def __init__(
@@ -69,6 +73,7 @@ class Dataset:
         db_name: Optional[str] = None,
         db_folder: Optional[str] = None,
         normalization_tolerances: Tuple[float, float] = (-0.1, 1.1),
+        metadata_only: bool = False,
     ) -> None:
 
         if db_folder is None:
@@ -82,6 +87,7 @@ class Dataset:
             self.db_name = db_name
 
         self.qc_run_id = qc_run_id
+        self.metadata_only = metadata_only
         self._snapshot: Dict[str, Any] = {}
         self._nt_metadata: Dict[str, Any] = {}
         self._normalization_constants: Dict[str, List[float]] = {}
@@ -96,12 +102,13 @@ class Dataset:
 
         self.raw_data: xr.Dataset = xr.Dataset()
         self.data: xr.Dataset = xr.Dataset()
-        self.power_spectrum: xr.Dataset = xr.Dataset()
-        self.filtered_data: xr.Dataset = xr.Dataset()
+        self._power_spectrum: Optional[xr.Dataset] = None
+        self._filtered_data: Optional[xr.Dataset] = None
+        if metadata_only:
+            self._power_spectrum = xr.Dataset()
+            self._filtered_data = xr.Dataset()
 
         self.from_qcodes_dataset()
-        self.prepare_filtered_data()
-        self.compute_power_spectrum()
 
     @property
     def snapshot(self) -> Dict[str, Any]:
@@ -118,6 +125,32 @@ class Dataset:
         """"""
         return self._normalization_constants
 
+    @property
+    def power_spectrum(self) -> xr.Dataset:
+        """Fourier frequencies of all readout methods, computed by
+        `compute_power_spectrum` on first access."""
+        if self._power_spectrum is None:
+            self.compute_power_spectrum()
+        assert self._power_spectrum is not None
+        return self._power_spectrum
+
+    @power_spectrum.setter
+    def power_spectrum(self, value: xr.Dataset) -> None:
+        self._power_spectrum = value
+
+    @property
+    def filtered_data(self) -> xr.Dataset:
+        """Gaussian filtered data of all readout methods, computed by
+        `prepare_filtered_data` on first access."""
+        if self._filtered_data is None:
+            self.prepare_filtered_data()
+        assert self._filtered_data is not None
+        return self._filtered_data
+
+    @filtered_data.setter
+    def filtered_data(self, value: xr.Dataset) -> None:
+        self._filtered_data = value
+
     @property
     def features(self) -> Dict[str, Dict[str, Any]]:
         """"""
@@ -155,6 +188,13 @@ class Dataset:
         self.guid = qc_dataset.guid
         self.qc_parameters = qc_dataset.get_parameters()
 
+        if self.metadata_only:
+            self._load_metadata_from_qcodes(qc_dataset)
+            for r_meth, r_param in self.readout_methods.items():
+                param_spec = qc_dataset.paramspecs[r_param]
+                self.dimensions[r_meth] = len(param_spec.depends_on_)
+            return
+
         self.raw_data = qc_dataset.to_xarray_dataset()
 
         self._load_metadata_from_qcodes(qc_dataset)
@@ -197,6 +237,12 @@ class Dataset:
             logger.warning("No readout method specified.")
             self.readout_methods = {}
         if not isinstance(self.readout_methods, dict) or not self.readout_methods:
+            if self.metadata_only:
+                read_params = [
+                    p.name for p in qc_dataset.dependent_parameters
+                ]
+            else:
+                read_params = [str(it) for it in list(self.raw_data.data_vars)]
             if isinstance(self.readout_methods, str):
                 methods = [self.readout_methods]
             elif isinstance(self.readout_methods, list):
@@ -204,8 +250,7 @@ class Dataset:
             else:
                 # we assume the default order of readout methods if nothing
                 # else is specified
-                methods = default_readout_methods[: len(self.raw_data)]
-            read_params = [str(it) for it in list(self.raw_data.data_vars)]
+                methods = default_readout_methods[: len(read_params)]
             self.readout_methods = dict(zip(methods, read_params))
 
         quality = qc_dataset.get_metadata("good")
@@ -298,11 +343,7 @@ class Dataset:
         voltage_x = self.data[readout_method][c_name].values
 
         xv = np.unique(voltage_x)
-        signal = self.data[readout_method].values.copy()
-        signal = sg.detrend(signal, axis=0)
-
-        frequencies_res = fp.fft(signal)
-        frequencies_res = np.abs(fp.fftshift(frequencies_res)) ** 2
+        frequencies_res = get_power_spectrum(self.data[readout_method].values)
 
         fx = fp.fftshift(fp.fftfreq(frequencies_res.shape[0], d=xv[1] - xv[0]))
 
@@ -323,17 +364,11 @@ class Dataset:
         c_name_y = default_coord_names["voltage"][1]
         voltage_x = self.data[readout_method][c_name_x].values
         voltage_y = self.data[readout_method][c_name_y].values
-        signal = self.data[readout_method].values.copy()
+        signal = self.data[readout_method].values
 
         xv = np.unique(voltage_x)
         yv = np.unique(voltage_y)
-        signal = signal.copy()
-
-        signal = sg.detrend(signal, axis=0)
-        signal = sg.detrend(signal, axis=1)
-
-        frequencies_res = fp.fft2(signal)
-        frequencies_res = np.abs(fp.fftshift(frequencies_res)) ** 2
+        frequencies_res = get_power_spectrum(signal)
 
         fx_1d = fp.fftshift(fp.fftfreq(frequencies_res.shape[0], d=xv[1] - xv[0]))
         fy_1d = fp.fftshift(fp.fftfreq(frequencies_res.shape[1], d=yv[1] - yv[0]))
@@ -367,3 +402,30 @@ class Dataset:
                 raise NotImplementedError
 
             self.power_spectrum[readout_method] = freq_xar
+
+
+def get_power_spectrum(
+    signal: npt.NDArray[np.float64],
+) -> npt.NDArray[np.float64]:
+    """Computes the power spectrum of a 1D or 2D signal. The signal is
+    detrended along each axis before the Fourier transformation is applied.
+
+    Args:
+        signal: 1D or 2D signal.
+
+    Returns:
+        np.array: power spectrum of the same shape as signal, with zero
+            frequencies shifted to the center.
+    """
+    signal = np.array(signal, copy=True)
+    for axis in range(signal.ndim):
+        signal = sg.detrend(signal, axis=axis)
+
+    if signal.ndim == 1:
+        frequencies_res = fp.fft(signal)
+    elif signal.ndim == 2:
+        frequencies_res = fp.fft2(signal)
+    else:
+        raise NotImplementedError
+
+    return np.abs(fp.fftshift(frequencies_res)) ** 2
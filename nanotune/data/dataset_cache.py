@@ -0,0 +1,132 @@
+import json
+import logging
+import os
+from collections import OrderedDict
+from typing import Optional, Tuple, Type, TypeVar
+
+import qcodes as qc
+from qcodes.dataset.data_set import DataSet
+
+import nanotune as nt
+from nanotune.data.dataset import Dataset
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_SIZE = 8
+DatasetType = TypeVar("DatasetType", bound=Dataset)
+CacheKey = Tuple[str, str, type, str]
+
+
+class DatasetCache:
+    """Bounded cache of loaded nanotune datasets and data fits.
+
+    Loading a `Dataset` reads the data from the database and computes
+    filtered data and power spectra, and data fits are typically followed
+    by a call to `find_fit`. Within a single tuning stage iteration the same
+    measurement is loaded several times, e.g. to classify it, to extract
+    features and to determine range update directives. The cache keeps the
+    most recently used instances, identified by the GUID of the
+    QCoDeS dataset, the database they were loaded from, their class and
+    additional keyword arguments. Features found by a cached fit are thus
+    kept as well.
+
+    Datasets which have not been completed are not cached. Metadata of cached
+    instances is reloaded whenever it is written through nanotune, see
+    `update_metadata`.
+
+    Attributes:
+        maxsize: maximum number of instances kept.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[CacheKey, Dataset]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def load(
+        self,
+        dataset_class: Type[DatasetType],
+        qc_run_id: int,
+        db_name: str,
+        db_folder: Optional[str] = None,
+        **kwargs,
+    ) -> DatasetType:
+        """Returns a cached instance of 'dataset_class' or loads a new one.
+
+        Args:
+            dataset_class: `Dataset` or a subclass of it such as a
+                `DataFit`.
+            qc_run_id: QCoDeS captured run ID.
+            db_name: database name.
+            db_folder: folder containing the database. Default is
+                nt.config["db_folder"].
+            **kwargs: keyword arguments passed to 'dataset_class'.
+
+        Returns:
+            Dataset: instance of 'dataset_class'.
+        """
+        if db_folder is None:
+            db_folder = nt.config["db_folder"]
+
+        nt.set_database(db_name, db_folder=db_folder)
+        qc_dataset = qc.load_by_run_spec(captured_run_id=qc_run_id)
+        try:
+            guid = qc_dataset.guid
+            completed = qc_dataset.completed
+        finally:
+            qc_dataset.conn.close()
+
+        key = (
+            guid,
+            os.path.join(db_folder, db_name),
+            dataset_class,
+            json.dumps(kwargs, sort_keys=True, default=str),
+        )
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key]  # type: ignore
+
+        dataset = dataset_class(
+            qc_run_id, db_name, db_folder=db_folder, **kwargs,
+        )
+        if not completed:
+            return dataset
+
+        self._entries[key] = dataset
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return dataset
+
+    def update_metadata(self, qc_dataset: DataSet) -> None:
+        """Reloads metadata of all cached instances of a QCoDeS dataset.
+        To be called after metadata has been written to it. Instances whose
+        normalization constants changed are removed, as their normalized
+        data is outdated.
+
+        Args:
+            qc_dataset: QCoDeS dataset whose metadata has changed.
+        """
+        for key in [k for k in self._entries if k[0] == qc_dataset.guid]:
+            dataset = self._entries[key]
+            normalization_constants = dict(dataset.normalization_constants)
+            dataset._load_metadata_from_qcodes(qc_dataset)
+            if dataset.normalization_constants != normalization_constants:
+                del self._entries[key]
+
+    def invalidate(self, guid: Optional[str] = None) -> None:
+        """Removes cached instances of a QCoDeS dataset, or all instances if
+        no GUID is given.
+
+        Args:
+            guid: QCoDeS dataset GUID.
+        """
+        if guid is None:
+            self._entries.clear()
+        else:
+            for key in [k for k in self._entries if k[0] == guid]:
+                del self._entries[key]
+
+
+dataset_cache = DatasetCache()
@@ -1,15 +1,24 @@
+import hashlib
+import json
 import logging
 import os
-from typing import Dict, List, Optional
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 import numpy as np
+import numpy.typing as npt
 import scipy.fft as fp
 from scipy.ndimage import generic_gradient_magnitude, sobel
 from skimage.transform import resize
 
 import nanotune as nt
+from nanotune.data.dataset import get_power_spectrum
+from nanotune.utils import save_json_atomically
 
 logger = logging.getLogger(__name__)
+
+PARTIAL_SUFFIX = ".partial.npy"
+CHECKPOINT_SUFFIX = ".checkpoint.json"
 N_2D = nt.config["core"]["standard_shapes"]["2"]
 NT_LABELS = list(dict(nt.config["core"]["labels"]).keys())
 
@@ -83,12 +92,39 @@ def prep_data(
         list: multidimensional list. First sublist is normalized data,
             second Fourier frequencies, third gradient and fourth features.
     """
+    condensed_data = condense_dataset(
+        dataset,
+        category,
+        flip_data=flip_data,
+        readout_method_to_use=readout_method_to_use,
+    )
+    return [condensed_data[:, np.newaxis, :].tolist()]
+
+
+def condense_dataset(
+    dataset: nt.Dataset,
+    category: str,
+    flip_data: bool = False,
+    readout_method_to_use: str = 'transport',
+) -> npt.NDArray[np.float64]:
+    """Prepares data for classification as `prep_data`, but returns a numpy
+    array instead of nested lists.
+
+    Args:
+        dataset: instance of nanotune dataset whose data should be prepared.
+        category: as which category/type of data, e.g. `pinchoff`, `singledot`
+            etc, it should be treated.
+        flip_data: whether data should be flipped.
+        readout_method_to_use: readout method to prepare.
+
+    Returns:
+        np.array: condensed data of shape (number of data types,
+            number of points in standard shape), see `condense_data`.
+    """
     assert category in nt.config["core"]["features"].keys()
     if len(dataset.power_spectrum) == 0:
         dataset.compute_power_spectrum()
 
-    condensed_data_all = []
-
     # for readout_method in dataset.readout_methods.keys():
     signal = dataset.data[readout_method_to_use].values
     if flip_data:
@@ -96,20 +132,10 @@ def prep_data(
     dimension = dataset.dimensions[readout_method_to_use]
 
     shape = tuple(nt.config["core"]["standard_shapes"][str(dimension)])
-    condensed_data = np.empty(
-        (len(nt.config["core"]["data_types"]), 1, np.prod(shape))
-    )
 
-    relevant_features = nt.config["core"]["features"][category]
-    features = []
-
-    if dataset.features:
-        if all(isinstance(i, dict) for i in dataset.features.values()):
-            for feat in relevant_features:
-                features.append(dataset.features[readout_method_to_use][feat])
-        else:
-            for feat in relevant_features:
-                features.append(dataset.features[feat])
+    features = get_relevant_features(
+        dataset.features, category, readout_method_to_use
+    )
 
     # double check if current range is correct:
     if np.max(signal) > 1:
@@ -121,6 +147,108 @@ def prep_data(
         dataset.data[readout_method_to_use].values = signal * 0.3
         dataset.compute_power_spectrum()
 
+    power = dataset.power_spectrum[readout_method_to_use].values
+    return condense_data(signal, power, features, shape)
+
+
+def condense_signal(
+    signal: npt.NDArray[np.float64],
+    category: str,
+    features: Optional[Dict[str, Any]] = None,
+    readout_method_to_use: str = 'transport',
+) -> npt.NDArray[np.float64]:
+    """Prepares a normalized signal held in memory, e.g. a segment of a
+    charge diagram, for classification. The result equals the one of
+    `condense_dataset` applied to a dataset holding the same signal, without
+    requiring the signal to be saved and loaded from a database.
+
+    Args:
+        signal: normalized signal.
+        category: as which category/type of data, e.g. `pinchoff`, `singledot`
+            etc, it should be treated.
+        features: extracted features, either flat or nested by readout method
+            as in nanotune metadata.
+        readout_method_to_use: readout method the signal belongs to.
+
+    Returns:
+        np.array: condensed data of shape (number of data types,
+            number of points in standard shape), see `condense_data`.
+    """
+    assert category in nt.config["core"]["features"].keys()
+    if features is None:
+        features = {}
+    shape = tuple(nt.config["core"]["standard_shapes"][str(signal.ndim)])
+    relevant_features = get_relevant_features(
+        features, category, readout_method_to_use
+    )
+
+    if np.max(signal) > 1:
+        min_curr = np.min(signal)
+        max_curr = np.max(signal)
+        signal = (signal - min_curr) / (max_curr - min_curr)
+        # same as in condense_dataset: frequencies of a signal assumed not to
+        # reach device_max_signal
+        power = get_power_spectrum(signal * 0.3)
+    else:
+        power = get_power_spectrum(signal)
+
+    return condense_data(signal, power, relevant_features, shape)
+
+
+def get_relevant_features(
+    features: Dict[str, Any],
+    category: str,
+    readout_method_to_use: str = 'transport',
+) -> List[Any]:
+    """Selects the features used to classify data of a given category.
+
+    Args:
+        features: extracted features, either flat or nested by readout method
+            as in nanotune metadata.
+        category: category/type of data, e.g. `pinchoff`, `singledot` etc.
+        readout_method_to_use: readout method whose features to select if
+            features are nested.
+
+    Returns:
+        list: values of the category's features, in the order defined in
+            config.json. Empty if no features are given.
+    """
+    relevant_features = nt.config["core"]["features"][category]
+    if not features:
+        return []
+    if all(isinstance(i, dict) for i in features.values()):
+        return [
+            features[readout_method_to_use][feat] for feat in relevant_features
+        ]
+    return [features[feat] for feat in relevant_features]
+
+
+def condense_data(
+    signal: npt.NDArray[np.float64],
+    power_spectrum: npt.NDArray[np.float64],
+    features: Sequence[float],
+    shape: Sequence[int],
+) -> npt.NDArray[np.float64]:
+    """Combines a signal, its gradient, Fourier frequencies and
+    extracted features into a single array, as used in files exported by
+    `export_data`. Signal, gradient and frequencies are resized to 'shape',
+    features are padded with the fill value defined in config.json.
+
+    Args:
+        signal: normalized signal.
+        power_spectrum: power spectrum of the signal.
+        features: extracted features.
+        shape: standard shape to resize to.
+
+    Returns:
+        np.array: condensed data of shape (number of data types,
+            number of points in standard shape). The position of each data
+            type is defined in config.json under `data_types`.
+    """
+    condensed_data = np.empty(
+        (len(nt.config["core"]["data_types"]), np.prod(shape))
+    )
+
     data_resized = resize(
         signal, shape, anti_aliasing=True, mode="edge"
     ).flatten()
@@ -129,13 +257,12 @@ def prep_data(
     gradient_resized = resize(
         grad, shape, anti_aliasing=True, mode="constant"
     ).flatten()
-    power = dataset.power_spectrum[readout_method_to_use].values
     frequencies_resized = resize(
-        power, shape, anti_aliasing=True, mode="constant"
+        power_spectrum, shape, anti_aliasing=True, mode="constant"
     ).flatten()
 
-    pad_width = len(data_resized.flatten()) - len(features)
-    features = np.pad(
+    pad_width = len(data_resized) - len(features)
+    padded_features = np.pad(
         features,
         (0, pad_width),
         "constant",
@@ -143,20 +270,18 @@ def prep_data(
     )
 
     index = nt.config["core"]["data_types"]["signal"]
-    condensed_data[index, 0, :] = data_resized.tolist()
+    condensed_data[index, :] = data_resized
 
     index = nt.config["core"]["data_types"]["frequencies"]
-    condensed_data[index, 0, :] = frequencies_resized.tolist()
+    condensed_data[index, :] = frequencies_resized
 
     index = nt.config["core"]["data_types"]["gradient"]
-    condensed_data[index, 0, :] = gradient_resized.tolist()
+    condensed_data[index, :] = gradient_resized
 
     index = nt.config["core"]["data_types"]["features"]
-    condensed_data[index, 0, :] = features
+    condensed_data[index, :] = padded_features
 
-    condensed_data_all.append(condensed_data.tolist())
-
-    return condensed_data_all
+    return condensed_data
 
 
 def export_data(
@@ -168,6 +293,8 @@ def export_data(
     filename: Optional[str] = None,
     db_folder: Optional[str] = None,
     readout_method_to_use: str = 'transport',
+    n_workers: int = 1,
+    chunk_size: int = 256,
 ) -> None:
     """Exports condensed data to a numpy file in a format used by
     nanotune's Classifier.
@@ -180,6 +307,13 @@ def export_data(
     first array[0, :, :] are all signals, array[1, :, :] the frequencies,
     array is defined in config.json under `data_types`.
 
+    Relevant run IDs are collected first, allowing the output to be
+    preallocated in a memory-mapped file next to the final one. Datasets are
+    then prepared in chunks, optionally by a pool of worker processes each
+    using their own database connections. Completed chunks are recorded in a
+    checkpoint file, and an interrupted export is resumed when called again
+    with the same arguments. Datasets which can not be prepared are skipped.
+
     Args:
         category: nt.config['core']['features'].keys()
         db_names: names of databases whose data should be exported.
@@ -194,6 +328,9 @@ def export_data(
         db_folder: folder where databases are located.
         readout_method_to_use: which readout method to use if more than one
             is available. Default is 'transport'.
+        n_workers: number of worker processes. Data is prepared in the
+            current process if set to 1.
+        chunk_size: number of datasets prepared by a worker at a time.
     """
     assert isinstance(db_names, list)
     if category not in list(nt.config['core']['features'].keys()):
@@ -216,9 +353,6 @@ def export_data(
         stages = [category]
 
     shape = tuple(nt.config["core"]["standard_shapes"][str(dim)])
-    condensed_data_all = np.empty(
-        (len(nt.config["core"]["data_types"]), 0, np.prod(shape))
-    )
 
     relevant_ids: Dict[str, List[int]] = {}
     for db_name in db_names:
@@ -237,58 +371,214 @@ def export_data(
                 logger.error(msg)
                 break
 
-    labels_exp = []
+    datasets_to_export: List[Tuple[str, int]] = []
     for db_name, dataids in relevant_ids.items():
-        nt.set_database(db_name, db_folder)
         skip_us = []
         if skip_ids is not None:
             try:
                 skip_us = skip_ids[db_name]
             except KeyError:
                 logger.warning("No data IDs to skip in {}.".format(db_name))
+        datasets_to_export += [
+            (db_name, d_id) for d_id in dataids if d_id not in skip_us
+        ]
+
+    if filename is None:
+        filename = "_".join(stages)
+    if not filename.endswith(".npy"):
+        filename += ".npy"
+    path = os.path.join(db_folder, filename)
+    partial_path = path[:-len(".npy")] + PARTIAL_SUFFIX
+    checkpoint_path = path + CHECKPOINT_SUFFIX
+
+    rows_per_dataset = 2 if add_flipped_data else 1
+    checkpoint: Dict[str, Any] = {
+        "category": category,
+        "datasets_digest": hashlib.sha256(
+            json.dumps(datasets_to_export).encode()
+        ).hexdigest(),
+        "add_flipped_data": add_flipped_data,
+        "readout_method_to_use": readout_method_to_use,
+        "chunk_size": chunk_size,
+    }
+    completed_chunks: Dict[str, List[int]] = {}
+    if os.path.exists(checkpoint_path) and os.path.exists(partial_path):
+        previous, completed_chunks = _read_checkpoint(checkpoint_path)
+        if previous != checkpoint:
+            logger.error(
+                f"Checkpoint {checkpoint_path} was written with different "
+                + "arguments or databases have changed. Remove it to "
+                + "start over."
+            )
+            raise ValueError
+        logger.info(f"Resuming export to {path}.")
+    else:
+        output = np.lib.format.open_memmap(
+            partial_path,
+            mode="w+",
+            dtype=np.float64,
+            shape=(
+                len(nt.config["core"]["data_types"]),
+                rows_per_dataset * len(datasets_to_export),
+                int(np.prod(shape)) + 1,
+            ),
+        )
+        del output
+        save_json_atomically(checkpoint, checkpoint_path)
+
+    starts = range(0, len(datasets_to_export), chunk_size)
+    remaining = [
+        (str(chunk_idx), start)
+        for chunk_idx, start in enumerate(starts)
+        if str(chunk_idx) not in completed_chunks
+    ]
+
+    def record_chunk(chunk_idx: str, exported_rows: List[int]) -> None:
+        completed_chunks[chunk_idx] = exported_rows
+        _append_to_checkpoint(checkpoint_path, chunk_idx, exported_rows)
+        logger.info(
+            f"Exported {len(completed_chunks)} of {len(starts)} chunks "
+            + f"to {path}."
+        )
 
-        for d_id in dataids:
-            if d_id not in skip_us:
-                try:
-                    df = nt.Dataset(d_id, db_name, db_folder=db_folder)
-                    condensed_data = prep_data(
+    chunk_args = [
+        (
+            category,
+            datasets_to_export[start:start + chunk_size],
+            rows_per_dataset * start,
+            db_folder,
+            add_flipped_data,
+            readout_method_to_use,
+            partial_path,
+        )
+        for _, start in remaining
+    ]
+    if n_workers == 1:
+        for (chunk_idx, _), args in zip(remaining, chunk_args):
+            record_chunk(chunk_idx, _export_chunk(*args))
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            futures = {
+                executor.submit(_export_chunk, *args): chunk_idx
+                for (chunk_idx, _), args in zip(remaining, chunk_args)
+            }
+            for future in as_completed(futures):
+                record_chunk(futures[future], future.result())
+
+    exported_rows = sorted(
+        row for rows in completed_chunks.values() for row in rows
+    )
+    partial_output = np.load(partial_path, mmap_mode="r")
+    output = np.lib.format.open_memmap(
+        path,
+        mode="w+",
+        dtype=np.float64,
+        shape=(
+            partial_output.shape[0],
+            len(exported_rows),
+            partial_output.shape[2],
+        ),
+    )
+    for start in range(0, len(exported_rows), chunk_size):
+        rows = exported_rows[start:start + chunk_size]
+        output[:, start:start + len(rows), :] = partial_output[:, rows, :]
+    output.flush()
+    del output, partial_output
+
+    os.remove(partial_path)
+    os.remove(checkpoint_path)
+
+
+def _export_chunk(
+    category: str,
+    datasets: List[Tuple[str, int]],
+    first_row: int,
+    db_folder: str,
+    add_flipped_data: bool,
+    readout_method_to_use: str,
+    partial_path: str,
+) -> List[int]:
+    """Prepares datasets for `export_data` and writes them, including their
+    labels, into the memory-mapped numpy file at 'partial_path', starting at
+    row 'first_row'.
+
+    Returns:
+        list: rows written successfully.
+    """
+    output = np.load(partial_path, mmap_mode="r+")
+    row = first_row
+    exported_rows = []
+    for db_name, d_id in datasets:
+        n_rows = 2 if add_flipped_data else 1
+        try:
+            df = nt.Dataset(d_id, db_name, db_folder=db_folder)
+            condensed_data = [
+                condense_dataset(
+                    df,
+                    category,
+                    readout_method_to_use=readout_method_to_use,
+                )
+            ]
+            if add_flipped_data:
+                condensed_data.append(
+                    condense_dataset(
                         df,
                         category,
-                        readout_method_to_use=readout_method_to_use)
-                    new_label = export_label(df.ml_label, df.quality, category)
-                    condensed_data_all = np.append(
-                        condensed_data_all, condensed_data[0], axis=1
+                        flip_data=True,
+                        readout_method_to_use=readout_method_to_use,
                     )
-                    labels_exp.append(new_label)
-
-                    if add_flipped_data:
-                        condensed_data = prep_data(
-                            df, category, flip_data=True,
-                            readout_method_to_use=readout_method_to_use
-                        )
-                        new_label = export_label(
-                            df.ml_label, df.quality, category
-                        )
-                        condensed_data_all = np.append(
-                            condensed_data_all, condensed_data[0], axis=1
-                        )
-                        labels_exp.append(new_label)
-                except (IndexError, ValueError, TypeError) as i_err:
-                    print(db_name)
-                    print(d_id)
-                    print(i_err)
-
-    n = list(condensed_data_all.shape)
-    n[-1] += 1
+                )
+            new_label = export_label(df.ml_label, df.quality, category)
+            for i_row, data in enumerate(condensed_data):
+                output[:, row + i_row, :-1] = data
+                output[:, row + i_row, -1] = new_label
+            exported_rows += list(range(row, row + n_rows))
+        except (IndexError, ValueError, TypeError) as i_err:
+            logger.warning(
+                f"Unable to export dataset {d_id} of {db_name}: {i_err}"
+            )
+        row += n_rows
+
+    output.flush()
+    del output
+    return exported_rows
+
+
+def _append_to_checkpoint(
+    checkpoint_path: str,
+    chunk_idx: str,
+    exported_rows: List[int],
+) -> None:
+    """Appends a completed chunk and its exported rows to the checkpoint
+    file as a separate line, leaving previously recorded chunks untouched.
+    """
+    with open(checkpoint_path, "a") as f:
+        f.write(
+            "\n" + json.dumps({"chunk": chunk_idx, "rows": exported_rows})
+        )
 
-    data_w_labels = np.zeros(n)
-    data_w_labels[:, :, -1] = labels_exp
-    data_w_labels[:, :, :-1] = condensed_data_all
 
-    if filename is None:
-        filename = "_".join(stages)
-    path = os.path.join(db_folder, filename)
-    np.save(path, data_w_labels)
+def _read_checkpoint(
+    checkpoint_path: str,
+) -> Tuple[Dict[str, Any], Dict[str, List[int]]]:
+    """Reads the export arguments and completed chunks written to a
+    checkpoint file by `export_data`. A chunk whose line was only partially
+    written when the export was interrupted is considered not completed.
+
+    Returns:
+        dict: export arguments.
+        dict: mapping chunk indices to the rows exported by them.
+    """
+    with open(checkpoint_path, "r") as f:
+        lines = f.read().splitlines()
+    completed_chunks: Dict[str, List[int]] = {}
+    for line in lines[1:]:
+        try:
+            chunk = json.loads(line)
+        except json.JSONDecodeError:
+            break
+        completed_chunks[chunk["chunk"]] = chunk["rows"]
+    return json.loads(lines[0]), completed_chunks
 
 
 def correct_normalizations(
@@ -0,0 +1,562 @@
+import json
+import logging
+import os
+import sqlite3
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.request import pathname2url
+
+from qcodes.dataset.descriptions.versioning import serialization as serial
+
+import nanotune as nt
+
+logger = logging.getLogger(__name__)
+
+CATALOG_FILE_NAME = "nt_label_catalog.sqlite"
+CATALOG_VERSION = 1
+# maximum number of run IDs per query, below sqlite's limit of parameters
+_MAX_QUERY_PARAMETERS = 500
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    """Catalog entry of a single QCoDeS dataset.
+
+    Attributes:
+        db_name: name of database containing the dataset.
+        db_folder: folder containing the database.
+        run_id: QCoDeS run ID.
+        captured_run_id: QCoDeS captured run ID.
+        guid: QCoDeS GUID.
+        labels: labels set to 1, e.g. ('pinchoff', 'good').
+        quality: value of the 'good' label, None if not labelled.
+        device_name: name of the device measured, as saved in nanotune
+            metadata.
+        dimensions: largest number of setpoints any measured parameter
+            depends on.
+    """
+    db_name: str
+    db_folder: str
+    run_id: int
+    captured_run_id: int
+    guid: str
+    labels: Tuple[str, ...]
+    quality: Optional[int]
+    device_name: Optional[str]
+    dimensions: Optional[int]
+
+    @property
+    def db_path(self) -> str:
+        """Path of database containing the dataset."""
+        return os.path.join(self.db_folder, self.db_name)
+
+
+class LabelCatalog:
+    """Sidecar index of machine learning labels of datasets spread over many
+    QCoDeS databases.
+
+    Selecting labelled data with `get_dataIDs` requires opening each database
+    and scanning its entire `runs` table. The catalog holds one row per
+    dataset in a separate sqlite file, keyed by database, run ID, captured
+    run ID and GUID, with integer label columns, the dataset's quality,
+    device name and dimensions, and indexes on labels and GUIDs. Queries
+    across all databases are thus answered from the catalog alone and
+    datasets are located by GUID without opening any database.
+
+    The catalog is brought up to date by `refresh`, which only reads
+    databases modified since they were last indexed. Of those, only label
+    columns are read for datasets already indexed, while run descriptions
+    and nanotune metadata are parsed for new datasets only. Databases are
+    opened read-only.
+
+    Attributes:
+        db_folders: folders whose databases, i.e. files ending in '.db', are
+            indexed.
+        catalog_path: path of the catalog file.
+        labels: label columns held, as defined in nanotune's configuration
+            under 'labels'.
+    """
+
+    def __init__(
+        self,
+        db_folders: Optional[Sequence[str]] = None,
+        catalog_path: Optional[str] = None,
+    ) -> None:
+        """Opens the catalog, creating it if it does not exist. Catalogs
+        created with a different version or set of labels are emptied and
+        indexed from scratch by the next `refresh`.
+
+        Args:
+            db_folders: folders containing databases to index. Default is
+                nt.config["db_folder"].
+            catalog_path: path of the catalog file. Default is a file named
+                `CATALOG_FILE_NAME` in the first folder of db_folders.
+        """
+        if db_folders is None:
+            db_folders = [nt.config["db_folder"]]
+        if isinstance(db_folders, str):
+            db_folders = [db_folders]
+        self.db_folders = [os.path.abspath(str(f)) for f in db_folders]
+        if catalog_path is None:
+            catalog_path = os.path.join(self.db_folders[0], CATALOG_FILE_NAME)
+        self.catalog_path = str(catalog_path)
+        self.labels = list(dict(nt.config["core"]["labels"]).keys())
+
+        self._conn = sqlite3.connect(self.catalog_path)
+        try:
+            self._create_tables()
+        except Exception:
+            self._conn.close()
+            raise
+
+    def __enter__(self) -> "LabelCatalog":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def close(self) -> None:
+        """Closes the connection to the catalog file."""
+        self._conn.close()
+
+    def refresh(
+        self,
+        db_paths: Optional[Iterable[str]] = None,
+    ) -> List[str]:
+        """Indexes new and modified databases and removes databases which no
+        longer exist. A database counts as modified if the modification time
+        or size of its file or write-ahead log has changed.
+
+        Args:
+            db_paths: databases to index in addition to those in
+                `db_folders`, e.g. databases in other folders.
+
+        Returns:
+            list: paths of databases (re)indexed.
+        """
+        paths = set(self._find_databases())
+        if db_paths is not None:
+            paths.update(os.path.abspath(str(p)) for p in db_paths)
+
+        indexed = {
+            db_path: (db_id, (mtime_ns, size, wal_mtime_ns))
+            for db_id, db_path, mtime_ns, size, wal_mtime_ns
+            in self._conn.execute(
+                "SELECT db_id, db_path, mtime_ns, size, wal_mtime_ns "
+                "FROM databases"
+            )
+        }
+        with self._conn:
+            for db_path, (db_id, _) in indexed.items():
+                if not os.path.isfile(db_path):
+                    self._conn.execute(
+                        "DELETE FROM runs WHERE db_id=?", (db_id,))
+                    self._conn.execute(
+                        "DELETE FROM databases WHERE db_id=?", (db_id,))
+
+        updated = []
+        for db_path in sorted(paths):
+            if not os.path.isfile(db_path):
+                logger.warning(f"Database {db_path} not found.")
+                continue
+            signature = _get_file_signature(db_path)
+            if db_path in indexed and indexed[db_path][1] == signature:
+                continue
+            self._index_database(db_path, signature)
+            updated.append(db_path)
+
+        return updated
+
+    def find(
+        self,
+        category: Optional[str] = None,
+        quality: Optional[int] = None,
+        device_name: Optional[str] = None,
+        dimensions: Optional[int] = None,
+        unlabelled: bool = False,
+    ) -> List[CatalogEntry]:
+        """Returns catalog entries of all datasets matching all criteria
+        given, ordered by database and run ID.
+
+        Args:
+            category: label set to 1, e.g. `pinchoff` or `doubledot`.
+            quality: value of the 'good' label, 1==good, 0==poor.
+            device_name: name of the device measured.
+            dimensions: dimensionality of the measurement.
+            unlabelled: whether to only return datasets without a quality,
+                as `get_unlabelled_ids` does.
+
+        Returns:
+            list: matching catalog entries.
+        """
+        conditions = []
+        parameters: List[Any] = []
+        if category is not None:
+            conditions.append(f"{self._label_column(category)}=1")
+        if quality is not None:
+            conditions.append("good=?")
+            parameters.append(quality)
+        if unlabelled:
+            conditions.append("good IS NULL")
+        if device_name is not None:
+            conditions.append("device_name=?")
+            parameters.append(device_name)
+        if dimensions is not None:
+            conditions.append("dimensions=?")
+            parameters.append(dimensions)
+
+        return self._select_entries(conditions, parameters)
+
+    def get_dataIDs(
+        self,
+        category: str,
+        quality: Optional[int] = None,
+        get_run_ids: bool = True,
+    ) -> Dict[str, List[int]]:
+        """Returns QCoDeS run IDs of datasets belonging to a specific category
+        of measurements in all databases indexed. The catalog counterpart of
+        `nanotune.data.databases.get_dataIDs`.
+
+        Args:
+            category: measurement type/category we are looking for. E.g.
+                `pinchoff`, `singledot` or `doubledot`.
+            quality: Optional if a specific quality is required. 1==good,
+                0==poor.
+            get_run_ids: whether to return run IDs. Returns captured run IDs
+                if False.
+
+        Returns:
+            dict: mapping database paths onto lists of QCoDeS run IDs.
+        """
+        return _group_ids(self.find(category, quality=quality), get_run_ids)
+
+    def get_unlabelled_ids(
+        self,
+        get_run_id: bool = True,
+    ) -> Dict[str, List[int]]:
+        """Returns QCoDeS run IDs of datasets without a value in the `good`
+        column in all databases indexed. The catalog counterpart of
+        `nanotune.data.databases.get_unlabelled_ids`.
+
+        Args:
+            get_run_id: whether to return run IDs. Returns captured run IDs if
+                False.
+
+        Returns:
+            dict: mapping database paths onto lists of QCoDeS run IDs.
+        """
+        return _group_ids(self.find(unlabelled=True), get_run_id)
+
+    def locate(self, guid: str) -> Optional[CatalogEntry]:
+        """Finds a dataset by its GUID without opening any database.
+
+        Args:
+            guid: QCoDeS GUID.
+
+        Returns:
+            CatalogEntry: entry of the dataset, None if not indexed.
+        """
+        entries = self._select_entries(["guid=?"], [guid])
+        if len(entries) > 1:
+            logger.warning(
+                f"Dataset {guid} found in several databases, "
+                f"returning the one in {entries[0].db_path}."
+            )
+        return entries[0] if entries else None
+
+    def _label_column(self, label: str) -> str:
+        """Validates a label before it is used as a column name."""
+        if label not in self.labels:
+            logger.error(
+                f"Unknown label {label}. Valid labels are {self.labels}."
+            )
+            raise ValueError
+        return label
+
+    def _create_tables(self) -> None:
+        """Creates tables and indexes, dropping existing ones created with a
+        different catalog version or set of labels."""
+        info = {"version": str(CATALOG_VERSION),
+                "labels": json.dumps(self.labels)}
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS catalog_info "
+                "(key TEXT PRIMARY KEY, value TEXT)"
+            )
+            stored_info = dict(
+                self._conn.execute("SELECT key, value FROM catalog_info")
+            )
+            if stored_info and stored_info != info:
+                logger.info("Label catalog outdated, rebuilding it.")
+                self._conn.execute("DROP TABLE IF EXISTS runs")
+                self._conn.execute("DROP TABLE IF EXISTS databases")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO catalog_info VALUES (?, ?)",
+                info.items(),
+            )
+
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS databases ("
+                "db_id INTEGER PRIMARY KEY, "
+                "db_path TEXT UNIQUE NOT NULL, "
+                "mtime_ns INTEGER, size INTEGER, wal_mtime_ns INTEGER)"
+            )
+            label_columns = "".join(
+                f"{label} INTEGER, " for label in self.labels
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS runs ("
+                "db_id INTEGER NOT NULL, "
+                "run_id INTEGER NOT NULL, "
+                "captured_run_id INTEGER, "
+                "guid TEXT NOT NULL, "
+                f"{label_columns}"
+                "device_name TEXT, "
+                "dimensions INTEGER, "
+                "PRIMARY KEY (db_id, run_id))"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS runs_guid ON runs (guid)")
+            for label in self.labels:
+                columns = label if label == "good" else f"{label}, good"
+                self._conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS runs_{label} "
+                    f"ON runs ({columns})"
+                )
+
+    def _find_databases(self) -> List[str]:
+        """Returns paths of all databases in `db_folders`."""
+        paths: List[str] = []
+        for db_folder in self.db_folders:
+            if not os.path.isdir(db_folder):
+                logger.warning(f"Database folder {db_folder} not found.")
+                continue
+            paths.extend(
+                os.path.join(db_folder, file_name)
+                for file_name in os.listdir(db_folder)
+                if file_name.endswith(".db")
+            )
+        return paths
+
+    def _index_database(
+        self,
+        db_path: str,
+        signature: Tuple[int, int, int],
+    ) -> None:
+        """Replaces the catalog rows of a database, reusing device names and
+        dimensions of datasets indexed previously."""
+        row = self._conn.execute(
+            "SELECT db_id FROM databases WHERE db_path=?", (db_path,)
+        ).fetchone()
+        known: Dict[int, Tuple[str, Optional[str], Optional[int]]] = {}
+        if row is not None:
+            known = {
+                run_id: (guid, device_name, dimensions)
+                for run_id, guid, device_name, dimensions in self._conn.execute(
+                    "SELECT run_id, guid, device_name, dimensions FROM runs "
+                    "WHERE db_id=?",
+                    (row[0],),
+                )
+            }
+
+        rows = _read_runs(db_path, self.labels, known)
+        with self._conn:
+            if row is None:
+                db_id = self._conn.execute(
+                    "INSERT INTO databases (db_path) VALUES (?)", (db_path,)
+                ).lastrowid
+            else:
+                db_id = row[0]
+                self._conn.execute("DELETE FROM runs WHERE db_id=?", (db_id,))
+            self._conn.execute(
+                "UPDATE databases SET mtime_ns=?, size=?, wal_mtime_ns=? "
+                "WHERE db_id=?",
+                (*signature, db_id),
+            )
+            placeholders = ", ".join(["?"] * (len(self.labels) + 6))
+            self._conn.executemany(
+                f"INSERT INTO runs VALUES ({placeholders})",
+                [(db_id, *r) for r in rows],
+            )
+
+    def _select_entries(
+        self,
+        conditions: Sequence[str],
+        parameters: Sequence[Any],
+    ) -> List[CatalogEntry]:
+        """Returns catalog entries of datasets matching all SQL conditions."""
+        label_columns = ", ".join(f"runs.{label}" for label in self.labels)
+        sql = (
+            "SELECT databases.db_path, runs.run_id, runs.captured_run_id, "
+            f"runs.guid, {label_columns}, runs.device_name, runs.dimensions "
+            "FROM runs JOIN databases ON runs.db_id=databases.db_id"
+        )
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY databases.db_path, runs.run_id"
+
+        entries = []
+        n_labels = len(self.labels)
+        for db_path, run_id, captured_run_id, guid, *values in (
+            self._conn.execute(sql, parameters)
+        ):
+            label_values = dict(zip(self.labels, values[:n_labels]))
+            device_name, dimensions = values[n_labels:]
+            entries.append(
+                CatalogEntry(
+                    db_name=os.path.basename(db_path),
+                    db_folder=os.path.dirname(db_path),
+                    run_id=run_id,
+                    captured_run_id=captured_run_id,
+                    guid=guid,
+                    labels=tuple(
+                        label for label, value in label_values.items()
+                        if value == 1
+                    ),
+                    quality=label_values.get("good"),
+                    device_name=device_name,
+                    dimensions=dimensions,
+                )
+            )
+        return entries
+
+
+def _get_file_signature(db_path: str) -> Tuple[int, int, int]:
+    """Returns modification time and size of a database file and the
+    modification time of its write-ahead log, 0 if there is none."""
+    stat = os.stat(db_path)
+    wal_path = db_path + "-wal"
+    wal_mtime_ns = 0
+    if os.path.isfile(wal_path):
+        wal_mtime_ns = os.stat(wal_path).st_mtime_ns
+    return stat.st_mtime_ns, stat.st_size, wal_mtime_ns
+
+
+def _read_runs(
+    db_path: str,
+    labels: Sequence[str],
+    known: Dict[int, Tuple[str, Optional[str], Optional[int]]],
+) -> List[Tuple[Any, ...]]:
+    """Reads catalog rows of all datasets in a database, without the
+    database's catalog ID. Run descriptions and nanotune metadata are only
+    read for datasets not in known, which maps run IDs onto GUID, device name
+    and dimensions of datasets indexed before.
+    """
+    conn = sqlite3.connect(f"file:{pathname2url(db_path)}?mode=ro", uri=True)
+    try:
+        columns = [
+            column[1] for column in conn.execute("PRAGMA table_info(runs)")
+        ]
+        if not columns:
+            return []
+        captured_column = (
+            "captured_run_id" if "captured_run_id" in columns else "run_id"
+        )
+        label_columns = ", ".join(
+            f'"{label}"' if label in columns else "NULL" for label in labels
+        )
+        runs = conn.execute(
+            f"SELECT run_id, {captured_column}, guid, {label_columns} "
+            "FROM runs ORDER BY run_id"
+        ).fetchall()
+
+        new_run_ids = [
+            run[0] for run in runs
+            if run[0] not in known or known[run[0]][0] != run[2]
+        ]
+        details = _read_run_details(conn, new_run_ids, nt.meta_tag in columns)
+    finally:
+        conn.close()
+
+    rows = []
+    for run_id, captured_run_id, guid, *values in runs:
+        if run_id in details:
+            device_name, dimensions = details[run_id]
+        else:
+            device_name, dimensions = known[run_id][1:]
+        rows.append((
+            run_id,
+            captured_run_id,
+            guid,
+            *[_to_label_value(value) for value in values],
+            device_name,
+            dimensions,
+        ))
+    return rows
+
+
+def _read_run_details(
+    conn: sqlite3.Connection,
+    run_ids: Sequence[int],
+    has_nt_metadata: bool,
+) -> Dict[int, Tuple[Optional[str], Optional[int]]]:
+    """Returns device name and dimensions of datasets, parsed from nanotune
+    metadata and QCoDeS run descriptions."""
+    nt_metadata_column = f'"{nt.meta_tag}"' if has_nt_metadata else "NULL"
+    details = {}
+    for start in range(0, len(run_ids), _MAX_QUERY_PARAMETERS):
+        chunk = run_ids[start:start + _MAX_QUERY_PARAMETERS]
+        placeholders = ", ".join(["?"] * len(chunk))
+        for run_id, run_description, nt_metadata in conn.execute(
+            f"SELECT run_id, run_description, {nt_metadata_column} "
+            f"FROM runs WHERE run_id IN ({placeholders})",
+            chunk,
+        ):
+            details[run_id] = (
+                _get_device_name(nt_metadata),
+                _get_dimensions(run_description),
+            )
+    return details
+
+
+def _get_device_name(nt_metadata: Optional[str]) -> Optional[str]:
+    """Returns the device name saved in nanotune metadata, if any."""
+    if not nt_metadata:
+        return None
+    try:
+        return json.loads(nt_metadata).get("device_name")
+    except (ValueError, AttributeError):
+        return None
+
+
+def _get_dimensions(run_description: Optional[str]) -> Optional[int]:
+    """Returns the largest number of setpoints any parameter of a run
+    description depends on, None if no parameter depends on setpoints."""
+    if not run_description:
+        return None
+    try:
+        describer = serial.from_json_to_current(run_description)
+    except Exception:
+        logger.warning("Unable to parse run description.")
+        return None
+    dependencies = describer.interdeps.dependencies
+    if not dependencies:
+        return None
+    return max(len(setpoints) for setpoints in dependencies.values())
+
+
+def _to_label_value(value: Any) -> Optional[int]:
+    """Converts a label saved as number or string, e.g. 1 or '1', to an
+    integer."""
+    if value is None:
+        return None
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _group_ids(
+    entries: Sequence[CatalogEntry],
+    get_run_ids: bool,
+) -> Dict[str, List[int]]:
+    """Groups run IDs or captured run IDs of entries by database path."""
+    ids: Dict[str, List[int]] = {}
+    for entry in entries:
+        ids.setdefault(entry.db_path, []).append(
+            entry.run_id if get_run_ids else entry.captured_run_id
+        )
+    return ids
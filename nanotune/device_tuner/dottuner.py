@@ -284,8 +284,8 @@ class DotTuner(Tuner):
             device (nt.Device): device to tune.
             dot_segments (Dict[int, Any]): dot segment information, e.g.
                 compiled by DotFit and stored in
-                `tuningresult.ml_result['dot_segments']`. Maps run ids of
-                segmented data onto a dict with "predicted_regime" and
+                `tuningresult.ml_result['dot_segments']`. Maps segment
+                indices onto a dict with "predicted_regime" and
                 "voltage_ranges" keys.
             gate_ids (Sequence[int]): IDs of gates to sweep, default is
                 DoubleDotLayout.plungers()
@@ -295,9 +295,10 @@ class DotTuner(Tuner):
                 smaller number than for other measurements.
         """
         logger.info("Take high resolution of good charge diagram segments.")
-        for r_id in dot_segments.keys():
-            if dot_segments[r_id]["predicted_regime"] == target_state.value:
-                v_rgs = dot_segments[r_id]["voltage_ranges"]
+        for segment_idx in dot_segments.keys():
+            segment = dot_segments[segment_idx]
+            if segment["predicted_regime"] == target_state.value:
+                v_rgs = segment["voltage_ranges"]
                 for g_id, v_range in zip(gate_ids, v_rgs):
                     device.current_valid_ranges({g_id: v_range})
                 _ = self.get_charge_diagram(
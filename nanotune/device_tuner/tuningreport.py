@@ -156,7 +156,12 @@ class TuningReport:
             #     except KeyError:
             #         s = ''
             #     self.comments[qc_run_id] = 'Classified as poor result.\n' + s
-            ds = Dataset(qc_run_id, self.db_name)
+            ds = Dataset(
+                qc_run_id,
+                self.db_name,
+                db_folder=self.db_folder,
+                metadata_only=True,
+            )
             device_name = ds.device_name
             f_folder = os.path.join(self.db_folder, "tuning_results", device_name)
             # for qc_run_id in flatten_list(value):
@@ -164,7 +169,7 @@ class TuningReport:
 
             # filename = stage + '_fit_ds'
             # filename += str(qc_run_id) + '.png'
-            filename = os.path.join(f_folder, str(ds.ds.guid) + ".png")
+            filename = os.path.join(f_folder, str(ds.guid) + ".png")
 
             self._files[str(qc_run_id)] = filename
 
@@ -10,6 +10,7 @@ import qcodes as qc
 
 import nanotune as nt
 from nanotune.data.dataset import default_coord_names
+from nanotune.data.dataset_cache import dataset_cache
 
 logger = logging.getLogger(__name__)
 AxesTuple = Tuple[matplotlib.axes.Axes, matplotlib.colorbar.Colorbar]
@@ -99,3 +100,4 @@ class DataFit(ABC, nt.Dataset):
             nt_meta = {}
         nt_meta["features"] = self.features
         ds.add_metadata(nt.meta_tag, json.dumps(nt_meta))
+        dataset_cache.update_metadata(ds)
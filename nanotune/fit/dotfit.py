@@ -3,7 +3,7 @@ import json
 import logging
 import math
 import os
-from itertools import combinations
+from concurrent.futures import Future, ThreadPoolExecutor
 from math import floor
 from typing import Any, Dict, List, Optional, Tuple, Union
 import numpy.typing as npt
@@ -13,10 +13,15 @@ import numpy as np
 import qcodes as qc
 import xarray as xr
 from mpl_toolkits.axes_grid1 import make_axes_locatable
+from qcodes.dataset.experiment_container import load_experiment
 from qcodes.dataset.measurements import Measurement
+from qcodes.dataset.sqlite.connection import atomic
+from qcodes.dataset.sqlite.database import connect
+from qcodes.dataset.sqlite.queries import get_last_experiment
 from scipy.ndimage import measurements as scm
 from scipy.ndimage.filters import maximum_filter
 from scipy.ndimage.morphology import binary_erosion, generate_binary_structure
+from scipy.spatial import cKDTree
 
 import nanotune as nt
 from nanotune.data.dataset import default_coord_names
@@ -40,6 +45,8 @@ default_dot_fit_parameters: Dict[str, Dict[str, Union[int, float]]] = {
         "dot_signal_threshold": 0.1,
     },
 }
+# a single writer keeps segments saved in the background in submission order
+_segment_writer = ThreadPoolExecutor(max_workers=1)
 
 
 class DotFit(DataFit):
@@ -136,6 +143,24 @@ class DotFit(DataFit):
             use_raw_data: whether to segment raw data. Normalized data is used
                 if not.
         """
+        self.segmented_data = self.get_segments(use_raw_data=use_raw_data)
+
+    def get_segments(
+        self,
+        use_raw_data: bool = False,
+    ) -> List[xr.Dataset]:
+        """Segments a charge diagram into sub-regions without retaining them.
+        The signals of the sub-regions are views of the diagram's data, no
+        data is copied.
+
+        Args:
+            use_raw_data: whether to segment raw data. Normalized data is used
+                if not.
+
+        Returns:
+            list: one xarray dataset per sub-region, holding all readout
+                methods.
+        """
         if use_raw_data:
             data = self.raw_data
             coord_names = [str(it) for it in list(self.raw_data.coords)]
@@ -145,7 +170,7 @@ class DotFit(DataFit):
             coord_names = default_coord_names["voltage"]
             readout_params = list(self.readout_methods.keys())
 
-        self.segmented_data = []
+        segmented_data: List[xr.Dataset] = []
 
         for read_meth in readout_params:
             orig_v_x = data[read_meth][coord_names[0]].values
@@ -167,9 +192,9 @@ class DotFit(DataFit):
                 logger.warning(f"Dotfit {self.guid}: Mesh resolution too low.")
 
             n_mesh = [np.max([1, n_x]), np.max([1, n_y])]
-            if not self.segmented_data:
+            if not segmented_data:
                 empty = [xr.Dataset() for i in range(np.prod(n_mesh))]
-                self.segmented_data = empty
+                segmented_data = empty
             dind_x, indx_remain = divmod(orig_shape_x, n_mesh[0])
             dind_y, indy_remain = divmod(orig_shape_y, n_mesh[1])
             n_total = 0
@@ -199,7 +224,9 @@ class DotFit(DataFit):
                     )
                     seg_xrset = xr.Dataset({read_meth: seg_xar})
 
-                    self.segmented_data[n_total - 1].update(seg_xrset)
+                    segmented_data[n_total - 1].update(seg_xrset)
+
+        return segmented_data
 
     def save_segmented_data_return_info(
         self,
@@ -212,94 +239,195 @@ class DotFit(DataFit):
             dict: nested, with the data ID as key on the first level, readout
                 method and `voltage_ranges` on the second.
         """
+        if not self.segmented_data:
+            self.prepare_segmented_data(use_raw_data=True)
+
+        return self._save_segments(
+            self.segmented_data, segment_db_name, segment_db_folder
+        )
+
+    def save_segmented_data_async(
+        self,
+        segment_db_name: str,
+        segment_db_folder: Optional[str] = None,
+    ) -> "Future[Dict[int, Dict[str, Any]]]":
+        """Saves raw data segments in a background thread, e.g. for provenance
+        when segments are classified in memory. Segments are written in the
+        order in which they are submitted, using connections of their own
+        instead of switching the default database.
+
+        Returns:
+            Future: resolving to the segment info returned by
+                `save_segmented_data_return_info`.
+        """
+        segments = self.get_segments(use_raw_data=True)
+        future = _segment_writer.submit(
+            self._save_segments, segments, segment_db_name, segment_db_folder
+        )
+        future.add_done_callback(self._log_failed_segment_save)
+
+        return future
+
+    def get_segments_info(
+        self,
+        segments: Optional[List[xr.Dataset]] = None,
+    ) -> Dict[int, Dict[str, Any]]:
+        """Determines the voltage ranges spanned by data segments, without
+        saving them.
+
+        Args:
+            segments: data segments as returned by `get_segments`. The
+                `segmented_data` attribute is used if not specified.
+
+        Returns:
+            dict: nested, with the segment index as key on the first level and
+                `voltage_ranges` on the second.
+        """
+        if segments is None:
+            segments = self.segmented_data
+
+        return {
+            idx: {"voltage_ranges": _get_voltage_ranges(segment)}
+            for idx, segment in enumerate(segments)
+        }
+
+    def _save_segments(
+        self,
+        segments: List[xr.Dataset],
+        segment_db_name: str,
+        segment_db_folder: Optional[str] = None,
+    ) -> Dict[int, Dict[str, Any]]:
+        """Saves each segment in a new dataset, connecting to the original and
+        segment databases explicitly. Neither nanotune's nor QCoDeS' default
+        database is changed.
+        """
         if segment_db_folder is None:
             segment_db_folder = nt.config["db_folder"]
+        if segment_db_name[-2:] != "db":
+            segment_db_name += ".db"
+        segment_db_path = os.path.join(segment_db_folder, segment_db_name)
 
-        if not self.segmented_data:
-            self.prepare_segmented_data(use_raw_data=True)
-        if not os.path.isfile(os.path.join(segment_db_folder, segment_db_name)):
-            ds = qc.load_by_run_spec(captured_run_id=self.qc_run_id)
-            nt.new_database(segment_db_name, db_folder=segment_db_folder)
-            qc.new_experiment(f"segmented_{ds.exp_name}", sample_name=ds.sample_name)
+        new_db = not os.path.isfile(segment_db_path)
+        if new_db:
+            nt.create_database_at(segment_db_path)
 
         original_params = self.qc_parameters
         segment_info: Dict[int, Dict[str, Any]] = {}
 
-        with nt.switch_database(segment_db_name, segment_db_folder):
-            for segment in self.segmented_data:
-                meas = Measurement()
-                meas.register_custom_parameter(
-                    original_params[0].name,
-                    label=original_params[0].label,
-                    unit=original_params[0].unit,
-                    paramtype="array",
+        conn = connect(segment_db_path)
+        try:
+            if new_db:
+                exp_name, sample_name = self._get_experiment_names()
+                experiment = qc.new_experiment(
+                    f"segmented_{exp_name}", sample_name=sample_name, conn=conn
                 )
-
-                meas.register_custom_parameter(
-                    original_params[1].name,
-                    label=original_params[1].label,
-                    unit=original_params[1].unit,
-                    paramtype="array",
-                )
-                result: List[List[Tuple[str, npt.NDArray[np.float64]]]] = []
-                ranges: List[Tuple[float, float]] = []
-                m_params = [str(it) for it in list(segment.data_vars)]
-                for ip, param_name in enumerate(m_params):
-                    coord_names = list(segment.coords)
-                    x_crd_name = coord_names[0]
-                    y_crd_name = coord_names[1]
-
-                    voltage_x = segment[param_name][x_crd_name].values
-                    voltage_y = segment[param_name][y_crd_name].values
-                    signal = segment[param_name].values
-
-                    range_x = (np.min(voltage_x), np.max(voltage_x))
-                    range_y = (np.min(voltage_y), np.max(voltage_y))
-                    ranges = [range_x, range_y]
-
-                    setpoints = self.raw_data[param_name].depends_on
+            else:
+                exp_id = get_last_experiment(conn)
+                if exp_id is None:
+                    logger.error(
+                        f"No experiment found in {segment_db_path} to save "
+                        + "segments to."
+                    )
+                    raise ValueError
+                experiment = load_experiment(exp_id, conn=conn)
+            # write all segments in a single transaction
+            with atomic(experiment.conn):
+                for segment in segments:
+                    meas = Measurement(exp=experiment)
                     meas.register_custom_parameter(
-                        original_params[ip + 2].name,
-                        label=original_params[ip + 2].label,
-                        unit=original_params[1].unit,
+                        original_params[0].name,
+                        label=original_params[0].label,
+                        unit=original_params[0].unit,
                         paramtype="array",
-                        setpoints=setpoints,
-                    )
-                    v_x_grid, v_y_grid = np.meshgrid(voltage_x, voltage_y)
-
-                    result.append(
-                        [
-                            (setpoints[0], v_x_grid),
-                            (setpoints[1], v_y_grid),
-                            (param_name, signal.T),
-                        ]
                     )
 
-                with meas.run() as datasaver:
-                    for r_i in range(len(self.readout_methods)):
-                        datasaver.add_result(*result[r_i])
-
-                    datasaver.dataset.add_metadata(
-                        "snapshot", json.dumps(self.snapshot)
-                    )
-                    datasaver.dataset.add_metadata(
-                        nt.meta_tag, json.dumps(self.nt_metadata)
-                    )
-                    datasaver.dataset.add_metadata(
-                        "original_guid", json.dumps(self.guid)
-                    )
-                    logger.debug(
-                        "New dataset created and populated.\n"
-                        + "database: "
-                        + str(segment_db_name)
-                        + "ID: "
-                        + str(datasaver.run_id)
+                    meas.register_custom_parameter(
+                        original_params[1].name,
+                        label=original_params[1].label,
+                        unit=original_params[1].unit,
+                        paramtype="array",
                     )
-                    segment_info[datasaver.run_id] = {}
-                    segment_info[datasaver.run_id]["voltage_ranges"] = ranges
+                    result: List[List[Tuple[str, npt.NDArray[np.float64]]]] = []
+                    ranges = _get_voltage_ranges(segment)
+                    m_params = [str(it) for it in list(segment.data_vars)]
+                    for ip, param_name in enumerate(m_params):
+                        coord_names = list(segment.coords)
+                        x_crd_name = coord_names[0]
+                        y_crd_name = coord_names[1]
+
+                        voltage_x = segment[param_name][x_crd_name].values
+                        voltage_y = segment[param_name][y_crd_name].values
+                        signal = segment[param_name].values
+
+                        setpoints = self.raw_data[param_name].depends_on
+                        meas.register_custom_parameter(
+                            original_params[ip + 2].name,
+                            label=original_params[ip + 2].label,
+                            unit=original_params[1].unit,
+                            paramtype="array",
+                            setpoints=setpoints,
+                        )
+                        v_x_grid, v_y_grid = np.meshgrid(voltage_x, voltage_y)
+
+                        result.append(
+                            [
+                                (setpoints[0], v_x_grid),
+                                (setpoints[1], v_y_grid),
+                                (param_name, signal.T),
+                            ]
+                        )
+
+                    with meas.run() as datasaver:
+                        for r_i in range(len(self.readout_methods)):
+                            datasaver.add_result(*result[r_i])
+
+                        datasaver.dataset.add_metadata(
+                            "snapshot", json.dumps(self.snapshot)
+                        )
+                        datasaver.dataset.add_metadata(
+                            nt.meta_tag, json.dumps(self.nt_metadata)
+                        )
+                        datasaver.dataset.add_metadata(
+                            "original_guid", json.dumps(self.guid)
+                        )
+                        logger.debug(
+                            "New dataset created and populated.\n"
+                            + "database: "
+                            + str(segment_db_name)
+                            + "ID: "
+                            + str(datasaver.run_id)
+                        )
+                        segment_info[datasaver.run_id] = {}
+                        segment_info[datasaver.run_id]["voltage_ranges"] = ranges
+        finally:
+            conn.close()
 
         return segment_info
 
+    def _get_experiment_names(self) -> Tuple[str, str]:
+        """Loads experiment and sample name of the original dataset."""
+        db_name = self.db_name
+        if db_name[-2:] != "db":
+            db_name += ".db"
+        conn = connect(os.path.join(self.db_folder, db_name))
+        try:
+            ds = qc.load_by_run_spec(captured_run_id=self.qc_run_id, conn=conn)
+            return ds.exp_name, ds.sample_name
+        finally:
+            conn.close()
+
+    def _log_failed_segment_save(
+        self,
+        future: "Future[Dict[int, Dict[str, Any]]]",
+    ) -> None:
+        """Logs errors raised while saving segments in the background."""
+        exception = future.exception()
+        if exception is not None:
+            logger.error(
+                f"Dotfit {self.guid}: Saving data segments failed: "
+                f"{exception!r}"
+            )
+
     def get_edge(
         self,
         which_one: str,
@@ -387,6 +515,9 @@ class DotFit(DataFit):
         was to extract triple point distances needed to fit the capacitance
         model. The latter is yet to be implemented and this current method is
         not robust.
+        Each peak is located at the centroid of its labelled region and pairs
+        of peaks closer than `distance_threshold` are found using
+        `get_close_point_pairs`.
         """
         relevant_distances = {}
         for read_meth in self.readout_methods:
@@ -416,31 +547,20 @@ class DotFit(DataFit):
             labels = labeled_features[0]
             n_features = labeled_features[1]
             if np.sum(n_features) > 1:
-                coordinates = []
-
-                for peak_id in range(1, n_features + 1):
-                    indx = np.argwhere(labels == peak_id)
-                    if len(indx) == 0:
-                        logger.error("No peak found.")
-
-                    else:
-                        for ind in indx:
-                            x_val = v_x[ind[1]]
-                            y_val = v_y[ind[0]]
-                            coordinates.append([x_val, y_val])
-                coordinates_np: npt.NDArray[np.float64] = np.array(coordinates)
-
-                # calculate distances between points, all to all
-                all_combos = combinations(coordinates_np, 2)
-                distances = [get_point_distances(*combo) for combo in all_combos]
-                distances_arr = np.asarray(distances)
-
-                relevant_indx = np.where(distances_arr[:, 0, 0] <= distance_threshold)[
-                    0
-                ]
-
-                dist_list = [distances[indx] for indx in relevant_indx]
-                relevant_distances[read_meth] = dist_list
+                peak_ids = np.arange(1, n_features + 1)
+                centroids = np.array(
+                    scm.center_of_mass(detected_peaks, labels, peak_ids)
+                )
+                coordinates_np: npt.NDArray[np.float64] = np.stack(
+                    [
+                        np.interp(centroids[:, 1], np.arange(len(v_x)), v_x),
+                        np.interp(centroids[:, 0], np.arange(len(v_y)), v_y),
+                    ],
+                    axis=1,
+                )
+                relevant_distances[read_meth] = get_close_point_pairs(
+                    coordinates_np, distance_threshold
+                )
             else:
                 relevant_distances[read_meth] = []
         return relevant_distances
@@ -556,3 +676,58 @@ def get_point_distances(p1, p2):
         p1.tolist(),
         p2.tolist(),
     )
+
+
+def get_close_point_pairs(
+    points: npt.NDArray[np.float64],
+    distance_threshold: float,
+) -> List[Tuple[List[Any], List[float], List[float], List[float]]]:
+    """Finds all pairs of points which are at most `distance_threshold` apart
+    using a KD-tree, without computing distances between all pairs.
+
+    Args:
+        points: coordinates of points, of shape (n_points, 2).
+        distance_threshold: maximum distance between paired points.
+
+    Returns:
+        list: distance and points of each pair, in the format returned by
+            `get_point_distances`. Pairs are in the order given by
+            `itertools.combinations` of the points.
+    """
+    points = np.asarray(points, dtype=float)
+    if len(points) < 2:
+        return []
+    tree = cKDTree(points)
+    # query slightly beyond the threshold, pairs are selected on the exact
+    # distances below
+    pairs = tree.query_pairs(
+        distance_threshold * (1 + 1e-9) + 1e-15, output_type="ndarray"
+    )
+    pairs = pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+
+    p1 = points[pairs[:, 0]]
+    p2 = points[pairs[:, 1]]
+    distances = np.sqrt(np.sum((p1 - p2) ** 2, axis=1))
+    within = distances <= distance_threshold
+
+    return [
+        ([dist, None], diff, point_1, point_2)
+        for dist, diff, point_1, point_2 in zip(
+            distances[within].tolist(),
+            np.abs(p2 - p1)[within].tolist(),
+            p1[within].tolist(),
+            p2[within].tolist(),
+        )
+    ]
+
+
+def _get_voltage_ranges(segment: xr.Dataset) -> List[Tuple[float, float]]:
+    """Returns the voltage ranges spanned by a data segment."""
+    coord_names = list(segment.coords)
+    voltage_x = segment[coord_names[0]].values
+    voltage_y = segment[coord_names[1]].values
+
+    return [
+        (np.min(voltage_x), np.max(voltage_x)),
+        (np.min(voltage_y), np.max(voltage_y)),
+    ]
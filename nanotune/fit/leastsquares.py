@@ -0,0 +1,627 @@
+import logging
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+logger = logging.getLogger(__name__)
+
+EPS = np.finfo(float).eps
+LOSSES = ["linear", "cauchy"]
+
+ResidualFunction = Callable[
+    [npt.NDArray[np.float64], npt.NDArray[np.int64]], npt.NDArray[np.float64]
+]
+
+
+def least_squares_batch(
+    fun: ResidualFunction,
+    x0: npt.NDArray[np.float64],
+    bounds: Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]],
+    jac: Optional[ResidualFunction] = None,
+    loss: str = "linear",
+    ftol: float = 1e-8,
+    xtol: float = 1e-8,
+    gtol: float = 1e-8,
+    max_nfev: Optional[int] = None,
+) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """Solves many independent bounded nonlinear least squares problems at
+    once.
+
+    Implements the Trust Region Reflective algorithm of
+    `scipy.optimize.least_squares` with `method="trf"` and the exact trust
+    region solver, vectorized over problems. Each problem follows the same
+    sequence of steps as it would in scipy, so that both find the same
+    solution. All problems share the number of parameters and residuals.
+
+    Args:
+        fun: function computing residuals, called as fun(x, idx) with
+            parameters x of shape (k, n_params) of the problems with indices
+            idx. Returns residuals of shape (k, n_residuals).
+        x0: initial guesses, of shape (n_problems, n_params).
+        bounds: lower and upper bounds of parameters, each broadcastable to
+            the shape of x0.
+        jac: function computing the Jacobian of residuals, called as
+            jac(x, idx). Returns an array of shape (k, n_residuals, n_params).
+            If not given, the Jacobian is estimated by forward differences
+            the way scipy does by default.
+        loss: loss function, either 'linear' or 'cauchy'.
+        ftol: tolerance for termination by the change of the cost.
+        xtol: tolerance for termination by the change of parameters.
+        gtol: tolerance for termination by the norm of the gradient.
+        max_nfev: maximum number of function evaluations per problem.
+            Defaults to 100 * n_params, as in scipy.
+
+    Returns:
+        np.array: solutions, of shape (n_problems, n_params).
+        np.array: residuals at the solutions, of shape (n_problems,
+            n_residuals).
+    """
+    if loss not in LOSSES:
+        logger.error(f"Unknown loss {loss}. Choose from {LOSSES}.")
+        raise ValueError
+    x0 = np.atleast_2d(np.asarray(x0, dtype=float))
+    n_problems, n_params = x0.shape
+    lb = np.broadcast_to(np.asarray(bounds[0], dtype=float), x0.shape)
+    ub = np.broadcast_to(np.asarray(bounds[1], dtype=float), x0.shape)
+    if np.any((x0 < lb) | (x0 > ub)):
+        logger.error("Initial guesses are infeasible.")
+        raise ValueError
+    if max_nfev is None:
+        max_nfev = 100 * n_params
+    all_idx = np.arange(n_problems)
+
+    def jacobian(x, idx, f):
+        if jac is None:
+            return _approx_jacobian(fun, x, idx, f, lb[idx], ub[idx])
+        return np.asarray(jac(x, idx), dtype=float)
+
+    x = _make_strictly_feasible(x0, lb, ub, rstep=1e-10)
+    f_true = np.asarray(fun(x, all_idx), dtype=float)
+    if not np.all(np.isfinite(f_true)):
+        logger.error("Residuals are not finite in the initial point.")
+        raise ValueError
+    n_residuals = f_true.shape[1]
+    cost = _cost(f_true, loss)
+    J, f = _scale_for_loss(jacobian(x, all_idx, f_true), f_true, loss)
+    g = np.einsum("kmn,km->kn", J, f)
+
+    v, _ = _cl_scaling_vector(x, g, lb, ub)
+    Delta = np.linalg.norm(x / v**0.5, axis=1)
+    Delta[Delta == 0] = 1.0
+    alpha = np.zeros(n_problems)
+    nfev = np.ones(n_problems, dtype=int)
+    running = np.ones(n_problems, dtype=bool)
+
+    # Scaled Jacobian, gradient and SVD of the current iterate, updated after
+    # each accepted step.
+    prepare = np.ones(n_problems, dtype=bool)
+    d = np.empty((n_problems, n_params))
+    diag_h = np.empty((n_problems, n_params))
+    g_h = np.empty((n_problems, n_params))
+    J_h = np.empty((n_problems, n_residuals, n_params))
+    uf = np.empty((n_problems, n_params))
+    s = np.empty((n_problems, n_params))
+    V = np.empty((n_problems, n_params, n_params))
+    theta = np.empty(n_problems)
+
+    while True:
+        idx = np.flatnonzero(prepare & running)
+        if idx.size > 0:
+            v, dv = _cl_scaling_vector(x[idx], g[idx], lb[idx], ub[idx])
+            g_norm = np.max(np.abs(g[idx] * v), axis=1)
+            running[idx[g_norm < gtol]] = False
+            running[idx[nfev[idx] == max_nfev]] = False
+            prepare[idx] = False
+
+            d[idx] = v**0.5
+            diag_h[idx] = g[idx] * dv
+            g_h[idx] = d[idx] * g[idx]
+            J_h[idx] = J[idx] * d[idx, np.newaxis, :]
+            J_augmented = np.concatenate(
+                [J_h[idx], _diag(diag_h[idx] ** 0.5)], axis=1
+            )
+            U, s[idx], VT = np.linalg.svd(J_augmented, full_matrices=False)
+            V[idx] = np.swapaxes(VT, 1, 2)
+            uf[idx] = np.einsum("kmn,km->kn", U[:, :n_residuals], f[idx])
+            theta[idx] = np.maximum(0.995, 1 - g_norm)
+
+        idx = np.flatnonzero(running)
+        if idx.size == 0:
+            break
+
+        p_h, alpha[idx] = _solve_lsq_trust_region(
+            n_residuals, uf[idx], s[idx], V[idx], Delta[idx], alpha[idx]
+        )
+        step, step_h, predicted_reduction = _select_step(
+            x[idx], J_h[idx], diag_h[idx], g_h[idx], d[idx] * p_h, p_h,
+            d[idx], Delta[idx], lb[idx], ub[idx], theta[idx],
+        )
+        x_new = _make_strictly_feasible(
+            x[idx] + step, lb[idx], ub[idx], rstep=0
+        )
+        f_new = np.asarray(fun(x_new, idx), dtype=float)
+        nfev[idx] += 1
+        step_h_norm = np.linalg.norm(step_h, axis=1)
+
+        finite = np.all(np.isfinite(f_new), axis=1)
+        Delta[idx[~finite]] = 0.25 * step_h_norm[~finite]
+
+        cost_new = _cost(np.where(finite[:, np.newaxis], f_new, 0), loss)
+        actual_reduction = np.where(finite, cost[idx] - cost_new, -1.)
+        Delta_new, ratio = _update_tr_radius(
+            Delta[idx], actual_reduction, predicted_reduction,
+            step_h_norm, step_h_norm > 0.95 * Delta[idx],
+        )
+        ftol_satisfied = (
+            (actual_reduction < ftol * cost[idx]) & (ratio > 0.25)
+        )
+        xtol_satisfied = np.linalg.norm(step, axis=1) < xtol * (
+            xtol + np.linalg.norm(x[idx], axis=1)
+        )
+        terminated = finite & (ftol_satisfied | xtol_satisfied)
+
+        update_radius = finite & ~terminated
+        alpha[idx[update_radius]] *= (
+            Delta[idx[update_radius]] / Delta_new[update_radius]
+        )
+        Delta[idx[update_radius]] = Delta_new[update_radius]
+
+        accepted = finite & (actual_reduction > 0)
+        accepted_idx = idx[accepted]
+        x[accepted_idx] = x_new[accepted]
+        f_true[accepted_idx] = f_new[accepted]
+        cost[accepted_idx] = cost_new[accepted]
+        if accepted_idx.size > 0:
+            J[accepted_idx], f[accepted_idx] = _scale_for_loss(
+                jacobian(x_new[accepted], accepted_idx, f_new[accepted]),
+                f_new[accepted],
+                loss,
+            )
+            g[accepted_idx] = np.einsum(
+                "kmn,km->kn", J[accepted_idx], f[accepted_idx]
+            )
+        prepare[accepted_idx] = True
+
+        running[idx[terminated]] = False
+        running[idx[~accepted & (nfev[idx] == max_nfev)]] = False
+
+    return x, f_true
+
+
+def _approx_jacobian(
+    fun: ResidualFunction,
+    x: npt.NDArray[np.float64],
+    idx: npt.NDArray[np.int64],
+    f: npt.NDArray[np.float64],
+    lb: npt.NDArray[np.float64],
+    ub: npt.NDArray[np.float64],
+) -> npt.NDArray[np.float64]:
+    """Estimates the Jacobian of residuals by forward differences, with
+    steps adjusted to bounds, as scipy's `approx_derivative`.
+    """
+    sign_x = (x >= 0).astype(float) * 2 - 1
+    h = EPS**0.5 * sign_x * np.maximum(1.0, np.abs(x))
+
+    lower_dist = x - lb
+    upper_dist = ub - x
+    violated = (x + h < lb) | (x + h > ub)
+    fitting = np.abs(h) <= np.maximum(lower_dist, upper_dist)
+    h[violated & fitting] *= -1
+    forward = (upper_dist >= lower_dist) & ~fitting
+    h[forward] = upper_dist[forward]
+    backward = (upper_dist < lower_dist) & ~fitting
+    h[backward] = -lower_dist[backward]
+
+    J = np.empty(f.shape + (x.shape[1], ))
+    for p_idx in range(x.shape[1]):
+        x_step = x.copy()
+        x_step[:, p_idx] += h[:, p_idx]
+        dx = x_step[:, p_idx] - x[:, p_idx]
+        df = np.asarray(fun(x_step, idx), dtype=float) - f
+        J[..., p_idx] = df / dx[:, np.newaxis]
+    return J
+
+
+def _cost(
+    f: npt.NDArray[np.float64],
+    loss: str,
+) -> npt.NDArray[np.float64]:
+    """Returns the cost of each problem given its residuals."""
+    if loss == "cauchy":
+        return 0.5 * np.sum(np.log1p(f**2), axis=1)
+    return 0.5 * np.sum(f**2, axis=1)
+
+
+def _scale_for_loss(
+    J: npt.NDArray[np.float64],
+    f: npt.NDArray[np.float64],
+    loss: str,
+) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """Scales Jacobian and residuals such that the robust loss problem is
+    solved as a least squares problem, as in scipy.
+    """
+    J = np.array(J, dtype=float)
+    f = np.array(f, dtype=float)
+    if loss == "linear":
+        return J, f
+    rho_1 = 1 / (1 + f**2)
+    rho_2 = -rho_1**2
+    J_scale = rho_1 + 2 * rho_2 * f**2
+    J_scale[J_scale < EPS] = EPS
+    J_scale **= 0.5
+    return J * J_scale[..., np.newaxis], f * rho_1 / J_scale
+
+
+def _diag(values: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    """Returns a stack of diagonal matrices with the given diagonals."""
+    return values[..., np.newaxis] * np.eye(values.shape[-1])
+
+
+def _cl_scaling_vector(
+    x: npt.NDArray[np.float64],
+    g: npt.NDArray[np.float64],
+    lb: npt.NDArray[np.float64],
+    ub: npt.NDArray[np.float64],
+) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """Returns the Coleman-Li scaling vector and its derivative."""
+    v = np.ones_like(x)
+    dv = np.zeros_like(x)
+
+    mask = (g < 0) & np.isfinite(ub)
+    v[mask] = ub[mask] - x[mask]
+    dv[mask] = -1
+
+    mask = (g > 0) & np.isfinite(lb)
+    v[mask] = x[mask] - lb[mask]
+    dv[mask] = 1
+
+    return v, dv
+
+
+def _make_strictly_feasible(
+    x: npt.NDArray[np.float64],
+    lb: npt.NDArray[np.float64],
+    ub: npt.NDArray[np.float64],
+    rstep: float = 1e-10,
+) -> npt.NDArray[np.float64]:
+    """Shifts parameters on or close to their bounds into the interior of
+    the feasible region.
+    """
+    x_new = x.copy()
+    if rstep == 0:
+        lower_mask = x <= lb
+        upper_mask = x >= ub
+        x_new[lower_mask] = np.nextafter(lb[lower_mask], ub[lower_mask])
+        x_new[upper_mask] = np.nextafter(ub[upper_mask], lb[upper_mask])
+    else:
+        lower_dist = x - lb
+        upper_dist = ub - x
+        lower_threshold = rstep * np.maximum(1, np.abs(lb))
+        upper_threshold = rstep * np.maximum(1, np.abs(ub))
+        lower_mask = np.isfinite(lb) & (
+            lower_dist <= np.minimum(upper_dist, lower_threshold)
+        )
+        upper_mask = np.isfinite(ub) & (
+            upper_dist <= np.minimum(lower_dist, upper_threshold)
+        )
+        lower_mask &= ~upper_mask
+        x_new[lower_mask] = lb[lower_mask] + lower_threshold[lower_mask]
+        x_new[upper_mask] = ub[upper_mask] - upper_threshold[upper_mask]
+
+    tight_bounds = (x_new < lb) | (x_new > ub)
+    x_new[tight_bounds] = 0.5 * (lb[tight_bounds] + ub[tight_bounds])
+    return x_new
+
+
+def _solve_lsq_trust_region(
+    n_residuals: int,
+    uf: npt.NDArray[np.float64],
+    s: npt.NDArray[np.float64],
+    V: npt.NDArray[np.float64],
+    Delta: npt.NDArray[np.float64],
+    initial_alpha: npt.NDArray[np.float64],
+    rtol: float = 0.01,
+    max_iter: int = 10,
+) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """Solves the trust region subproblems of all problems using the SVD of
+    their (augmented) Jacobians, see scipy's `solve_lsq_trust_region`.
+    Returns steps and Levenberg-Marquardt parameters alpha.
+    """
+    def phi_and_derivative(alpha, suf, s, Delta):
+        denom = s**2 + alpha[:, np.newaxis]
+        p_norm = np.linalg.norm(suf / denom, axis=1)
+        phi = p_norm - Delta
+        phi_prime = -np.sum(suf**2 / denom**3, axis=1) / p_norm
+        return phi, phi_prime
+
+    n_params = s.shape[1]
+    suf = s * uf
+    if n_residuals >= n_params:
+        full_rank = s[:, -1] > EPS * n_residuals * s[:, 0]
+    else:
+        full_rank = np.zeros(len(s), dtype=bool)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p_gauss_newton = -np.einsum("kij,kj->ki", V, uf / s)
+    gauss_newton = full_rank & (
+        np.linalg.norm(p_gauss_newton, axis=1) <= Delta
+    )
+
+    alpha_upper = np.linalg.norm(suf, axis=1) / Delta
+    with np.errstate(divide="ignore", invalid="ignore"):
+        phi, phi_prime = phi_and_derivative(
+            np.zeros(len(s)), suf, s, Delta
+        )
+    alpha_lower = np.where(full_rank, -phi / phi_prime, 0.0)
+
+    with np.errstate(invalid="ignore"):
+        alpha = np.where(
+            ~full_rank & (initial_alpha == 0),
+            np.fmax(
+                0.001 * alpha_upper, (alpha_lower * alpha_upper) ** 0.5
+            ),
+            initial_alpha,
+        )
+
+    iterating = ~gauss_newton
+    for _ in range(max_iter):
+        if not np.any(iterating):
+            break
+        reset = (alpha < alpha_lower) | (alpha > alpha_upper)
+        with np.errstate(invalid="ignore"):
+            alpha = np.where(
+                iterating & reset,
+                np.fmax(
+                    0.001 * alpha_upper, (alpha_lower * alpha_upper) ** 0.5
+                ),
+                alpha,
+            )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            phi, phi_prime = phi_and_derivative(alpha, suf, s, Delta)
+            ratio = phi / phi_prime
+        alpha_upper = np.where(iterating & (phi < 0), alpha, alpha_upper)
+        alpha_lower = np.where(
+            iterating, np.maximum(alpha_lower, alpha - ratio), alpha_lower
+        )
+        alpha = np.where(
+            iterating, alpha - (phi + Delta) * ratio / Delta, alpha
+        )
+        iterating &= ~(np.abs(phi) < rtol * Delta)
+
+    alpha = np.where(gauss_newton, 0.0, alpha)
+    p = -np.einsum("kij,kj->ki", V, suf / (s**2 + alpha[:, np.newaxis]))
+    p *= (Delta / np.linalg.norm(p, axis=1))[:, np.newaxis]
+    p = np.where(gauss_newton[:, np.newaxis], p_gauss_newton, p)
+
+    return p, alpha
+
+
+def _update_tr_radius(
+    Delta: npt.NDArray[np.float64],
+    actual_reduction: npt.NDArray[np.float64],
+    predicted_reduction: npt.NDArray[np.float64],
+    step_norm: npt.NDArray[np.float64],
+    bound_hit: npt.NDArray[np.bool_],
+) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """Updates trust region radii based on the ratios between actual and
+    predicted reductions of the cost, which are returned as well.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(
+            predicted_reduction > 0,
+            actual_reduction / predicted_reduction,
+            np.where(
+                (predicted_reduction == 0) & (actual_reduction == 0), 1., 0.
+            ),
+        )
+    Delta = np.where(ratio < 0.25, 0.25 * step_norm, Delta)
+    Delta = np.where((ratio > 0.75) & bound_hit, 2.0 * Delta, Delta)
+    return Delta, ratio
+
+
+def _step_size_to_bound(
+    x: npt.NDArray[np.float64],
+    s: npt.NDArray[np.float64],
+    lb: npt.NDArray[np.float64],
+    ub: npt.NDArray[np.float64],
+) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.int64]]:
+    """Returns the step sizes t such that x + s * t reaches a bound, and
+    which bounds are hit (-1 for lower, 1 for upper, 0 for none).
+    """
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        steps = np.where(
+            s != 0, np.maximum((lb - x) / s, (ub - x) / s), np.inf
+        )
+    min_step = np.min(steps, axis=1)
+    hits = np.equal(steps, min_step[:, np.newaxis]) * np.sign(s).astype(int)
+    return min_step, hits
+
+
+def _intersect_trust_region(
+    x: npt.NDArray[np.float64],
+    s: npt.NDArray[np.float64],
+    Delta: npt.NDArray[np.float64],
+) -> npt.NDArray[np.float64]:
+    """Returns the positive t such that ||x + s * t|| equals Delta."""
+    a = np.sum(s * s, axis=1)
+    b = np.sum(x * s, axis=1)
+    c = np.sum(x * x, axis=1) - Delta**2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        d = np.sqrt(b * b - a * c)
+        q = -(b + np.copysign(d, b))
+        return np.maximum(q / a, c / q)
+
+
+def _build_quadratic_1d(
+    J: npt.NDArray[np.float64],
+    g: npt.NDArray[np.float64],
+    s: npt.NDArray[np.float64],
+    diag: npt.NDArray[np.float64],
+    s0: Optional[npt.NDArray[np.float64]] = None,
+) -> Tuple[npt.NDArray[np.float64], ...]:
+    """Returns coefficients a, b and c of the quadratic function
+    f(t) = 0.5 * (s0 + s*t).T * (J.T*J + diag) * (s0 + s*t) + g.T * (s0 + s*t)
+    = a * t**2 + b * t + c along the directions s.
+    """
+    v = np.einsum("kmn,kn->km", J, s)
+    a = 0.5 * (np.sum(v * v, axis=1) + np.sum(s * diag * s, axis=1))
+    b = np.sum(g * s, axis=1)
+    if s0 is None:
+        return a, b, np.zeros_like(a)
+
+    u = np.einsum("kmn,kn->km", J, s0)
+    b += np.sum(u * v, axis=1) + np.sum(s0 * diag * s, axis=1)
+    c = 0.5 * np.sum(u * u, axis=1) + np.sum(g * s0, axis=1)
+    c += 0.5 * np.sum(s0 * diag * s0, axis=1)
+    return a, b, c
+
+
+def _minimize_quadratic_1d(
+    a: npt.NDArray[np.float64],
+    b: npt.NDArray[np.float64],
+    lb: npt.NDArray[np.float64],
+    ub: npt.NDArray[np.float64],
+    c: npt.NDArray[np.float64],
+) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """Minimizes a * t**2 + b * t + c within [lb, ub], returning the
+    minimizing t and the minimum.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        extremum = -0.5 * b / a
+    valid = (a != 0) & (lb < extremum) & (extremum < ub)
+    t = np.stack([lb, ub, np.where(valid, extremum, lb)], axis=1)
+    y = t * (a[:, np.newaxis] * t + b[:, np.newaxis]) + c[:, np.newaxis]
+    y[~valid, 2] = np.inf
+    min_index = np.argmin(y, axis=1)
+    rows = np.arange(len(a))
+    return t[rows, min_index], y[rows, min_index]
+
+
+def _evaluate_quadratic(
+    J: npt.NDArray[np.float64],
+    g: npt.NDArray[np.float64],
+    s: npt.NDArray[np.float64],
+    diag: npt.NDArray[np.float64],
+) -> npt.NDArray[np.float64]:
+    """Returns 0.5 * s.T * (J.T * J + diag) * s + g.T * s."""
+    Js = np.einsum("kmn,kn->km", J, s)
+    q = np.sum(Js * Js, axis=1) + np.sum(s * diag * s, axis=1)
+    return 0.5 * q + np.sum(s * g, axis=1)
+
+
+def _select_step(
+    x: npt.NDArray[np.float64],
+    J_h: npt.NDArray[np.float64],
+    diag_h: npt.NDArray[np.float64],
+    g_h: npt.NDArray[np.float64],
+    p: npt.NDArray[np.float64],
+    p_h: npt.NDArray[np.float64],
+    d: npt.NDArray[np.float64],
+    Delta: npt.NDArray[np.float64],
+    lb: npt.NDArray[np.float64],
+    ub: npt.NDArray[np.float64],
+    theta: npt.NDArray[np.float64],
+) -> Tuple[npt.NDArray[np.float64], ...]:
+    """Selects the steps to take according to the Trust Region Reflective
+    algorithm: trust region steps which stay within bounds are taken as they
+    are. Otherwise the best of the trust region step stopped at the bound,
+    its reflection at the bound and the anti-gradient step is taken. Returns
+    steps in original and scaled variables as well as the predicted
+    reductions of the cost.
+    """
+    step = p.copy()
+    step_h = p_h.copy()
+    value = _evaluate_quadratic(J_h, g_h, p_h, diag_h)
+
+    out = np.flatnonzero(~np.all((x + p >= lb) & (x + p <= ub), axis=1))
+    if out.size > 0:
+        step[out], step_h[out], value[out] = _reflective_step(
+            x[out], J_h[out], diag_h[out], g_h[out], p[out], p_h[out],
+            d[out], Delta[out], lb[out], ub[out], theta[out],
+        )
+    return step, step_h, -value
+
+
+def _reflective_step(
+    x: npt.NDArray[np.float64],
+    J_h: npt.NDArray[np.float64],
+    diag_h: npt.NDArray[np.float64],
+    g_h: npt.NDArray[np.float64],
+    p: npt.NDArray[np.float64],
+    p_h: npt.NDArray[np.float64],
+    d: npt.NDArray[np.float64],
+    Delta: npt.NDArray[np.float64],
+    lb: npt.NDArray[np.float64],
+    ub: npt.NDArray[np.float64],
+    theta: npt.NDArray[np.float64],
+) -> Tuple[npt.NDArray[np.float64], ...]:
+    """Returns the best of the trust region step stopped at the bound, its
+    reflection and the anti-gradient step, for trust region steps leaving
+    the feasible region. Returns the values of the quadratic model as well.
+    """
+    p_stride, hits = _step_size_to_bound(x, p, lb, ub)
+
+    # Compute the reflected direction.
+    r_h = np.where(hits.astype(bool), -p_h, p_h)
+    r = d * r_h
+
+    # Restrict trust region step, such that it hits the bound.
+    p = p * p_stride[:, np.newaxis]
+    p_h = p_h * p_stride[:, np.newaxis]
+    x_on_bound = x + p
+
+    # Reflected direction will cross first either feasible region or trust
+    # region boundary.
+    to_tr = _intersect_trust_region(p_h, r_h, Delta)
+    to_bound, _ = _step_size_to_bound(x_on_bound, r, lb, ub)
+
+    r_stride = np.minimum(to_bound, to_tr)
+    positive = r_stride > 0
+    r_stride_l = np.zeros_like(r_stride)
+    r_stride_u = np.full_like(r_stride, -1.)
+    r_stride_l[positive] = (
+        (1 - theta[positive]) * p_stride[positive] / r_stride[positive]
+    )
+    r_stride_u[positive] = np.where(
+        r_stride[positive] == to_bound[positive],
+        theta[positive] * to_bound[positive],
+        to_tr[positive],
+    )
+
+    # Check if reflection step is available.
+    reflect = r_stride_l <= r_stride_u
+    a, b, c = _build_quadratic_1d(J_h, g_h, r_h, diag_h, s0=p_h)
+    r_stride, r_value = _minimize_quadratic_1d(
+        a, b, r_stride_l, np.where(reflect, r_stride_u, r_stride_l), c
+    )
+    r_h = r_h * r_stride[:, np.newaxis] + p_h
+    r = r_h * d
+    r_value[~reflect] = np.inf
+
+    # Now correct p_h to make it strictly interior.
+    p = p * theta[:, np.newaxis]
+    p_h = p_h * theta[:, np.newaxis]
+    p_value = _evaluate_quadratic(J_h, g_h, p_h, diag_h)
+
+    ag_h = -g_h
+    ag = d * ag_h
+    with np.errstate(divide="ignore"):
+        to_tr = Delta / np.linalg.norm(ag_h, axis=1)
+    to_bound, _ = _step_size_to_bound(x, ag, lb, ub)
+    ag_stride = np.where(to_bound < to_tr, theta * to_bound, to_tr)
+    a, b, c = _build_quadratic_1d(J_h, g_h, ag_h, diag_h)
+    ag_stride, ag_value = _minimize_quadratic_1d(
+        a, b, np.zeros_like(ag_stride), ag_stride, c
+    )
+    ag_h = ag_h * ag_stride[:, np.newaxis]
+    ag = ag * ag_stride[:, np.newaxis]
+
+    use_p = (p_value < r_value) & (p_value < ag_value)
+    use_r = ~use_p & (r_value < p_value) & (r_value < ag_value)
+    step = np.where(use_p[:, np.newaxis], p, ag)
+    step = np.where(use_r[:, np.newaxis], r, step)
+    step_h = np.where(use_p[:, np.newaxis], p_h, ag_h)
+    step_h = np.where(use_r[:, np.newaxis], r_h, step_h)
+    value = np.where(use_p, p_value, np.where(use_r, r_value, ag_value))
+    return step, step_h, value
@@ -8,14 +8,155 @@ import matplotlib.pyplot as plt
 import numpy as np
 from mpl_toolkits.axes_grid1 import make_axes_locatable
 from numpy import linalg as lg
-from scipy.optimize import least_squares
 
 import nanotune as nt
 from nanotune.data.plotting import default_plot_params, plot_params_type
 from nanotune.fit.datafit import DataFit
+from nanotune.fit.leastsquares import least_squares_batch
 
 logger = logging.getLogger(__name__)
 AxesTuple = Tuple[matplotlib.axes.Axes, matplotlib.colorbar.Colorbar]
+PINCHOFF_FIT_PARAMETERS = ["amplitude", "slope", "offset", "tanh_sign"]
+
+
+def pinchoff_function(
+    v: npt.NDArray[np.float64],
+    params: npt.NDArray[np.float64],
+) -> npt.NDArray[np.float64]:
+    """Hyperbolic tangent used to fit pinch-off curves, evaluated for one or
+    several parameter vectors at once.
+
+    Args:
+        v: normalized voltage vector.
+        params: parameters [amplitude, slope, shift, tanh sign] along the last
+            axis, e.g. of shape (4, ) or (n_traces, 4).
+
+    Returns:
+        np.array: tanh function values, of shape params.shape[:-1] + v.shape.
+    """
+    params = np.asarray(params, dtype=float)
+    amplitude, slope, offset, tanh_sign = [
+        params[..., idx, np.newaxis] for idx in range(4)
+    ]
+    return amplitude * (1 + tanh_sign * np.tanh(slope * v + offset))
+
+
+def compute_initial_guess_batch(
+    signals: npt.NDArray[np.float64],
+    normalized_voltage: Optional[npt.NDArray[np.float64]] = None,
+) -> Tuple[Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]],
+           npt.NDArray[np.float64]]:
+    """Computes initial guesses and bounds for fitting a stack of pinch-off
+    curves, as done by `PinchoffFit.compute_initial_guess` for a single
+    trace.
+
+    Args:
+        signals: normalized traces, of shape (n_traces, n_points).
+        normalized_voltage: normalized voltage vector. Defaults to n_points
+            values between 0 and 1.
+
+    Returns:
+        tuple: bounds as a tuple of lower and upper bounds and initial guess,
+            each of shape (n_traces, 4).
+    """
+    signals = np.atleast_2d(signals)
+    n_traces, n_points = signals.shape
+    if normalized_voltage is None:
+        normalized_voltage = np.linspace(0, 1, n_points)
+
+    amplitude_init = np.max(signals, axis=1) - np.min(signals, axis=1)
+    # voltage_offset is the horizontal offset: not important
+    # We do not care where in voltage space the transition happens
+    # but we need to shift the fit horizontally to make it overlap
+    # with the data
+    voltage_offset_init = (
+        np.max(normalized_voltage) - np.min(normalized_voltage)
+    ) / 2
+
+    initial_guess = np.empty((n_traces, 4))
+    initial_guess[:, 0] = amplitude_init
+    initial_guess[:, 1] = 1 / amplitude_init
+    initial_guess[:, 2] = voltage_offset_init
+    initial_guess[:, 3] = 1.
+
+    min_bounds = np.empty((n_traces, 4))
+    min_bounds[:] = [0, 0, -np.inf, -1.]
+    max_bounds = np.empty((n_traces, 4))
+    max_bounds[:, 0] = amplitude_init
+    max_bounds[:, 1:] = [np.inf, np.inf, 1.]
+
+    return (min_bounds, max_bounds), initial_guess
+
+
+def fit_pinchoff_batch(
+    signals: npt.NDArray[np.float64],
+    initial_guess: Optional[npt.NDArray[np.float64]] = None,
+    bounds: Optional[Tuple[npt.NDArray[np.float64],
+                           npt.NDArray[np.float64]]] = None,
+    normalized_voltage: Optional[npt.NDArray[np.float64]] = None,
+) -> Dict[str, npt.NDArray[np.float64]]:
+    """Fits a stack of pinch-off curves to hyperbolic tangents at once.
+
+    Each fit minimizes a robust (Cauchy loss) cost of the residuals between
+    fit and trace, normalized by the trace's norm. Iterations of all traces
+    are computed together by `least_squares_batch`, which follows the steps
+    scipy's `least_squares` takes for each trace separately. Used by
+    `PinchoffFit.find_fit`, and to extract features of many traces at once.
+
+    Args:
+        signals: normalized traces, of shape (n_traces, n_points).
+        initial_guess: initial parameters [amplitude, slope, shift, tanh
+            sign] of each trace, of shape (n_traces, 4). Computed from
+            `signals` using `compute_initial_guess_batch` if not given.
+        bounds: lower and upper bounds of parameters, each of shape
+            (n_traces, 4). Computed from `signals` if not given.
+        normalized_voltage: normalized voltage vector. Defaults to n_points
+            values between 0 and 1.
+
+    Returns:
+        dict: Fitted 'amplitude', 'slope', 'offset' and 'tanh_sign' as well
+            as the norm of the 'residuals' of all traces, each an array of
+            shape (n_traces, ).
+    """
+    signals = np.atleast_2d(np.asarray(signals, dtype=float))
+    n_points = signals.shape[1]
+    if normalized_voltage is None:
+        voltage = np.linspace(0, 1, n_points)
+    else:
+        voltage = normalized_voltage
+    if initial_guess is None or bounds is None:
+        default_bounds, default_guess = compute_initial_guess_batch(
+            signals, voltage
+        )
+        if initial_guess is None:
+            initial_guess = default_guess
+        if bounds is None:
+            bounds = default_bounds
+    norms = lg.norm(signals, axis=1)[:, np.newaxis]
+
+    def err_func(
+        params: npt.NDArray[np.float64],
+        idx: npt.NDArray[np.int64],
+    ) -> npt.NDArray[np.float64]:
+        err = pinchoff_function(voltage, params)
+        return (err - signals[idx]) / norms[idx]
+
+    params, residuals = least_squares_batch(
+        err_func,
+        initial_guess,
+        bounds,
+        loss="cauchy",
+        gtol=1e-15,
+        ftol=1e-15,
+        xtol=1e-15,
+    )
+
+    fit_result = {
+        name: params[:, p_idx]
+        for p_idx, name in enumerate(PINCHOFF_FIT_PARAMETERS)
+    }
+    fit_result["residuals"] = lg.norm(residuals, axis=1)
+    return fit_result
 
 
 class PinchoffFit(DataFit):
@@ -84,29 +225,22 @@ class PinchoffFit(DataFit):
         """Fits a pinchoff curve to a hyperbolic tangent and extracts transition
         voltages as well as interval."""
 
-        for r_meth in self.readout_methods:
-            (bounds,
-             initial_guess) = self.compute_initial_guess(readout_method=r_meth)
-            smooth_signal = self.filtered_data[r_meth].values
-
-            def err_func(p: List[float]) -> npt.NDArray[np.float64]:
-                err = self.fit_function(self._normalized_voltage, p)
-                err = (err - smooth_signal) / lg.norm(smooth_signal)
-                return err
-
-            sub_res = least_squares(
-                err_func,
-                initial_guess,
-                method="trf",
-                loss="cauchy",
-                verbose=0,
-                bounds=bounds,
-                gtol=1e-15,
-                ftol=1e-15,
-                xtol=1e-15,
-            )
-
-            self._retain_fit_result(sub_res, r_meth)
+        readout_methods = list(self.readout_methods)
+        signals = np.stack([self.data[r].values for r in readout_methods])
+        smooth_signals = np.stack(
+            [self.filtered_data[r].values for r in readout_methods]
+        )
+        bounds, initial_guess = compute_initial_guess_batch(
+            signals, self._normalized_voltage
+        )
+        fit_result = fit_pinchoff_batch(
+            smooth_signals,
+            initial_guess=initial_guess,
+            bounds=bounds,
+            normalized_voltage=self._normalized_voltage,
+        )
+        for r_idx, r_meth in enumerate(readout_methods):
+            self._retain_fit_result(fit_result, r_idx, r_meth)
 
         self.compute_transition_interval()
         self.compute_transition_voltage()
@@ -182,42 +316,11 @@ class PinchoffFit(DataFit):
         readout_method: str = "transport",
     ) -> Tuple[Tuple[List[float], List[float]], List[float]]:
         """Computes initial guess for fitting."""
-        signal = self.data[readout_method].values
-        amplitude_init = np.max(signal) - np.min(signal)
-        amplitude_min = 0
-        amplitude_max = amplitude_init
-
-        slope_init = 1 / amplitude_init
-        slope_min = 0
-        slope_max = np.inf
-
-        # voltage_offset is the horizontal offset: not important
-        # We do not care where in voltage space the transition happens
-        # but we need to shift the fit horizontally to make it overlap
-        # with the data
-        voltage_offset_init = (
-            np.max(self._normalized_voltage) - np.min(self._normalized_voltage)
-        ) / 2
-        voltage_offset_min = -np.inf
-        voltage_offset_max = np.inf
-
-        tanh_sign_min = -1.
-        tanh_sign_max = 1.
-        tanh_sign_init = 1.
-
-        min_bounds = [
-            amplitude_min, slope_min, voltage_offset_min, tanh_sign_min
-        ]
-        max_bounds = [
-            amplitude_max, slope_max, voltage_offset_max, tanh_sign_max
-        ]
-
-        bounds = (min_bounds, max_bounds)
-        initial_guess = [
-            amplitude_init, slope_init, voltage_offset_init, tanh_sign_init
-        ]
-
-        return bounds, initial_guess
+        (min_bounds, max_bounds), initial_guess = compute_initial_guess_batch(
+            self.data[readout_method].values, self._normalized_voltage
+        )
+        bounds = (min_bounds[0].tolist(), max_bounds[0].tolist())
+        return bounds, initial_guess[0].tolist()
 
     def fit_function(self,
         v: npt.NDArray[np.float64],
@@ -233,16 +336,17 @@ class PinchoffFit(DataFit):
         Returns:
             np.array: tanh function values.
         """
-        fit = 1 + params[3] * (np.tanh(params[1] * v + params[2]))
-        return params[0] * fit
+        return pinchoff_function(v, np.asarray(params))
 
-    def _retain_fit_result(self, subres, read_meth):
+    def _retain_fit_result(
+        self,
+        fit_result: Dict[str, npt.NDArray[np.float64]],
+        trace_idx: int,
+        read_meth: str,
+    ) -> None:
         self._features[read_meth] = {}
-        self._features[read_meth]["amplitude"] = subres.x[0]
-        self._features[read_meth]["slope"] = subres.x[1]
-        self._features[read_meth]["offset"] = subres.x[2]
-        self._features[read_meth]["tanh_sign"] = subres.x[3]
-        self._features[read_meth]["residuals"] = lg.norm(subres.fun)
+        for feature in PINCHOFF_FIT_PARAMETERS + ["residuals"]:
+            self._features[read_meth][feature] = fit_result[feature][trace_idx]
 
     def _retain_transition_features(self) -> None:
         for read_meth in self.readout_methods:
@@ -12,6 +12,7 @@ from qcodes.dataset.experiment_container import experiments, load_experiment
 from qcodes.dataset.plotting import plot_by_id
 from qcodes.dataset.sqlite.queries import get_runs
 import nanotune as nt
+from nanotune.data.dataset_cache import dataset_cache
 
 logger = logging.getLogger(__name__)
 label_bad = "Not Good"
@@ -342,6 +343,7 @@ class LabellingTool(qtw.QMainWindow):
 
             for label, value in self.current_label.items():
                 ds.add_metadata(label, value)
+            dataset_cache.update_metadata(ds)
 
             self.clear()
             self.next()
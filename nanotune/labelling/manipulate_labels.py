@@ -5,6 +5,7 @@ import qcodes as qc
 from qcodes.dataset.plotting import plot_by_id
 
 import nanotune as nt
+from nanotune.data.dataset_cache import dataset_cache
 
 logger = logging.getLogger(__name__)
 LABELS = list(dict(nt.config["core"]["labels"]).keys())
@@ -40,6 +41,7 @@ def correct_label(
 
         for label, value in new_label.items():
             ds.add_metadata(label, value)
+        dataset_cache.update_metadata(ds)
         logger.info('Label corrected successfully.')
 
 
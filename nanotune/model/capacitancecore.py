@@ -0,0 +1,1789 @@
+import logging
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, List, Optional, Sequence, Tuple, TypeVar, Union
+
+import numpy as np
+import numpy.typing as npt
+import scipy as sc
+from numpy.linalg import inv, multi_dot
+from scipy.ndimage import gaussian_filter
+from skimage.transform import resize
+
+import nanotune as nt
+from nanotune.model.charge_regions import ChargeStabilityRegions
+
+logger = logging.getLogger(__name__)
+
+N_2D = nt.config["core"]["standard_shapes"]["2"]
+N_1D = nt.config["core"]["standard_shapes"]["1"]
+# elem_charge = 1.60217662 * 10e-19
+elem_charge = 1
+N_lmt_type = Sequence[Tuple[int, int]]
+EnergyType = TypeVar("EnergyType", float, npt.NDArray[np.float64])
+MAX_GLOBAL_CANDIDATES = 4096
+
+
+@dataclass(frozen=True)
+class CapacitanceOperators:
+    """Capacitance matrices and operators derived from them, as used to
+    compute energies and chemical potentials. All arrays are read-only.
+
+    Attributes:
+        version: version of the capacitances the operators were computed
+            from. Incremented by CapacitanceCore each time a capacitance
+            changes.
+        C_cc: dot capacitance matrix, including its diagonals.
+        C_cv: capacitances between charge and voltage nodes.
+        C_cc_inv: inverse of C_cc.
+        C_cc_inv_C_cv: matrix product of inverse of C_cc and C_cv.
+        C_cc_inv_diag: diagonal of inverse of C_cc.
+    """
+    version: int
+    C_cc: npt.NDArray[np.float64]
+    C_cv: npt.NDArray[np.float64]
+    C_cc_inv: npt.NDArray[np.float64]
+    C_cc_inv_C_cv: npt.NDArray[np.float64]
+    C_cc_inv_diag: npt.NDArray[np.float64]
+
+
+class CapacitanceCore:
+    """Array-backed implementation of the capacitance model described in
+    `CapacitanceModel`, holding its state in plain numpy arrays.
+
+    Unlike `CapacitanceModel`, it is not a QCoDeS instrument: it does not
+    need to be registered or closed and can be pickled, e.g. to be sent to
+    worker processes generating synthetic data. `CapacitanceModel` wraps a
+    core and exposes its state through QCoDeS parameters and nodes.
+
+    Charge and voltage configurations are exposed as arrays which may be
+    modified in place, e.g. `core.V_v[2] = 0.5`. Capacitances are set
+    through their properties, which keep the diagonals of C_cc up to date
+    and invalidate cached operators.
+    """
+    __slots__ = (
+        "_N",
+        "_V_v",
+        "_C_cc_off_diags",
+        "_C_cv",
+        "_c_l",
+        "_c_r",
+        "_operators",
+        "_operators_version",
+    )
+
+    def __init__(
+        self,
+        n_charge_nodes: int,
+        n_voltage_nodes: int,
+        N: Optional[Sequence[int]] = None,
+        V_v: Optional[Sequence[float]] = None,
+        C_cc_off_diags: Optional[Sequence[Sequence[float]]] = None,
+        C_cv: Optional[Sequence[Sequence[float]]] = None,
+        c_l: float = 0.0,
+        c_r: float = 0.0,
+    ) -> None:
+        """Init method of CapacitanceCore class.
+
+        Args:
+            n_charge_nodes: number of charge nodes, i.e. dots.
+            n_voltage_nodes: number of voltage nodes, i.e. gates.
+            N: initial charge configuration, i.e. number of charges on
+                each dot. Default is all dots empty.
+            V_v: voltages of voltage nodes. Default is all zero.
+            C_cc_off_diags: capacitances between charge nodes, given as
+                list of off diagonals. Default is all zero.
+            C_cv: capacitances between charge and voltage nodes. Default is
+                all zero.
+            c_l: capacitance to left lead.
+            c_r: capacitance to right lead.
+        """
+        self._operators_version = 0
+        self._operators: Optional[CapacitanceOperators] = None
+        self._c_l = float(c_l)
+        self._c_r = float(c_r)
+        self._C_cc_off_diags = np.zeros([n_charge_nodes, n_charge_nodes])
+
+        if N is None:
+            N = [0] * n_charge_nodes
+        self.N = N  # type: ignore
+
+        if V_v is None:
+            V_v = [0.0] * n_voltage_nodes
+        self.V_v = V_v  # type: ignore
+
+        if C_cv is None:
+            C_cv = np.zeros([n_charge_nodes, n_voltage_nodes]).tolist()
+        self.C_cv = C_cv  # type: ignore
+
+        if C_cc_off_diags is None:
+            C_cc_off_diags = [
+                [0.0] * (off_diag_inx + 1)
+                for off_diag_inx in reversed(range(n_charge_nodes - 1))
+            ]
+        self.set_C_cc_off_diagonals(C_cc_off_diags)
+
+    def __getstate__(self) -> Tuple[Any, ...]:
+        """Returns the state to pickle, leaving out cached operators."""
+        return (
+            self._N,
+            self._V_v,
+            self._C_cc_off_diags,
+            self._C_cv,
+            self._c_l,
+            self._c_r,
+            self._operators_version,
+        )
+
+    def __setstate__(self, state: Tuple[Any, ...]) -> None:
+        """Restores a pickled state. Operators are recomputed when first
+        accessed.
+        """
+        (
+            self._N,
+            self._V_v,
+            self._C_cc_off_diags,
+            self._C_cv,
+            self._c_l,
+            self._c_r,
+            self._operators_version,
+        ) = state
+        self._operators = None
+
+    @property
+    def N(self) -> npt.NDArray[np.int64]:
+        """Charge configuration, i.e. number of charges on each dot."""
+        return self._N
+
+    @N.setter
+    def N(self, value: Sequence[int]) -> None:
+        self._N = np.array(value, dtype=int).reshape(-1)
+
+    @property
+    def V_v(self) -> npt.NDArray[np.float64]:
+        """Voltage configuration, i.e. voltages of all voltage nodes."""
+        return self._V_v
+
+    @V_v.setter
+    def V_v(self, value: Sequence[float]) -> None:
+        self._V_v = np.array(value, dtype=float).reshape(-1)
+
+    @property
+    def C_cv(self) -> npt.NDArray[np.float64]:
+        """Capacitances between charge and voltage nodes. Read-only, set a
+        new matrix to change them.
+        """
+        return self._C_cv
+
+    @C_cv.setter
+    def C_cv(self, value: Sequence[Sequence[float]]) -> None:
+        C_cv = np.array(value, dtype=float)
+        C_cv.flags.writeable = False
+        self._C_cv = C_cv
+        self._invalidate_operators()
+
+    @property
+    def C_cc(self) -> npt.NDArray[np.float64]:
+        """Dot capacitance matrix. Its diagonals are the sum of all
+        capacitances connected to the respective charge node, calculated in
+        `_get_C_cc_diagonals`.
+        """
+        return self._C_cc_off_diags + self._get_C_cc_diagonals()
+
+    def set_C_cc_off_diagonals(
+        self,
+        off_diagonals: Sequence[Sequence[float]],
+    ) -> None:
+        """Sets capacitances between charge nodes.
+
+        Args:
+            off_diagonals: Off diagonals of C_cc, in a list of lists:
+                [[1st off diagonal], [2nd off diagonal], ...].
+        """
+        n_dots = len(self._N)
+        C_cc = np.zeros([n_dots, n_dots])
+        for dinx, diagonal in enumerate(off_diagonals):
+            if len(diagonal) != (n_dots - dinx - 1):
+                logger.error(
+                    "CapacitanceModel: Unable to set C_cc. "
+                    + "Please specify off diagonals in a list of "
+                    + "lists: [[1st off diagonal], "
+                    + "[2nd off diagonal]]"
+                )
+            C_cc += np.diag(diagonal, k=dinx + 1)
+            C_cc += np.diag(diagonal, k=-dinx - 1)
+
+        self._C_cc_off_diags = C_cc
+        self._invalidate_operators()
+
+    @property
+    def c_l(self) -> float:
+        """Capacitance to left lead."""
+        return self._c_l
+
+    @c_l.setter
+    def c_l(self, value: float) -> None:
+        self._c_l = float(value)
+        self._invalidate_operators()
+
+    @property
+    def c_r(self) -> float:
+        """Capacitance to right lead."""
+        return self._c_r
+
+    @c_r.setter
+    def c_r(self, value: float) -> None:
+        self._c_r = float(value)
+        self._invalidate_operators()
+
+    @property
+    def operators(self) -> CapacitanceOperators:
+        """Capacitance matrices and derived operators, computed once per
+        version of the model's capacitances.
+        """
+        if self._operators is None:
+            C_cc = self.C_cc
+            C_cv = self._C_cv.copy()
+            C_cc_inv = inv(C_cc)
+            C_cc_inv_C_cv = np.dot(C_cc_inv, C_cv)
+            C_cc_inv_diag = np.diag(C_cc_inv).copy()
+            for array in [C_cc, C_cv, C_cc_inv, C_cc_inv_C_cv, C_cc_inv_diag]:
+                array.flags.writeable = False
+
+            self._operators = CapacitanceOperators(
+                version=self._operators_version,
+                C_cc=C_cc,
+                C_cv=C_cv,
+                C_cc_inv=C_cc_inv,
+                C_cc_inv_C_cv=C_cc_inv_C_cv,
+                C_cc_inv_diag=C_cc_inv_diag,
+            )
+        return self._operators
+
+    def _get_C_cc_diagonals(self) -> npt.NDArray[np.float64]:
+        """Getter for diagonal values of dot capacitance matrix C_cc.
+        We assume that every dot is coupled to every other, meaning that
+        that if three or more dots are aligned the first will have a capacitive
+        coupling to the last. In the same manner, all dots are coupled to the
+        leads. Change if necessary.
+        """
+        C_cv_sums = np.sum(np.absolute(self._C_cv), axis=1)
+        # from other dots:
+        off_diag_sums = np.sum(np.absolute(self._C_cc_off_diags), axis=1)
+
+        diag = C_cv_sums + off_diag_sums
+        diag += np.absolute(self._c_r) + np.absolute(self._c_r)
+
+        return np.diag(diag)
+
+    def _invalidate_operators(self) -> None:
+        """Marks cached capacitance operators as outdated. To be called
+        whenever a capacitance of the model changes.
+        """
+        self._operators_version += 1
+        self._operators = None
+
+    def compute_energy(
+        self,
+        N: Optional[npt.ArrayLike] = None,
+        V_v: Optional[npt.ArrayLike] = None,
+    ) -> float:
+        """Computes the total energy of the dot system.
+
+        Args:
+            N: charge configuration, i.e. number of charges on each
+                charge node.
+            V_v: Voltages to set on voltages nodes.
+
+        Returns:
+            float: energy of the system
+        """
+        if N is None:
+            N_np = np.array(self.N)
+        else:
+            N_np = np.array(N)
+
+        if V_v is None:
+            V_v_np = self.V_v
+        else:
+            V_v_np = np.array(V_v, dtype=float).flatten()
+
+        ops = self.operators
+        induced = np.dot(ops.C_cv, V_v_np)
+        induced_pot = np.dot(ops.C_cc_inv_C_cv, V_v_np)
+        N_np = N_np.flatten()
+
+        U = (elem_charge ** 2) / 2 * multi_dot([N_np, ops.C_cc_inv, N_np])
+        U += 1 / 2 * np.dot(induced, induced_pot)
+        U += elem_charge * np.dot(N_np, induced_pot)
+
+        return abs(U)
+
+    def determine_N(
+        self,
+        V_v: Optional[Sequence[float]] = None,
+    ) -> List[int]:
+        """Determines the charge state N by minimizing the total
+        energy of the dot system.
+
+        Args:
+            V_v: Voltages to set on voltages nodes.
+
+        Returns:
+            list: Charge state, i.e. number of electrons on each charge node.
+        """
+        if V_v is None:
+            V_v = self.V_v.tolist()
+
+        eng_fct = partial(self.compute_energy, V_v=V_v)
+
+        x0 = np.array(self.N).reshape(-1, 1)
+        res = sc.optimize.minimize(
+            eng_fct,
+            x0,
+            method="Nelder-Mead",
+            tol=1e-4,
+        )
+        c_config = np.rint(res.x)
+
+        n_dots = len(c_config)
+        energies = []
+        c_configs = []
+
+        current_energy = self.compute_energy(N=c_config, V_v=V_v)
+
+        def append_energy(charge_stage: Sequence[int]) -> None:
+            charge_stage[charge_stage < 0] = 0  # type: ignore
+            energies.append(self.compute_energy(N=charge_stage, V_v=V_v))
+            c_configs.append(charge_stage)
+
+        I_mat = np.eye(n_dots)
+        # Check if neighbouring ones have lower energy:
+        for dot_id in range(n_dots):
+            e_hat = I_mat[dot_id]
+
+            append_energy(c_config + e_hat)
+            append_energy(c_config - e_hat)
+
+            for other_dot in range(n_dots):
+                if other_dot != dot_id:
+                    e_hat_other = I_mat[other_dot]
+                    append_energy(c_config + e_hat - e_hat_other)
+
+        indx = np.where(np.array(energies) < np.array(current_energy))[0]
+        if indx.size > 0:
+            min_indx = np.argmin(np.array(energies)[indx.astype(int)])
+            min_c_configs = np.array(c_configs)[indx.astype(int)]
+            c_config = min_c_configs[min_indx]
+
+        c_config[c_config < 0] = 0
+        return c_config.tolist()
+
+    def get_charge_configurations(
+        self,
+        N_limits: N_lmt_type,
+    ) -> npt.NDArray[np.int64]:
+        """Enumerates all charge configurations within 'N_limits'. The order
+        is the same as the one of itertools.product.
+
+        Args:
+            N_limits: Min and max values of number of electrons in each dot.
+
+        Returns:
+            np.array: Charge configurations, one per row.
+        """
+        n_ranges = [np.arange(n_min, n_max + 1) for n_min, n_max in N_limits]
+        grids = np.meshgrid(*n_ranges, indexing="ij")
+        return np.stack([grid.ravel() for grid in grids], axis=-1)
+
+    def compute_energies(
+        self,
+        N_configs: npt.ArrayLike,
+        V_v_points: npt.ArrayLike,
+    ) -> npt.NDArray[np.float64]:
+        """Computes the total energy of the dot system for every pair of
+        voltage configuration and charge configuration in one pass.
+        Vectorized version of `compute_energy`.
+
+        Args:
+            N_configs: Charge configurations, one per row.
+            V_v_points: Voltage configurations of all voltage nodes, one
+                per row.
+
+        Returns:
+            np.array: Energies of shape (number of voltage configurations,
+                number of charge configurations).
+        """
+        return _compute_energies(
+            np.atleast_2d(N_configs), np.atleast_2d(V_v_points),
+            self.operators,
+        )
+
+    def determine_N_batch(
+        self,
+        V_v_points: npt.ArrayLike,
+        N_limits: Optional[N_lmt_type] = None,
+        margin: int = 1,
+        chunk_size: int = 2 ** 20,
+        max_candidates: Optional[int] = MAX_GLOBAL_CANDIDATES,
+    ) -> npt.NDArray[np.int64]:
+        """Determines the ground state charge configurations of many
+        voltage configurations at once. All candidate charge configurations
+        are enumerated and their energies computed for all voltage
+        configurations, the ground state being the one of minimal energy.
+
+        If no 'N_limits' are supplied, candidates are taken around the
+        continuous energy minimum, :math:`-\\mathbf{C_{cv}} V_v`, of all
+        configurations, extended by 'margin' charges and limited to
+        non-negative charges. If there are more than 'max_candidates' of
+        them, as is typically the case for arrays of many dots, ground states
+        are tracked along the sweep using `track_ground_states` instead.
+
+        Args:
+            V_v_points: Voltage configurations of all voltage nodes, one
+                per row.
+            N_limits: Min and max values of number of electrons in each dot,
+                defining all candidate charge configurations.
+            margin: Number of charges by which the estimated charge
+                configuration ranges are extended.
+            chunk_size: Maximum number of energies to hold in memory at
+                once. Voltage configurations are processed in chunks
+                accordingly.
+            max_candidates: Maximum number of candidate charge
+                configurations to enumerate if no 'N_limits' are supplied.
+                No limit if None.
+
+        Returns:
+            np.array: Charge configurations, one per voltage configuration.
+        """
+        V_v_arr = np.atleast_2d(np.asarray(V_v_points, dtype=float))
+        ops = self.operators
+
+        if N_limits is None:
+            N_limits = _estimate_N_limits(V_v_arr, ops, margin)
+            n_candidates = np.prod(
+                [n_max - n_min + 1 for n_min, n_max in N_limits],
+                dtype=float,
+            )
+            if max_candidates is not None and n_candidates > max_candidates:
+                return self.track_ground_states(
+                    V_v_arr, margin=margin, chunk_size=chunk_size,
+                )
+
+        c_configs = self.get_charge_configurations(N_limits)
+        points_per_chunk = max(1, chunk_size // len(c_configs))
+
+        ground_states = np.empty(
+            (len(V_v_arr), c_configs.shape[1]), dtype=np.int64
+        )
+        for start in range(0, len(V_v_arr), points_per_chunk):
+            stop = start + points_per_chunk
+            energies = _compute_energies(
+                c_configs, V_v_arr[start:stop], ops,
+            )
+            ground_states[start:stop] = c_configs[np.argmin(energies, axis=1)]
+
+        return ground_states
+
+    def track_ground_states(
+        self,
+        V_v_points: npt.ArrayLike,
+        N_start: Optional[Sequence[int]] = None,
+        max_steps: int = 1000,
+        margin: int = 1,
+        chunk_size: int = 2 ** 20,
+    ) -> npt.NDArray[np.int64]:
+        """Determines the ground state charge configurations along a sweep,
+        e.g. a raster of voltage configurations as returned by
+        `_get_voltage_grid`, without enumerating all candidate
+        configurations.
+
+        The search at each voltage configuration starts from the ground
+        state of the previous one and repeatedly moves to the lowest energy
+        configuration reachable by adding, removing or moving a single
+        charge, until no such move lowers the energy. As a check, the
+        continuous energy minimum rounded to non-negative charges,
+        :math:`-\\mathbf{C_{cv}} V_v`, is considered as well. If it has a
+        lower energy or 'max_steps' moves are not enough, the local search
+        has failed and `determine_N_batch` searches all configurations
+        around the continuous minimum, extended by 'margin' charges.
+
+        Args:
+            V_v_points: Voltage configurations of all voltage nodes, one
+                per row, in the order in which they are swept.
+            N_start: Charge configuration to start the search at the first
+                voltage configuration from. Default is its continuous energy
+                minimum rounded to non-negative charges.
+            max_steps: Maximum number of moves at each voltage
+                configuration.
+            margin: Number of charges by which ranges of the global search
+                are extended.
+            chunk_size: Maximum number of energies to hold in memory at once
+                during a global search.
+
+        Returns:
+            np.array: Charge configurations, one per voltage configuration.
+        """
+        V_v_arr = np.atleast_2d(np.asarray(V_v_points, dtype=float))
+        ops = self.operators
+        moves = _charge_moves(len(self.N))
+
+        N_cont = -np.dot(V_v_arr, ops.C_cv.T) / elem_charge
+        N_closest = np.maximum(np.rint(N_cont), 0).astype(int)
+        if N_start is None:
+            N_current = N_closest[0]
+        else:
+            N_current = np.array(N_start, dtype=np.int64)
+
+        ground_states = np.empty(
+            (len(V_v_arr), moves.shape[1]), dtype=np.int64
+        )
+        for ip, V_v in enumerate(V_v_arr):
+            V_v = V_v[np.newaxis, :]
+            N_current, converged = _descend_to_ground_state(
+                N_current, V_v, moves, ops, max_steps,
+            )
+            energies = _compute_energies(
+                np.stack([N_current, N_closest[ip]]), V_v, ops,
+            )[0]
+            if not converged or energies[1] < energies[0]:
+                N_current = self.determine_N_batch(
+                    V_v,
+                    N_limits=_estimate_N_limits(V_v, ops, margin),
+                    chunk_size=chunk_size,
+                )[0]
+            ground_states[ip] = N_current
+
+        return ground_states
+
+    def compute_charge_stability_regions(
+        self,
+        voltage_node_idx: Sequence[int],
+        voltage_ranges: Sequence[Tuple[float, float]],
+        N_limits: Optional[N_lmt_type] = None,
+        margin: int = 1,
+    ) -> ChargeStabilityRegions:
+        """Computes the charge stability regions, i.e. polygons within which
+        a charge configuration is the ground state, and the transition
+        segments between them in the window spanned by two voltage nodes.
+        Voltage nodes not swept keep their current value. The regions can
+        then be rasterized at any resolution, see `ChargeStabilityRegions`.
+
+        Args:
+            voltage_node_idx: Voltage node indices spanning the window.
+            voltage_ranges: Voltage ranges of the window.
+            N_limits: Min and max values of number of electrons in each dot,
+                defining all candidate charge configurations. If None, they
+                are estimated in the same way as in `determine_N_batch`.
+            margin: Number of charges by which estimated charge
+                configuration ranges are extended.
+
+        Returns:
+            ChargeStabilityRegions: regions and transition segments.
+        """
+        ops = self.operators
+        if N_limits is None:
+            corners = self._get_voltage_grid(
+                voltage_node_idx,
+                [[np.min(v_range), np.max(v_range)]
+                 for v_range in voltage_ranges],
+            )
+            N_limits = _estimate_N_limits(corners, ops, margin)
+        N_configs = self.get_charge_configurations(N_limits)
+        N_float = N_configs.astype(float)
+
+        V_v_fixed = np.array(self.V_v, dtype=float)
+        V_v_fixed[list(voltage_node_idx)] = 0
+        induced_pot = np.stack([
+            np.dot(ops.C_cc_inv_C_cv, V_v_fixed),
+            ops.C_cc_inv_C_cv[:, voltage_node_idx[0]],
+            ops.C_cc_inv_C_cv[:, voltage_node_idx[1]],
+        ], axis=-1)
+
+        energy_coefficients = elem_charge * np.dot(N_float, induced_pot)
+        energy_coefficients[:, 0] += (elem_charge ** 2) / 2 * np.einsum(
+            "ki,ij,kj->k", N_float, ops.C_cc_inv, N_float
+        )
+
+        mu_coefficients = np.repeat(
+            elem_charge * induced_pot[np.newaxis], len(N_configs), axis=0,
+        )
+        mu_coefficients[..., 0] += (elem_charge ** 2) * (
+            np.dot(N_float, ops.C_cc_inv) - ops.C_cc_inv_diag / 2
+        )
+
+        return ChargeStabilityRegions(
+            voltage_ranges,
+            N_configs,
+            energy_coefficients,
+            mu_coefficients,
+            (elem_charge ** 2) * ops.C_cc_inv_diag,
+        )
+
+    def get_triplepoints(
+        self,
+        voltage_node_idx: Sequence[int],
+        N_limits: N_lmt_type,
+    ) -> Tuple[
+            npt.NDArray[np.float64], npt.NDArray[np.float64], List[List[int]]]:
+        """Calculates triple points for charge configurations within
+        'N_limits'.
+
+        Args:
+            voltage_node_idx: indices of gates to sweep
+            N_limit: Min and max values of number of electrons in each dot,
+                     defining all charge configurations to consider
+
+        Return:
+            np.array: Coordinates of electron triple points
+            np.array: Coordinates of hole triple points
+            list: List of electron charge configurations
+        """
+
+        if len(N_limits) > len(self.N):
+            logger.error(
+                "CapacitanceCore.get_triplepoints: "
+                + "Infeasible charge configuration supplied."
+            )
+
+        c_configs = self.get_charge_configurations(N_limits)
+        coordinates_etp, coordinates_htp = self.calculate_triplepoints_batch(
+            voltage_node_idx, c_configs,
+        )
+        # setting N mostly for monitor purposes
+        self.N = c_configs[-1].tolist()
+
+        return coordinates_etp, coordinates_htp, c_configs.tolist()
+
+    def calculate_triplepoints(
+        self,
+        voltage_node_idx: Sequence[int],
+        N: Sequence[int],
+    ) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+        """Determines coordinates in voltage space of triple points
+        (electron and hole) for a single charge configuration.
+
+        Args:
+            voltage_node_idx: Indices of voltage nodes to be determined
+            N: Charge configuration, number of electrons of each charge
+                node.
+
+        Return:
+            np.array: Coordinates of electron triple points.
+            np.array: Coordinates of hole triple points.
+        """
+        x_etp, x_htp = self.calculate_triplepoints_batch(
+            voltage_node_idx, [N],
+        )
+        return x_etp[0], x_htp[0]
+
+    def calculate_triplepoints_batch(
+        self,
+        voltage_node_idx: Sequence[int],
+        N_configs: npt.ArrayLike,
+        V_v: Optional[Sequence[float]] = None,
+    ) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+        """Determines coordinates in voltage space of triple points
+        (electron and hole) for many charge configurations at once.
+        Chemical potentials are linear in the voltages, which is why the
+        conditions of `mu_electron_triplepoints` and `mu_hole_triplepoints`
+        being zero form linear systems, sharing the same matrix for all
+        charge configurations. They are solved in the least squares sense
+        for all configurations in one go.
+
+        Args:
+            voltage_node_idx: Indices of voltage nodes to be determined.
+            N_configs: Charge configurations, one per row.
+            V_v: Voltages of all voltage nodes, of which those not in
+                'voltage_node_idx' are kept fixed. Default is self.V_v.
+
+        Return:
+            np.array: Coordinates of electron triple points, one row per
+                charge configuration.
+            np.array: Coordinates of hole triple points, one row per
+                charge configuration.
+        """
+        if V_v is None:
+            V_fixed = np.array(self.V_v)
+        else:
+            V_fixed = np.array(V_v, dtype=float)
+
+        ops = self.operators
+        voltage_node_idx = list(voltage_node_idx)
+        N_configs = np.atleast_2d(np.asarray(N_configs, dtype=float))
+        n_dots = N_configs.shape[1]
+
+        V_fixed[voltage_node_idx] = 0
+        # mu_j(N) = offset_j + N_pot_j + lin_j * V_swept
+        offset = -(elem_charge ** 2) / 2 * ops.C_cc_inv_diag
+        offset = offset + elem_charge * np.dot(ops.C_cc_inv_C_cv, V_fixed)
+        lin = elem_charge * ops.C_cc_inv_C_cv[:, voltage_node_idx]
+        N_pot = (elem_charge ** 2) * np.dot(N_configs, ops.C_cc_inv)
+
+        # electron triple points: mu_j(N + e_j) = 0
+        rhs_etp = -(offset + N_pot + (elem_charge ** 2) * ops.C_cc_inv_diag)
+        x_etp = np.linalg.lstsq(lin, rhs_etp.T, rcond=None)[0]
+
+        # hole triple points: mu_j(N + e_j + e_k) = 0 for all k != j
+        dot_idx, other_idx = np.nonzero(~np.eye(n_dots, dtype=bool))
+        added_pot = ops.C_cc_inv[other_idx, dot_idx]
+        added_pot = added_pot + ops.C_cc_inv_diag[dot_idx]
+        rhs_htp = -(
+            offset[dot_idx] + N_pot[:, dot_idx]
+            + (elem_charge ** 2) * added_pot
+        )
+        x_htp = np.linalg.lstsq(lin[dot_idx], rhs_htp.T, rcond=None)[0]
+
+        return x_etp.T, x_htp.T
+
+    def mu_electron_triplepoints(
+        self,
+        new_voltages: Sequence[float],
+        voltage_node_idx: Sequence[int],
+        N: Optional[Sequence[int]] = None,
+    ) -> npt.NDArray[np.float64]:
+        """Calculates chemical potentials of all charge nodes
+        for a given charge configuration N and corresponding to electron
+        triple points (:math:`\mu(N)`).
+
+        Args:
+            new_voltages: Voltages to set on voltage nodes.
+            voltage_node_idx: Voltage node indices to which the values
+                in new_voltages correspond to.
+            N: Desired charge configuration, optional. If none supplied
+                self.N is taken.
+
+        Returns:
+            np.array: Chemical potentials of electron triple points
+                corresponding to electron triple points.
+        """
+        if N is None:
+            N_np = self.N
+        else:
+            N_np = np.array(N, dtype=int)
+
+        V_v = np.array(self.V_v, dtype=float)
+        V_v[voltage_node_idx] = new_voltages
+
+        I_mat = np.eye(len(N_np))
+
+        out = []
+        for dot_id in range(len(N_np)):
+            e_hat = I_mat[dot_id]
+            out.append(self.mu(dot_id, N=N_np + e_hat, V_v=V_v))
+
+        return np.array(out).flatten()
+
+    def mu_hole_triplepoints(
+        self,
+        new_voltages: Sequence[float],
+        voltage_node_idx: Sequence[int],
+        N: Optional[Sequence[int]] = None,
+    ) -> npt.NDArray[np.float64]:
+        """Calculates chemical potentials of all charge nodes
+            for given charge configuration N and corresponding to hole triple
+            points (:math:`mu_{j}(N + \hat{e}_{i})`).
+
+        Args:
+            new_voltages: values of new gate voltages, to be replaced in
+                self.V_v. These are the values scipy.optimize.fsolve is solving
+                for.
+            voltage_node_idx: Voltages nodes indices to which the values
+                above correspond to.
+            N: Desired charge configuration, if none supplied self.N is taken.
+        """
+        if N is None:
+            N_np = self.N
+        else:
+            N_np = np.array(N, dtype=int)
+        V_v = np.array(self.V_v, dtype=float)
+        V_v[voltage_node_idx] = new_voltages
+
+        I_mat = np.eye(len(N_np))
+        out = []
+
+        for dot_id in range(len(N_np)):
+            e_hat = I_mat[dot_id]
+            for other_dot in range(len(N_np)):
+                if other_dot != dot_id:
+                    e_hat_other = I_mat[other_dot]
+                    out.append(
+                        self.mu(dot_id, N=N_np + e_hat_other + e_hat, V_v=V_v)
+                    )
+        return np.array(out).flatten()
+
+    def mu(
+        self,
+        dot_indx: int,
+        N: Optional[npt.ArrayLike] = None,
+        V_v: Optional[npt.ArrayLike] = None,
+    ) -> float:
+        """Calculates the chemical potential of a single dot (charge node)
+        given the charge
+        and voltage configuration of the entire dot system (all dots included).
+
+        Args:
+            dot_indx: index of dot for which the chemical potential should be
+                computed.
+            N: Charge configuration of the entire system, i.e. the number of
+                electrons on each charge node.
+            V_v: Voltages to set on (all) voltage nodes.
+
+        Returns:
+            float: Chemical potential of dot `dot_indx`.
+        """
+
+        if N is None:
+            N_np = np.array(self.N)
+        else:
+            N_np = np.array(N)
+
+        if V_v is None:
+            V_v_np = np.array(self.V_v)
+        else:
+            V_v_np = np.array(V_v)
+
+        ops = self.operators
+
+        pot = -(elem_charge ** 2) / 2 * ops.C_cc_inv_diag[dot_indx]
+        pot += (elem_charge ** 2) * np.dot(N_np, ops.C_cc_inv[:, dot_indx])
+        pot += elem_charge * np.dot(ops.C_cc_inv_C_cv[dot_indx], V_v_np)
+
+        return pot
+
+    def chemical_potentials(
+        self,
+        N_points: npt.ArrayLike,
+        V_v_points: npt.ArrayLike,
+    ) -> npt.NDArray[np.float64]:
+        """Calculates the chemical potentials of all dots for many charge
+        and voltage configurations at once. Vectorized version of `mu`.
+
+        Args:
+            N_points: Charge configurations, one per row.
+            V_v_points: Voltage configurations of all voltage nodes, one
+                per row and one per charge configuration.
+
+        Returns:
+            np.array: Chemical potentials of shape (number of
+                configurations, number of dots).
+        """
+        return _compute_chemical_potentials(
+            np.atleast_2d(N_points), np.atleast_2d(V_v_points),
+            self.operators,
+        )
+
+    def compute_charge_diagram(
+        self,
+        voltage_node_idx: Sequence[int],
+        voltage_ranges: Sequence[Tuple[float, float]],
+        n_steps: Sequence[int] = N_2D,
+        line_intensity: float = 1.0,
+        add_noise: bool = True,
+        target_snr_db: float = 100,
+        normalize: bool = True,
+        add_charge_jumps: bool = False,
+        jump_freq: float = 0.001,
+        method: str = "grid",
+        rng: Optional[np.random.Generator] = None,
+    ) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64],
+            npt.NDArray[np.float64]]:
+        """Computes the charge diagram measured by
+        `CapacitanceModel.sweep_voltages`, without saving it to a database.
+
+        Args:
+            voltage_node_idx: Voltage node indices to sweep.
+            voltage_ranges: Voltage ranges to sweep.
+            n_steps: Number of steps of the measurement.
+            line_intensity: Multiplication factor of transport current.
+            add_noise: whether or not to add noise.
+            target_snr_db: Target signal-to-noise ratio used to
+                calculate amplitude of random normal noise.
+            normalize: whether to normalize the data.
+            add_charge_jumps: Whether or not to add random charge jumps.
+            jump_freq: Average frequency at which optional charge jumps
+                should occur.
+            method: How ground states are determined. 'grid' minimizes
+                energies at each pixel using `determine_N_batch`, 'analytic'
+                rasterizes charge stability regions computed by
+                `compute_charge_stability_regions`, at a cost independent of
+                the number of candidate charge configurations per pixel.
+            rng: Random number generator drawing noise and charge jumps.
+                Numpy's global random state is used if None.
+
+        Returns:
+            np.array: 2D charge diagram.
+            np.array: Setpoints of first voltage node.
+            np.array: Setpoints of second voltage node.
+        """
+        self.V_v[voltage_node_idx[0]] = np.min(voltage_ranges[0])
+        self.V_v[voltage_node_idx[1]] = np.min(voltage_ranges[1])
+
+        voltage_x = np.linspace(
+            np.min(voltage_ranges[0]), np.max(voltage_ranges[0]), n_steps[0]
+        )
+
+        voltage_y = np.linspace(
+            np.min(voltage_ranges[1]), np.max(voltage_ranges[1]), n_steps[1]
+        )
+        signal = np.zeros(n_steps)
+
+        if add_charge_jumps:
+            additional_charges = np.ones(n_steps)
+            s = 1
+
+            if rng is None:
+                poisson = np.random.poisson(lam=jump_freq, size=n_steps)
+            else:
+                poisson = rng.poisson(lam=jump_freq, size=n_steps)
+            poisson[poisson > 1] = 1
+            for ix in range(n_steps[0]):
+                for iy in range(n_steps[1]):
+                    if poisson[ix, iy] == 1:
+                        s *= -1
+                    additional_charges[ix, iy] *= s
+            additional_charges = np.array(additional_charges)
+            additional_charges = (additional_charges + 1) / 2
+        else:
+            additional_charges = np.zeros(n_steps)
+
+        V_v_points = self._get_voltage_grid(
+            voltage_node_idx, [voltage_x, voltage_y],
+        )
+        if method == "grid":
+            N_points = self.determine_N_batch(V_v_points)
+        elif method == "analytic":
+            N_points = self.compute_charge_stability_regions(
+                voltage_node_idx, voltage_ranges,
+            ).ground_states(n_steps)
+        else:
+            logger.error(
+                f"Unknown method {method}. Use 'grid' or 'analytic'."
+            )
+            raise ValueError
+        N_points = N_points.astype(float)
+        if rng is None:
+            n_idx = np.random.randint(N_points.shape[1], size=len(N_points))
+        else:
+            n_idx = rng.integers(N_points.shape[1], size=len(N_points))
+        N_points[np.arange(len(N_points)), n_idx] += additional_charges.ravel()
+
+        signal = self.calculate_transport_at_zero_bias_batch(
+            N_points, V_v_points,
+        ).reshape(signal.shape) * line_intensity
+
+        self.V_v[voltage_node_idx[0]] = voltage_x[-1]
+        self.V_v[voltage_node_idx[1]] = voltage_y[-1]
+        self.N = N_points[-1].tolist()
+
+        if add_noise:
+            signal = self._add_noise(
+                signal, target_snr_db=target_snr_db, rng=rng,
+            )
+        if normalize:
+            signal = signal / np.max(signal)
+
+        return signal, voltage_x, voltage_y
+
+    def compute_coulomb_oscillations(
+        self,
+        voltage_node_idx: int,
+        voltage_range: Sequence[float],
+        n_steps: int = N_1D[0],
+        line_intensity: float = 1.0,
+        add_noise: bool = True,
+        broadening: float = 0.01,
+        target_snr_db: float = 100.0,
+        normalize: bool = True,
+    ) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+        """Computes the Coulomb oscillations measured by
+        `CapacitanceModel.sweep_voltage`, without saving them to a database.
+
+        Args:
+            voltage_node_idx: voltage node index to sweep.
+            voltage_range: Voltage range to sweep.
+            n_steps: Number of steps of the measurement.
+            line_intensity: Multiplication factor of transport current.
+            add_noise: whether or not to add noise.
+            broadening: level broadening due to dots coupling to leads
+            target_snr_db: target signal-to-noise ratio used to
+                calculate amplitude of random normal noise.
+            normalize: whether to normalize the data.
+
+        Returns:
+            np.array: 1D transport signal.
+            np.array: Setpoints of the voltage node.
+        """
+        self.V_v[voltage_node_idx] = np.min(voltage_range)
+
+        voltage_x = np.linspace(
+            np.min(voltage_range), np.max(voltage_range), n_steps
+        )
+        V_v_points = self._get_voltage_grid([voltage_node_idx], [voltage_x])
+        N_points = self.determine_N_batch(V_v_points)
+
+        signal = self.calculate_transport_at_zero_bias_batch(
+            N_points, V_v_points, broadening=broadening,
+        ) * line_intensity
+
+        self.V_v[voltage_node_idx] = voltage_x[-1]
+        self.N = N_points[-1].tolist()
+
+        if add_noise:
+            signal = self._add_noise(signal, target_snr_db=target_snr_db)
+        if normalize:
+            signal = signal / np.max(signal)
+
+        return signal, voltage_x
+
+    def sweep_bias_and_voltage(
+        self,
+        voltage_node_idx: int,  # the one we want to sweep
+        voltage_range: Sequence[float],
+        bias_range: Tuple[float, float],
+        n_steps: Sequence[int] = N_2D,
+        line_intensity: float = 1.0,
+    ) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+        """Computes a Coulomb diamond diagram by sweeping the source-drain
+        bias against a voltage. It returns two diagrams, one showing
+        the bias-voltage sweep without co-tunneling events and a second
+        showing elastic co-tunneling events only, calculated via
+        `get_co_tunneling_rate`.
+
+        Args:
+            voltage_node_idx: voltage node index to sweep.
+            voltage_range: range of voltage to sweep.
+            bias_range: bias range to sweep.
+            n_steps: number of steps in each dimension.
+            line_intensity: Multiplication factor of number of
+                degeneracies, resulting in the desired peak hight before normalization.
+
+        Returns:
+            np.ndarray: 2d diagram of bias-voltage sweep without tunneling
+                events.
+            np.ndarray: 2d diagram showing elastic co-tunneling only.
+        """
+
+        voltage_x = np.linspace(
+            np.min(voltage_range), np.max(voltage_range), n_steps[0]
+        )
+
+        bias_steps = np.linspace(
+            np.min(bias_range), np.max(bias_range), n_steps[1]
+        )
+
+        V_v_points = self._get_voltage_grid([voltage_node_idx], [voltage_x])
+        N_points = self.determine_N_batch(V_v_points)
+
+        dU = self.get_energy_differences_to_excited_charge_states_batch(
+            N_points, V_v_points, n_diff_charges=1,
+        )
+        abs_bias = np.abs(bias_steps)
+        n_in_bias = np.zeros(n_steps, dtype=int)
+        for excitation in dU.T:
+            n_in_bias += excitation[:, np.newaxis] <= abs_bias[np.newaxis, :]
+        signal = n_in_bias * line_intensity
+
+        N_plus_one = N_points.copy()
+        N_plus_one[:, 0] += 1
+        mu_n = self.chemical_potentials(N_points, V_v_points)[:, 0]
+        mu_n_plus_one = self.chemical_potentials(N_plus_one, V_v_points)[:, 0]
+        # rates are computed on the entire grid but only used where no
+        # excited state is within the bias window
+        with np.errstate(divide="ignore", invalid="ignore"):
+            add_rate = self.get_co_tunneling_rate(
+                bias_steps[np.newaxis, :],
+                mu_n[:, np.newaxis],
+                mu_n_plus_one[:, np.newaxis],
+            )
+        co_tunn = np.where(n_in_bias == 0, add_rate, 0)
+
+        self.V_v = V_v_points[-1].tolist()
+        self.N = N_points[-1].tolist()
+
+        signal = (signal - np.mean(signal))/np.std(signal)
+        co_tunn = (co_tunn - np.mean(co_tunn))/np.std(co_tunn)
+
+        return signal, co_tunn
+
+    def get_co_tunneling_rate(
+        self,
+        bias: float,
+        mu_n: float,
+        mu_n_plus_one: float,
+        source_rate_N: float = 0.3,
+        source_rate_N_plus_one: float = 0.2,
+        drain_rate_N: float = 0.3,
+        drain_rate_N_plus_one: float = 0.2,
+        h_bar: float = 1,
+    ) -> float:
+        """Calculates the elastic co-tunneling rate according to the equation
+        on page 400 (chapter 8) or Thomas Ihn's book. This equations assumes
+        the system to be at zero temperature and that tunneling rates are
+        independent of energy over a small source-drain voltage. Biases and
+        chemical potentials may also be arrays, in which case rates are
+        computed element-wise.
+
+        Args:
+            bias: source drain bias
+            mu_n: chemical potential of charge state with a total of N charges,
+                e.g. of the self.N state.
+            mu_n_plus_one: chemical potential of charge state with N+1 charges,
+                e.g. an adjacent charge state of self.N. Adjacent means
+                having one additional charge.
+            source_rate_N: tunneling rate between source and a dot system in
+                charge state with a total of N charges.
+            source_rate_N_plus_one: tunneling rate between source and a dot
+                system in charge state with a total of N+1 charges.
+            drain_rate_N: tunneling rate between drain and a dot system in
+                charge state with a total of N charges
+            drain_rate_N_plus_one: tunneling rate between drain and a dot
+                system in charge state with a total of N+1 charges.
+            h_bar: Plank constant or the substitution thereof.
+
+        Returns:
+            float: co-tunneling rate
+        """
+        mu_source = bias
+        mu_drain = 0
+
+        first_term = (source_rate_N * drain_rate_N)
+        first_term /= ((mu_drain - mu_n)*(mu_source - mu_n))
+        second_term = (source_rate_N_plus_one * drain_rate_N_plus_one)
+        second_term /= ((mu_drain - mu_n_plus_one)*(mu_source - mu_n_plus_one))
+        third_term = np.log((mu_n_plus_one - mu_drain)/(mu_drain - mu_n))
+        third_term = third_term - np.log(
+            (mu_n_plus_one - mu_source)/(mu_source - mu_n)
+        )
+        third_term = third_term / (
+            (mu_n_plus_one - mu_n) * (mu_source - mu_drain)
+        )
+
+        co_tunneling_rate = 2 * np.pi/h_bar * (first_term + second_term) * bias
+        co_tunneling_rate = co_tunneling_rate + third_term
+
+        return co_tunneling_rate
+
+    def calculate_transport_at_zero_bias(
+            self,
+        N_current: Optional[Sequence[int]] = None,
+        V_v: Optional[Sequence[float]] = None,
+        broadening: float = 0.01
+    ) -> float:
+        """Computes transport signal at zero bias and at zero temperature.
+
+        Assume the electrochemical potentials of source and drain to be zero (zero bias)
+        Transport current is propotional to DOS (density of states) of all dot levels at energy 0
+        Assume that all dots are connected sequentially, meaning carrier needs to hop from
+        source to dot 1, then to dot 2, ..., then to dot N, and finally hop to drain
+        In this case, current is propotional to (DOS of dot 1 at energy 0) * ... * (DOS of dot N at 0)
+        For each dot, only consider current charge state and the first excited state.
+        Also take into account level broadening due to dots coupling to leads.
+
+        Args:
+            N_current: charge state to which other states differing by at most
+                one charge should be compared to. Default is self.N.
+            V_v: voltage configuration at which the energies should be computed.
+                Default is self.V_v.
+            broadening: level broadening due to dots coupling to leads
+
+        Returns:
+            float: transport signal in given configuration
+        """
+
+        n_dots = len(self.N)
+
+        if N_current is not None:
+            self.N = N_current  # type: ignore
+        N_np = self.N
+
+        if V_v is not None:
+            self.V_v = V_v  # type: ignore
+
+        I_mat = np.eye(n_dots)
+        current = 1.
+
+        for dot_id in range(n_dots):
+            dos = 0.0
+            e_hat = I_mat[dot_id]
+            mu = self.mu(dot_id, N=N_np)
+            # dos of current charge state
+            dos += self.lorentzian_density_of_state(0.0, mu, broadening)
+            charge_state = N_np + e_hat
+            mu = self.mu(dot_id, N=charge_state)
+            # dos of the first excited state
+            dos += self.lorentzian_density_of_state(0.0, mu, broadening)
+            current *= dos
+
+        return current
+
+    def calculate_transport_at_zero_bias_batch(
+        self,
+        N_points: npt.ArrayLike,
+        V_v_points: npt.ArrayLike,
+        broadening: float = 0.01,
+    ) -> npt.NDArray[np.float64]:
+        """Computes transport signals at zero bias and at zero temperature
+        for many charge and voltage configurations at once. Vectorized
+        version of `calculate_transport_at_zero_bias`.
+
+        Args:
+            N_points: Charge configurations, one per row.
+            V_v_points: Voltage configurations of all voltage nodes, one
+                per row and one per charge configuration.
+            broadening: level broadening due to dots coupling to leads
+
+        Returns:
+            np.array: transport signal of each configuration.
+        """
+        mu = self.chemical_potentials(N_points, V_v_points)
+        # chemical potentials of the first excited states, i.e. with one
+        # additional charge on the respective dot
+        mu_excited = mu + (elem_charge ** 2) * self.operators.C_cc_inv_diag
+
+        dos = self.lorentzian_density_of_state(0.0, mu, broadening)
+        dos += self.lorentzian_density_of_state(0.0, mu_excited, broadening)
+
+        return np.prod(dos, axis=1)
+
+    def lorentzian_density_of_state(
+        self,
+        transport_energy: float,
+        level_energy: EnergyType,
+        broadening: float,
+    ) -> EnergyType:
+        """Computes density of states of a energy level at given transport energy
+        using a Lorentzian function
+
+        For reference, see equation 1.3.2 in S. Datta's book
+        Quantum Transport Atom To Transistor
+
+        Returns:
+            float or np.array: density of state at transport energy, of the
+                same shape as 'level_energy'
+        """
+        diff = transport_energy - level_energy
+        return broadening / (2. * np.pi * (diff ** 2 + broadening ** 2 / 4.))
+
+    def get_energy_differences_to_adjacent_charge_states(
+        self,
+        N_current: Optional[Sequence[int]] = None,
+        V_v: Optional[Sequence[float]] = None,
+    ) -> npt.NDArray[np.float64]:
+        """Computes energy differences between a charge state and all states
+        differing from it by at most one charge.
+
+        Args:
+            N_current: charge state to which other states differing by at most
+                one charge should be compared to. Default is self.N.
+            V_v: voltage configuration at which the energies should be computed.
+                Default is self.V_v.
+
+        Returns:
+            np.array: Energy differences to charge states differing by at most
+                one charge.
+        """
+
+        n_dots = len(self.N)
+
+        if N_current is not None:
+            self.N = N_current  # type: ignore
+        N_np = self.N
+
+        if V_v is not None:
+            self.V_v = V_v  # type: ignore
+
+        I_mat = np.eye(n_dots)
+        energies = []
+
+        for dot_id in range(n_dots):
+            e_hat = I_mat[dot_id]
+
+            charge_state = N_np + e_hat
+            charge_state[charge_state < 0] = 0
+            energies.append(self.compute_energy(N=charge_state, V_v=V_v))
+
+            charge_state = N_np - e_hat
+            charge_state[charge_state < 0] = 0
+            energies.append(self.compute_energy(N=charge_state, V_v=V_v))
+
+            for other_dot in range(n_dots):
+                if other_dot != dot_id:
+                    e_hat_other = I_mat[other_dot]
+                    charge_state = N_np + e_hat - e_hat_other
+                    charge_state[charge_state < 0] = 0
+                    energies.append(
+                        self.compute_energy(
+                            N=charge_state, V_v=V_v,
+                        )
+                    )
+        current_energy = self.compute_energy(N=N_np, V_v=V_v)
+        dU = abs(np.array(energies) - current_energy)
+
+        return dU[dU != 0]
+
+    def get_energy_differences_to_excited_charge_states(
+        self,
+        N_current: Optional[Sequence[int]] = None,
+        V_v: Optional[Sequence[float]] = None,
+        n_diff_charges: int = 3,
+    ) -> npt.NDArray[np.float64]:
+        """Computes energy differences between a charge state and all states
+        differing from it by at most 'n_diff_charges' charges. These additional
+        charges represent excited charge state which require an excitation
+        voltage for a quantum dot system to reach them.
+
+        Args:
+            N_current: charge state to which other states differing by at most
+                'n_diff_charges' charges should be compared to. Default is self.N.
+            V_v: voltage configuration at which the energies should be computed.
+                Default is self.V_v.
+            n_diff_charges: number of extra charges to consider adding to
+                'N_current'.
+
+        Returns:
+            np.array: Energy differences to charge states differing by at most
+                'n_diff_charges' charges.
+        """
+        n_dots = len(self.N)
+
+        if N_current is not None:
+            self.N = N_current  # type: ignore
+        N_np = self.N
+
+        if V_v is not None:
+            self.V_v = V_v  # type: ignore
+
+        I_mat = np.eye(n_dots)
+        energies = []
+
+        for dot_id in range(n_dots):
+            e_hat = I_mat[dot_id]
+
+            for add_e in range(n_diff_charges):
+                charge_state = N_np + (add_e+1)*e_hat
+                charge_state[charge_state < 0] = 0
+                energies.append(self.compute_energy(N=charge_state, V_v=V_v))
+
+            charge_state = N_np - e_hat
+            charge_state[charge_state < 0] = 0
+            energies.append(self.compute_energy(N=charge_state, V_v=V_v))
+
+            for other_dot in range(n_dots):
+                if other_dot != dot_id:
+                    e_hat_other = I_mat[other_dot]
+                    for add_e in range(n_diff_charges):
+                        charge_state = N_np + (add_e+1)*e_hat - e_hat_other
+                        charge_state[charge_state < 0] = 0
+                        energies.append(
+                            self.compute_energy(
+                                N=charge_state, V_v=V_v,
+                            )
+                        )
+        current_energy = self.compute_energy(N=N_np, V_v=V_v)
+        dU = abs(np.array(energies) - current_energy)
+
+        return dU[dU != 0]
+
+    def get_energy_differences_to_excited_charge_states_batch(
+        self,
+        N_points: npt.ArrayLike,
+        V_v_points: npt.ArrayLike,
+        n_diff_charges: int = 3,
+    ) -> npt.NDArray[np.float64]:
+        """Computes energy differences between many charge states and all
+        states differing from them by at most 'n_diff_charges' charges, each
+        at its own voltage configuration. Vectorized version of
+        `get_energy_differences_to_excited_charge_states`, which does not
+        change the model's charge or voltage configuration.
+
+        Args:
+            N_points: charge states, one per row.
+            V_v_points: voltage configurations of all voltage nodes, one per
+                row and charge state.
+            n_diff_charges: number of extra charges to consider adding to
+                each charge state.
+
+        Returns:
+            np.array: Energy differences of shape (number of charge states,
+                number of excited states), in the order used by
+                `get_energy_differences_to_excited_charge_states`.
+                Differences of zero, which the non-vectorized version
+                removes, are NaN.
+        """
+        N_points = np.atleast_2d(N_points)
+        V_v_points = np.atleast_2d(np.asarray(V_v_points, dtype=float))
+        n_dots = N_points.shape[1]
+
+        I_mat = np.eye(n_dots, dtype=int)
+        offsets = []
+        for dot_id in range(n_dots):
+            e_hat = I_mat[dot_id]
+            for add_e in range(n_diff_charges):
+                offsets.append((add_e+1)*e_hat)
+            offsets.append(-e_hat)
+            for other_dot in range(n_dots):
+                if other_dot != dot_id:
+                    for add_e in range(n_diff_charges):
+                        offsets.append((add_e+1)*e_hat - I_mat[other_dot])
+
+        excited_states = N_points[:, np.newaxis, :] + np.array(offsets)
+        excited_states[excited_states < 0] = 0
+
+        ops = self.operators
+        energies = _compute_paired_energies(excited_states, V_v_points, ops)
+        current_energies = _compute_paired_energies(
+            N_points[:, np.newaxis, :], V_v_points, ops,
+        )
+        dU = np.abs(energies - current_energies)
+        dU[dU == 0] = np.nan
+
+        return dU
+
+    def determine_sweep_voltages(
+        self,
+        voltage_node_idx: Sequence[int],
+        V_v: Optional[Sequence[float]] = None,
+        N_limits: Optional[N_lmt_type] = None,
+    ) -> List[Tuple[float, float]]:
+        """Determines voltages to sweep to measure specific charge transitions.
+        Sweep limits are the voltages of the swept nodes minimizing the
+        energy of the first and last charge configuration in 'N_limits'
+        respectively, while all other voltages are kept fixed.
+
+        Args:
+            voltage_node_idx: Indices of voltages nodes to sweep.
+            V_v: Voltage configuration of all gates. Default is self.V_v.
+            N_limits: Charge configuration ranges to measure. E.g. for a double
+                dot to sweep over empty dots to both having 3 electrons: [(0, 3), (0, 3)]
+
+        Returns:
+            list: Voltage limits to sweep. Example double dot:
+                [(gate1_min_voltage, gate1_max_voltage), (gate2_min_voltage, gate2_max_voltage)]
+        """
+        if N_limits is None:
+            N_limits = [(0, 1)] * len(self.N)
+
+        sweep_limits = self.determine_sweep_voltages_batch(
+            voltage_node_idx, N_limits, V_v=V_v,
+        )
+        return [(lower, upper) for lower, upper in sweep_limits.tolist()]
+
+    def determine_sweep_voltages_batch(
+        self,
+        voltage_node_idx: Union[Sequence[int], npt.NDArray[np.int64]],
+        N_limits: Union[N_lmt_type, npt.NDArray[np.int64]],
+        V_v: Optional[Sequence[float]] = None,
+    ) -> npt.NDArray[np.float64]:
+        """Determines voltages to sweep to measure specific charge transitions
+        for several combinations of swept voltage nodes and charge
+        configuration ranges at once, see `determine_sweep_voltages`.
+
+        Args:
+            voltage_node_idx: Indices of voltage nodes to sweep, of shape
+                (..., number of swept nodes).
+            N_limits: Charge configuration ranges to measure, of shape
+                (..., number of dots, 2). Leading dimensions are broadcast
+                against those of 'voltage_node_idx'.
+            V_v: Voltage configuration of all gates. Default is self.V_v.
+
+        Returns:
+            np.array: Voltage limits to sweep, of shape (..., number of swept
+                nodes, 2).
+        """
+        ops = self.operators
+        return _compute_sweep_voltages(
+            voltage_node_idx,
+            N_limits,
+            self.V_v if V_v is None else V_v,
+            ops.C_cc_inv,
+            ops.C_cv,
+        )
+
+    def _get_voltage_grid(
+        self,
+        voltage_node_idx: Sequence[int],
+        voltage_setpoints: Sequence[npt.ArrayLike],
+    ) -> npt.NDArray[np.float64]:
+        """Assembles voltage configurations of all voltage nodes for all
+        setpoints of a sweep. Voltage nodes not swept keep their current
+        value.
+
+        Args:
+            voltage_node_idx: Voltage node indices to sweep.
+            voltage_setpoints: Setpoints of each swept voltage node.
+
+        Returns:
+            np.array: Voltage configurations, one per row, ordered as the
+                nested sweep with the first voltage node being the outer
+                loop.
+        """
+        grids = np.meshgrid(*voltage_setpoints, indexing="ij")
+        V_v_points = np.tile(
+            np.array(self.V_v, dtype=float), (grids[0].size, 1)
+        )
+        for v_idx, grid in zip(voltage_node_idx, grids):
+            V_v_points[:, v_idx] = grid.ravel()
+
+        return V_v_points
+
+    def _make_it_real(
+        self,
+        diagram: npt.NDArray[np.float64],
+        kernel_widths: Union[float, Sequence[float]] = [3.0, 3.0],
+    ) -> npt.NDArray[np.float64]:
+        """Uses a Gaussian filter to broaden a stickfigure diagram.
+
+        Args:
+            diagram: The previously computed stickfigure diagram
+            kernel_width (list, float): Width of the Gaussian kernel. Can be a
+                single number or list of the same length as the diagram's
+                dimensions.
+
+        Return:
+            np.ndarray: Gaussian blurred diagram.
+        """
+        org_shape = diagram.shape
+        diagram = gaussian_filter(
+            diagram, sigma=kernel_widths, mode="constant", truncate=1
+        )
+
+        return resize(diagram, org_shape)
+
+    def _add_noise(
+        self,
+        diagram: npt.NDArray[np.float64],
+        target_snr_db: float = 10.0,
+        rng: Optional[np.random.Generator] = None,
+    ) -> npt.NDArray[np.float64]:
+        """Adds normally distributed random noise to a diagram to match the
+        desired signal-to-noise ratio.
+
+        Args:
+            diagram: Noise free diagram
+            target_snr_db: Target signal to noise ratio in dB
+            rng: Random number generator drawing the noise. Numpy's global
+                random state is used if None.
+
+        Return:
+            np.ndarray: Diagram with normally distributed random noise added.
+        """
+
+        d_shape = diagram.shape
+        sig_mean_power = np.mean(diagram ** 2 / 2)
+        sig_avg_db = 10 * np.log10(sig_mean_power)
+
+        noise_avg_db = sig_avg_db - target_snr_db
+        noise_avg_power = 10 ** (noise_avg_db / 10)
+
+        mean_noise = 0
+        if rng is None:
+            noise = np.random.normal(
+                mean_noise, noise_avg_power, np.prod(d_shape))
+        else:
+            noise = rng.normal(mean_noise, noise_avg_power, np.prod(d_shape))
+        noise = noise.reshape(*d_shape)
+
+        return diagram + noise
+
+
+def _compute_energies(
+    N_configs: npt.NDArray[np.int64],
+    V_v_points: npt.NDArray[np.float64],
+    ops: CapacitanceOperators,
+) -> npt.NDArray[np.float64]:
+    """Computes energies of all pairs of voltage and charge configurations,
+    the former along the first and the latter along the second axis of the
+    output.
+    """
+    N_configs = N_configs.astype(float)
+    induced = np.dot(V_v_points, ops.C_cv.T)
+    induced_pot = np.dot(V_v_points, ops.C_cc_inv_C_cv.T)
+
+    U = (elem_charge ** 2) / 2 * np.einsum(
+        "ki,ij,kj->k", N_configs, ops.C_cc_inv, N_configs
+    )[np.newaxis, :]
+    U = U + 1 / 2 * np.einsum("pi,pi->p", induced, induced_pot)[:, np.newaxis]
+    U += elem_charge * np.dot(induced_pot, N_configs.T)
+
+    return np.absolute(U)
+
+
+def _estimate_N_limits(
+    V_v_points: npt.NDArray[np.float64],
+    ops: CapacitanceOperators,
+    margin: int,
+) -> List[Tuple[int, int]]:
+    """Estimates non-negative charge configuration ranges around the
+    continuous energy minima of all voltage configurations, extended by
+    'margin' charges.
+    """
+    N_cont = -np.dot(V_v_points, ops.C_cv.T) / elem_charge
+    N_min = np.floor(np.min(N_cont, axis=0)).astype(int) - margin
+    N_max = np.ceil(np.max(N_cont, axis=0)).astype(int) + margin
+    return list(zip(
+        np.maximum(N_min, 0).tolist(), np.maximum(N_max, 0).tolist()
+    ))
+
+
+def _charge_moves(n_dots: int) -> npt.NDArray[np.int64]:
+    """Returns all changes of a charge configuration adding, removing or
+    moving a single charge, one per row.
+    """
+    I_mat = np.eye(n_dots, dtype=int)
+    moves = [I_mat, -I_mat]
+    for dot_id in range(n_dots):
+        for other_dot in range(n_dots):
+            if other_dot != dot_id:
+                moves.append((I_mat[dot_id] - I_mat[other_dot])[np.newaxis])
+    return np.concatenate(moves, axis=0)
+
+
+def _descend_to_ground_state(
+    N_current: npt.NDArray[np.int64],
+    V_v: npt.NDArray[np.float64],
+    moves: npt.NDArray[np.int64],
+    ops: CapacitanceOperators,
+    max_steps: int,
+) -> Tuple[npt.NDArray[np.int64], bool]:
+    """Moves from 'N_current' to the lowest energy configuration reachable
+    by a single move until no move lowers the energy. Returns the final
+    configuration and whether it was reached within 'max_steps' moves.
+    """
+    current_energy = _compute_energies(N_current[np.newaxis], V_v, ops)[0, 0]
+    for _ in range(max_steps):
+        candidates = N_current + moves
+        candidates = candidates[np.all(candidates >= 0, axis=1)]
+        energies = _compute_energies(candidates, V_v, ops)[0]
+        best = np.argmin(energies)
+        if energies[best] >= current_energy:
+            return N_current, True
+        N_current = candidates[best]
+        current_energy = energies[best]
+    return N_current, False
+
+
+def _compute_paired_energies(
+    N_points: npt.NDArray[np.int64],
+    V_v_points: npt.NDArray[np.float64],
+    ops: CapacitanceOperators,
+) -> npt.NDArray[np.float64]:
+    """Computes energies of charge configurations of shape (number of voltage
+    configurations, number of charge configurations, number of dots), each
+    row of configurations at the voltage configuration of the same row.
+    """
+    N_points = N_points.astype(float)
+    induced = np.dot(V_v_points, ops.C_cv.T)
+    induced_pot = np.dot(V_v_points, ops.C_cc_inv_C_cv.T)
+
+    U = (elem_charge ** 2) / 2 * np.einsum(
+        "pki,ij,pkj->pk", N_points, ops.C_cc_inv, N_points
+    )
+    U += 1 / 2 * np.einsum("pi,pi->p", induced, induced_pot)[:, np.newaxis]
+    U += elem_charge * np.einsum("pki,pi->pk", N_points, induced_pot)
+
+    return np.absolute(U)
+
+
+def _compute_chemical_potentials(
+    N_points: npt.NDArray[np.float64],
+    V_v_points: npt.NDArray[np.float64],
+    ops: CapacitanceOperators,
+) -> npt.NDArray[np.float64]:
+    """Computes chemical potentials of all dots, one row per pair of charge
+    and voltage configuration.
+    """
+    pot = -(elem_charge ** 2) / 2 * ops.C_cc_inv_diag[np.newaxis, :]
+    pot = pot + (elem_charge ** 2) * np.dot(N_points, ops.C_cc_inv)
+    pot += elem_charge * np.dot(V_v_points, ops.C_cc_inv_C_cv.T)
+
+    return pot
+
+
+def determine_models_sweep_voltages(
+    cores: Sequence[CapacitanceCore],
+    voltage_node_idx: Union[Sequence[int], npt.NDArray[np.int64]],
+    N_limits: Union[N_lmt_type, npt.NDArray[np.int64]],
+) -> npt.NDArray[np.float64]:
+    """Determines voltages to sweep to measure specific charge transitions of
+    several models with the same numbers of charge and voltage nodes at
+    once, each at its current voltage configuration. See
+    `CapacitanceCore.determine_sweep_voltages`.
+
+    Args:
+        cores: models to determine sweep voltages of.
+        voltage_node_idx: Indices of voltage nodes to sweep, either the same
+            for all models or of shape (number of models, number of swept
+            nodes).
+        N_limits: Charge configuration ranges to measure, either the same
+            for all models or of shape (number of models, number of dots, 2).
+
+    Returns:
+        np.array: Voltage limits to sweep, of shape (number of models,
+            number of swept nodes, 2).
+    """
+    operators = [core.operators for core in cores]
+    voltage_node_idx = np.asarray(voltage_node_idx)
+    N_limits = np.asarray(N_limits)
+    if voltage_node_idx.ndim == 1:
+        voltage_node_idx = voltage_node_idx[np.newaxis]
+    if N_limits.ndim == 2:
+        N_limits = N_limits[np.newaxis]
+
+    return _compute_sweep_voltages(
+        voltage_node_idx,
+        N_limits,
+        np.stack([core.V_v for core in cores]),
+        np.stack([ops.C_cc_inv for ops in operators]),
+        np.stack([ops.C_cv for ops in operators]),
+    )
+
+
+def _compute_sweep_voltages(
+    voltage_node_idx: Union[Sequence[int], npt.NDArray[np.int64]],
+    N_limits: Union[N_lmt_type, npt.NDArray[np.int64]],
+    V_v: Union[Sequence[float], npt.NDArray[np.float64]],
+    C_cc_inv: npt.NDArray[np.float64],
+    C_cv: npt.NDArray[np.float64],
+) -> npt.NDArray[np.float64]:
+    """Computes voltages of swept nodes minimizing the energy of the lower
+    and upper limits of charge configuration ranges, with all leading
+    dimensions of the inputs broadcast against each other.
+
+    The energy (N + C_cv V)^T C_cc_inv (N + C_cv V) / 2 is quadratic in the
+    swept voltages x. Writing C_cv V = b + A x with A the columns of C_cv
+    of the swept nodes, its minimum is at
+    x = -(A^T C_cc_inv A)^+ A^T C_cc_inv (N + b), using the pseudo-inverse
+    to pick the smallest solution if the minimum is not unique.
+    """
+    node_idx = np.asarray(voltage_node_idx, dtype=int)
+    N_limits = np.asarray(N_limits, dtype=float)
+    V_v = np.asarray(V_v, dtype=float)
+    C_cc_inv = np.asarray(C_cc_inv, dtype=float)
+    C_cv = np.asarray(C_cv, dtype=float)
+
+    # all batch dimensions, leaving out node and matrix dimensions
+    batch_shape = np.broadcast_shapes(
+        node_idx.shape[:-1],
+        N_limits.shape[:-2],
+        V_v.shape[:-1],
+        C_cc_inv.shape[:-2],
+        C_cv.shape[:-2],
+    )
+    n_dots, n_gates = C_cv.shape[-2:]
+    n_swept = node_idx.shape[-1]
+    node_idx = np.broadcast_to(node_idx, batch_shape + (n_swept,))
+    C_cv = np.broadcast_to(C_cv, batch_shape + (n_dots, n_gates))
+
+    swept = np.take_along_axis(C_cv, node_idx[..., np.newaxis, :], -1)
+    V_fixed = np.array(np.broadcast_to(V_v, batch_shape + (n_gates,)))
+    np.put_along_axis(V_fixed, node_idx, 0, axis=-1)
+    induced = elem_charge * N_limits + np.einsum(
+        "...ij,...j->...i", C_cv, V_fixed)[..., np.newaxis]
+
+    weighted = np.einsum("...ji,...jk->...ik", swept, C_cc_inv)
+    curvature = np.einsum("...ij,...jk->...ik", weighted, swept)
+    gradient = np.einsum("...ij,...jl->...il", weighted, induced)
+
+    return -np.einsum(
+        "...ij,...jl->...il", np.linalg.pinv(curvature), gradient)
@@ -0,0 +1,364 @@
+import logging
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+logger = logging.getLogger(__name__)
+
+WINDOW_BOUNDARY = -1
+# relative tolerance used to decide whether pixels lie on region boundaries
+BOUNDARY_TOLERANCE = 1e-9
+
+
+class ChargeStabilityRegions:
+    """Charge stability regions of a constant-interaction model within a
+    window spanned by two voltage nodes, as computed by
+    `CapacitanceModel.compute_charge_stability_regions`.
+
+    In the constant-interaction model, the energy difference between any
+    two charge configurations is linear in the swept voltages. The region
+    in which a configuration is the ground state is therefore a convex
+    polygon, and transitions between ground states occur along straight
+    segments. Once computed, the regions can be rasterized at any resolution
+    and over any part of the window at the cost of drawing them, without
+    minimizing energies pixel by pixel.
+
+    Attributes:
+        voltage_ranges: voltage ranges of the window, the first
+            corresponding to the first and the second to the second axis of
+            rasterized diagrams.
+        N_configs: candidate charge configurations, one per row.
+        energy_coefficients: coefficients :math:`(c, a, b)` of the energy
+            :math:`c + a x + b y` of each candidate, up to a term independent
+            of the charge configuration.
+        mu_coefficients: coefficients of the chemical potentials of each dot
+            and candidate, in the same format as 'energy_coefficients'.
+        excitation_energies: increase of the chemical potential of each
+            dot when adding a charge to it.
+        vertices: vertices of the polygon of each candidate, empty if a
+            candidate is not the ground state anywhere within the window.
+        edge_labels: for each polygon edge, starting at the vertex of the
+            same index, the index of the candidate on its other side or
+            `WINDOW_BOUNDARY`.
+    """
+    def __init__(
+        self,
+        voltage_ranges: Sequence[Tuple[float, float]],
+        N_configs: npt.NDArray[np.int64],
+        energy_coefficients: npt.NDArray[np.float64],
+        mu_coefficients: npt.NDArray[np.float64],
+        excitation_energies: npt.NDArray[np.float64],
+    ) -> None:
+        self.voltage_ranges = [
+            (float(np.min(v_range)), float(np.max(v_range)))
+            for v_range in voltage_ranges
+        ]
+        self.N_configs = N_configs
+        self.energy_coefficients = energy_coefficients
+        self.mu_coefficients = mu_coefficients
+        self.excitation_energies = excitation_energies
+
+        self.vertices: List[npt.NDArray[np.float64]] = []
+        self.edge_labels: List[npt.NDArray[np.int64]] = []
+        for idx in range(len(N_configs)):
+            vertices, edge_labels = self._compute_polygon(idx)
+            self.vertices.append(vertices)
+            self.edge_labels.append(edge_labels)
+
+    @property
+    def ground_state_indices(self) -> List[int]:
+        """Indices of candidates being the ground state somewhere within the
+        window.
+        """
+        return [
+            idx for idx, vertices in enumerate(self.vertices)
+            if len(vertices) > 0
+        ]
+
+    def transition_segments(
+        self,
+    ) -> List[Tuple[int, int, npt.NDArray[np.float64],
+                    npt.NDArray[np.float64]]]:
+        """Returns the segments along which the ground state changes.
+
+        Returns:
+            list: tuples of the indices of the two candidates on either side
+                of a segment, the lower one first, and the segment's start
+                and end point.
+        """
+        segments = []
+        for idx in self.ground_state_indices:
+            vertices = self.vertices[idx]
+            for iv, other_idx in enumerate(self.edge_labels[idx]):
+                if other_idx > idx:
+                    segments.append((
+                        idx,
+                        int(other_idx),
+                        vertices[iv],
+                        vertices[(iv + 1) % len(vertices)],
+                    ))
+        return segments
+
+    def ground_state_map(
+        self,
+        n_steps: Sequence[int],
+        voltage_ranges: Optional[Sequence[Tuple[float, float]]] = None,
+    ) -> npt.NDArray[np.int64]:
+        """Rasterizes the regions, returning the index of the ground state
+        candidate at each pixel. Pixels are evenly spaced including the
+        limits of the voltage ranges, as in
+        `CapacitanceModel.compute_charge_diagram`.
+
+        Each row of pixels is intersected with the polygons analytically.
+        Only pixels on or very close to region boundaries are resolved by
+        comparing the energies of all candidates, ties being resolved in
+        favour of the candidate of lower index as in
+        `CapacitanceModel.determine_N_batch`.
+
+        Args:
+            n_steps: number of pixels along each axis.
+            voltage_ranges: voltage ranges to rasterize, e.g. to compute a
+                tile of a larger diagram. Need to lie within the window.
+                Default is the entire window.
+
+        Returns:
+            np.array: candidate indices of shape 'n_steps'.
+        """
+        voltage_x, voltage_y = self._get_setpoints(n_steps, voltage_ranges)
+        y_tolerance = BOUNDARY_TOLERANCE * max(
+            self.voltage_ranges[1][1] - self.voltage_ranges[1][0], 1.0
+        )
+
+        n_x, n_y = len(voltage_x), len(voltage_y)
+        coverage = np.zeros((n_x, n_y + 1), dtype=int)
+        label_sums = np.zeros((n_x, n_y + 1), dtype=int)
+        for idx in self.ground_state_indices:
+            y_min, y_max = _scanline_intervals(self.vertices[idx], voltage_x)
+            rows = np.where(y_min <= y_max)[0]
+            start = np.searchsorted(
+                voltage_y, y_min[rows] - y_tolerance, side="left",
+            )
+            stop = np.searchsorted(
+                voltage_y, y_max[rows] + y_tolerance, side="right",
+            )
+            np.add.at(coverage, (rows, start), 1)
+            np.add.at(coverage, (rows, stop), -1)
+            np.add.at(label_sums, (rows, start), idx)
+            np.add.at(label_sums, (rows, stop), -idx)
+
+        coverage = np.cumsum(coverage, axis=1)[:, :-1]
+        ground_states = np.cumsum(label_sums, axis=1)[:, :-1]
+
+        ambiguous = np.where(coverage != 1)
+        if len(ambiguous[0]) > 0:
+            c, a, b = self.energy_coefficients.T
+            energies = (
+                c[np.newaxis, :]
+                + np.outer(voltage_x[ambiguous[0]], a)
+                + np.outer(voltage_y[ambiguous[1]], b)
+            )
+            ground_states[ambiguous] = np.argmin(energies, axis=1)
+
+        return ground_states
+
+    def ground_states(
+        self,
+        n_steps: Sequence[int],
+        voltage_ranges: Optional[Sequence[Tuple[float, float]]] = None,
+    ) -> npt.NDArray[np.int64]:
+        """Rasterizes the regions, returning the ground state charge
+        configuration at each pixel, one per row, in the order of
+        `CapacitanceModel._get_voltage_grid`.
+
+        Args:
+            n_steps: number of pixels along each axis.
+            voltage_ranges: voltage ranges to rasterize. Default is the
+                entire window.
+
+        Returns:
+            np.array: charge configurations.
+        """
+        indices = self.ground_state_map(n_steps, voltage_ranges)
+        return self.N_configs[indices.ravel()]
+
+    def rasterize(
+        self,
+        n_steps: Sequence[int],
+        voltage_ranges: Optional[Sequence[Tuple[float, float]]] = None,
+        broadening: float = 0.01,
+    ) -> npt.NDArray[np.float64]:
+        """Computes the transport signal at zero bias, as
+        `CapacitanceModel.calculate_transport_at_zero_bias_batch` does for
+        ground states, using the chemical potentials of each region and
+        Lorentzian level broadening.
+
+        Args:
+            n_steps: number of pixels along each axis.
+            voltage_ranges: voltage ranges to rasterize. Default is the
+                entire window.
+            broadening: level broadening due to dots coupling to leads.
+
+        Returns:
+            np.array: transport signal of shape 'n_steps'.
+        """
+        voltage_x, voltage_y = self._get_setpoints(n_steps, voltage_ranges)
+        indices = self.ground_state_map(n_steps, voltage_ranges)
+
+        coefficients = self.mu_coefficients[indices]
+        mu = (
+            coefficients[..., 0]
+            + coefficients[..., 1] * voltage_x[:, np.newaxis, np.newaxis]
+            + coefficients[..., 2] * voltage_y[np.newaxis, :, np.newaxis]
+        )
+        dos = _lorentzian(mu, broadening)
+        dos += _lorentzian(mu + self.excitation_energies, broadening)
+
+        return np.prod(dos, axis=-1)
+
+    def _get_setpoints(
+        self,
+        n_steps: Sequence[int],
+        voltage_ranges: Optional[Sequence[Tuple[float, float]]] = None,
+    ) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+        """Returns setpoints of both axes, checking that they lie within
+        the window.
+        """
+        if voltage_ranges is None:
+            voltage_ranges = self.voltage_ranges
+        setpoints = []
+        for v_range, window, steps in zip(
+            voltage_ranges, self.voltage_ranges, n_steps
+        ):
+            v_min, v_max = np.min(v_range), np.max(v_range)
+            if v_min < window[0] or v_max > window[1]:
+                logger.error(
+                    f"Voltage range {v_range} exceeds the window {window} "
+                    + "the charge stability regions were computed for."
+                )
+                raise ValueError
+            setpoints.append(np.linspace(v_min, v_max, steps))
+        return setpoints[0], setpoints[1]
+
+    def _compute_polygon(
+        self,
+        idx: int,
+    ) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.int64]]:
+        """Computes the polygon in which candidate 'idx' has the lowest
+        energy by clipping the window with the half-planes in which its
+        energy is lower than the one of each other candidate.
+        """
+        (x_min, x_max), (y_min, y_max) = self.voltage_ranges
+        vertices = np.array([
+            [x_min, y_min], [x_max, y_min], [x_max, y_max], [x_min, y_max],
+        ])
+        edge_labels = np.full(4, WINDOW_BOUNDARY)
+
+        differences = (
+            self.energy_coefficients[idx] - self.energy_coefficients
+        )
+        normals = differences[:, 1:]
+        offsets = -differences[:, 0]
+        others = np.delete(np.arange(len(differences)), idx)
+        norms = np.maximum(np.linalg.norm(normals[others], axis=1), 1e-300)
+
+        # only half-planes cutting off vertices change the polygon. Clipping
+        # by the one cutting off most first, typically only a few of them
+        # need to be applied
+        for _ in range(len(others)):
+            distances = (
+                np.dot(vertices, normals[others].T) - offsets[others]
+            )
+            scale = np.maximum(np.max(np.abs(distances), axis=0), 1e-300)
+            cutting = np.any(distances > BOUNDARY_TOLERANCE * scale, axis=0)
+            if not np.any(cutting):
+                break
+            violation = np.where(
+                cutting, np.max(distances, axis=0) / norms, -np.inf
+            )
+            other_idx = others[np.argmax(violation)]
+            vertices, edge_labels = _clip_polygon(
+                vertices,
+                edge_labels,
+                normals[other_idx],
+                offsets[other_idx],
+                int(other_idx),
+            )
+            if len(vertices) == 0:
+                break
+
+        return vertices, edge_labels
+
+
+def _clip_polygon(
+    vertices: npt.NDArray[np.float64],
+    edge_labels: npt.NDArray[np.int64],
+    normal: npt.NDArray[np.float64],
+    offset: float,
+    label: int,
+) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.int64]]:
+    """Clips a convex polygon with the half-plane of points p satisfying
+    'normal' . p <= 'offset'. Edges along the clipping line are labelled
+    'label'. Polygons reduced to a line or a point are returned empty.
+    """
+    distances = np.dot(vertices, normal) - offset
+    scale = max(np.max(np.abs(distances)), 1e-300)
+    inside = distances <= BOUNDARY_TOLERANCE * scale
+    if np.all(inside):
+        return vertices, edge_labels
+    if not np.any(inside):
+        return np.empty((0, 2)), np.empty(0, dtype=int)
+
+    new_vertices = []
+    new_labels = []
+    n_vertices = len(vertices)
+    for iv in range(n_vertices):
+        jv = (iv + 1) % n_vertices
+        if inside[iv]:
+            new_vertices.append(vertices[iv])
+            new_labels.append(edge_labels[iv])
+        if inside[iv] != inside[jv]:
+            t = distances[iv] / (distances[iv] - distances[jv])
+            new_vertices.append(
+                vertices[iv] + t * (vertices[jv] - vertices[iv])
+            )
+            new_labels.append(label if inside[iv] else edge_labels[iv])
+
+    if len(new_vertices) < 3:
+        return np.empty((0, 2)), np.empty(0, dtype=int)
+    return np.array(new_vertices), np.array(new_labels, dtype=int)
+
+
+def _scanline_intervals(
+    vertices: npt.NDArray[np.float64],
+    voltage_x: npt.NDArray[np.float64],
+) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """Intersects a convex polygon with lines of constant first voltage,
+    returning the minimum and maximum second voltage on each line. Lines
+    not intersecting the polygon have a minimum larger than their maximum.
+    """
+    y_min = np.full(len(voltage_x), np.inf)
+    y_max = np.full(len(voltage_x), -np.inf)
+    x_tolerance = BOUNDARY_TOLERANCE * max(np.ptp(vertices[:, 0]), 1.0)
+    for (x0, y0), (x1, y1) in zip(vertices, np.roll(vertices, -1, axis=0)):
+        if abs(x1 - x0) <= x_tolerance:
+            on_edge = np.abs(voltage_x - x0) <= x_tolerance
+            y_min[on_edge] = np.minimum(y_min[on_edge], min(y0, y1))
+            y_max[on_edge] = np.maximum(y_max[on_edge], max(y0, y1))
+            continue
+        t = (voltage_x - x0) / (x1 - x0)
+        on_edge = (t >= 0) & (t <= 1)
+        y = y0 + np.clip(t, 0, 1) * (y1 - y0)
+        y_min[on_edge] = np.minimum(y_min[on_edge], y[on_edge])
+        y_max[on_edge] = np.maximum(y_max[on_edge], y[on_edge])
+    return y_min, y_max
+
+
+def _lorentzian(
+    level_energy: npt.NDArray[np.float64],
+    broadening: float,
+) -> npt.NDArray[np.float64]:
+    """Density of states at zero transport energy, see
+    `CapacitanceModel.lorentzian_density_of_state`.
+    """
+    return broadening / (2. * np.pi * (level_energy ** 2 + broadening ** 2 / 4.))
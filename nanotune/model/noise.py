@@ -1,10 +1,11 @@
 import logging
 import os
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 import numpy.typing as npt
 import matplotlib.pyplot as plt
 import numpy as np
 import scipy.fftpack as fp
+import scipy.signal as sg
 from skimage.transform import resize
 
 import nanotune as nt
@@ -22,6 +23,10 @@ DEFAULT_FILES = {
 }
 
 N_2D = nt.config["core"]["standard_shapes"]["2"]
+DEFAULT_BATCH_SIZE = 256
+
+# memory-mapped noise files, see get_noise_bank
+_NOISE_BANKS: Dict[Tuple[str, int, int], npt.NDArray[np.float64]] = {}
 
 
 def load_noise(
@@ -34,34 +39,18 @@ def load_noise(
     Note: complex numbers are cast into floats here, might need to fix this
     of frequencies do not give desired result
     """
-    if files is None:
-        files = DEFAULT_FILES
-
-    if folder is None:
-        folder = nt.config["db_folder"]
-
     all_noise = {}
     # np.zeros((len(noise_types), 2, number_of_samples, *N_2D))
     # noise_idx = []
     for ntype in noise_types:
-        if ntype not in NOISE_TYPES:
-            logger.error(
-                "Unknown noise type. Choose one of the following: "
-                + " {}".format(", ".join(NOISE_TYPES))
-            )
-            raise ValueError
-        NOISE_TYPES.index(ntype)
+        noise_bank = get_noise_bank(ntype, files=files, folder=folder)
+        rows = np.random.choice(
+            len(noise_bank), number_of_samples, replace=True).astype(int)
+        raw_noise = _read_noise(noise_bank, rows)
+        raw_noise = np.reshape(raw_noise, (number_of_samples, *N_2D))
 
-        raw_noise = np.load(os.path.join(folder, DEFAULT_FILES[ntype]))
-        raw_noise = np.reshape(raw_noise[0, :, :], (raw_noise.shape[1], *N_2D))
-
-        raw_noise = raw_noise[
-            np.random.choice(len(raw_noise), number_of_samples, replace=True).astype(
-                int
-            )
-        ]
-        raw_noise_freq = fp.frequencies2(raw_noise)
-        raw_noise_freq = fp.frequenciesshift(raw_noise_freq)
+        raw_noise_freq = fp.fft2(raw_noise)
+        raw_noise_freq = fp.fftshift(raw_noise_freq, axes=(-2, -1))
 
         all_noise[ntype] = np.zeros((2, number_of_samples, *N_2D))
         all_noise[ntype][0] = raw_noise
@@ -70,6 +59,140 @@ def load_noise(
     return all_noise
 
 
+def get_noise_bank(
+    noise_type: str,
+    files: Optional[Dict[str, str]] = None,
+    folder: Optional[str] = None,
+) -> npt.NDArray[np.float64]:
+    """Returns the signals of a noise file, memory-mapped. Noise files are
+    mapped once and cached until they change on disk.
+
+    Args:
+        noise_type: one of NOISE_TYPES.
+        files: noise file names, mapping noise types to file names. Default
+            is DEFAULT_FILES.
+        folder: folder of noise files. Default is nt.config["db_folder"].
+
+    Returns:
+        np.array: memory-mapped noise signals of shape (number of samples,
+            number of points in standard shape).
+    """
+    if noise_type not in NOISE_TYPES:
+        logger.error(
+            "Unknown noise type. Choose one of the following: "
+            + " {}".format(", ".join(NOISE_TYPES))
+        )
+        raise ValueError
+    if files is None:
+        files = DEFAULT_FILES
+    if folder is None:
+        folder = nt.config["db_folder"]
+
+    path = os.path.abspath(os.path.join(folder, files[noise_type]))
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    if key not in _NOISE_BANKS:
+        for cached_key in [k for k in _NOISE_BANKS if k[0] == path]:
+            del _NOISE_BANKS[cached_key]
+        signal_idx = nt.config["core"]["data_types"]["signal"]
+        _NOISE_BANKS[key] = np.load(path, mmap_mode="r")[signal_idx]
+    return _NOISE_BANKS[key]
+
+
+def augmented_batches(
+    signal: npt.NDArray[np.float64],
+    labels: npt.NDArray[np.int64],
+    noise_types: Optional[List[str]] = None,
+    max_strength: Optional[List[float]] = None,
+    min_strength: Optional[List[float]] = None,
+    charge_shift_probability: float = 0.0,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    n_batches: Optional[int] = None,
+    seed: Optional[int] = None,
+    files: Optional[Dict[str, str]] = None,
+    folder: Optional[str] = None,
+) -> Iterator[Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64],
+                    npt.NDArray[np.int64]]]:
+    """Yields batches of randomly drawn and augmented signals, without
+    materializing the augmented data set. Noise is added in current space
+    in the same way as by `add_noise`, with noise samples read from
+    memory-mapped noise files, see `get_noise_bank`.
+
+    Args:
+        signal: signals to augment, of shape (number of signals, number of
+            points in standard shape). May be memory-mapped.
+        labels: labels of 'signal'.
+        noise_types: noise types to add, out of NOISE_TYPES. Each signal
+            receives all noise types.
+        max_strength: maximal amplitude of each noise type.
+        min_strength: minimal amplitude of each noise type. Default is 0.
+        charge_shift_probability: probability of a signal being augmented
+            with a random charge shift, see `add_random_charge_shifts`.
+        batch_size: number of signals per batch.
+        n_batches: number of batches to yield. Batches are yielded
+            indefinitely if None.
+        seed: seed of the random number generator.
+        files: noise file names, see `get_noise_bank`.
+        folder: folder of noise files, see `get_noise_bank`.
+
+    Yields:
+        np.array: augmented signals of shape (batch_size, number of points
+            in standard shape).
+        np.array: power spectra of augmented signals, of the same shape.
+        np.array: labels of augmented signals.
+    """
+    if noise_types is None:
+        noise_types = []
+    if max_strength is None:
+        max_strength = []
+    if len(noise_types) != len(max_strength):
+        if noise_types:
+            logger.error("Specify a maximal strength for each noise type.")
+            raise ValueError
+    if min_strength is None:
+        min_strength = [0] * len(noise_types)
+    noise_banks = [
+        get_noise_bank(ntype, files=files, folder=folder)
+        for ntype in noise_types
+    ]
+    rng = np.random.default_rng(seed)
+    labels = np.asarray(labels)
+
+    n_yielded = 0
+    while n_batches is None or n_yielded < n_batches:
+        # sorted indices read memory-mapped data sequentially
+        rows = np.sort(rng.integers(len(labels), size=batch_size))
+        batch = np.array(signal[rows], dtype=np.float64)
+        batch = batch.reshape(batch_size, -1)
+
+        shifted = rng.random(batch_size) < charge_shift_probability
+        if np.any(shifted):
+            images = batch[shifted].reshape(-1, *N_2D)
+            batch[shifted] = shift_charges_batch(images, rng).reshape(
+                len(images), -1)
+
+        for inn, ntype in enumerate(noise_types):
+            amp = rng.uniform(
+                min_strength[inn], max_strength[inn], (batch_size, 1))
+            noise_rows = np.sort(
+                rng.integers(len(noise_banks[inn]), size=batch_size))
+            noise = _read_noise(noise_banks[inn], noise_rows)
+            noise = noise[rng.permutation(batch_size)]
+
+            old_max = np.max(batch, axis=1).reshape(batch_size, 1)
+            if ntype in ["current_drop", "random_blobs"]:
+                noise = amp * noise
+                noise[amp[:, 0] == 0] = 1
+                batch = batch * noise
+            else:
+                batch = batch + amp * noise
+            new_max = np.max(batch, axis=1).reshape(batch_size, 1)
+            batch = batch * old_max / new_max
+
+        yield batch, _power_spectrum_batch(batch), labels[rows]
+        n_yielded += 1
+
+
 def add_noise(
     original_data: npt.NDArray[np.float64],
     noise_types: List[str],
@@ -93,8 +216,8 @@ def add_noise(
     if not in_current:
         org_max = np.max(noisy_data.reshape(m, -1), axis=1)
         noisy_data = np.reshape(noisy_data, (m, *N_2D))
-        noisy_freq = fp.frequencies2(noisy_data)
-        noisy_freq = fp.frequenciesshift(noisy_freq)
+        noisy_freq = fp.fft2(noisy_data)
+        noisy_freq = fp.fftshift(noisy_freq, axes=(-2, -1))
 
     noisy_data = np.reshape(noisy_data, (m, -1))
     raw_noise = load_noise(noise_types, m)
@@ -141,12 +264,12 @@ def add_noise(
 
     if in_current:
         noisy_data = np.reshape(noisy_data, (m, *N_2D))
-        noisy_freq = fp.frequencies2(noisy_data)
-        noisy_freq = fp.frequenciesshift(noisy_freq)
+        noisy_freq = fp.fft2(noisy_data)
+        noisy_freq = fp.fftshift(noisy_freq, axes=(-2, -1))
 
     else:
         noisy_freq = np.reshape(noisy_freq, (m, *N_2D))
-        noisy_data = np.abs(fp.ifrequencies2(noisy_freq))
+        noisy_data = np.abs(fp.ifft2(noisy_freq))
 
         new_max = np.max(noisy_data, axis=1).reshape(m, 1)
         noisy_data = noisy_data * org_max / new_max
@@ -165,62 +288,133 @@ def add_noise(
 def add_random_charge_shifts(
     original_data: npt.NDArray[np.float64],
     number_of_samples: int,
+    seed: Optional[int] = None,
 ) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
-    """ """
+    """Adds a random charge shift to 'number_of_samples' randomly chosen
+    signals, see `shift_charges_batch`.
+
+    Args:
+        original_data: signals of shape (number of signals, ...) with
+            the number of points of the standard shape.
+        number_of_samples: number of signals to shift.
+        seed: seed of the random number generator.
+
+    Returns:
+        np.array: signals, some of them shifted, of the same shape as
+            'original_data'.
+        np.array: absolute values of the signals' Fourier transforms.
+    """
+    rng = np.random.default_rng(seed)
     data = np.copy(original_data)
-    data_idx = np.random.choice(
-        original_data.shape[0], number_of_samples, replace=False
-    ).astype(int)
+    m = data.shape[0]
     org_shape = data.shape
+    data = np.reshape(data, (m, *N_2D))
 
-    for idx in data_idx:
-        ex_data = np.squeeze(data[idx])
-
-        n_diff = np.random.randint(5, 9, 1)
-        min_d = int(np.floor(n_diff / 2))
-        n_step = np.random.randint(2, ex_data.shape[0], 1)[0]
+    data_idx = rng.choice(m, number_of_samples, replace=False).astype(int)
+    data[data_idx] = shift_charges_batch(data[data_idx], rng)
 
-        transpose = np.random.randint(2, size=1)[0]
+    freq_data = fp.fft2(data)
+    freq_data = np.abs(fp.fftshift(freq_data, axes=(-2, -1)))
 
-        if transpose:
-            new_img1 = np.concatenate(
-                (
-                    ex_data[:n_step, :],
-                    ex_data[n_step - min_d : n_step + min_d, :],
-                    ex_data[n_step + min_d :, :],
-                ),
-                axis=0,
-            )
-        else:
-            new_img1 = np.concatenate(
-                (
-                    ex_data[:, :n_step],
-                    ex_data[:, n_step - min_d : n_step + min_d],
-                    ex_data[:, n_step + min_d :],
-                ),
-                axis=1,
-            )
-        new_img1 = resize(new_img1, (50, 50))
+    data = data.reshape(*org_shape)
+    freq_data = freq_data.reshape(*org_shape)
 
-        data[idx] = new_img1.reshape(1, *org_shape[1:])
+    return data, freq_data
 
-    m = data.shape[0]
 
-    data = np.reshape(data, (m, *N_2D))
-    freq_data = fp.frequencies2(data)
-    freq_data = np.abs(fp.frequenciesshift(freq_data))
+def shift_charges_batch(
+    images: npt.NDArray[np.float64],
+    rng: np.random.Generator,
+) -> npt.NDArray[np.float64]:
+    """Emulates random charge shifts by repeating a band of 4 to 8 lines
+    at a random position, along a random axis of each image, and resizing
+    the stretched image back to its original shape.
 
-    data = data.reshape(*org_shape)
-    freq_data = freq_data.reshape(*org_shape)
+    Args:
+        images: images of shape (number of images, n_x, n_y).
+        rng: random number generator.
 
-    return data, freq_data
+    Returns:
+        np.array: shifted images of the same shape.
+    """
+    images = np.array(images, dtype=np.float64)
+    n_images, n_lines = images.shape[0], images.shape[1]
+    if n_images == 0:
+        return images
+    if images.shape[1] != images.shape[2]:
+        logger.error("Charge shifts require square images.")
+        raise ValueError
+
+    min_d = rng.integers(5, 9, (n_images, 1)) // 2
+    n_step = rng.integers(2, n_lines, (n_images, 1))
+    along_rows = rng.integers(2, size=n_images).astype(bool)
+
+    # first line and length of the repeated band, which is empty if its
+    # start wraps around as a negative index
+    band_start = n_step - min_d
+    band_start = np.where(band_start < 0, band_start + n_lines, band_start)
+    n_band = np.maximum(np.minimum(n_step + min_d, n_lines) - band_start, 0)
+    n_stretched = n_lines + n_band - np.minimum(min_d, n_lines - n_step)
+    # linear interpolation as done by skimage.transform.resize
+    coordinates = (np.arange(n_lines) + 0.5) * n_stretched / n_lines - 0.5
+    coordinates = np.abs(coordinates)
+    coordinates = np.where(
+        coordinates > n_stretched - 1,
+        2 * (n_stretched - 1) - coordinates,
+        coordinates,
+    )
+    lower = np.floor(coordinates).astype(int)
+    upper = np.minimum(lower + 1, n_stretched - 1)
+    weight = (coordinates - lower)[..., np.newaxis]
+
+    def source_line(stretched_line):
+        return np.where(
+            stretched_line < n_step,
+            stretched_line,
+            np.where(
+                stretched_line < n_step + n_band,
+                stretched_line - n_step + band_start,
+                stretched_line - n_band + min_d,
+            ),
+        )
+
+    images[~along_rows] = np.swapaxes(images[~along_rows], 1, 2)
+    lower_lines = np.take_along_axis(
+        images, source_line(lower)[..., np.newaxis], axis=1)
+    upper_lines = np.take_along_axis(
+        images, source_line(upper)[..., np.newaxis], axis=1)
+    shifted = (1 - weight) * lower_lines + weight * upper_lines
+    shifted[~along_rows] = np.swapaxes(shifted[~along_rows], 1, 2)
+
+    return shifted
+
+
+def _read_noise(
+    noise_bank: npt.NDArray[np.float64],
+    rows: npt.NDArray[np.int64],
+) -> npt.NDArray[np.float64]:
+    """Reads noise samples from a (memory-mapped) noise bank."""
+    return np.array(noise_bank[rows], dtype=np.float64)
+
+
+def _power_spectrum_batch(
+    signal: npt.NDArray[np.float64],
+) -> npt.NDArray[np.float64]:
+    """Computes power spectra of flattened 2D signals in the same way as
+    `get_power_spectrum`.
+    """
+    signal = signal.reshape(len(signal), *N_2D)
+    for axis in [1, 2]:
+        signal = sg.detrend(signal, axis=axis)
+    frequencies = fp.fftshift(fp.fft2(signal), axes=(-2, -1))
+    return (np.abs(frequencies) ** 2).reshape(len(signal), -1)
 
 
 # def add_noise_in_freq_domain(files: List) -> None:
 #     """
 #     """
-#     # # syn_data_freq = fp.frequencies2(data_current)
-#     # # syn_data_freq = fp.frequenciesshift(syn_data_freq)
+#     # # syn_data_freq = fp.fft2(data_current)
+#     # # syn_data_freq = fp.fftshift(syn_data_freq)
 
 #     # noisy_freqs = np.copy(syn_freq)
 
@@ -238,7 +432,7 @@ def add_random_charge_shifts(
 
 #     # noisy_freqs = np.reshape(noisy_freqs, (m, 50, 50))
 
-#     # images = np.abs(fp.ifrequencies2(noisy_freqs))
+#     # images = np.abs(fp.ifft2(noisy_freqs))
 
 #     # images = images*current_drop_selection
 
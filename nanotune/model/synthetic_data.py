@@ -0,0 +1,288 @@
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+import nanotune as nt
+from nanotune.data.dataset import get_power_spectrum
+from nanotune.data.export_data import condense_data, export_label
+from nanotune.model.capacitancecore import CapacitanceCore, N_lmt_type
+from nanotune.utils import save_json_atomically
+
+logger = logging.getLogger(__name__)
+
+N_2D = nt.config["core"]["standard_shapes"]["2"]
+CHECKPOINT_SUFFIX = ".checkpoint.json"
+
+
+@dataclass
+class DiagramDistribution:
+    """Distribution of synthetic charge diagrams computed with
+    `CapacitanceCore`. Capacitances and signal-to-noise ratios are drawn
+    uniformly between their lower and upper limits, independently for each
+    diagram.
+
+    Attributes:
+        charge_nodes: charge nodes of the model, mapping integer node IDs to
+            string labels.
+        voltage_nodes: voltage nodes of the model, mapping integer node IDs
+            to string labels.
+        voltage_node_idx: indices of the two voltage nodes to sweep.
+        V_v: voltages of all voltage nodes.
+        C_cv_limits: lower and upper limits of capacitances between charge
+            and voltage nodes, each of shape (n charge nodes,
+            n voltage nodes).
+        C_cc_off_diags_limits: lower and upper limits of the off-diagonals
+            of the dot capacitance matrix, each in the format taken by
+            `CapacitanceModel.C_cc`.
+        voltage_ranges: voltage ranges to sweep. If None, they are
+            determined from 'N_limits' for each diagram.
+        N_limits: charge configuration ranges to sweep over, see
+            `CapacitanceCore.determine_sweep_voltages`.
+        n_steps: number of steps of each sweep.
+        snr_db_limits: lower and upper limit of the target signal-to-noise
+            ratio in dB. No noise is added if None.
+        charge_jump_probability: probability of a diagram containing random
+            charge jumps.
+        jump_freq: average frequency at which charge jumps occur.
+        regime: machine learning label, e.g. 'singledot' or 'doubledot'.
+        quality: quality label. If None, it is derived from the
+            signal-to-noise ratio in the same way as in
+            `CapacitanceModel.sweep_voltages`.
+        category: category labels are exported for, see `export_label`.
+    """
+    charge_nodes: Dict[int, str]
+    voltage_nodes: Dict[int, str]
+    voltage_node_idx: Sequence[int]
+    V_v: Sequence[float]
+    C_cv_limits: Tuple[Sequence[Sequence[float]], Sequence[Sequence[float]]]
+    C_cc_off_diags_limits: Tuple[
+        Sequence[Sequence[float]], Sequence[Sequence[float]]]
+    voltage_ranges: Optional[Sequence[Tuple[float, float]]] = None
+    N_limits: Optional[N_lmt_type] = None
+    n_steps: Sequence[int] = tuple(N_2D)
+    snr_db_limits: Optional[Tuple[float, float]] = (100.0, 100.0)
+    charge_jump_probability: float = 0.0
+    jump_freq: float = 0.001
+    regime: str = "doubledot"
+    quality: Optional[int] = None
+    category: str = "dotregime"
+
+
+def generate_diagram(
+    distribution: DiagramDistribution,
+    seed: np.random.SeedSequence,
+) -> Tuple[npt.NDArray[np.float64], int]:
+    """Draws capacitances from a distribution, computes the resulting charge
+    diagram and condenses it into the format used by `export_data`.
+
+    Args:
+        distribution: distribution to draw the diagram from.
+        seed: seed of all random numbers used for this diagram.
+
+    Returns:
+        np.array: condensed data of shape (number of data types, number of
+            points in standard shape).
+        int: exported label.
+    """
+    rng = np.random.default_rng(seed)
+
+    C_cv = rng.uniform(*np.array(distribution.C_cv_limits, dtype=float))
+    C_cc_off_diags = [
+        rng.uniform(low, high).tolist()
+        for low, high in zip(*distribution.C_cc_off_diags_limits)
+    ]
+
+    add_noise = distribution.snr_db_limits is not None
+    target_snr_db = 100.0
+    if distribution.snr_db_limits is not None:
+        target_snr_db = rng.uniform(*distribution.snr_db_limits)
+    add_charge_jumps = bool(
+        rng.random() < distribution.charge_jump_probability)
+
+    quality = distribution.quality
+    if quality is None:
+        quality = int(target_snr_db > 2)
+
+    core = CapacitanceCore(
+        len(distribution.charge_nodes),
+        len(distribution.voltage_nodes),
+        V_v=list(distribution.V_v),
+        C_cc_off_diags=C_cc_off_diags,
+        C_cv=C_cv.tolist(),
+    )
+    voltage_ranges = distribution.voltage_ranges
+    if voltage_ranges is None:
+        voltage_ranges = core.determine_sweep_voltages(
+            distribution.voltage_node_idx,
+            N_limits=distribution.N_limits,
+        )
+    signal, _, _ = core.compute_charge_diagram(
+        distribution.voltage_node_idx,
+        voltage_ranges,
+        n_steps=distribution.n_steps,
+        add_noise=add_noise,
+        target_snr_db=target_snr_db,
+        add_charge_jumps=add_charge_jumps,
+        jump_freq=distribution.jump_freq,
+        rng=rng,
+    )
+
+    condensed_data = condense_data(
+        signal, get_power_spectrum(signal), [], N_2D,
+    )
+    label = export_label(
+        [distribution.regime], quality, distribution.category,
+    )
+    return condensed_data, label
+
+
+def generate_diagrams(
+    distribution: DiagramDistribution,
+    n_diagrams: int,
+    filename: str,
+    folder: Optional[str] = None,
+    seed: int = 0,
+    n_workers: Optional[int] = None,
+    chunk_size: int = 64,
+) -> str:
+    """Generates synthetic charge diagrams in parallel and saves them to a
+    numpy file in the format used by `export_data` and consumed by
+    `Classifier`, i.e. of shape (number of data types, 'n_diagrams',
+    number of points in standard shape + 1) with labels in the last column.
+
+    Diagrams are computed in chunks by a pool of processes, which write
+    directly into the memory-mapped output file. Each diagram draws its
+    random numbers from an independent stream derived from 'seed' and its
+    index, making the output independent of 'n_workers' and 'chunk_size'.
+    Completed chunks are recorded in a checkpoint file next to the output,
+    allowing an interrupted generation to be resumed by calling this
+    function with the same arguments. The checkpoint file is removed once
+    all diagrams have been generated.
+
+    Args:
+        distribution: distribution to draw diagrams from.
+        n_diagrams: number of diagrams to generate.
+        filename: name of the numpy file.
+        folder: folder to save the file in. Default is
+            nt.config["db_folder"].
+        seed: seed of all random numbers.
+        n_workers: number of worker processes. Diagrams are computed in the
+            current process if set to 1. Default is the number of CPUs.
+        chunk_size: number of diagrams computed by a worker at a time.
+
+    Returns:
+        str: path of the numpy file.
+    """
+    if folder is None:
+        folder = nt.config["db_folder"]
+    if not filename.endswith(".npy"):
+        filename += ".npy"
+    path = os.path.join(folder, filename)
+    checkpoint_path = path + CHECKPOINT_SUFFIX
+
+    checkpoint = {
+        "n_diagrams": n_diagrams,
+        "seed": seed,
+        "chunk_size": chunk_size,
+        "distribution": json.loads(json.dumps(asdict(distribution))),
+        "completed_chunks": [],
+    }
+    completed_chunks: Set[int] = set()
+    if os.path.exists(checkpoint_path):
+        with open(checkpoint_path, "r") as f:
+            previous = json.load(f)
+        completed_chunks = set(previous.pop("completed_chunks"))
+        if previous != {
+            k: v for k, v in checkpoint.items() if k != "completed_chunks"
+        }:
+            logger.error(
+                f"Checkpoint {checkpoint_path} was written with different "
+                + "arguments. Remove it to start over."
+            )
+            raise ValueError
+        logger.info(f"Resuming generation of {path}.")
+    else:
+        shape = (
+            len(nt.config["core"]["data_types"]),
+            n_diagrams,
+            int(np.prod(N_2D)) + 1,
+        )
+        output = np.lib.format.open_memmap(
+            path, mode="w+", dtype=np.float64, shape=shape,
+        )
+        del output
+        _write_checkpoint(checkpoint_path, checkpoint, completed_chunks)
+
+    starts = range(0, n_diagrams, chunk_size)
+    remaining = [
+        (chunk_idx, list(range(start, min(start + chunk_size, n_diagrams))))
+        for chunk_idx, start in enumerate(starts)
+        if chunk_idx not in completed_chunks
+    ]
+
+    if n_workers == 1:
+        for chunk_idx, indices in remaining:
+            _generate_chunk(distribution, seed, indices, path)
+            completed_chunks.add(chunk_idx)
+            _write_checkpoint(checkpoint_path, checkpoint, completed_chunks)
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            futures = {
+                executor.submit(
+                    _generate_chunk, distribution, seed, indices, path,
+                ): chunk_idx
+                for chunk_idx, indices in remaining
+            }
+            for future in as_completed(futures):
+                future.result()
+                completed_chunks.add(futures[future])
+                _write_checkpoint(
+                    checkpoint_path, checkpoint, completed_chunks,
+                )
+                logger.info(
+                    f"Generated {len(completed_chunks)} of {len(starts)} "
+                    + "chunks."
+                )
+
+    os.remove(checkpoint_path)
+    return path
+
+
+def _generate_chunk(
+    distribution: DiagramDistribution,
+    seed: int,
+    indices: List[int],
+    path: str,
+) -> None:
+    """Generates diagrams of the given indices and writes them to the
+    memory-mapped numpy file at 'path'.
+    """
+    output = np.load(path, mmap_mode="r+")
+    for index in indices:
+        condensed_data, label = generate_diagram(
+            distribution,
+            np.random.SeedSequence(seed, spawn_key=(index,)),
+        )
+        output[:, index, :-1] = condensed_data
+        output[:, index, -1] = label
+    output.flush()
+    del output
+
+
+def _write_checkpoint(
+    checkpoint_path: str,
+    checkpoint: Dict[str, Any],
+    completed_chunks: Set[int],
+) -> None:
+    """Atomically writes the list of completed chunks to the checkpoint
+    file.
+    """
+    checkpoint = dict(checkpoint)
+    checkpoint["completed_chunks"] = sorted(completed_chunks)
+    save_json_atomically(checkpoint, checkpoint_path)
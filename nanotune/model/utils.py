@@ -1,308 +1,487 @@
+import logging
 import os
-from typing import List, Optional
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
 import numpy.typing as npt
 import matplotlib.pyplot as plt
 import numpy as np
 import scipy.fftpack as fp
 import scipy.signal as sg
-from scipy.ndimage import gaussian_filter, generic_gradient_magnitude, sobel
+from scipy.ndimage import (correlate1d, gaussian_filter,
+                           generic_gradient_magnitude, sobel)
 from skimage.transform import resize
 
 import nanotune as nt
 from nanotune.data.dataset import default_coord_names
+from nanotune.model.noise import DEFAULT_FILES, NOISE_TYPES
+
+logger = logging.getLogger(__name__)
 
 N_2D = nt.config["core"]["standard_shapes"]["2"]
+ONE_OVER_F_SHAPE = (1000, 1000)
+# number of 1/f noise samples computed at a time, each requiring several
+# arrays of ONE_OVER_F_SHAPE
+ONE_OVER_F_BATCH_SIZE = 8
+DEFAULT_BATCH_SIZE = 256
+
+NoiseSampler = Callable[[np.random.Generator, int], npt.NDArray[np.float64]]
 
 
 def generate_one_f_noise(
     how_many: int = 20000,
     save_to_file: bool = True,
     filename: Optional[str] = None,
+    seed: Optional[int] = None,
 ) -> npt.NDArray[np.float64]:
-    """ """
-    fx_1d = fp.frequenciesshift(fp.frequenciesfreq(1000, d=0.02))
-
-    condensed_data_all = np.empty(
-        [len(nt.config["core"]["data_types"]) - 1, 0, np.prod(N_2D)]
+    """Generates 1/f noise samples, see `generate_noise_library`.
+
+    Args:
+        how_many: number of samples.
+        save_to_file: whether to save the samples to a numpy file in
+            nt.config["db_folder"].
+        filename: name of the numpy file. Default is the file `load_noise`
+            reads.
+        seed: seed of the random number generator.
+
+    Returns:
+        np.array: noise of shape (3, 'how_many', number of points in
+            standard shape), holding signal, frequencies and gradient.
+    """
+    return _generate_noise(
+        "one_over_f", how_many, save_to_file, filename, seed,
     )
 
-    for niter in range(how_many):
-
-        condensed_data = np.empty(
-            [len(nt.config["core"]["data_types"]) - 1, 1, np.prod(N_2D)]
-        )
-
-        fx, fy = np.meshgrid(fx_1d, fx_1d, indexing="ij")
-        f = np.sqrt(fx ** 2 + fy ** 2)
-
-        f[f > 0] = np.divide(1, f[f > 0])
 
-        # if low_pass_cutoff is not None:
-        #     f[f > low_pass_cutoff] = 0
-
-        # if high_pass_cutoff is not None:
-        # f[f < high_pass_cutoff] = 0
-
-        exponents = np.random.uniform(low=0, high=2 * np.pi, size=f.shape)
-        power_spect = np.multiply(f, np.exp(1j * exponents))
-
-        noise = np.abs(fp.ifrequencies2(power_spect))
-        noise = (noise - np.min(noise)) / (np.max(noise) - np.min(noise))
-
-        grad = generic_gradient_magnitude(noise, sobel)
-
-        noise = resize(noise, N_2D, anti_aliasing=True, mode="constant").flatten()
-
-        grad = resize(grad, N_2D, anti_aliasing=True, mode="constant").flatten()
-
-        power_spect = resize(
-            np.abs(power_spect), N_2D, anti_aliasing=True, mode="constant"
-        ).flatten()
+def generate_white_noise(
+    how_many: int = 20000,
+    save_to_file: bool = True,
+    filename: Optional[str] = None,
+    seed: Optional[int] = None,
+) -> npt.NDArray[np.float64]:
+    """Generates white noise samples, see `generate_one_f_noise`."""
+    return _generate_noise("white", how_many, save_to_file, filename, seed)
 
-        index = nt.config["core"]["data_types"]["signal"]
-        condensed_data[index, 0, :] = noise
 
-        index = nt.config["core"]["data_types"]["frequencies"]
-        condensed_data[index, 0, :] = power_spect
+def generate_current_drop(
+    how_many: int = 20000,
+    save_to_file: bool = True,
+    filename: Optional[str] = None,
+    seed: Optional[int] = None,
+) -> npt.NDArray[np.float64]:
+    """Generates current drop samples, see `generate_one_f_noise`."""
+    return _generate_noise(
+        "current_drop", how_many, save_to_file, filename, seed,
+    )
 
-        index = nt.config["core"]["data_types"]["gradient"]
-        condensed_data[index, 0, :] = grad
 
-        condensed_data_all = np.concatenate(
-            (condensed_data_all, condensed_data), axis=1
-        )
+def generate_random_telegraph_noise(
+    how_many: int = 20000,
+    save_to_file: bool = True,
+    filename: Optional[str] = None,
+    seed: Optional[int] = None,
+) -> npt.NDArray[np.float64]:
+    """Generates random telegraph noise samples, see
+    `generate_one_f_noise`.
+    """
+    return _generate_noise("rnt", how_many, save_to_file, filename, seed)
 
-    if save_to_file:
-        if filename is None:
-            filename = "one_over_f_noise.npy"
-        path = os.path.join(nt.config["db_folder"], filename)
-        np.save(path, condensed_data_all)
 
-    return condensed_data_all
+# define normalized 2D gaussian
+def gauss2d(x=0, y=0, mx=0, my=0, sx=1, sy=1):
+    norm = 1.0 / (2.0 * np.pi * sx * sy)
+    norm = norm * np.exp(
+        -((x - mx) ** 2.0 / (2.0 * sx ** 2.0) + (y - my) ** 2.0 / (2.0 * sy ** 2.0))
+    )
+    return norm
 
 
-def generate_white_noise(
+def generate_random_blobs(
     how_many: int = 20000,
     save_to_file: bool = True,
     filename: Optional[str] = None,
+    n_blobs: int = 15,
+    stdx: Optional[List[float]] = None,
+    stdy: Optional[List[float]] = None,
+    seed: Optional[int] = None,
 ) -> npt.NDArray[np.float64]:
-    """ """
-    condensed_data_all = np.empty(
-        [len(nt.config["core"]["data_types"]) - 1, 0, np.prod(N_2D)]
+    """Generates samples of random Gaussian blobs, see
+    `generate_one_f_noise`.
+
+    Args:
+        how_many: number of samples.
+        save_to_file: whether to save the samples to a numpy file in
+            nt.config["db_folder"].
+        filename: name of the numpy file. Default is the file `load_noise`
+            reads.
+        n_blobs: number of blobs per sample.
+        stdx: lower and upper limit of the blobs' standard deviations along
+            the first axis.
+        stdy: lower and upper limit of the blobs' standard deviations along
+            the second axis.
+        seed: seed of the random number generator.
+
+    Returns:
+        np.array: noise of shape (3, 'how_many', number of points in
+            standard shape), holding signal, frequencies and gradient.
+    """
+    return _generate_noise(
+        "random_blobs", how_many, save_to_file, filename, seed,
+        n_blobs=n_blobs, stdx=stdx, stdy=stdy,
     )
 
-    for niter in range(how_many):
-        condensed_data = np.empty(
-            [len(nt.config["core"]["data_types"]) - 1, 1, np.prod(N_2D)]
-        )
-        coeff = np.random.normal(0, 1, N_2D)
-        noise = np.abs(fp.ifrequencies2(coeff))
-        grad = generic_gradient_magnitude(noise, sobel)
 
-        index = nt.config["core"]["data_types"]["signal"]
-        condensed_data[index, 0, :] = noise.flatten()
+def generate_noise_library(
+    noise_type: str,
+    how_many: int = 20000,
+    filename: Optional[str] = None,
+    folder: Optional[str] = None,
+    seed: int = 0,
+    n_workers: Optional[int] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    **kwargs: Any,
+) -> str:
+    """Generates noise samples in parallel and saves them to a numpy file in
+    the format read by `load_noise`, i.e. of shape (3, 'how_many', number of
+    points in standard shape) holding signal, frequencies and gradient.
+
+    Samples are computed in vectorized batches by a pool of processes,
+    which write directly into the memory-mapped output file. Each batch
+    draws its random numbers from an independent stream derived from 'seed'
+    and its index, making the output independent of 'n_workers'.
+
+    Args:
+        noise_type: one of NOISE_TYPES.
+        how_many: number of samples.
+        filename: name of the numpy file. Default is the file `load_noise`
+            reads.
+        folder: folder to save the file in. Default is
+            nt.config["db_folder"].
+        seed: seed of all random numbers.
+        n_workers: number of worker processes. Samples are computed in the
+            current process if set to 1. Default is the number of CPUs.
+        batch_size: number of samples computed at a time.
+        kwargs: keyword arguments passed on to the sampler of 'noise_type',
+            e.g. 'n_blobs', 'stdx' and 'stdy' for random blobs.
+
+    Returns:
+        str: path of the numpy file.
+    """
+    _get_noise_sampler(noise_type, **kwargs)
+    if folder is None:
+        folder = nt.config["db_folder"]
+    if filename is None:
+        filename = DEFAULT_FILES[noise_type]
+    if not filename.endswith(".npy"):
+        filename += ".npy"
+    path = os.path.join(folder, filename)
+
+    output = np.lib.format.open_memmap(
+        path,
+        mode="w+",
+        dtype=np.float64,
+        shape=(len(nt.config["core"]["data_types"]) - 1, how_many,
+               int(np.prod(N_2D))),
+    )
+    del output
+
+    batches = [
+        (batch_idx, start, min(start + batch_size, how_many))
+        for batch_idx, start in enumerate(range(0, how_many, batch_size))
+    ]
+    if n_workers == 1:
+        for batch in batches:
+            _generate_noise_batch(noise_type, seed, *batch, path, kwargs)
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            futures = [
+                executor.submit(
+                    _generate_noise_batch,
+                    noise_type, seed, *batch, path, kwargs,
+                )
+                for batch in batches
+            ]
+            for n_done, future in enumerate(as_completed(futures)):
+                future.result()
+                logger.info(
+                    f"Generated {n_done + 1} of {len(batches)} batches of "
+                    + f"{noise_type} noise."
+                )
+
+    return path
+
+
+def one_over_f_noise_batch(
+    rng: np.random.Generator,
+    n_samples: int,
+) -> npt.NDArray[np.float64]:
+    """Computes 1/f noise samples with random phases on a fine grid of shape
+    ONE_OVER_F_SHAPE, downsampled to the standard shape.
+
+    Args:
+        rng: random number generator.
+        n_samples: number of samples.
+
+    Returns:
+        np.array: noise of shape (3, 'n_samples', number of points in
+            standard shape), holding signal, frequencies and gradient.
+    """
+    f = _one_over_f_amplitudes()
+    output = _empty_noise(n_samples)
+    output[_data_index("frequencies")] = resize(
+        f, N_2D, anti_aliasing=True, mode="constant",
+    ).ravel()
+
+    for start in range(0, n_samples, ONE_OVER_F_BATCH_SIZE):
+        stop = min(start + ONE_OVER_F_BATCH_SIZE, n_samples)
+        exponents = rng.uniform(
+            low=0, high=2 * np.pi, size=(stop - start, *f.shape),
+        )
+        power_spect = f * np.exp(1j * exponents)
+        del exponents
 
-        index = nt.config["core"]["data_types"]["frequencies"]
-        condensed_data[index, 0, :] = coeff.flatten()
+        noise = np.abs(fp.ifft2(power_spect))
+        del power_spect
+        noise = _normalize(noise)
+        grad = _gradient_magnitude(noise)
 
-        index = nt.config["core"]["data_types"]["gradient"]
-        condensed_data[index, 0, :] = grad.flatten()
+        output[_data_index("signal"), start:stop] = _downsample(noise)
+        output[_data_index("gradient"), start:stop] = _downsample(grad)
 
-        condensed_data_all = np.concatenate(
-            (condensed_data_all, condensed_data), axis=1
-        )
+    return output
 
-    if save_to_file:
-        if filename is None:
-            filename = "white_noise.npy"
-        path = os.path.join(nt.config["db_folder"], filename)
-        np.save(path, condensed_data_all)
 
-    return condensed_data_all
+def white_noise_batch(
+    rng: np.random.Generator,
+    n_samples: int,
+) -> npt.NDArray[np.float64]:
+    """Computes white noise samples, see `one_over_f_noise_batch`."""
+    coeff = rng.normal(0, 1, (n_samples, *N_2D))
+    noise = np.abs(fp.ifft2(coeff))
+    return _stack_noise(noise, coeff, _gradient_magnitude(noise))
 
 
-def generate_current_drop(
-    how_many: int = 20000,
-    save_to_file: bool = True,
-    filename: Optional[str] = None,
+def current_drop_batch(
+    rng: np.random.Generator,
+    n_samples: int,
 ) -> npt.NDArray[np.float64]:
-    """ """
-    condensed_data_all = np.empty(
-        [len(nt.config["core"]["data_types"]) - 1, 0, np.prod(N_2D)]
+    """Computes samples of a current dropping along the diagonal with a
+    random steepness and offset, see `one_over_f_noise_batch`.
+    """
+    xm, ym = np.meshgrid(
+        np.linspace(0, N_2D[1], N_2D[1]), np.linspace(0, N_2D[0], N_2D[0]),
     )
+    drop = _normalize(np.sqrt((xm + ym) ** 2))
 
-    for niter in range(how_many):
-        condensed_data = np.empty(
-            [len(nt.config["core"]["data_types"]) - 1, 1, np.prod(N_2D)]
-        )
-        xm, ym = np.meshgrid(np.linspace(0, 50, 50), np.linspace(0, 50, 50))
-        drop = np.sqrt((xm + ym) ** 2)
-        drop = (drop - np.min(drop)) / (np.max(drop) - np.min(drop))
+    amp = rng.uniform(0, 10, (n_samples, 1, 1))
+    offset = rng.uniform(-5, 5, (n_samples, 1, 1))
+    drop = _normalize(np.tanh(amp * drop + offset))
+
+    return _stack_noise(
+        drop, _shifted_spectrum(drop), _gradient_magnitude(drop),
+    )
 
-        amp = np.random.uniform(0, 10, 1)
-        offset = np.random.uniform(-5, 5, 1)
 
-        drop = np.tanh(amp * drop + offset)
-        drop = (drop - np.min(drop)) / (np.max(drop) - np.min(drop))
+def random_telegraph_noise_batch(
+    rng: np.random.Generator,
+    n_samples: int,
+) -> npt.NDArray[np.float64]:
+    """Computes random telegraph noise samples, switching between 0 and 1 at
+    random points while scanning the diagram line by line, along either
+    axis. See `one_over_f_noise_batch`.
+    """
+    lam = rng.uniform(0, 0.2, (n_samples, 1, 1))
+    transpose = rng.integers(2, size=n_samples).astype(bool)
 
-        drop_freq = fp.frequencies2(drop)
-        drop_freq = fp.frequenciesshift(drop_freq)
-        drop_freq = np.abs(drop_freq)
+    poisson = rng.poisson(lam=lam, size=(n_samples, *N_2D))
+    poisson[poisson > 1] = 1
+    n_switches = np.cumsum(poisson.reshape(n_samples, -1), axis=1)
+    x = (1 - 2 * (n_switches % 2)).reshape(n_samples, *N_2D).astype(float)
+    x[transpose] = np.swapaxes(x[transpose], 1, 2)
 
-        grad = generic_gradient_magnitude(drop, sobel)
+    x = (x + 1) / 2
 
-        index = nt.config["core"]["data_types"]["signal"]
-        condensed_data[index, 0, :] = drop.flatten()
+    return _stack_noise(x, _shifted_spectrum(x), _gradient_magnitude(x))
 
-        index = nt.config["core"]["data_types"]["frequencies"]
-        condensed_data[index, 0, :] = drop_freq.flatten()
 
-        index = nt.config["core"]["data_types"]["gradient"]
-        condensed_data[index, 0, :] = grad.flatten()
+def random_blobs_batch(
+    rng: np.random.Generator,
+    n_samples: int,
+    n_blobs: int = 15,
+    stdx: Optional[Sequence[float]] = None,
+    stdy: Optional[Sequence[float]] = None,
+) -> npt.NDArray[np.float64]:
+    """Computes samples of superimposed Gaussian blobs of random positions
+    and widths, see `one_over_f_noise_batch` and `generate_random_blobs`.
+    """
+    if stdx is None:
+        stdx = [0.3, 0.8]
+    if stdy is None:
+        stdy = [0.3, 0.8]
 
-        condensed_data_all = np.concatenate(
-            (condensed_data_all, condensed_data), axis=1
+    x, y = np.meshgrid(
+        np.linspace(-1, 1, N_2D[1]), np.linspace(-1, 1, N_2D[0]),
+    )
+    blob_shape = (n_samples, n_blobs, 1, 1)
+    z = np.zeros((n_samples, *N_2D))
+    # sum blob by blob to avoid holding all blobs in memory
+    mx = rng.uniform(-1, 1, blob_shape)
+    my = rng.uniform(-1, 1, blob_shape)
+    sx = rng.uniform(stdx[0], stdx[1], blob_shape)
+    sy = rng.uniform(stdy[0], stdy[1], blob_shape)
+    for n_blob in range(n_blobs):
+        z += gauss2d(
+            x,
+            y,
+            mx=mx[:, n_blob],
+            my=my[:, n_blob],
+            sx=sx[:, n_blob],
+            sy=sy[:, n_blob],
         )
+    z = _normalize(z)
+
+    return _stack_noise(z, _shifted_spectrum(z), _gradient_magnitude(z))
+
+
+def _generate_noise(
+    noise_type: str,
+    how_many: int,
+    save_to_file: bool,
+    filename: Optional[str],
+    seed: Optional[int],
+    **kwargs: Any,
+) -> npt.NDArray[np.float64]:
+    """Computes noise samples in batches into a preallocated array and
+    optionally saves them to nt.config["db_folder"].
+    """
+    sampler = _get_noise_sampler(noise_type, **kwargs)
+    rng = np.random.default_rng(seed)
+    condensed_data_all = _empty_noise(how_many)
+    for start in range(0, how_many, DEFAULT_BATCH_SIZE):
+        stop = min(start + DEFAULT_BATCH_SIZE, how_many)
+        condensed_data_all[:, start:stop] = sampler(rng, stop - start)
 
     if save_to_file:
         if filename is None:
-            filename = "current_drop.npy"
+            filename = DEFAULT_FILES[noise_type]
         path = os.path.join(nt.config["db_folder"], filename)
         np.save(path, condensed_data_all)
 
     return condensed_data_all
 
 
-def generate_random_telegraph_noise(
-    how_many: int = 20000,
-    save_to_file: bool = True,
-    filename: Optional[str] = None,
-) -> npt.NDArray[np.float64]:
-    """ """
-    condensed_data_all = np.empty(
-        [len(nt.config["core"]["data_types"]) - 1, 0, np.prod(N_2D)]
+def _generate_noise_batch(
+    noise_type: str,
+    seed: int,
+    batch_idx: int,
+    start: int,
+    stop: int,
+    path: str,
+    kwargs: Dict[str, Any],
+) -> None:
+    """Computes the samples between 'start' and 'stop' and writes them to
+    the memory-mapped numpy file at 'path'.
+    """
+    sampler = _get_noise_sampler(noise_type, **kwargs)
+    rng = np.random.default_rng(
+        np.random.SeedSequence(seed, spawn_key=(batch_idx,))
     )
-
-    for niter in range(how_many):
-        condensed_data = np.empty(
-            [len(nt.config["core"]["data_types"]) - 1, 1, np.prod(N_2D)]
+    output = np.load(path, mmap_mode="r+")
+    output[:, start:stop] = sampler(rng, stop - start)
+    output.flush()
+    del output
+
+
+def _get_noise_sampler(noise_type: str, **kwargs: Any) -> NoiseSampler:
+    """Returns the function computing batches of noise of the given type."""
+    samplers: Dict[str, Callable[..., npt.NDArray[np.float64]]] = {
+        "white": white_noise_batch,
+        "rnt": random_telegraph_noise_batch,
+        "one_over_f": one_over_f_noise_batch,
+        "random_blobs": random_blobs_batch,
+        "current_drop": current_drop_batch,
+    }
+    if noise_type not in NOISE_TYPES:
+        logger.error(
+            "Unknown noise type. Choose one of the following: "
+            + " {}".format(", ".join(NOISE_TYPES))
         )
-        x = np.ones(N_2D)
-        s = 1
-        # for n_switches in range(0, 1):
-
-        lam = np.random.uniform(0, 0.2, 1)
-        trnsp = np.random.randint(2, size=1)
+        raise ValueError
+    return partial(samplers[noise_type], **kwargs)
 
-        poisson = np.random.poisson(lam=lam, size=N_2D)
-        poisson[poisson > 1] = 1
-        for ix in range(N_2D[0]):
-            for iy in range(N_2D[0]):
-                if poisson[ix, iy] == 1:
-                    s *= -1
-                x[ix, iy] *= s
-        if trnsp:
-            x = x.T
 
-        x = (x + 1) / 2
-
-        noise_spect = fp.frequencies2(x)
-        noise_spect = fp.frequenciesshift(noise_spect)
-        noise_spect = np.abs(noise_spect)
-
-        grad = generic_gradient_magnitude(x, sobel)
+def _empty_noise(n_samples: int) -> npt.NDArray[np.float64]:
+    """Allocates noise samples of all data types except features."""
+    return np.empty(
+        [len(nt.config["core"]["data_types"]) - 1, n_samples,
+         int(np.prod(N_2D))]
+    )
 
-        index = nt.config["core"]["data_types"]["signal"]
-        condensed_data[index, 0, :] = x.flatten()
 
-        index = nt.config["core"]["data_types"]["frequencies"]
-        condensed_data[index, 0, :] = noise_spect.flatten()
+def _data_index(data_type: str) -> int:
+    return nt.config["core"]["data_types"][data_type]
 
-        index = nt.config["core"]["data_types"]["gradient"]
-        condensed_data[index, 0, :] = grad.flatten()
 
-        condensed_data_all = np.concatenate(
-            (condensed_data_all, condensed_data), axis=1
-        )
+def _stack_noise(
+    signal: npt.NDArray[np.float64],
+    frequencies: npt.NDArray[np.float64],
+    gradient: npt.NDArray[np.float64],
+) -> npt.NDArray[np.float64]:
+    """Flattens and stacks noise samples of shape (n_samples, *N_2D) in the
+    layout of noise files.
+    """
+    output = _empty_noise(len(signal))
+    output[_data_index("signal")] = signal.reshape(len(signal), -1)
+    output[_data_index("frequencies")] = frequencies.reshape(len(signal), -1)
+    output[_data_index("gradient")] = gradient.reshape(len(signal), -1)
+    return output
 
-    if save_to_file:
-        if filename is None:
-            filename = "random_telegraph_noise.npy"
-        path = os.path.join(nt.config["db_folder"], filename)
-        np.save(path, condensed_data_all)
 
-    return condensed_data_all
+def _normalize(images: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    """Scales each image, i.e. the last two dimensions, to [0, 1]."""
+    i_min = np.min(images, axis=(-2, -1), keepdims=True)
+    i_max = np.max(images, axis=(-2, -1), keepdims=True)
+    return (images - i_min) / (i_max - i_min)
 
 
-# define normalized 2D gaussian
-def gauss2d(x=0, y=0, mx=0, my=0, sx=1, sy=1):
-    norm = 1.0 / (2.0 * np.pi * sx * sy)
-    norm = norm * np.exp(
-        -((x - mx) ** 2.0 / (2.0 * sx ** 2.0) + (y - my) ** 2.0 / (2.0 * sy ** 2.0))
-    )
-    return norm
+def _shifted_spectrum(
+    images: npt.NDArray[np.float64],
+) -> npt.NDArray[np.float64]:
+    """Absolute value of the centered 2D Fourier transform of each image."""
+    return np.abs(fp.fftshift(fp.fft2(images), axes=(-2, -1)))
 
 
-def generate_random_blobs(
-    how_many: int = 20000,
-    save_to_file: bool = True,
-    filename: Optional[str] = None,
-    n_blobs: int = 15,
-    stdx: Optional[List[float]] = None,
-    stdy: Optional[List[float]] = None,
+def _gradient_magnitude(
+    images: npt.NDArray[np.float64],
 ) -> npt.NDArray[np.float64]:
-    """ """
-    if stdx is None:
-        stdx = [0.3, 0.8]
-    if stdy is None:
-        stdy = [0.3, 0.8]
-
-    condensed_data_all = np.empty(
-        [len(nt.config["core"]["data_types"]) - 1, 0, np.prod(N_2D)]
+    """Sobel gradient magnitude of each image, equal to
+    generic_gradient_magnitude(image, sobel) of each image on its own.
+    """
+    axes = (images.ndim - 2, images.ndim - 1)
+    squared = np.zeros_like(images, dtype=float)
+    for axis, other_axis in [axes, axes[::-1]]:
+        derivative = correlate1d(images, [-1, 0, 1], axis, mode="reflect")
+        derivative = correlate1d(derivative, [1, 2, 1], other_axis,
+                                 mode="reflect")
+        squared += derivative ** 2
+    return np.sqrt(squared)
+
+
+def _downsample(images: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    """Resizes each image to the standard shape and flattens it."""
+    resized = resize(
+        images, (len(images), *N_2D), anti_aliasing=True, mode="constant",
     )
-
-    for niter in range(how_many):
-        condensed_data = np.empty(
-            [len(nt.config["core"]["data_types"]) - 1, 1, np.prod(N_2D)]
-        )
-        x = np.linspace(-1, 1)
-        y = np.linspace(-1, 1)
-        x, y = np.meshgrid(x, y)
-        z = np.zeros(N_2D)
-        for n_blob in range(n_blobs):
-            z += gauss2d(
-                x,
-                y,
-                mx=np.random.uniform(-1, 1, 1),
-                my=np.random.uniform(-1, 1, 1),
-                sx=np.random.uniform(*stdx, 1),  # type: ignore
-                sy=np.random.uniform(*stdy, 1),  # type: ignore
-            )
-        z = (z - np.min(z)) / (np.max(z) - np.min(z))
-
-        noise_spect = fp.frequencies2(z)
-        noise_spect = fp.frequenciesshift(noise_spect)
-        noise_spect = np.abs(noise_spect)
-
-        grad = generic_gradient_magnitude(z, sobel)
-
-        index = nt.config["core"]["data_types"]["signal"]
-        condensed_data[index, 0, :] = z.flatten()
-
-        index = nt.config["core"]["data_types"]["frequencies"]
-        condensed_data[index, 0, :] = noise_spect.flatten()
-
-        index = nt.config["core"]["data_types"]["gradient"]
-        condensed_data[index, 0, :] = grad.flatten()
-
-        condensed_data_all = np.concatenate(
-            (condensed_data_all, condensed_data), axis=1
-        )
-
-    if save_to_file:
-        if filename is None:
-            filename = "random_blobs.npy"
-        path = os.path.join(nt.config["db_folder"], filename)
-        np.save(path, condensed_data_all)
-
-    return condensed_data_all
+    return resized.reshape(len(images), -1)
+
+
+def _one_over_f_amplitudes() -> npt.NDArray[np.float64]:
+    """Returns 1/f on a centered frequency grid of shape ONE_OVER_F_SHAPE,
+    zero at f = 0.
+    """
+    fx_1d = fp.fftshift(fp.fftfreq(ONE_OVER_F_SHAPE[0], d=0.02))
+    fx, fy = np.meshgrid(fx_1d, fx_1d, indexing="ij")
+    f = np.sqrt(fx ** 2 + fy ** 2)
+    f[f > 0] = np.divide(1, f[f > 0])
+    return f
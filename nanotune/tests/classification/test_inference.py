@@ -0,0 +1,93 @@
+import os
+
+import numpy as np
+import pytest
+
+import nanotune as nt
+from nanotune.classification.classifier import Classifier
+from nanotune.classification.inference import FusedInference
+from nanotune.data.export_data import export_label
+
+
+@pytest.fixture(scope="function")
+def dot_data(tmp_path):
+    n_samples = 40
+    len_2d = np.prod(nt.config["core"]["standard_shapes"]["2"])
+    rng = np.random.default_rng(1)
+    data = rng.uniform(
+        size=(len(nt.config["core"]["data_types"]), n_samples, len_2d + 1)
+    )
+    labels = [export_label(["doubledot"], q, "dotregime") for q in [0, 1]]
+    data[:, :, -1] = np.tile(labels, n_samples // 2)
+    # shift one population to make it separable
+    data[0, ::2, :len_2d] += 0.3
+    np.save(os.path.join(str(tmp_path), "dots.npy"), data)
+    return data[:, :, :-1]
+
+
+@pytest.mark.parametrize(
+    "classifier_type",
+    ["LogisticRegression", "LinearSVC", "SVC", "KNeighborsClassifier"],
+)
+def test_fused_inference_matches_prep_data(dot_data, tmp_path, classifier_type):
+    clf = Classifier(
+        ["dots.npy"],
+        "doubledot",
+        folder_path=str(tmp_path),
+        classifier_type=classifier_type,
+    )
+    clf.train()
+    assert isinstance(clf.fused_inference, FusedInference)
+    assert clf.fused_inference.is_linear == (
+        classifier_type in ["LogisticRegression", "LinearSVC"]
+    )
+
+    relevant_data = clf.get_relevant_data(dot_data)
+    _, prepped_data = clf.prep_data(test_data=relevant_data)
+    expected = clf.clf.predict(prepped_data)
+    assert np.array_equal(clf.predict_condensed_data(dot_data), expected)
+
+    if clf.fused_inference.is_linear:
+        assert np.allclose(
+            clf.fused_inference.transform(relevant_data)[:, 0],
+            clf.clf.decision_function(prepped_data),
+        )
+
+
+def test_fused_inference_with_principal_components(dot_data, tmp_path):
+    clf = Classifier(
+        ["dots.npy"],
+        "doubledot",
+        folder_path=str(tmp_path),
+        classifier_type="LogisticRegression",
+        retained_variance=0.9,
+    )
+    train_data, _ = clf.prep_data(
+        train_data=clf.original_data, perform_pca=True, scale_pc=True,
+    )
+    assert clf.fused_inference is None
+    clf.clf.fit(train_data, clf.labels)
+    clf.compile_inference(perform_pca=True, scale_pc=True)
+
+    relevant_data = clf.get_relevant_data(dot_data)
+    _, prepped_data = clf.prep_data(
+        test_data=relevant_data, perform_pca=True, scale_pc=True,
+    )
+    assert np.allclose(
+        clf.fused_inference.transform(relevant_data)[:, 0],
+        clf.clf.decision_function(prepped_data),
+    )
+    assert np.array_equal(
+        clf.predict_condensed_data(dot_data), clf.clf.predict(prepped_data)
+    )
+
+
+def test_compile_inference_untrained(dot_data, tmp_path):
+    clf = Classifier(
+        ["dots.npy"],
+        "doubledot",
+        folder_path=str(tmp_path),
+        classifier_type="LogisticRegression",
+    )
+    with pytest.raises(AttributeError):
+        clf.compile_inference()
@@ -1,3 +1,303 @@
 import pytest
 
 import nanotune as nt
+import os
+
+import numpy as np
+
+from nanotune.classification.classifier import (METRIC_NAMES, Classifier,
+                                               load_condensed_data)
+from nanotune.data.export_data import export_label
+from nanotune.model.utils import generate_noise_library
+from nanotune.tests.data_generator_methods import (generate_doubledot_data,
+                                                   save_2Ddata_with_qcodes)
+
+
+@pytest.fixture(scope="function")
+def doubledot_datasets(experiment):
+    for _ in range(3):
+        datasaver = save_2Ddata_with_qcodes(generate_doubledot_data, None)
+        datasaver.dataset.conn.close()
+
+
+@pytest.fixture(scope="function")
+def doubledot_classifier(tmp_path):
+    n_samples = 20
+    len_2d = np.prod(nt.config["core"]["standard_shapes"]["2"])
+    rng = np.random.default_rng(0)
+    data = rng.uniform(
+        size=(len(nt.config["core"]["data_types"]), n_samples, len_2d + 1)
+    )
+    labels = [export_label(["doubledot"], q, "dotregime") for q in [0, 1]]
+    data[:, :, -1] = np.tile(labels, n_samples // 2)
+    np.save(os.path.join(str(tmp_path), "doubledots.npy"), data)
+
+    clf = Classifier(
+        ["doubledots.npy"],
+        "doubledot",
+        folder_path=str(tmp_path),
+        classifier_type="LogisticRegression",
+    )
+    clf.train()
+    return clf
+
+
+def test_predict_many(doubledot_classifier, doubledot_datasets, tmp_path):
+    run_ids = [1, 2, 3]
+    predictions = doubledot_classifier.predict_many(
+        run_ids, "temp.db", db_folder=str(tmp_path),
+    )
+    assert predictions.shape == (3,)
+    for run_id, prediction in zip(run_ids, predictions):
+        single = doubledot_classifier.predict(
+            run_id, "temp.db", db_folder=str(tmp_path),
+        )
+        assert len(single) == 1
+        assert single[0].tolist() == [prediction]
+
+
+def test_get_relevant_data_missing_features(doubledot_classifier):
+    fill_value = nt.config["core"]["fill_value"][0]
+    len_2d = np.prod(nt.config["core"]["standard_shapes"]["2"])
+    condensed_data = np.full(
+        (len(nt.config["core"]["data_types"]), 3, len_2d), fill_value,
+        dtype=float,
+    )
+    features_idx = nt.config["core"]["data_types"]["features"]
+    condensed_data[features_idx, 0, :3] = [0.1, 0.2, 0.3]
+    condensed_data[features_idx, 2, :2] = [0.4, 0.5]
+
+    doubledot_classifier.data_types = ["features"]
+    doubledot_classifier._feature_indexes = [1]
+    relevant_data = doubledot_classifier.get_relevant_data(condensed_data)
+    assert relevant_data.shape == (3, 1)
+    assert relevant_data[0, 0] == 0.2
+    assert np.isnan(relevant_data[1, 0])
+    assert relevant_data[2, 0] == 0.5
+
+
+def test_load_condensed_data(doubledot_datasets, tmp_path):
+    condensed_data = load_condensed_data(
+        [1, 2], "temp.db", ["doubledot", "dotregime"], db_folder=str(tmp_path),
+    )
+    len_2d = np.prod(nt.config["core"]["standard_shapes"]["2"])
+    n_data_types = len(nt.config["core"]["data_types"])
+    assert set(condensed_data.keys()) == {"doubledot", "dotregime"}
+    for data in condensed_data.values():
+        assert data.shape == (n_data_types, 2, len_2d)
+
+    condensed_data = load_condensed_data([], "temp.db", ["doubledot"])
+    assert condensed_data["doubledot"].shape[1] == 0
+
+
+def test_load_data_float32(doubledot_classifier, tmp_path):
+    np.random.seed(0)
+    clf64 = Classifier(
+        ["doubledots.npy"], "doubledot", folder_path=str(tmp_path),
+    )
+    np.random.seed(0)
+    clf = Classifier(
+        ["doubledots.npy"],
+        "doubledot",
+        folder_path=str(tmp_path),
+        classifier_type="LogisticRegression",
+        dtype=np.float32,
+    )
+    assert clf.original_data.dtype == np.float32
+    assert np.allclose(clf.original_data, clf64.original_data)
+    assert np.array_equal(clf.labels, clf64.labels)
+
+
+def test_load_data_label_order(doubledot_classifier):
+    # datasets are ordered by label, poor quality first
+    assert np.array_equal(doubledot_classifier.labels, [0] * 10 + [1] * 10)
+    assert doubledot_classifier.original_data.shape == (20, 5000)
+
+
+def test_iter_data(doubledot_classifier):
+    chunks = list(doubledot_classifier.iter_data(chunk_size=6))
+    assert [len(labels) for _, labels in chunks] == [6, 6, 6, 2]
+
+    data = np.concatenate([data for data, _ in chunks])
+    labels = np.concatenate([labels for _, labels in chunks])
+    # datasets are yielded in file order while load_data selects them at
+    # random
+    order = np.lexsort((data[:, 0], labels))
+    loaded_order = np.lexsort((
+        doubledot_classifier.original_data[:, 0], doubledot_classifier.labels,
+    ))
+    assert np.array_equal(
+        data[order], doubledot_classifier.original_data[loaded_order],
+    )
+    assert np.array_equal(
+        labels[order], doubledot_classifier.labels[loaded_order],
+    )
+
+
+def test_train_incrementally(doubledot_classifier, tmp_path):
+    clf = Classifier(
+        ["doubledots.npy"],
+        "doubledot",
+        folder_path=str(tmp_path),
+        classifier_type="GaussianNB",
+    )
+    clf.train_incrementally(chunk_size=6)
+    _, X_test = clf.prep_data(test_data=clf.original_data)
+    assert clf.clf.predict(X_test).shape == (20,)
+
+    with pytest.raises(ValueError):
+        doubledot_classifier.clf = nt.classification.classifier.svm.SVC()
+        doubledot_classifier.train_incrementally()
+
+
+def test_train_incrementally_augmented(doubledot_classifier, tmp_path):
+    generate_noise_library("white", 10, folder=str(tmp_path), n_workers=1)
+    augmentation = dict(
+        noise_types=["white"],
+        max_strength=[0.1],
+        charge_shift_probability=0.5,
+        folder=str(tmp_path),
+        seed=0,
+    )
+    batches = list(doubledot_classifier.iter_augmented_data(
+        batch_size=6, n_batches=2, **augmentation,
+    ))
+    assert len(batches) == 2
+    for data, labels in batches:
+        assert data.shape == doubledot_classifier.original_data[:6].shape
+        assert labels.shape == (6,)
+
+    clf = Classifier(
+        ["doubledots.npy"],
+        "doubledot",
+        folder_path=str(tmp_path),
+        classifier_type="GaussianNB",
+    )
+    clf.train_incrementally(
+        chunk_size=6, n_epochs=2, augmentation=dict(n_batches=3, **augmentation),
+    )
+    _, X_test = clf.prep_data(test_data=clf.original_data)
+    assert clf.clf.predict(X_test).shape == (20,)
+
+    with pytest.raises(ValueError):
+        clf.train_incrementally(augmentation=augmentation)
+    with pytest.raises(ValueError):
+        clf.data_types = ["signal", "features"]
+        next(clf.iter_augmented_data())
+
+
+def test_save_and_load(doubledot_classifier, doubledot_datasets, tmp_path):
+    path = os.path.join(str(tmp_path), "doubledot_classifier.pkl")
+    doubledot_classifier.save(path)
+
+    data_path = os.path.join(str(tmp_path), "doubledots.npy")
+    data = np.load(data_path)
+    os.remove(data_path)
+    loaded = Classifier.load(path)
+
+    assert loaded.category == doubledot_classifier.category
+    assert loaded.data_types == doubledot_classifier.data_types
+    assert loaded.original_data.size == 0
+    assert list(loaded.training_checksums.keys()) == [data_path]
+
+    condensed_data = load_condensed_data(
+        [1, 2, 3], "temp.db", ["doubledot"], db_folder=str(tmp_path),
+    )["doubledot"]
+    assert np.array_equal(
+        loaded.predict_condensed_data(condensed_data),
+        doubledot_classifier.predict_condensed_data(condensed_data),
+    )
+
+    with pytest.raises(ValueError):
+        Classifier.load(path, verify_checksums=True)
+
+    np.save(data_path, data)
+    Classifier.load(path, verify_checksums=True)
+
+    data[0, 0, 0] += 1
+    np.save(data_path, data)
+    with pytest.raises(ValueError):
+        Classifier.load(path, verify_checksums=True)
+
+
+def test_save_untrained(tmp_path):
+    n_samples = 4
+    len_2d = np.prod(nt.config["core"]["standard_shapes"]["2"])
+    data = np.zeros(
+        (len(nt.config["core"]["data_types"]), n_samples, len_2d + 1)
+    )
+    np.save(os.path.join(str(tmp_path), "dots.npy"), data)
+    clf = Classifier(
+        ["dots.npy"],
+        "doubledot",
+        folder_path=str(tmp_path),
+        classifier_type="LogisticRegression",
+    )
+    with pytest.raises(ValueError):
+        clf.save(os.path.join(str(tmp_path), "clf.pkl"))
+
+
+def test_compute_metrics_reproducible(doubledot_classifier):
+    info_dict, metrics = doubledot_classifier.compute_metrics(
+        n_iter=3, save_to_file=False, seed=1,
+    )
+    assert metrics.shape == (len(METRIC_NAMES), 3)
+    assert info_dict["classifier"] == "LogisticRegression"
+    assert np.array(info_dict["confusion_matrix"]["mean"]).shape == (2, 2)
+    for im, metric_name in enumerate(METRIC_NAMES):
+        assert info_dict[metric_name]["mean"] == np.mean(metrics[im])
+
+    _, metrics_parallel = doubledot_classifier.compute_metrics(
+        n_iter=3, save_to_file=False, seed=1, n_workers=2,
+    )
+    assert np.array_equal(metrics, metrics_parallel)
+
+
+def test_compute_metrics_leaves_clf_fitted(doubledot_classifier, tmp_path):
+    condensed_data = np.random.default_rng(2).uniform(
+        size=(len(nt.config["core"]["data_types"]), 4,
+              np.prod(nt.config["core"]["standard_shapes"]["2"]))
+    )
+    predictions = {}
+    for n_workers in [1, 2]:
+        clf = Classifier(
+            ["doubledots.npy"],
+            "doubledot",
+            folder_path=str(tmp_path),
+            classifier_type="LogisticRegression",
+        )
+        clf.compute_metrics(
+            n_iter=2, save_to_file=False, seed=1, n_workers=n_workers,
+        )
+        predictions[n_workers] = clf.predict_condensed_data(condensed_data)
+    assert predictions[1].shape == (4,)
+    assert np.array_equal(predictions[1], predictions[2])
+
+
+def test_compare_classifiers(doubledot_classifier, tmp_path, monkeypatch):
+    monkeypatch.setitem(nt.config, "db_folder", str(tmp_path))
+    results = doubledot_classifier.compare_classifiers(
+        ["LogisticRegression", "LinearSVC", "DecisionTreeClassifier"],
+        n_iter=2,
+        seed=1,
+        n_workers=2,
+    )
+    assert sorted(results.keys()) == [
+        "DecisionTreeClassifier", "LinearSVC", "LogisticRegression"]
+    info_dict, metrics = results["LogisticRegression"]
+    _, metrics_single = doubledot_classifier.compute_metrics(
+        n_iter=2, save_to_file=False, seed=1,
+    )
+    assert np.array_equal(metrics, metrics_single)
+    for info_dict, metrics in results.values():
+        assert metrics.shape == (len(METRIC_NAMES), 2)
+        assert info_dict["n_train"] == results["LinearSVC"][0]["n_train"]
+
+    path = os.path.join(str(tmp_path), "classifier_metrics")
+    assert sorted(os.listdir(path)) == [
+        "doubledots_doubledot_" + name + "_signal_frequencies.json"
+        for name in sorted(results.keys())
+    ]
+
+    with pytest.raises(ValueError):
+        doubledot_classifier.compare_classifiers(["SVM"], n_iter=1)
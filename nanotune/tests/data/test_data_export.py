@@ -1,3 +1,4 @@
+import json
 import os
 
 import numpy as np
@@ -180,3 +181,82 @@ def test_prep_data_return_data(nt_dataset_pinchoff, tmp_path):
 
     index = nt.config["core"]["data_types"]["features"]
     assert np.allclose(condensed_data[index, 0, :], features)
+
+
+def test_export_data_parallel(experiment_doubledots, tmp_path):
+    export_data(
+        "doubledot", ["temp.db"], db_folder=tmp_path, filename="serial.npy",
+        add_flipped_data=True,
+    )
+    export_data(
+        "doubledot", ["temp.db"], db_folder=tmp_path, filename="parallel.npy",
+        add_flipped_data=True, n_workers=2, chunk_size=3,
+    )
+    serial = np.load(os.path.join(tmp_path, "serial.npy"))
+    parallel = np.load(os.path.join(tmp_path, "parallel.npy"))
+    assert serial.shape == (4, 20, 2501)
+    assert np.array_equal(serial, parallel, equal_nan=True)
+    assert not [f for f in os.listdir(tmp_path) if "partial" in f]
+    assert not [f for f in os.listdir(tmp_path) if "checkpoint" in f]
+
+
+def test_export_data_resume(experiment_doubledots, tmp_path, monkeypatch):
+    export_data(
+        "doubledot", ["temp.db"], db_folder=tmp_path, filename="full.npy",
+    )
+
+    import nanotune.data.export_data as export_module
+    export_chunk = export_module._export_chunk
+    n_calls = 0
+
+    def interrupted_export_chunk(*args):
+        nonlocal n_calls
+        n_calls += 1
+        if n_calls > 2:
+            raise RuntimeError("interrupted")
+        return export_chunk(*args)
+
+    monkeypatch.setattr(
+        export_module, "_export_chunk", interrupted_export_chunk,
+    )
+    with pytest.raises(RuntimeError):
+        export_data(
+            "doubledot", ["temp.db"], db_folder=tmp_path,
+            filename="resumed.npy", chunk_size=3,
+        )
+    checkpoint_path = os.path.join(tmp_path, "resumed.npy.checkpoint.json")
+    with open(checkpoint_path, "r") as f:
+        lines = f.read().splitlines()
+    assert "datasets" not in json.loads(lines[0])
+    assert [json.loads(line)["chunk"] for line in lines[1:]] == ["0", "1"]
+    # a chunk record cut short by the interruption is exported again
+    with open(checkpoint_path, "a") as f:
+        f.write('\n{"chunk": "2", "ro')
+
+    n_calls = -10
+    export_data(
+        "doubledot", ["temp.db"], db_folder=tmp_path,
+        filename="resumed.npy", chunk_size=3,
+    )
+    assert n_calls == -8
+    full = np.load(os.path.join(tmp_path, "full.npy"))
+    resumed = np.load(os.path.join(tmp_path, "resumed.npy"))
+    assert np.array_equal(full, resumed, equal_nan=True)
+    assert not os.path.exists(
+        os.path.join(tmp_path, "resumed.npy.checkpoint.json")
+    )
+
+    with pytest.raises(ValueError):
+        monkeypatch.setattr(
+            export_module, "_export_chunk", interrupted_export_chunk,
+        )
+        n_calls = 1
+        with pytest.raises(RuntimeError):
+            export_data(
+                "doubledot", ["temp.db"], db_folder=tmp_path,
+                filename="other.npy", chunk_size=3,
+            )
+        export_data(
+            "doubledot", ["temp.db"], db_folder=tmp_path,
+            filename="other.npy", chunk_size=4,
+        )
@@ -109,3 +109,51 @@ def test_dataset_property_getters(nt_dataset_pinchoff, tmp_path):
 
     qc_ds = load_by_id(1)
     assert ds.features == nt_metadata["features"]
+
+
+def test_dataset_lazy_post_processing(nt_dataset_doubledot, tmp_path):
+    ds = Dataset(1, db_name="temp.db", db_folder=str(tmp_path))
+    assert ds._power_spectrum is None
+    assert ds._filtered_data is None
+
+    power_spectrum = ds.power_spectrum
+    assert set(power_spectrum.data_vars) == {"transport", "sensing"}
+    assert ds.power_spectrum is power_spectrum
+    assert ds._filtered_data is None
+
+    filtered_data = ds.filtered_data
+    assert set(filtered_data.data_vars) == {"transport", "sensing"}
+    assert ds.filtered_data is filtered_data
+
+
+def _assert_metadata_only_matches_full_load(tmp_path):
+    ds = Dataset(1, db_name="temp.db", db_folder=str(tmp_path))
+    ds_meta = Dataset(
+        1, db_name="temp.db", db_folder=str(tmp_path), metadata_only=True,
+    )
+    assert ds_meta.metadata_only
+    for attr in [
+        "guid",
+        "exp_id",
+        "device_name",
+        "readout_methods",
+        "dimensions",
+        "quality",
+        "ml_label",
+        "features",
+        "normalization_constants",
+    ]:
+        assert getattr(ds_meta, attr) == getattr(ds, attr)
+
+    assert len(ds_meta.raw_data) == 0
+    assert len(ds_meta.data) == 0
+    assert len(ds_meta.power_spectrum) == 0
+    assert len(ds_meta.filtered_data) == 0
+
+
+def test_dataset_metadata_only(nt_dataset_doubledot, tmp_path):
+    _assert_metadata_only_matches_full_load(tmp_path)
+
+
+def test_dataset_metadata_only_missing_metadata(qc_dataset_doubledot, tmp_path):
+    _assert_metadata_only_matches_full_load(tmp_path)
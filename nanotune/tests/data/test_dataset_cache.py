@@ -0,0 +1,53 @@
+import json
+
+from qcodes.dataset.experiment_container import load_by_id
+
+import nanotune as nt
+from nanotune.data.dataset_cache import DatasetCache
+from nanotune.fit.pinchofffit import PinchoffFit
+
+
+def test_dataset_cache_load(nt_dataset_pinchoff, tmp_path):
+    cache = DatasetCache(maxsize=2)
+    ds = cache.load(nt.Dataset, 1, "temp.db", db_folder=str(tmp_path))
+    assert isinstance(ds, nt.Dataset)
+    assert ds.guid == nt_dataset_pinchoff.guid
+    assert cache.load(nt.Dataset, 1, "temp.db", db_folder=str(tmp_path)) is ds
+
+    fit = cache.load(PinchoffFit, 1, "temp.db", db_folder=str(tmp_path))
+    assert isinstance(fit, PinchoffFit)
+    assert fit is not ds
+    assert len(cache) == 2
+
+    fit_kwargs = cache.load(
+        PinchoffFit, 1, "temp.db", db_folder=str(tmp_path), gradient_percentile=30,
+    )
+    assert fit_kwargs is not fit
+    assert len(cache) == 2
+    assert cache.load(
+        PinchoffFit, 1, "temp.db", db_folder=str(tmp_path)
+    ) is fit
+    assert cache.load(
+        nt.Dataset, 1, "temp.db", db_folder=str(tmp_path)
+    ) is not ds
+
+    cache.invalidate(ds.guid)
+    assert len(cache) == 0
+
+
+def test_dataset_cache_update_metadata(nt_dataset_pinchoff, tmp_path):
+    cache = DatasetCache()
+    ds = cache.load(nt.Dataset, 1, "temp.db", db_folder=str(tmp_path))
+
+    qc_dataset = load_by_id(1)
+    nt_metadata = json.loads(qc_dataset.get_metadata(nt.meta_tag))
+    nt_metadata["features"] = {"amplitude": 0.4}
+    qc_dataset.add_metadata(nt.meta_tag, json.dumps(nt_metadata))
+    cache.update_metadata(qc_dataset)
+    assert cache.load(nt.Dataset, 1, "temp.db", db_folder=str(tmp_path)) is ds
+    assert ds.features == {"amplitude": 0.4}
+
+    nt_metadata["normalization_constants"]["transport"] = [0, 3]
+    qc_dataset.add_metadata(nt.meta_tag, json.dumps(nt_metadata))
+    cache.update_metadata(qc_dataset)
+    assert len(cache) == 0
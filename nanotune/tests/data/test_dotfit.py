@@ -1,11 +1,13 @@
 import math
 import os
+from itertools import combinations
 
 import numpy as np
 import pytest
 
 import nanotune as nt
-from nanotune.fit.dotfit import DotFit
+from nanotune.fit.dotfit import (DotFit, get_close_point_pairs,
+                                 get_point_distances)
 from nanotune.tests.data.conftest import generate_doubledot_data
 
 atol = 1e-05
@@ -153,6 +155,39 @@ def test_dotfit_save_segmented_data(
     assert np.allclose(raw_current_new_df, raw_current_original, rtol=atol)
 
 
+def test_dotfit_get_segments(nt_dataset_doubledot, tmp_path):
+    df = DotFit(1, "temp.db", db_folder=str(tmp_path), segment_size=0.05)
+    segments = df.get_segments()
+    assert not df.segmented_data
+    assert len(segments) == 4
+    for segment in segments:
+        for read_meth in ["transport", "sensing"]:
+            assert np.shares_memory(
+                segment[read_meth].values, df.data[read_meth].values
+            )
+
+    seg_info = df.get_segments_info(segments)
+    assert sorted(seg_info.keys()) == [0, 1, 2, 3]
+    assert seg_info[0]["voltage_ranges"] == [(-0.2, -0.15125), (-0.3, -0.252)]
+    assert seg_info[3]["voltage_ranges"] == [(-0.15, -0.1), (-0.25, -0.2)]
+
+
+def test_dotfit_save_segmented_data_async(nt_dataset_doubledot, tmp_path):
+    df = DotFit(1, "temp.db", db_folder=str(tmp_path), segment_size=0.05)
+    future = df.save_segmented_data_async(
+        "segmented_temp.db", segment_db_folder=str(tmp_path))
+    seg_info = future.result()
+
+    assert sorted(seg_info.keys()) == [1, 2, 3, 4]
+    db_name, db_folder = nt.get_database()
+    assert db_name == "temp.db"
+    assert db_folder == str(tmp_path)
+
+    seg_ds = nt.Dataset(1, "segmented_temp.db", db_folder=str(tmp_path))
+    raw_segments = df.get_segments(use_raw_data=True)
+    assert np.allclose(
+        seg_ds.raw_data["current"].values, raw_segments[0]["current"].values)
+
 def test_get_triple_point_distances(nt_dataset_doubledot, tmp_path):
     df = DotFit(1, "temp.db", db_folder=str(tmp_path))
 
@@ -197,6 +232,27 @@ def test_get_triple_point_distances(nt_dataset_doubledot, tmp_path):
     assert [-0.12, -0.25] in sensing_distance[:, 3]
 
 
+def test_get_close_point_pairs():
+    rng = np.random.default_rng(0)
+    points = rng.uniform(-0.3, 0, size=(60, 2))
+    distance_threshold = 0.03
+
+    pairs = get_close_point_pairs(points, distance_threshold)
+
+    all_pairs = [get_point_distances(*combo) for combo in combinations(points, 2)]
+    expected = [p for p in all_pairs if p[0][0] <= distance_threshold]
+    assert len(pairs) == len(expected)
+    for pair, expected_pair in zip(pairs, expected):
+        assert math.isclose(pair[0][0], expected_pair[0][0], rel_tol=atol)
+        assert pair[0][1] is None
+        assert np.allclose(pair[1], expected_pair[1])
+        assert pair[2] == expected_pair[2]
+        assert pair[3] == expected_pair[3]
+
+    assert get_close_point_pairs(points[:1], distance_threshold) == []
+    assert get_close_point_pairs(points, 0) == []
+
+
 def test_dotfit_plot(nt_dataset_doubledot, tmp_path):
     df = DotFit(1, "temp.db", db_folder=str(tmp_path))
 
@@ -0,0 +1,83 @@
+import os
+
+import pytest
+import qcodes as qc
+
+from nanotune.data.databases import get_dataIDs, get_unlabelled_ids
+from nanotune.data.label_catalog import CATALOG_FILE_NAME, LabelCatalog
+
+
+def test_label_catalog_queries(
+    experiment_labelled_data, second_third_experiment_labelled_data, tmp_path
+):
+    db_path = os.path.join(str(tmp_path), "temp.db")
+    db_path2 = os.path.join(str(tmp_path), "temp2.db")
+
+    with LabelCatalog(str(tmp_path)) as catalog:
+        assert catalog.catalog_path == os.path.join(
+            str(tmp_path), CATALOG_FILE_NAME)
+        assert sorted(catalog.refresh()) == [db_path, db_path2]
+        assert len(catalog) == 16
+
+        ids = catalog.get_dataIDs("pinchoff")
+        assert ids[db_path] == get_dataIDs("temp.db", "pinchoff", tmp_path)
+        assert ids[db_path2] == get_dataIDs("temp2.db", "pinchoff", tmp_path)
+        assert catalog.get_dataIDs("singledot", quality=0) == {
+            db_path: [3], db_path2: [3, 6]}
+        assert catalog.get_dataIDs("singledot", quality=1) == {}
+        assert catalog.get_unlabelled_ids() == {}
+
+        entries = catalog.find("doubledot", device_name="test_device")
+        assert [(e.db_name, e.run_id) for e in entries] == [
+            ("temp.db", 5), ("temp.db", 9), ("temp2.db", 1)]
+        assert entries[0].labels == ("doubledot",)
+        assert entries[0].quality == 0
+        assert catalog.find(device_name="other_device") == []
+
+        with pytest.raises(ValueError):
+            catalog.find("single")
+
+
+def test_label_catalog_locate(experiment_labelled_data, tmp_path):
+    ds = qc.load_by_id(3)
+    guid = ds.guid
+    ds.conn.close()
+
+    with LabelCatalog(str(tmp_path)) as catalog:
+        assert catalog.locate(guid) is None
+        catalog.refresh()
+        entry = catalog.locate(guid)
+    assert entry.db_path == os.path.join(str(tmp_path), "temp.db")
+    assert entry.run_id == 3
+    assert entry.captured_run_id == 3
+    assert entry.labels == ("singledot",)
+
+
+def test_label_catalog_refresh(experiment_partially_labelled, tmp_path):
+    db_path = os.path.join(str(tmp_path), "temp.db")
+    catalog = LabelCatalog(str(tmp_path))
+    try:
+        assert catalog.refresh() == [db_path]
+        assert catalog.refresh() == []
+        assert catalog.get_unlabelled_ids()[db_path] == get_unlabelled_ids(
+            "temp.db", str(tmp_path))
+
+        ds = qc.load_by_id(4)
+        ds.add_metadata("good", 1)
+        ds.add_metadata("pinchoff", 1)
+        ds.conn.close()
+        assert catalog.refresh() == [db_path]
+        assert catalog.get_unlabelled_ids()[db_path] == [7, 8, 10]
+        assert catalog.get_dataIDs("pinchoff", quality=1) == {db_path: [4]}
+        assert len(catalog) == 10
+    finally:
+        catalog.close()
+
+    # a reopened catalog is up to date
+    with LabelCatalog(str(tmp_path)) as catalog:
+        assert catalog.refresh() == []
+        assert len(catalog) == 10
+
+        os.remove(db_path)
+        assert catalog.refresh() == []
+        assert len(catalog) == 0
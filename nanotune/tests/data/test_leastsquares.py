@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from scipy.optimize import least_squares
+
+from nanotune.fit.leastsquares import least_squares_batch
+
+
+def exponential_decays():
+    t = np.linspace(0, 4, 40)
+    rng = np.random.default_rng(1)
+    params = np.array([[2., 1.5], [0.5, 0.3], [1., 3.], [3., 0.8]])
+    data = params[:, :1] * np.exp(-params[:, 1:] * t)
+    data += 0.05 * rng.standard_normal(data.shape)
+    data[0, 5] += 2  # outlier
+
+    def residuals(x, idx):
+        return x[:, :1] * np.exp(-x[:, 1:] * t) - data[idx]
+
+    def jacobian(x, idx):
+        decay = np.exp(-x[:, 1:] * t)
+        return np.stack([decay, -x[:, :1] * t * decay], axis=-1)
+
+    return t, data, residuals, jacobian
+
+
+@pytest.mark.parametrize("loss", ["linear", "cauchy"])
+def test_least_squares_batch_matches_scipy(loss):
+    t, data, residuals, _ = exponential_decays()
+    x0 = np.ones((len(data), 2))
+    bounds = ([0, 0], [2.5, np.inf])
+
+    x, fun = least_squares_batch(residuals, x0, bounds, loss=loss)
+
+    for idx, trace in enumerate(data):
+        res = least_squares(
+            lambda p: p[0] * np.exp(-p[1] * t) - trace,
+            x0[idx],
+            method="trf",
+            loss=loss,
+            bounds=bounds,
+        )
+        assert np.allclose(x[idx], res.x, rtol=1e-6)
+        assert np.allclose(fun[idx], res.fun, atol=1e-6)
+
+    assert np.all(x[:, 0] <= 2.5)
+
+
+def test_least_squares_batch_analytic_jacobian():
+    _, data, residuals, jacobian = exponential_decays()
+    x0 = np.ones((len(data), 2))
+    bounds = ([0, 0], [np.inf, np.inf])
+
+    x_approx, _ = least_squares_batch(residuals, x0, bounds)
+    x, _ = least_squares_batch(residuals, x0, bounds, jac=jacobian)
+
+    assert np.allclose(x, x_approx, rtol=1e-5)
+
+
+def test_least_squares_batch_invalid_input():
+    _, _, residuals, _ = exponential_decays()
+    x0 = np.ones((4, 2))
+
+    with pytest.raises(ValueError):
+        least_squares_batch(residuals, x0, ([0, 0], [np.inf] * 2), loss="huber")
+
+    with pytest.raises(ValueError):
+        least_squares_batch(residuals, x0, ([2, 0], [np.inf] * 2))
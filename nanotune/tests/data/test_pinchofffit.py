@@ -1,14 +1,19 @@
 import json
 import math
 import os
+import warnings
 import matplotlib.pyplot as plt
 import numpy as np
 import pytest
 from qcodes.dataset.experiment_container import load_by_id
+from scipy.ndimage import gaussian_filter
+from scipy.optimize import least_squares
 
 import nanotune as nt
-from nanotune.fit.pinchofffit import PinchoffFit
-from nanotune.tests.data_generator_methods import generate_bad_pinchoff_data
+from nanotune.fit.pinchofffit import (PinchoffFit, compute_initial_guess_batch,
+                                      fit_pinchoff_batch, pinchoff_function)
+from nanotune.tests.data_generator_methods import (generate_bad_pinchoff_data,
+                                                   generate_pinchoff_data)
 
 rtol = 1e-05
 
@@ -198,3 +203,84 @@ def test_pinchoff_features_plot(nt_dataset_pinchoff, tmp_path):
     assert os.path.exists(os.path.join(str(tmp_path), "test.png"))
     assert len(ax) == len(pf.readout_methods)
     plt.close()
+
+
+def test_fit_pinchoff_batch_matches_least_squares():
+    _, current, sensor = generate_pinchoff_data()
+    _, bad_current, bad_sensor = generate_bad_pinchoff_data()
+    signals = np.stack([current, sensor, bad_current, bad_sensor])
+    smooth_signals = gaussian_filter(signals, sigma=(0, 2))
+    v = np.linspace(0, 1, signals.shape[1])
+    bounds, initial_guess = compute_initial_guess_batch(signals, v)
+
+    fit_result = fit_pinchoff_batch(smooth_signals, initial_guess, bounds, v)
+
+    for idx, smooth_signal in enumerate(smooth_signals):
+        def err_func(p):
+            err = pinchoff_function(v, p) - smooth_signal
+            return err / np.linalg.norm(smooth_signal)
+
+        sub_res = least_squares(
+            err_func,
+            initial_guess[idx],
+            method="trf",
+            loss="cauchy",
+            bounds=(bounds[0][idx], bounds[1][idx]),
+            gtol=1e-15,
+            ftol=1e-15,
+            xtol=1e-15,
+        )
+        batch_params = [
+            fit_result[name][idx]
+            for name in ["amplitude", "slope", "offset", "tanh_sign"]
+        ]
+        assert np.allclose(batch_params, sub_res.x, rtol=rtol)
+        assert math.isclose(
+            fit_result["residuals"][idx],
+            np.linalg.norm(sub_res.fun),
+            rel_tol=rtol,
+        )
+
+
+def test_fit_pinchoff_batch_default_initial_guess():
+    _, current, sensor = generate_pinchoff_data()
+    signals = np.stack([current, sensor])
+    bounds, initial_guess = compute_initial_guess_batch(signals)
+
+    assert np.allclose(initial_guess[:, 2], 0.5)
+    assert np.allclose(bounds[1][:, 0], initial_guess[:, 0])
+
+    fit_result = fit_pinchoff_batch(signals)
+    single_result = fit_pinchoff_batch(sensor)
+    for name, values in fit_result.items():
+        assert values.shape == (2, )
+        assert math.isclose(values[1], single_result[name][0], rel_tol=rtol)
+
+
+def test_fit_pinchoff_batch_noisy_traces_no_warnings():
+    _, current, sensor = generate_pinchoff_data()
+    rng = np.random.default_rng(0)
+    signals = np.tile(np.stack([current, sensor]), (150, 1))
+    signals += 0.05 * rng.standard_normal(signals.shape)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning)
+        fit_result = fit_pinchoff_batch(signals)
+    assert np.all(np.isfinite(fit_result["residuals"]))
+
+
+def test_pinchofffit_find_fit_batch(nt_dataset_pinchoff, tmp_path):
+    pf = PinchoffFit(1, "temp.db", db_folder=str(tmp_path))
+    pf.find_fit()
+
+    for read_meth in pf.readout_methods:
+        bounds, initial_guess = pf.compute_initial_guess(read_meth)
+        fit_result = fit_pinchoff_batch(
+            pf.filtered_data[read_meth].values,
+            initial_guess=np.array([initial_guess]),
+            bounds=bounds,
+        )
+        for name, values in fit_result.items():
+            assert math.isclose(
+                pf.features[read_meth][name], values[0], rel_tol=rtol
+            )
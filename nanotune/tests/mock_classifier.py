@@ -1,4 +1,7 @@
-from typing import List, Optional
+from typing import List, Optional, Sequence
+
+import numpy as np
+import numpy.typing as npt
 
 import nanotune as nt
 
@@ -6,9 +9,10 @@ ALLOWED_CATEGORIES = list(dict(nt.config["core"]["features"]).keys())
 
 
 class MockClassifer:
-    def __init__(self, category):
+    def __init__(self, category, probability=1.0):
         assert category in ALLOWED_CATEGORIES
         self.category = category
+        self.probability = probability
 
     def predict(
         self,
@@ -20,3 +24,23 @@ class MockClassifer:
         #     return [0]
         # else:
         return [1]
+
+    def predict_many(
+        self,
+        dataids: Sequence[int],
+        db_name: str,
+        db_folder: Optional[str] = None,
+    ) -> npt.NDArray[np.int64]:
+        return np.ones(len(dataids), dtype=int)
+
+    def predict_condensed_data(
+        self,
+        condensed_data: npt.NDArray[np.float64],
+    ) -> npt.NDArray[np.int64]:
+        return np.ones(condensed_data.shape[1], dtype=int)
+
+    def predict_proba_condensed_data(
+        self,
+        condensed_data: npt.NDArray[np.float64],
+    ) -> npt.NDArray[np.float64]:
+        return np.full(condensed_data.shape[1], self.probability)
@@ -0,0 +1,57 @@
+import pytest
+
+from nanotune.model.capacitancemodel import CapacitanceModel
+
+
+@pytest.fixture(scope="function")
+def double_dot_model(tmp_path):
+    voltage_nodes = {
+        0: "top_barrier",
+        1: "left_barrier",
+        2: "left_plunger",
+        3: "central_barrier",
+        4: "right_plunger",
+        5: "right_barrier",
+    }
+    charge_nodes = {0: "A", 1: "B"}
+    model = CapacitanceModel(
+        "qdot",
+        charge_nodes=charge_nodes,
+        voltage_nodes=voltage_nodes,
+        db_name="temp.db",
+        db_folder=str(tmp_path),
+    )
+    model.V_v([-1, -1, -0.5, -1, -0.1, -1])
+    model.C_cc([[-2]])
+    model.C_cv([
+        [-0.6, -0.6, -0.5, -0.5, -0.1, -0.1],
+        [-0.5, -0.3, -0.2, -0.8, -0.5, -0.9],
+    ])
+    try:
+        yield model
+    finally:
+        model.close()
+
+
+@pytest.fixture(scope="function")
+def linear_array_model(tmp_path):
+    n_dots = 4
+    model = CapacitanceModel(
+        "linear_array",
+        charge_nodes={idx: f"dot_{idx}" for idx in range(n_dots)},
+        voltage_nodes={idx: f"plunger_{idx}" for idx in range(n_dots)},
+        db_name="temp.db",
+        db_folder=str(tmp_path),
+    )
+    model.C_cc([[-0.3, -0.3, -0.3], [-0.05, -0.05], [-0.01]])
+    model.C_cv([
+        [-0.8, -0.1, -0.05, -0.01],
+        [-0.1, -0.8, -0.1, -0.05],
+        [-0.05, -0.1, -0.8, -0.1],
+        [-0.01, -0.05, -0.1, -0.8],
+    ])
+    model.V_v([2, 2, 2, 2])
+    try:
+        yield model
+    finally:
+        model.close()
@@ -0,0 +1,139 @@
+import pickle
+
+import numpy as np
+import pytest
+import scipy as sc
+
+from nanotune.model.capacitancecore import (CapacitanceCore,
+                                            determine_models_sweep_voltages)
+
+
+@pytest.fixture(scope="function")
+def double_dot_core(double_dot_model):
+    return pickle.loads(pickle.dumps(double_dot_model.core))
+
+
+def test_default_state():
+    core = CapacitanceCore(3, 4)
+    assert core.N.tolist() == [0, 0, 0]
+    assert core.V_v.tolist() == [0, 0, 0, 0]
+    assert core.C_cv.shape == (3, 4)
+    assert np.array_equal(core.C_cc, np.zeros((3, 3)))
+    assert not hasattr(core, "__dict__")
+
+
+def test_pickle(double_dot_model, double_dot_core):
+    assert double_dot_core.N.tolist() == double_dot_model.N()
+    assert double_dot_core.V_v.tolist() == double_dot_model.V_v()
+    assert np.array_equal(double_dot_core.C_cc, double_dot_model.C_cc())
+    assert np.array_equal(double_dot_core.C_cv, double_dot_model.C_cv())
+    assert np.array_equal(
+        double_dot_core.operators.C_cc_inv,
+        double_dot_model.operators.C_cc_inv,
+    )
+    assert double_dot_core.compute_energy() == double_dot_model.compute_energy()
+    assert double_dot_core.determine_N() == double_dot_model.determine_N()
+
+
+def test_capacitances(double_dot_core):
+    ops = double_dot_core.operators
+    double_dot_core.C_cv = np.zeros((2, 6))
+    double_dot_core.c_r = 0.5
+    assert double_dot_core.operators.version > ops.version
+    # both leads are accounted for by c_r
+    assert np.allclose(double_dot_core.C_cc, [[3, -2], [-2, 3]])
+
+    double_dot_core.set_C_cc_off_diagonals([[-1]])
+    assert np.allclose(double_dot_core.C_cc, [[2, -1], [-1, 2]])
+    with pytest.raises(ValueError):
+        double_dot_core.C_cv[0, 0] = 1
+
+
+def test_model_syncs_with_core(double_dot_model):
+    core = double_dot_model.core
+    core.V_v[2] = 1.5
+    core.N = [2, 1]
+    assert double_dot_model.V_v()[2] == 1.5
+    assert double_dot_model.voltage_nodes[2].v() == 1.5
+    assert double_dot_model.N() == [2, 1]
+    assert double_dot_model.charge_nodes[1].n() == 1
+
+    double_dot_model.set_voltage(4, 2.5)
+    double_dot_model.charge_nodes[0].n(3)
+    assert core.V_v[4] == 2.5
+    assert core.N.tolist() == [3, 1]
+
+    double_dot_model.set_capacitance("cv", [0, 2], -0.7)
+    assert core.C_cv[0, 2] == -0.7
+
+
+def test_compute_charge_diagram(double_dot_model, double_dot_core):
+    kwargs = dict(n_steps=[20, 20], add_noise=False)
+    signal, voltage_x, voltage_y = double_dot_core.compute_charge_diagram(
+        [2, 4], [(2.83, 6.30), (3.87, 6.48)], **kwargs,
+    )
+    expected = double_dot_model.compute_charge_diagram(
+        [2, 4], [(2.83, 6.30), (3.87, 6.48)], **kwargs,
+    )
+    assert np.array_equal(signal, expected[0])
+    assert double_dot_core.V_v[2] == voltage_x[-1]
+    assert double_dot_core.V_v[4] == voltage_y[-1]
+    assert double_dot_core.N.tolist() == double_dot_model.N()
+
+
+def test_compute_coulomb_oscillations(double_dot_core):
+    signal, voltage_x = double_dot_core.compute_coulomb_oscillations(
+        2, (2.83, 6.30), n_steps=50, add_noise=False,
+    )
+    assert signal.shape == (50,)
+    assert np.max(signal) == 1
+    assert double_dot_core.V_v[2] == voltage_x[-1] == 6.30
+
+
+def test_determine_sweep_voltages(double_dot_core):
+    V_v = double_dot_core.V_v.tolist()
+    N_limits = [(0, 3), (1, 2)]
+    sweep_limits = double_dot_core.determine_sweep_voltages(
+        [2, 4], V_v=V_v, N_limits=N_limits,
+    )
+    assert V_v == double_dot_core.V_v.tolist()
+
+    def energy(N, swept_voltages):
+        V_v_swept = np.array(V_v)
+        V_v_swept[[2, 4]] = swept_voltages
+        return double_dot_core.compute_energy(N=N, V_v=V_v_swept)
+
+    for limit_idx in range(2):
+        N = [limits[limit_idx] for limits in N_limits]
+        res = sc.optimize.minimize(
+            lambda x: energy(N, x), [0, 0], method="Nelder-Mead", tol=1e-8,
+        )
+        assert np.allclose(
+            [limits[limit_idx] for limits in sweep_limits], res.x, atol=1e-4,
+        )
+
+
+def test_determine_sweep_voltages_batch(double_dot_core):
+    voltage_node_idx = [[2, 4], [0, 5], [2, 4]]
+    N_limits = [[(0, 3), (0, 3)], [(1, 2), (0, 4)], [(0, 1), (0, 1)]]
+    sweep_limits = double_dot_core.determine_sweep_voltages_batch(
+        voltage_node_idx, N_limits,
+    )
+    assert sweep_limits.shape == (3, 2, 2)
+    for idx, limits, expected in zip(voltage_node_idx, N_limits, sweep_limits):
+        assert np.allclose(
+            double_dot_core.determine_sweep_voltages(idx, N_limits=limits),
+            expected,
+        )
+
+    other_core = pickle.loads(pickle.dumps(double_dot_core))
+    other_core.C_cv = 2 * double_dot_core.C_cv
+    sweep_limits = determine_models_sweep_voltages(
+        [double_dot_core, other_core], [2, 4], [(0, 3), (0, 3)],
+    )
+    assert sweep_limits.shape == (2, 2, 2)
+    for core, expected in zip([double_dot_core, other_core], sweep_limits):
+        assert np.allclose(
+            core.determine_sweep_voltages([2, 4], N_limits=[(0, 3), (0, 3)]),
+            expected,
+        )
@@ -0,0 +1,332 @@
+import numpy as np
+import pytest
+import scipy as sc
+from qcodes import load_by_id
+
+import nanotune as nt
+from nanotune.model.capacitancemodel import CapacitanceModel
+
+sweep_ranges = [(2.83, 6.30), (3.87, 6.48)]
+
+
+def test_get_charge_configurations(double_dot_model):
+    c_configs = double_dot_model.get_charge_configurations([(0, 1), (1, 3)])
+    assert c_configs.tolist() == [
+        [0, 1], [0, 2], [0, 3], [1, 1], [1, 2], [1, 3],
+    ]
+
+
+def test_compute_energies(double_dot_model):
+    c_configs = [[0, 0], [1, 2], [3, 1]]
+    V_v_points = [
+        [-1, -1, -0.5, -1, -0.1, -1],
+        [-1, -1, 4.2, -1, 5.1, -1],
+    ]
+    energies = double_dot_model.compute_energies(c_configs, V_v_points)
+    assert energies.shape == (2, 3)
+    for ip, V_v in enumerate(V_v_points):
+        for ic, N in enumerate(c_configs):
+            expected = double_dot_model.compute_energy(N=N, V_v=V_v)
+            assert np.isclose(energies[ip, ic], expected)
+
+
+def test_determine_N_batch(double_dot_model):
+    V_v_points = double_dot_model._get_voltage_grid(
+        [2, 4], [np.linspace(*sweep_ranges[0], 7), np.linspace(*sweep_ranges[1], 7)]
+    )
+    ground_states = double_dot_model.determine_N_batch(V_v_points)
+    assert ground_states.shape == (49, 2)
+
+    for V_v, N in zip(V_v_points, ground_states):
+        assert double_dot_model.determine_N(V_v=V_v) == N.tolist()
+
+
+def _ground_state_energies(model, N_points, V_v_points):
+    return np.array([
+        model.compute_energy(N=N, V_v=V_v)
+        for N, V_v in zip(N_points, V_v_points)
+    ])
+
+
+def test_track_ground_states(linear_array_model):
+    V_v_points = linear_array_model._get_voltage_grid(
+        [0, 3], [np.linspace(1, 6, 15), np.linspace(1, 6, 15)]
+    )
+    expected = _ground_state_energies(
+        linear_array_model,
+        linear_array_model.determine_N_batch(V_v_points, max_candidates=None),
+        V_v_points,
+    )
+    # compare energies as the grid contains degenerate configurations
+    for ground_states in [
+        linear_array_model.track_ground_states(V_v_points),
+        # start far away from the ground state
+        linear_array_model.track_ground_states(
+            V_v_points, N_start=[12, 0, 9, 0],
+        ),
+        linear_array_model.determine_N_batch(V_v_points, max_candidates=1),
+    ]:
+        assert ground_states.shape == (225, 4)
+        assert np.allclose(
+            _ground_state_energies(
+                linear_array_model, ground_states, V_v_points,
+            ),
+            expected,
+        )
+
+
+def test_track_ground_states_fallback(linear_array_model):
+    V_v_points = linear_array_model._get_voltage_grid(
+        [0, 3], [np.linspace(1, 6, 4), np.linspace(1, 6, 4)]
+    )
+    expected = linear_array_model.determine_N_batch(
+        V_v_points, max_candidates=None,
+    )
+    ground_states = linear_array_model.track_ground_states(
+        V_v_points, N_start=[12, 0, 9, 0], max_steps=1,
+    )
+    assert np.array_equal(ground_states, expected)
+
+
+def test_default_C_cc_many_dots(tmp_path):
+    model = CapacitanceModel(
+        "default_array",
+        charge_nodes={idx: f"dot_{idx}" for idx in range(4)},
+        voltage_nodes={idx: f"plunger_{idx}" for idx in range(4)},
+        db_name="temp.db",
+        db_folder=str(tmp_path),
+    )
+    try:
+        assert np.array(model.C_cc()).shape == (4, 4)
+    finally:
+        model.close()
+
+
+def test_chemical_potentials(double_dot_model):
+    N_points = np.array([[0, 0], [2, 1]])
+    V_v_points = np.array([
+        [-1, -1, -0.5, -1, -0.1, -1],
+        [-1, -1, 4.2, -1, 5.1, -1],
+    ])
+    mu = double_dot_model.chemical_potentials(N_points, V_v_points)
+    for ip in range(2):
+        for dot_id in range(2):
+            expected = double_dot_model.mu(
+                dot_id, N=N_points[ip], V_v=V_v_points[ip],
+            )
+            assert np.isclose(mu[ip, dot_id], expected)
+
+
+def test_calculate_transport_at_zero_bias_batch(double_dot_model):
+    N_points = np.array([[1, 1], [2, 1]])
+    V_v_points = np.array([
+        [-1, -1, 4.2, -1, 5.1, -1],
+        [-1, -1, 5.3, -1, 4.6, -1],
+    ])
+    signal = double_dot_model.calculate_transport_at_zero_bias_batch(
+        N_points, V_v_points, broadening=0.05,
+    )
+    for ip in range(2):
+        expected = double_dot_model.calculate_transport_at_zero_bias(
+            N_current=N_points[ip], V_v=V_v_points[ip], broadening=0.05,
+        )
+        assert np.isclose(signal[ip], expected)
+
+
+def test_get_energy_differences_to_excited_charge_states_batch(
+    double_dot_model,
+):
+    N_points = np.array([[0, 0], [1, 1], [2, 1]])
+    V_v_points = np.array([
+        [-1, -1, -0.5, -1, -0.1, -1],
+        [-1, -1, 4.2, -1, 5.1, -1],
+        [-1, -1, 5.3, -1, 4.6, -1],
+    ])
+    dU = double_dot_model.get_energy_differences_to_excited_charge_states_batch(
+        N_points, V_v_points, n_diff_charges=2,
+    )
+    assert dU.shape == (3, 10)
+    for ip in range(3):
+        expected = (
+            double_dot_model.get_energy_differences_to_excited_charge_states(
+                N_current=N_points[ip], V_v=V_v_points[ip], n_diff_charges=2,
+            )
+        )
+        assert np.allclose(dU[ip][~np.isnan(dU[ip])], expected)
+
+
+def test_sweep_bias_and_voltage(double_dot_model):
+    voltage_range = (-3, 6)
+    n_steps = (20, 30)
+    line_intensity = 2.0
+    signal, co_tunn = double_dot_model.sweep_bias_and_voltage(
+        2, voltage_range, (-2, 2), n_steps=n_steps,
+        line_intensity=line_intensity,
+    )
+    assert signal.shape == tuple(n_steps)
+    assert co_tunn.shape == tuple(n_steps)
+
+    voltage_x = np.linspace(*voltage_range, n_steps[0])
+    bias_steps = np.linspace(-2, 2, n_steps[1])
+    V_v_points = double_dot_model._get_voltage_grid([2], [voltage_x])
+    N_points = double_dot_model.determine_N_batch(V_v_points)
+    expected = np.zeros(n_steps)
+    for iv, (V_v, N) in enumerate(zip(V_v_points, N_points)):
+        dU = double_dot_model.get_energy_differences_to_excited_charge_states(
+            N_current=N, V_v=V_v, n_diff_charges=1,
+        )
+        for ib, b_val in enumerate(bias_steps):
+            expected[iv, ib] = np.sum(dU <= abs(b_val)) * line_intensity
+    expected = (expected - np.mean(expected))/np.std(expected)
+    assert np.allclose(signal, expected)
+
+    assert double_dot_model.V_v()[2] == voltage_range[1]
+
+
+def test_sweep_voltages(double_dot_model, experiment):
+    run_id = double_dot_model.sweep_voltages(
+        [2, 4],
+        sweep_ranges,
+        n_steps=[20, 20],
+        add_noise=False,
+        normalize=False,
+    )
+    ds = nt.Dataset(run_id, "temp.db", db_folder=double_dot_model.db_folder)
+    signal = ds.data["transport"].values
+    assert signal.shape == (20, 20)
+    assert np.max(signal) > 10 * np.min(signal)
+    assert double_dot_model.V_v()[2] == pytest.approx(sweep_ranges[0][1])
+    assert double_dot_model.V_v()[4] == pytest.approx(sweep_ranges[1][1])
+
+
+def test_save_to_db_write_modes(double_dot_model, experiment):
+    datasets = {}
+    for write_mode in ["numeric", "array"]:
+        run_id = double_dot_model.sweep_voltages(
+            [2, 4],
+            sweep_ranges,
+            n_steps=[20, 10],
+            add_noise=False,
+            write_mode=write_mode,
+        )
+        datasets[write_mode] = nt.Dataset(
+            run_id, "temp.db", db_folder=double_dot_model.db_folder,
+        )
+    numeric, array = datasets["numeric"], datasets["array"]
+    assert array.data["transport"].shape == (20, 10)
+    assert np.allclose(
+        numeric.data["transport"].values, array.data["transport"].values,
+    )
+    for coord in ["voltage_x", "voltage_y"]:
+        assert np.allclose(
+            numeric.data["transport"][coord].values,
+            array.data["transport"][coord].values,
+        )
+    assert array.ml_label == numeric.ml_label == ["doubledot"]
+    assert array.quality == numeric.quality == 1
+
+    with pytest.raises(ValueError):
+        double_dot_model.sweep_voltages(
+            [2, 4], sweep_ranges, n_steps=[5, 5], write_mode="blob",
+        )
+
+
+def test_batched_db_writes(double_dot_model, experiment):
+    with double_dot_model.batched_db_writes():
+        run_ids = [
+            double_dot_model.sweep_voltages(
+                [2, 4], sweep_ranges, n_steps=[10, 10],
+            ),
+            double_dot_model.sweep_voltage(2, sweep_ranges[0], n_steps=10),
+        ]
+    assert run_ids == [1, 2]
+    ds = nt.Dataset(run_ids[1], "temp.db", db_folder=double_dot_model.db_folder)
+    assert ds.data["transport"].shape == (10,)
+    assert ds.ml_label == ["coulomboscillation"]
+    # diagrams are saved as arrays within a batch only
+    qc_ds = load_by_id(run_ids[0])
+    assert qc_ds.paramspecs["dummy_lockin_R"].type == "array"
+    qc_ds.conn.close()
+    run_id = double_dot_model.sweep_voltage(2, sweep_ranges[0], n_steps=10)
+    qc_ds = load_by_id(run_id)
+    assert qc_ds.paramspecs["dummy_lockin_R"].type == "numeric"
+    qc_ds.conn.close()
+
+    with pytest.raises(RuntimeError):
+        with double_dot_model.batched_db_writes():
+            double_dot_model.sweep_voltage(2, sweep_ranges[0], n_steps=10)
+            raise ValueError
+    assert experiment.last_counter == 3
+
+
+def test_operators(double_dot_model):
+    ops = double_dot_model.operators
+    C_cc = np.array(double_dot_model.C_cc())
+    C_cv = np.array(double_dot_model.C_cv())
+
+    assert np.allclose(ops.C_cc, C_cc)
+    assert np.allclose(ops.C_cc_inv, np.linalg.inv(C_cc))
+    assert np.allclose(ops.C_cc_inv_C_cv, np.linalg.inv(C_cc).dot(C_cv))
+    assert np.allclose(ops.C_cc_inv_diag, np.diag(np.linalg.inv(C_cc)))
+    with pytest.raises(ValueError):
+        ops.C_cc_inv[0, 0] = 1
+
+
+def test_operators_invalidation(double_dot_model):
+    ops = double_dot_model.operators
+    double_dot_model.V_v([-1, -1, 1, -1, 1, -1])
+    double_dot_model.N([1, 1])
+    assert double_dot_model.operators is ops
+
+    double_dot_model.set_capacitance("cv", [0, 2], -0.7)
+    new_ops = double_dot_model.operators
+    assert new_ops.version > ops.version
+    assert new_ops.C_cv[0, 2] == -0.7
+    assert new_ops.C_cc[0, 0] == pytest.approx(ops.C_cc[0, 0] + 0.2)
+
+    for set_capacitance in [
+        lambda: double_dot_model.C_cc([[-1.5]]),
+        lambda: double_dot_model.c_l(0.1),
+        lambda: double_dot_model.c_r(0.1),
+    ]:
+        ops = double_dot_model.operators
+        set_capacitance()
+        assert double_dot_model.operators.version > ops.version
+
+    assert np.allclose(
+        double_dot_model.operators.C_cc_inv,
+        np.linalg.inv(np.array(double_dot_model.C_cc())),
+    )
+
+
+def test_get_triplepoints(double_dot_model):
+    N_limits = [(0, 2), (0, 3)]
+    coordinates_etp, coordinates_htp, c_configs = \
+        double_dot_model.get_triplepoints([2, 4], N_limits)
+
+    assert c_configs == double_dot_model.get_charge_configurations(
+        N_limits).tolist()
+    assert coordinates_etp.shape == (12, 2)
+    assert coordinates_htp.shape == (12, 2)
+    assert double_dot_model.N() == [2, 3]
+
+    for x_etp, x_htp, N in zip(coordinates_etp, coordinates_htp, c_configs):
+        expected_etp = sc.optimize.fsolve(
+            double_dot_model.mu_electron_triplepoints, [0, 0], args=([2, 4], N),
+        )
+        expected_htp = sc.optimize.fsolve(
+            double_dot_model.mu_hole_triplepoints, [0, 0], args=([2, 4], N),
+        )
+        assert np.allclose(x_etp, expected_etp)
+        assert np.allclose(x_htp, expected_htp)
+        assert np.allclose(
+            double_dot_model.mu_electron_triplepoints(x_etp, [2, 4], N), 0
+        )
+
+
+def test_calculate_triplepoints(double_dot_model):
+    x_etp, x_htp = double_dot_model.calculate_triplepoints([2, 4], [1, 1])
+    assert x_etp.shape == (2, )
+    assert np.allclose(
+        double_dot_model.mu_hole_triplepoints(x_htp, [2, 4], [1, 1]), 0
+    )
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+sweep_ranges = [(2.83, 8.30), (3.87, 8.48)]
+
+
+def test_ground_states(double_dot_model):
+    regions = double_dot_model.compute_charge_stability_regions(
+        [2, 4], sweep_ranges,
+    )
+    for n_steps in [(20, 30), (101, 101)]:
+        V_v_points = double_dot_model._get_voltage_grid(
+            [2, 4],
+            [np.linspace(*sweep_ranges[0], n_steps[0]),
+             np.linspace(*sweep_ranges[1], n_steps[1])],
+        )
+        expected = double_dot_model.determine_N_batch(V_v_points)
+        assert np.array_equal(regions.ground_states(n_steps), expected)
+
+
+def test_rasterize(double_dot_model):
+    n_steps = (40, 50)
+    regions = double_dot_model.compute_charge_stability_regions(
+        [2, 4], sweep_ranges,
+    )
+    V_v_points = double_dot_model._get_voltage_grid(
+        [2, 4],
+        [np.linspace(*sweep_ranges[0], n_steps[0]),
+         np.linspace(*sweep_ranges[1], n_steps[1])],
+    )
+    expected = double_dot_model.calculate_transport_at_zero_bias_batch(
+        double_dot_model.determine_N_batch(V_v_points),
+        V_v_points,
+        broadening=0.05,
+    ).reshape(n_steps)
+    signal = regions.rasterize(n_steps, broadening=0.05)
+    assert np.allclose(signal, expected)
+
+
+def test_rasterize_tiles(double_dot_model):
+    regions = double_dot_model.compute_charge_stability_regions(
+        [2, 4], sweep_ranges,
+    )
+    voltage_x = np.linspace(*sweep_ranges[0], 60)
+    voltage_y = np.linspace(*sweep_ranges[1], 60)
+    diagram = regions.rasterize((60, 60))
+    tile = regions.rasterize(
+        (30, 20), [(voltage_x[30], voltage_x[59]), (voltage_y[0], voltage_y[19])]
+    )
+    assert np.allclose(tile, diagram[30:, :20])
+
+    with pytest.raises(ValueError):
+        regions.rasterize((10, 10), [(0, 9), sweep_ranges[1]])
+
+
+def test_transition_segments(double_dot_model):
+    regions = double_dot_model.compute_charge_stability_regions(
+        [2, 4], sweep_ranges,
+    )
+    segments = regions.transition_segments()
+    assert len(segments) > 0
+    for idx, other_idx, start, end in segments:
+        assert idx < other_idx
+        for point in [start, end, (start + end) / 2]:
+            V_v = np.array(double_dot_model.V_v())
+            V_v[[2, 4]] = point
+            energies = double_dot_model.compute_energies(
+                regions.N_configs[[idx, other_idx]], V_v,
+            )[0]
+            assert np.isclose(energies[0], energies[1])
+
+
+def test_compute_charge_diagram_analytic(double_dot_model):
+    diagrams = [
+        double_dot_model.compute_charge_diagram(
+            [2, 4], sweep_ranges, n_steps=(30, 30), add_noise=False,
+            method=method,
+        )[0]
+        for method in ["grid", "analytic"]
+    ]
+    assert np.allclose(diagrams[0], diagrams[1])
+
+    with pytest.raises(ValueError):
+        double_dot_model.compute_charge_diagram(
+            [2, 4], sweep_ranges, n_steps=(30, 30), method="unknown",
+        )
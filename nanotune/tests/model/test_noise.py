@@ -0,0 +1,121 @@
+import numpy as np
+import pytest
+from skimage.transform import resize
+
+import nanotune as nt
+from nanotune.data.dataset import get_power_spectrum
+from nanotune.model.noise import (NOISE_TYPES, add_noise,
+                                  add_random_charge_shifts,
+                                  augmented_batches, get_noise_bank,
+                                  shift_charges_batch)
+from nanotune.model.utils import generate_noise_library
+
+N_2D = nt.config["core"]["standard_shapes"]["2"]
+
+
+@pytest.fixture(scope="function")
+def noise_folder(tmp_path):
+    for noise_type in NOISE_TYPES:
+        how_many = 2 if noise_type == "one_over_f" else 20
+        generate_noise_library(
+            noise_type, how_many, folder=str(tmp_path), n_workers=1,
+        )
+    return str(tmp_path)
+
+
+@pytest.fixture(scope="function")
+def signals():
+    rng = np.random.default_rng(0)
+    return rng.uniform(size=(30, np.prod(N_2D))), np.arange(30) % 2
+
+
+def test_get_noise_bank(noise_folder):
+    bank = get_noise_bank("white", folder=noise_folder)
+    assert isinstance(bank, np.memmap)
+    assert bank.shape == (20, np.prod(N_2D))
+    assert get_noise_bank("white", folder=noise_folder) is bank
+
+    generate_noise_library("white", 5, folder=noise_folder, n_workers=1)
+    assert get_noise_bank("white", folder=noise_folder).shape[0] == 5
+
+    with pytest.raises(ValueError):
+        get_noise_bank("pink", folder=noise_folder)
+
+
+def test_augmented_batches(noise_folder, signals):
+    signal, labels = signals
+    kwargs = dict(
+        noise_types=NOISE_TYPES,
+        max_strength=[0.1] * len(NOISE_TYPES),
+        charge_shift_probability=0.5,
+        batch_size=8,
+        n_batches=3,
+        seed=1,
+        folder=noise_folder,
+    )
+    batches = list(augmented_batches(signal, labels, **kwargs))
+    assert len(batches) == 3
+    for batch_signal, batch_frequencies, batch_labels in batches:
+        assert batch_signal.shape == (8, np.prod(N_2D))
+        assert np.all(np.isfinite(batch_signal))
+        assert np.allclose(
+            batch_frequencies[0],
+            get_power_spectrum(batch_signal[0].reshape(N_2D)).ravel(),
+        )
+        assert set(batch_labels) <= {0, 1}
+
+    for batch, expected in zip(
+        augmented_batches(signal, labels, **kwargs), batches,
+    ):
+        assert np.array_equal(batch[0], expected[0])
+
+    batch_signal, _, batch_labels = next(augmented_batches(
+        signal, labels, batch_size=8, seed=1,
+    ))
+    rows = [np.flatnonzero((signal == row).all(axis=1))[0]
+            for row in batch_signal]
+    assert np.array_equal(labels[rows], batch_labels)
+
+    with pytest.raises(ValueError):
+        next(augmented_batches(signal, labels, noise_types=["white"]))
+
+
+def test_shift_charges_batch():
+    rng = np.random.default_rng(0)
+    images = rng.uniform(size=(20, *N_2D))
+    shifted = shift_charges_batch(images, np.random.default_rng(1))
+    assert shifted.shape == images.shape
+
+    # repeat random draws to compare with shifting each image on its own
+    draw_rng = np.random.default_rng(1)
+    min_d = draw_rng.integers(5, 9, (20, 1))[:, 0] // 2
+    n_step = draw_rng.integers(2, N_2D[0], (20, 1))[:, 0]
+    along_rows = draw_rng.integers(2, size=20).astype(bool)
+    for image, expected, d, step, rows in zip(
+        images, shifted, min_d, n_step, along_rows,
+    ):
+        if not rows:
+            image = image.T
+        stretched = np.concatenate(
+            (image[:step], image[step - d:step + d], image[step + d:]),
+        )
+        image = resize(stretched, N_2D)
+        if not rows:
+            image = image.T
+        assert np.allclose(image, expected)
+
+
+def test_add_random_charge_shifts(signals):
+    signal, _ = signals
+    data, freq_data = add_random_charge_shifts(signal, 10, seed=0)
+    assert data.shape == freq_data.shape == signal.shape
+    changed = np.any(data != signal, axis=1)
+    assert np.sum(changed) <= 10
+
+
+def test_add_noise(noise_folder, signals, monkeypatch):
+    monkeypatch.setitem(nt.config, "db_folder", noise_folder)
+    signal, _ = signals
+    noisy_data, noisy_freq = add_noise(signal, ["white", "rnt"], [0.1, 0.1])
+    assert noisy_data.shape == (30, *N_2D, 1)
+    assert noisy_freq.shape == (30, *N_2D, 1)
@@ -0,0 +1,123 @@
+import json
+import os
+from dataclasses import asdict
+
+import numpy as np
+import pytest
+
+import nanotune as nt
+from nanotune.classification.classifier import Classifier
+from nanotune.data.export_data import export_label
+from nanotune.model.synthetic_data import (CHECKPOINT_SUFFIX,
+                                           DiagramDistribution,
+                                           _write_checkpoint,
+                                           generate_diagrams)
+
+
+@pytest.fixture(scope="function")
+def distribution():
+    voltage_nodes = {
+        0: "top_barrier",
+        1: "left_barrier",
+        2: "left_plunger",
+        3: "central_barrier",
+        4: "right_plunger",
+        5: "right_barrier",
+    }
+    C_cv = np.array([
+        [-0.6, -0.6, -0.5, -0.5, -0.1, -0.1],
+        [-0.5, -0.3, -0.2, -0.8, -0.5, -0.9],
+    ])
+    return DiagramDistribution(
+        charge_nodes={0: "A", 1: "B"},
+        voltage_nodes=voltage_nodes,
+        voltage_node_idx=[2, 4],
+        V_v=[-1, -1, -0.5, -1, -0.1, -1],
+        C_cv_limits=((1.1 * C_cv).tolist(), (0.9 * C_cv).tolist()),
+        C_cc_off_diags_limits=([[-2.2]], [[-1.8]]),
+        voltage_ranges=[(2.83, 6.30), (3.87, 6.48)],
+        n_steps=[20, 20],
+        snr_db_limits=(5, 20),
+        charge_jump_probability=0.5,
+    )
+
+
+def test_generate_diagrams(distribution, tmp_path):
+    path = generate_diagrams(
+        distribution, 5, "synthetic", folder=str(tmp_path), n_workers=1,
+        chunk_size=2,
+    )
+    assert path == os.path.join(str(tmp_path), "synthetic.npy")
+    assert not os.path.exists(path + CHECKPOINT_SUFFIX)
+
+    data = np.load(path)
+    data_types = nt.config["core"]["data_types"]
+    len_2d = np.prod(nt.config["core"]["standard_shapes"]["2"]) + 1
+    assert data.shape == (len(data_types), 5, len_2d)
+
+    label = export_label(["doubledot"], 1, "dotregime")
+    assert np.all(data[:, :, -1] == label)
+    signal = data[data_types["signal"], :, :-1]
+    assert np.all(np.max(signal, axis=1) <= 1)
+    assert np.all(np.std(signal, axis=1) > 0)
+    assert len(np.unique(signal, axis=0)) == 5
+    features = data[data_types["features"], :, :-1]
+    assert np.all(features == nt.config["core"]["fill_value"])
+
+    clf = Classifier(["synthetic.npy"], "dotregime", folder_path=str(tmp_path))
+    assert clf.original_data.shape == (5, 2 * (len_2d - 1))
+
+
+def test_generate_diagrams_deterministic(distribution, tmp_path):
+    np.random.seed(1)
+    global_state = np.random.get_state()[1].copy()
+    path_sequential = generate_diagrams(
+        distribution, 4, "sequential", folder=str(tmp_path), seed=3,
+        n_workers=1, chunk_size=3,
+    )
+    # the caller's global random state is left untouched
+    assert np.array_equal(np.random.get_state()[1], global_state)
+    path_parallel = generate_diagrams(
+        distribution, 4, "parallel", folder=str(tmp_path), seed=3,
+        n_workers=2, chunk_size=1,
+    )
+    path_other_seed = generate_diagrams(
+        distribution, 4, "other_seed", folder=str(tmp_path), seed=4,
+        n_workers=1, chunk_size=3,
+    )
+    sequential = np.load(path_sequential)
+    assert np.array_equal(sequential, np.load(path_parallel))
+    assert not np.array_equal(sequential, np.load(path_other_seed))
+
+
+def test_generate_diagrams_resume(distribution, tmp_path):
+    path = generate_diagrams(
+        distribution, 4, "full", folder=str(tmp_path), n_workers=1,
+        chunk_size=2,
+    )
+    full = np.load(path)
+
+    partial = np.zeros_like(full)
+    partial[:, :2] = full[:, :2]
+    partial_path = os.path.join(str(tmp_path), "partial.npy")
+    np.save(partial_path, partial)
+    checkpoint = {
+        "n_diagrams": 4,
+        "seed": 0,
+        "chunk_size": 2,
+        "distribution": json.loads(json.dumps(asdict(distribution))),
+    }
+    _write_checkpoint(partial_path + CHECKPOINT_SUFFIX, checkpoint, {0})
+
+    with pytest.raises(ValueError):
+        generate_diagrams(
+            distribution, 4, "partial", folder=str(tmp_path), seed=1,
+            n_workers=1, chunk_size=2,
+        )
+
+    generate_diagrams(
+        distribution, 4, "partial", folder=str(tmp_path), n_workers=1,
+        chunk_size=2,
+    )
+    assert np.array_equal(np.load(partial_path), full)
+    assert not os.path.exists(partial_path + CHECKPOINT_SUFFIX)
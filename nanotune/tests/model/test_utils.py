@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+import nanotune as nt
+from nanotune.model.noise import DEFAULT_FILES, NOISE_TYPES, load_noise
+from nanotune.model.utils import (generate_noise_library,
+                                  generate_random_blobs,
+                                  generate_random_telegraph_noise,
+                                  generate_white_noise)
+
+N_2D = nt.config["core"]["standard_shapes"]["2"]
+
+
+@pytest.mark.parametrize("noise_type", NOISE_TYPES)
+def test_generate_noise_library(noise_type, tmp_path):
+    how_many = 2 if noise_type == "one_over_f" else 7
+    path = generate_noise_library(
+        noise_type, how_many, folder=str(tmp_path), n_workers=1, batch_size=3,
+    )
+    assert path == str(tmp_path / DEFAULT_FILES[noise_type])
+    noise = np.load(path)
+    assert noise.shape == (3, how_many, np.prod(N_2D))
+    assert np.all(np.isfinite(noise))
+    signal = noise[nt.config["core"]["data_types"]["signal"]]
+    assert not np.allclose(signal[0], signal[1])
+
+    loaded = load_noise([noise_type], 4, folder=str(tmp_path))
+    assert loaded[noise_type].shape == (2, 4, *N_2D)
+
+
+def test_generate_noise_library_workers(tmp_path):
+    paths = [
+        generate_noise_library(
+            "random_blobs", 10, filename=f"blobs_{n_workers}",
+            folder=str(tmp_path), seed=3, n_workers=n_workers, batch_size=4,
+            n_blobs=3,
+        )
+        for n_workers in [1, 2]
+    ]
+    assert np.array_equal(np.load(paths[0]), np.load(paths[1]))
+
+    with pytest.raises(ValueError):
+        generate_noise_library("pink", 10, folder=str(tmp_path))
+
+
+def test_generate_noise_seed():
+    for generate in [
+        generate_white_noise,
+        generate_random_telegraph_noise,
+        generate_random_blobs,
+    ]:
+        noise = generate(300, save_to_file=False, seed=1)
+        assert noise.shape == (3, 300, np.prod(N_2D))
+        assert np.array_equal(
+            noise, generate(300, save_to_file=False, seed=1),
+        )
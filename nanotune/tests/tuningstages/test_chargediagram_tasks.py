@@ -3,7 +3,12 @@
 # This software is released under the MIT License.
 # https://opensource.org/licenses/MIT
 
+import os
+
+import numpy as np
 import pytest
+from nanotune.classification.classifier import (condense_segments,
+                                               load_condensed_data)
 from nanotune.tuningstages.chargediagram_tasks import *
 from nanotune.fit.dotfit import DotFit
 from nanotune.tests.mock_classifier import MockClassifer
@@ -51,3 +56,143 @@ def test_classify_dot_segments(db_dot_tuning, tmp_path):
         db_folder=tmp_path,
     )
     assert sorted(list(clf_result.keys())) == [1, 2, 3, 4]
+
+
+def test_segment_and_classify_dot_data(nt_dataset_doubledot, tmp_path):
+    # the test dataset only holds triple point features, used for doubledot
+    classifiers=Classifiers(
+        singledot=MockClassifer('doubledot'),
+        doubledot=MockClassifer('doubledot'),
+        dotregime=MockClassifer('doubledot'),
+    )
+    dot_segments, clf_result = segment_and_classify_dot_data(
+        classifiers,
+        1,
+        'temp.db',
+        db_folder=str(tmp_path),
+        segment_size=0.05,
+    )
+    assert not os.path.isfile(os.path.join(tmp_path, 'segmented_temp.db'))
+    assert sorted(dot_segments.keys()) == [0, 1, 2, 3]
+    assert sorted(clf_result.keys()) == [0, 1, 2, 3]
+    assert dot_segments[0]["voltage_ranges"] == [
+        (-0.2, -0.15125), (-0.3, -0.252)]
+    assert clf_result[0] == {
+        'singledot': True, 'doubledot': True, 'dotregime': True}
+
+    df = DotFit(1, 'temp.db', db_folder=str(tmp_path), segment_size=0.05)
+    seg_info = df.save_segmented_data_return_info(
+        'segmented_temp.db', segment_db_folder=str(tmp_path))
+    assert [seg_info[r_id]["voltage_ranges"] for r_id in sorted(seg_info)] == [
+        dot_segments[idx]["voltage_ranges"] for idx in sorted(dot_segments)]
+
+    categories = ['doubledot']
+    loaded_data = load_condensed_data(
+        sorted(seg_info.keys()),
+        'segmented_temp.db',
+        categories,
+        db_folder=str(tmp_path),
+    )
+    segments = df.get_segments()
+    condensed_data = condense_segments(
+        [segment['transport'].values for segment in segments],
+        categories,
+        features=df.nt_metadata.get('features', {}),
+    )
+    for category in categories:
+        assert np.allclose(
+            condensed_data[category], loaded_data[category], equal_nan=True)
+
+
+
+def test_dot_classifier_cascade_gate(nt_dataset_doubledot, tmp_path):
+    classifiers=Classifiers(
+        singledot=MockClassifer('doubledot'),
+        doubledot=MockClassifer('doubledot'),
+        dotregime=MockClassifer('doubledot', probability=0.95),
+    )
+    cascade = DotClassifierCascade(confidence_threshold=0.9)
+    _, clf_result = segment_and_classify_dot_data(
+        classifiers,
+        1,
+        'temp.db',
+        db_folder=str(tmp_path),
+        segment_size=0.05,
+        cascade=cascade,
+    )
+    assert sorted(clf_result.keys()) == [0, 1, 2, 3]
+    for outcome in clf_result.values():
+        assert outcome == {
+            'singledot': False, 'doubledot': True, 'dotregime': True}
+        assert determine_dot_regime(outcome) == DOT_LABEL_MAPPING['doubledot'][1]
+    assert cascade.last_stage_counts == {
+        'signal_threshold': 0, 'gate': 4, 'all_classifiers': 0}
+    assert cascade.classifier_calls == {
+        'singledot': 0, 'doubledot': 4, 'dotregime': 4}
+    assert cascade.hit_rates['gate'] == 1
+
+    classifiers.dotregime.probability = 0.6
+    _, clf_result = segment_and_classify_dot_data(
+        classifiers,
+        1,
+        'temp.db',
+        db_folder=str(tmp_path),
+        segment_size=0.05,
+        cascade=cascade,
+    )
+    assert clf_result[0] == {
+        'singledot': True, 'doubledot': True, 'dotregime': True}
+    assert cascade.last_stage_counts == {
+        'signal_threshold': 0, 'gate': 0, 'all_classifiers': 4}
+    assert cascade.stage_counts == {
+        'signal_threshold': 0, 'gate': 4, 'all_classifiers': 4}
+    assert cascade.hit_rates == {
+        'signal_threshold': 0, 'gate': 0.5, 'all_classifiers': 0.5}
+
+
+def test_dot_classifier_cascade_quality_gate(nt_dataset_doubledot, tmp_path):
+    classifiers=Classifiers(
+        singledot=MockClassifer('doubledot'),
+        doubledot=MockClassifer('doubledot', probability=0.99),
+        dotregime=MockClassifer('doubledot'),
+    )
+    cascade = DotClassifierCascade(gate_classifier='doubledot')
+    _, clf_result = segment_and_classify_dot_data(
+        classifiers, 1, 'temp.db', db_folder=str(tmp_path), cascade=cascade,
+    )
+    assert clf_result[0] == {
+        'singledot': False, 'doubledot': True, 'dotregime': True}
+    assert cascade.classifier_calls == {
+        'singledot': 0, 'doubledot': 4, 'dotregime': 0}
+
+    cascade.reset_statistics()
+    classifiers.doubledot.probability = 0.01
+    _, clf_result = segment_and_classify_dot_data(
+        classifiers, 1, 'temp.db', db_folder=str(tmp_path), cascade=cascade,
+    )
+    assert clf_result[0] == {
+        'singledot': True, 'doubledot': False, 'dotregime': True}
+    assert cascade.classifier_calls == {
+        'singledot': 4, 'doubledot': 4, 'dotregime': 4}
+    assert cascade.stage_counts['all_classifiers'] == 4
+
+
+def test_dot_classifier_cascade_signal_threshold(nt_dataset_doubledot, tmp_path):
+    classifiers=Classifiers(
+        singledot=MockClassifer('doubledot'),
+        doubledot=MockClassifer('doubledot'),
+        dotregime=MockClassifer('doubledot'),
+    )
+    cascade = DotClassifierCascade(noise_floor=2)
+    _, clf_result = segment_and_classify_dot_data(
+        classifiers, 1, 'temp.db', db_folder=str(tmp_path), cascade=cascade,
+    )
+    assert clf_result[0] == {
+        'singledot': False, 'doubledot': False, 'dotregime': False}
+    assert cascade.last_stage_counts['signal_threshold'] == 4
+    assert sum(cascade.classifier_calls.values()) == 0
+
+    with pytest.raises(ValueError):
+        DotClassifierCascade(gate_classifier='pinchoff')
+    with pytest.raises(ValueError):
+        DotClassifierCascade(confidence_threshold=0.3)
@@ -20,9 +20,13 @@ def test_data_settings_attributes(tmp_path):
         'experiment_id',
         'noise_floor',
         'normalization_constants',
+        'save_segments',
+        'segment_cascade',
+        'segment_confidence_threshold',
         'segment_db_folder',
         'segment_db_name',
         'segment_experiment_id',
+        'segment_gate_classifier',
         'segment_size']
     )
     settings = DataSettings()
@@ -34,6 +38,10 @@ def test_data_settings_attributes(tmp_path):
     assert settings.segment_db_folder == settings.db_folder
     assert settings.segment_experiment_id is None
     assert settings.segment_size == 0.05
+    assert not settings.save_segments
+    assert not settings.segment_cascade
+    assert settings.segment_gate_classifier == 'dotregime'
+    assert settings.segment_confidence_threshold == 0.9
 
     settings.update({'normalization_constants':
         {'transport': (0.1, 1.1), 'sensing': (0, 1), 'rf': (0, 1 )}
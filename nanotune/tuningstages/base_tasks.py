@@ -23,6 +23,7 @@ from qcodes.instrument.parameter import _BaseParameter
 
 import nanotune as nt
 from nanotune.classification.classifier import Classifier
+from nanotune.data.dataset_cache import dataset_cache
 from nanotune.device_tuner.tuningresult import TuningResult
 from nanotune.device.device import NormalizationConstants, Readout
 from nanotune.fit.datafit import DataFit
@@ -59,6 +60,7 @@ def save_machine_learning_result(
             result_type = "predicted_" + result_type
         nt_meta[result_type] = result_value
     ds.add_metadata(meta_tag, json.dumps(nt_meta))
+    dataset_cache.update_metadata(ds)
 
 
 def check_measurement_quality(
@@ -103,12 +105,12 @@ def save_extracted_features(
         db_folder: Path to folder containing database db_name.
     """
 
-    fit = fit_class(
+    fit = dataset_cache.load(
+        fit_class,
         run_id,
         db_name,
         db_folder=db_folder,
     )
-    fit.find_fit()
     fit.save_features()
 
 
@@ -130,12 +132,12 @@ def get_extracted_features(
         dict: Extracted features.
     """
 
-    fit = fit_class(
+    fit = dataset_cache.load(
+        fit_class,
         run_id,
         db_name,
         db_folder=db_folder,
     )
-    fit.find_fit()
     return fit.features
 
 
@@ -156,7 +158,7 @@ def get_measurement_features(
         dict: Features
     """
 
-    ds = nt.Dataset(run_id, db_name, db_folder=db_folder)
+    ds = dataset_cache.load(nt.Dataset, run_id, db_name, db_folder=db_folder)
     return ds.features
 
 
@@ -345,6 +347,7 @@ def save_metadata(
     metadata = json.loads(ds.get_metadata(meta_tag))
     metadata.update(meta_dict)
     ds.add_metadata(meta_tag, json.dumps(metadata, cls=NumpyJSONEncoder))
+    dataset_cache.update_metadata(ds)
 
 
 def get_elapsed_time(
@@ -392,7 +395,7 @@ def plot_fit(
         db_folder: Path to folder containing database db_name.
     """
 
-    data_fit = fit_class(run_id, db_name, db_folder=db_folder)
+    data_fit = dataset_cache.load(fit_class, run_id, db_name, db_folder=db_folder)
     data_fit.plot_fit()
     plt.show()
 
@@ -750,7 +753,8 @@ def get_fit_range_update_directives(
             the gates swept need to be changed.
     """
 
-    fit = fit_class(
+    fit = dataset_cache.load(
+        fit_class,
         run_id,
         db_name,
         db_folder=db_folder,
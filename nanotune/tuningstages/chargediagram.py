@@ -14,13 +14,14 @@ from nanotune.tuningstages.settings import (DataSettings, SetpointSettings,
 from .base_tasks import (  # please update docstrings if import path changes
     conclude_iteration_with_range_update,
     get_extracted_features, get_fit_range_update_directives)
-from .chargediagram_tasks import (classify_dot_segments,
+from .chargediagram_tasks import (DotClassifierCascade,
                                   conclude_dot_classification,
                                   determine_dot_regime,
                                   get_dot_segment_regimes,
                                   get_new_chargediagram_ranges,
                                   get_range_directives_chargediagram,
-                                  segment_dot_data, translate_dot_regime,
+                                  segment_and_classify_dot_data,
+                                  translate_dot_regime,
                                   verify_dot_classification)
 
 RangeChangeSettingsDict = TypedDict(
@@ -67,6 +68,9 @@ class ChargeDiagram(TuningStage):
             their quality.
         fit_class: Returns the class used to perform data fitting, i.e.
             nanotune.fit.dotfit.Dotfit.
+        dot_cascade: Classifier cascade applied to dot segments if
+            `data_settings.segment_cascade` is set, None otherwise. Holds the
+            number of segments resolved by each stage.
 
     """
 
@@ -120,6 +124,14 @@ class ChargeDiagram(TuningStage):
         self.range_change_settings = default_range_change_settings
         self.target_regime = target_regime
         self.classifiers = classifiers
+        self.dot_cascade: Optional[DotClassifierCascade] = None
+        if data_settings.segment_cascade:
+            self.dot_cascade = DotClassifierCascade(
+                gate_classifier=data_settings.segment_gate_classifier,
+                confidence_threshold=data_settings.segment_confidence_threshold,
+                noise_floor=data_settings.noise_floor,
+                dot_signal_threshold=data_settings.dot_signal_threshold,
+            )
 
     @property
     def fit_class(self):
@@ -203,7 +215,12 @@ class ChargeDiagram(TuningStage):
         run_id: int,
     ) -> Dict[str, Any]:
         """Divides original measurement into segments, which are classified
-        seperately. The overall outcome, i.e. regime and quality, are
+        seperately and in memory. Segments are saved to the segment database
+        in the background only if `data_settings.save_segments` is set. If
+        `data_settings.segment_cascade` is set, segments are classified by
+        `self.dot_cascade`, skipping classifiers not needed to determine their
+        regime, and the number of segments resolved by each cascade stage is
+        added under 'cascade_stage_counts'. The overall outcome, i.e. regime and quality, are
         determined using ``conclude_dot_classification`` defined in
         .chargediagram_tasks. If the desired regime is not found, the overall
         regime is the most frequent one in the dot segments.
@@ -217,31 +234,35 @@ class ChargeDiagram(TuningStage):
                 and 'quality'.
         """
 
-        dot_segments = segment_dot_data(
+        segment_db_name = None
+        if self.data_settings.save_segments:
+            segment_db_name = self.data_settings.segment_db_name
+
+        dot_segments, classification_outcome = segment_and_classify_dot_data(
+            self.classifiers,
             run_id,
             self.data_settings.db_name,
             self.data_settings.db_folder,
-            self.data_settings.segment_db_name,
-            self.data_settings.segment_db_folder,
-            self.data_settings.segment_size,
-        )
-
-        classification_outcome = classify_dot_segments(
-            self.classifiers,
-            [run_id for run_id in dot_segments.keys()],
-            self.data_settings.segment_db_name,
-            self.data_settings.segment_db_folder,
+            segment_size=self.data_settings.segment_size,
+            segment_db_name=segment_db_name,
+            segment_db_folder=self.data_settings.segment_db_folder,
+            cascade=self.dot_cascade,
         )
         segment_regimes = get_dot_segment_regimes(
             classification_outcome,
             determine_dot_regime,
         )
 
-        for r_id in dot_segments.keys():
-            dot_segments[r_id]["predicted_regime"] = segment_regimes[r_id]
+        for segment_idx in dot_segments.keys():
+            dot_segments[segment_idx]["predicted_regime"] = segment_regimes[
+                segment_idx]
 
         ml_result: Dict[str, Any] = {}
         ml_result["dot_segments"] = dot_segments
+        if self.dot_cascade is not None:
+            ml_result["cascade_stage_counts"] = dict(
+                self.dot_cascade.last_stage_counts
+            )
 
         ml_result["regime"], ml_result["quality"] = conclude_dot_classification(
             self.target_regime,
@@ -6,9 +6,13 @@ import copy
 import logging
 from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
 
+import numpy as np
+import numpy.typing as npt
 from typing_extensions import TypedDict
 
 import nanotune as nt
+from nanotune.classification.classifier import (condense_segments,
+                                               load_condensed_data)
 from nanotune.fit.dotfit import DotFit
 from nanotune.tuningstages.settings import Classifiers
 
@@ -22,6 +26,8 @@ DotClassifierOutcome = TypedDict(
 )
 logger = logging.getLogger(__name__)
 DOT_LABEL_MAPPING = dict(nt.config["core"]["dot_mapping"])
+DOT_CLF_TYPES = ['singledot', 'doubledot', 'dotregime']
+CASCADE_STAGES = ['signal_threshold', 'gate', 'all_classifiers']
 
 
 def segment_dot_data(
@@ -95,22 +101,298 @@ def classify_dot_segments(
         db_folder = nt.config["db_folder"]
 
     with nt.switch_database(db_name, db_folder):
-        clf_result: Dict[int, Dict[str, Union[bool, int]]] = {}
-        for data_id in run_ids:
-            clf_result[data_id] = {}
-            for clf_type in ['singledot', 'doubledot', 'dotregime']:
-                classifier = getattr(classifiers, clf_type)
-                clf_result[data_id][clf_type] = any(
-                    classifier.predict(
-                        data_id,
-                        db_name,
-                        db_folder=db_folder,
-                    )
-                )
+        # load and prepare each segment only once for all classifiers
+        condensed_data = load_condensed_data(
+            run_ids,
+            db_name,
+            _get_dot_categories(classifiers),
+            db_folder=db_folder,
+        )
+        clf_result = _predict_dot_segments(classifiers, condensed_data, run_ids)
 
     return clf_result
 
 
+def segment_and_classify_dot_data(
+    classifiers: Classifiers,
+    run_id: int,
+    db_name: str,
+    db_folder: Optional[str] = None,
+    segment_size: float = 0.05,
+    segment_db_name: Optional[str] = None,
+    segment_db_folder: Optional[str] = None,
+    cascade: Optional["DotClassifierCascade"] = None,
+) -> Tuple[Dict[int, Any], Dict[int, Dict[str, Union[bool, int]]]]:
+    """Divides a 2D measurement into segments of segment_size x segment_size
+    in Volt and classifies them in memory. Segments are views of the
+    normalized measurement, which are neither saved nor reloaded. Their
+    classification equals the one of `classify_dot_segments` applied to
+    segments saved by `segment_dot_data`.
+
+    Args:
+        classifiers: Pre-trained classifiers predicting single and double dot
+            quality and dotregime.
+        run_id: QCoDeS data run ID.
+        db_name: Name of database containg dataset.
+        db_folder: Path to folder containing db_name.
+        segment_size: Voltage interval the segments should span in each
+            dimension.
+        segment_db_name: Name of database where data segments should be saved
+            for provenance. Segments are saved in a background thread if
+            specified, and not saved at all if not.
+        segment_db_folder: Path to folder containing segment_db_name.
+        cascade: Classifier cascade deciding which classifiers to apply to
+            which segment. All classifiers are applied to all segments if
+            None.
+
+    Returns:
+        dict: Dictionary mapping segment indices to the voltages ranges they
+            span: dot_segments = {<segment_idx>: {voltage_ranges: [(), ()]}}.
+        dict: Mapping segment indices onto a dict holding the respective
+            classification result of all classifiers passed, as returned by
+            `classify_dot_segments`.
+    """
+    fit = DotFit(
+        run_id,
+        db_name,
+        db_folder=db_folder,
+        segment_size=segment_size,
+    )
+    if segment_db_name is not None:
+        fit.save_segmented_data_async(segment_db_name, segment_db_folder)
+
+    segments = fit.get_segments()
+    dot_segments = fit.get_segments_info(segments)
+
+    readout_method = 'transport'
+    signals = [segment[readout_method].values for segment in segments]
+    features = fit.nt_metadata.get("features", {})
+    if cascade is not None:
+        results = cascade.classify(
+            classifiers,
+            signals,
+            features=features,
+            readout_method_to_use=readout_method,
+        )
+        return dot_segments, dict(zip(dot_segments.keys(), results))
+
+    condensed_data = condense_segments(
+        signals,
+        _get_dot_categories(classifiers),
+        features=features,
+        readout_method_to_use=readout_method,
+    )
+    clf_result = _predict_dot_segments(
+        classifiers, condensed_data, list(dot_segments.keys())
+    )
+
+    return dot_segments, clf_result
+
+
+def _get_dot_categories(classifiers: Classifiers) -> List[str]:
+    """Returns the data categories of all dot classifiers."""
+    return list({getattr(classifiers, t).category for t in DOT_CLF_TYPES})
+
+
+def _predict_dot_segments(
+    classifiers: Classifiers,
+    condensed_data: Dict[str, Any],
+    data_ids: Sequence[int],
+) -> Dict[int, Dict[str, Union[bool, int]]]:
+    """Applies all dot classifiers to condensed data of several segments,
+    whose order is given by data_ids."""
+    predictions = {}
+    for clf_type in DOT_CLF_TYPES:
+        classifier = getattr(classifiers, clf_type)
+        predictions[clf_type] = classifier.predict_condensed_data(
+            condensed_data[classifier.category]
+        )
+
+    clf_result: Dict[int, Dict[str, Union[bool, int]]] = {}
+    for idx, data_id in enumerate(data_ids):
+        clf_result[data_id] = {
+            clf_type: bool(predictions[clf_type][idx])
+            for clf_type in DOT_CLF_TYPES
+        }
+
+    return clf_result
+
+
+class DotClassifierCascade:
+    """Classifies dot segments in stages of increasing cost, running further
+    classifiers only on segments whose outcome is still ambiguous:
+
+    1. Signal thresholds: segments whose signal stays below `noise_floor`
+       (pinched off) or above `dot_signal_threshold` (open current) contain
+       no dots and are classified as such without any classifier.
+    2. Gate classifier: its predicted probability is used if it is at least
+       `confidence_threshold` or at most one minus it. A confident dot regime
+       leaves only the quality classifier of that regime to run, a confident
+       good single or double dot quality resolves a segment by itself.
+    3. All remaining classifiers run on segments not resolved before.
+
+    Outcomes are returned in the format of `classify_dot_segments`, skipped
+    classifiers taking values consistent with the decision made, so that
+    `determine_dot_regime` can be applied as usual.
+
+    Attributes:
+        gate_classifier: dot classifier type, e.g. 'dotregime', whose
+            probabilities decide whether other classifiers are needed.
+        confidence_threshold: minimum probability of either outcome of the
+            gate classifier to be accepted.
+        noise_floor: maximum normalized signal of a segment considered
+            pinched off. Not checked if None.
+        dot_signal_threshold: minimum normalized signal of a segment
+            considered open. Not checked if None.
+        stage_counts: number of segments resolved by each stage in
+            `CASCADE_STAGES`, summed over all classified segments.
+        last_stage_counts: number of segments resolved by each stage in the
+            last call of `classify`.
+        classifier_calls: number of segments passed to each classifier.
+    """
+    def __init__(
+        self,
+        gate_classifier: str = "dotregime",
+        confidence_threshold: float = 0.9,
+        noise_floor: Optional[float] = None,
+        dot_signal_threshold: Optional[float] = None,
+    ) -> None:
+        if gate_classifier not in DOT_CLF_TYPES:
+            logger.error(f"Gate classifier must be one of {DOT_CLF_TYPES}.")
+            raise ValueError
+        if not 0.5 <= confidence_threshold <= 1:
+            logger.error("Confidence threshold must be between 0.5 and 1.")
+            raise ValueError
+
+        self.gate_classifier = gate_classifier
+        self.confidence_threshold = confidence_threshold
+        self.noise_floor = noise_floor
+        self.dot_signal_threshold = dot_signal_threshold
+        self.stage_counts = dict.fromkeys(CASCADE_STAGES, 0)
+        self.last_stage_counts = dict.fromkeys(CASCADE_STAGES, 0)
+        self.classifier_calls = dict.fromkeys(DOT_CLF_TYPES, 0)
+
+    @property
+    def hit_rates(self) -> Dict[str, float]:
+        """Fraction of all segments classified so far resolved by each
+        stage."""
+        n_segments = sum(self.stage_counts.values())
+        return {
+            stage: count / n_segments if n_segments else 0.0
+            for stage, count in self.stage_counts.items()
+        }
+
+    def reset_statistics(self) -> None:
+        """Resets stage counts and classifier calls."""
+        self.stage_counts = dict.fromkeys(CASCADE_STAGES, 0)
+        self.last_stage_counts = dict.fromkeys(CASCADE_STAGES, 0)
+        self.classifier_calls = dict.fromkeys(DOT_CLF_TYPES, 0)
+
+    def classify(
+        self,
+        classifiers: Classifiers,
+        signals: Sequence[npt.NDArray[np.float64]],
+        features: Optional[Dict[str, Any]] = None,
+        readout_method_to_use: str = 'transport',
+    ) -> List[Dict[str, Union[bool, int]]]:
+        """Classifies normalized signals of dot segments.
+
+        Args:
+            classifiers: Pre-trained classifiers predicting single and double
+                dot quality and dotregime.
+            signals: normalized signals of segments.
+            features: extracted features of the data the segments belong to,
+                see `condense_segments`.
+            readout_method_to_use: readout method the signals belong to.
+
+        Returns:
+            list: classification result of each segment, mapping each dot
+                classifier type onto its (implied) outcome.
+        """
+        results: List[Dict[str, Union[bool, int]]] = [
+            dict.fromkeys(DOT_CLF_TYPES, False) for _ in signals
+        ]
+        stage_counts = dict.fromkeys(CASCADE_STAGES, 0)
+        condensed_data: Dict[str, Dict[int, npt.NDArray[np.float64]]] = {}
+
+        def run(
+            clf_type: str,
+            idxs: List[int],
+            proba: bool = False,
+        ) -> npt.NDArray[np.float64]:
+            classifier = getattr(classifiers, clf_type)
+            category_data = condensed_data.setdefault(classifier.category, {})
+            missing = [idx for idx in idxs if idx not in category_data]
+            if missing:
+                new_data = condense_segments(
+                    [signals[idx] for idx in missing],
+                    [classifier.category],
+                    features=features,
+                    readout_method_to_use=readout_method_to_use,
+                )[classifier.category]
+                for col, idx in enumerate(missing):
+                    category_data[idx] = new_data[:, col:col + 1]
+            data = np.concatenate([category_data[idx] for idx in idxs], axis=1)
+            self.classifier_calls[clf_type] += len(idxs)
+            if proba:
+                return classifier.predict_proba_condensed_data(data)
+            return classifier.predict_condensed_data(data)
+
+        pending = []
+        for idx, signal in enumerate(signals):
+            pinched_off = (
+                self.noise_floor is not None
+                and np.max(signal) < self.noise_floor
+            )
+            open_current = (
+                self.dot_signal_threshold is not None
+                and np.min(signal) > self.dot_signal_threshold
+            )
+            if pinched_off or open_current:
+                stage_counts["signal_threshold"] += 1
+            else:
+                pending.append(idx)
+
+        remaining = {idx: list(DOT_CLF_TYPES) for idx in pending}
+        if pending:
+            gate = self.gate_classifier
+            probabilities = run(gate, pending, proba=True)
+            for idx, probability in zip(pending, probabilities):
+                remaining[idx].remove(gate)
+                outcome = bool(probability >= 0.5)
+                results[idx][gate] = outcome
+                if max(probability, 1 - probability) < self.confidence_threshold:
+                    continue
+                if gate == "dotregime":
+                    # only the quality of the predicted regime is needed
+                    quality = "doubledot" if outcome else "singledot"
+                    remaining[idx] = [quality]
+                elif outcome:
+                    # a good dot, whose regime is given by the gate
+                    results[idx]["dotregime"] = gate == "doubledot"
+                    remaining[idx] = []
+
+        for clf_type in DOT_CLF_TYPES:
+            idxs = [idx for idx in pending if clf_type in remaining[idx]]
+            if not idxs:
+                continue
+            predictions = run(clf_type, idxs)
+            for idx, prediction in zip(idxs, predictions):
+                results[idx][clf_type] = bool(prediction)
+
+        for idx in pending:
+            if len(remaining[idx]) < len(DOT_CLF_TYPES) - 1:
+                stage_counts["gate"] += 1
+            else:
+                stage_counts["all_classifiers"] += 1
+
+        self.last_stage_counts = stage_counts
+        for stage, count in stage_counts.items():
+            self.stage_counts[stage] += count
+
+        return results
+
+
 def get_dot_segment_regimes(
     dot_segments_classification_result: Dict[int, Dict[str, int]],
     determine_regime: Callable[[Dict[str, Union[bool, int]]], int],
@@ -122,13 +404,14 @@ def get_dot_segment_regimes(
 
     Args:
         dot_segments_classification_result: Classification predictions of
-            datasets. Each run_id maps onto a dictionary holding multiple
-            prediction outcomes.
+            datasets. Each run ID or segment index maps onto a dictionary
+            holding multiple prediction outcomes.
         determine_regime: Function merging several classification outcomes into
             a single regime indicator.
 
     Returns:
-        dict: Mapping run_ids on a single regime indicator.
+        dict: Mapping run IDs or segment indices on a single regime
+            indicator.
     """
 
     segment_regimes = {}
@@ -242,8 +525,8 @@ def conclude_dot_classification(
 
     Args:
         target_charge_state: Target charge state
-        dot_segments: Dictionary mapping run_ids of dot segments onto their
-            predicted regime.
+        dot_segments: Dictionary mapping run IDs or indices of dot segments
+            onto their predicted regime.
         verify_classification_outcome: Function checking whether the target
             regime has been found.
         interpret_single_outcome: Interprets the classification result (int) to
@@ -63,6 +63,17 @@ class DataSettings(Settings):
             belongs, optional.
         segment_size (float): voltage range/span of each dot segment, classified
             independently.
+        save_segments (bool): whether dot segments, which are classified in
+            memory, are also saved to `segment_db_name` for provenance. Segments
+            are saved in the background.
+        segment_cascade (bool): whether dot segments are classified by a
+            confidence-gated classifier cascade, running further classifiers
+            only on segments not resolved by signal thresholds or by the gate
+            classifier.
+        segment_gate_classifier (str): dot classifier type, e.g. 'dotregime',
+            gating the cascade.
+        segment_confidence_threshold (float): minimum probability of either
+            outcome of the gate classifier to be accepted by the cascade.
         noise_floor (float): threshold below which a measured signal is
             considered noise. Compared to normalized measurements.
         dot_signal_threshold (float): threshold below which a measured signal is
@@ -77,6 +88,10 @@ class DataSettings(Settings):
     segment_db_folder: str = nt.config['db_folder']
     segment_experiment_id: Optional[int] = None
     segment_size: float = 0.05
+    save_segments: bool = False
+    segment_cascade: bool = False
+    segment_gate_classifier: str = 'dotregime'
+    segment_confidence_threshold: float = 0.9
     noise_floor: float = 0.02
     dot_signal_threshold: float = 0.1
 
@@ -20,6 +20,17 @@ def get_path(filename: str) -> str:
     return os.path.join(nt.config["db_folder"], filename)
 
 
+def save_json_atomically(content: Dict[str, Any], path: str) -> None:
+    """
+    Writes content to a JSON file, replacing the file only once it has been
+    written entirely. Used for checkpoints of interruptible computations.
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(content, f)
+    os.replace(tmp_path, path)
+
+
 @no_type_check
 def flatten_list(nested_list: List[Any]) -> Any:
     """